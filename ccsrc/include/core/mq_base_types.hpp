@@ -89,6 +89,15 @@ struct PauliMask {
     Index num_z = 0;
 };
 
+// Pauli terms that flip the same qubits mask_f. The k-th term maps |i> to
+// coeffs[k] * (-1)^popcount(i & phase_masks[k]) |i ^ mask_f>, where coeffs[k] has absorbed the phase of Y.
+template <typename T>
+struct PauliTermGroup {
+    Index mask_f = 0;
+    VT<Index> phase_masks;
+    VT<CT<T>> coeffs;
+};
+
 constexpr const char kNThreads[] = "n_threads";
 constexpr const char kNQubits[] = "n_qubits";
 constexpr const char kParamNames[] = "param_names";
@@ -144,6 +153,7 @@ constexpr const char gYY[] = "YY";
 constexpr const char gZZ[] = "ZZ";
 constexpr const char gU3[] = "U3";
 constexpr const char gFSim[] = "FSim";
+constexpr const char gFused[] = "Fused";  // gates fused into one dense matrix
 constexpr const char cPL[] = "PL";  // Pauli channel
 constexpr const char cAD[] = "AD";  // amplitude damping channel
 constexpr const char cPD[] = "PD";  // phase damping channel
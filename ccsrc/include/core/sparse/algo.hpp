@@ -16,7 +16,9 @@
 #ifndef MINDQUANTUM_SPARSE_ALGO_H_
 #define MINDQUANTUM_SPARSE_ALGO_H_
 
+#include <algorithm>
 #include <memory>
+#include <utility>
 
 #include "core/sparse/csrhdmatrix.hpp"
 #include "core/sparse/paulimat.hpp"
@@ -120,28 +122,114 @@ std::shared_ptr<CsrHdMatrix<T>> Csr_Plus_Csr(std::shared_ptr<CsrHdMatrix<T>> a,
     return c;
 }
 
+//! Matrix element <col ^ group.mask_f| group |col> of a group of pauli terms that flip the same qubits.
+template <typename T>
+CT<T> PauliTermGroupElement(const PauliTermGroup<T> &group, Index col) {
+    // The k-th term of the group maps |col> to coeffs[k] * (-1)^popcount(col & phase_masks[k]) |col ^ mask_f>
+    CT<T> value = 0;
+    for (size_t k = 0; k < group.coeffs.size(); k++) {
+        if (CountOne(col & group.phase_masks[k]) & 1) {
+            value -= group.coeffs[k];
+        } else {
+            value += group.coeffs[k];
+        }
+    }
+    return value;
+}
+
+//! Fill the CSR matrix of a sum of pauli terms grouped by the qubits they flip (see GroupPauliTerms).
+/*!
+ * All the terms of a group share the same column in a given row, so every row has exactly one entry per group. The
+ * row pointers are therefore known in advance and the rows are filled independently. The column indices of every row
+ * are sorted and entries whose terms cancel out are kept as explicit zeros.
+ *
+ * \param groups Pauli term groups, the flip masks of which must be distinct.
+ * \param dim Dimension of the matrix.
+ * \param indptr Row pointers, of size dim + 1.
+ * \param indices Column indices, of size dim * groups.size().
+ * \param data Values of the matrix, of size dim * groups.size().
+ */
+template <typename T, typename D>
+void PauliTermGroupsToCsr(const VT<PauliTermGroup<T>> &groups, Index dim, Index *indptr, Index *indices, D *data) {
+    const auto n_groups = static_cast<Index>(groups.size());
+    THRESHOLD_OMP_FOR(
+        dim, 1UL << nQubitTh, for (Index row = 0; row <= dim; row++) { indptr[row] = row * n_groups; })
+    THRESHOLD_OMP_FOR(
+        dim, 1UL << nQubitTh, for (Index row = 0; row < dim; row++) {
+            thread_local VT<std::pair<Index, CT<T>>> entries;
+            entries.resize(n_groups);
+            for (Index g = 0; g < n_groups; g++) {
+                const auto col = row ^ groups[g].mask_f;
+                entries[g] = {col, PauliTermGroupElement(groups[g], col)};
+            }
+            std::sort(entries.begin(), entries.end(),
+                      [](const auto &lhs, const auto &rhs) { return lhs.first < rhs.first; });
+            for (Index g = 0; g < n_groups; g++) {
+                indices[row * n_groups + g] = entries[g].first;
+                data[row * n_groups + g] = static_cast<D>(entries[g].second);
+            }
+        })
+}
+
+//! Upper triangular part of a hamiltonian, with half of its diagonal, as used by Hamiltonian in BACKEND mode.
+/*!
+ * The terms are grouped by the qubits they flip, so that every group contributes at most one entry to a row and all
+ * the rows are counted and then filled in parallel. The entry of a group in row i lies in the upper triangular part if
+ * and only if the highest qubit flipped by the group is not set in i.
+ */
 template <typename T>
 std::shared_ptr<CsrHdMatrix<T>> SparseHamiltonian(const VT<PauliTerm<T>> &hams, Index n_qubits) {
-    VT<std::shared_ptr<CsrHdMatrix<T>>> sp_hams(hams.size());
+    const auto groups = GroupPauliTerms(hams);
+    const auto n_groups = static_cast<Index>(groups.size());
+    const auto dim = Index{1} << n_qubits;
+
+    VT<Index> high_bits(n_groups);
+    for (Index g = 0; g < n_groups; g++) {
+        auto high_bit = groups[g].mask_f;
+        while ((high_bit & (high_bit - 1)) != 0) {
+            high_bit &= high_bit - 1;
+        }
+        high_bits[g] = high_bit;
+    }
 
+    auto *indptr = reinterpret_cast<Index *>(malloc(sizeof(Index) * (dim + 1)));
+    indptr[0] = 0;
     THRESHOLD_OMP_FOR(
-        n_qubits, nQubitTh, for (Index i = 0; i < static_cast<Index>(hams.size()); i++) {
-            auto pm = GetPauliMat(hams[i], n_qubits);
-            sp_hams[i] = PauliMatToCsrHdMatrix(pm);
-            pm->Reset();
+        dim, 1UL << nQubitTh, for (Index row = 0; row < dim; row++) {
+            Index count = 0;
+            for (Index g = 0; g < n_groups; g++) {
+                if ((row & high_bits[g]) == 0) {
+                    count++;
+                }
+            }
+            indptr[row + 1] = count;
         })
-    Index tot = static_cast<Index>(hams.size());
-    while (tot > 1) {
-        Index half = tot / 2 + tot % 2;
-        THRESHOLD_OMP(
-            MQ_DO_PRAGMA(omp parallel for schedule(static) num_threads(half)), n_qubits, nQubitTh,
-                         for (Index i = half; i < tot; i++) {
-                             sp_hams[i - half] = Csr_Plus_Csr(sp_hams[i - half], sp_hams[i]);
-                             sp_hams[i]->Reset();
-                         })
-        tot = half;
+    for (Index row = 0; row < dim; row++) {
+        indptr[row + 1] += indptr[row];
     }
-    return sp_hams[0];
+    const auto nnz = indptr[dim];
+    auto *indices = reinterpret_cast<Index *>(malloc(sizeof(Index) * nnz));
+    auto data = reinterpret_cast<CTP<T>>(malloc(sizeof(CT<T>) * nnz));
+
+    THRESHOLD_OMP_FOR(
+        dim, 1UL << nQubitTh, for (Index row = 0; row < dim; row++) {
+            thread_local VT<std::pair<Index, CT<T>>> entries;
+            entries.clear();
+            for (Index g = 0; g < n_groups; g++) {
+                if ((row & high_bits[g]) == 0) {
+                    const auto col = row ^ groups[g].mask_f;
+                    const auto value = PauliTermGroupElement(groups[g], col);
+                    entries.emplace_back(col, col == row ? value * static_cast<T>(0.5) : value);
+                }
+            }
+            std::sort(entries.begin(), entries.end(),
+                      [](const auto &lhs, const auto &rhs) { return lhs.first < rhs.first; });
+            for (size_t k = 0; k < entries.size(); k++) {
+                indices[indptr[row] + k] = entries[k].first;
+                data[indptr[row] + k] = entries[k].second;
+            }
+        })
+    return std::make_shared<CsrHdMatrix<T>>(dim, nnz, indptr, indices, data);
 }
 
 template <typename T, typename T2>
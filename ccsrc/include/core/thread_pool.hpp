@@ -0,0 +1,265 @@
+/**
+ * Copyright 2021 Huawei Technologies Co., Ltd
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ * http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#ifndef MINDQUANTUM_CORE_THREAD_POOL_HPP_
+#define MINDQUANTUM_CORE_THREAD_POOL_HPP_
+
+#include <algorithm>
+#include <atomic>
+#include <condition_variable>
+#include <cstddef>
+#include <deque>
+#include <exception>
+#include <functional>
+#include <memory>
+#include <mutex>
+#include <thread>
+#include <vector>
+
+#ifdef _OPENMP
+#    include <omp.h>
+#endif  // _OPENMP
+
+#ifndef _WIN32
+#    include <unistd.h>
+#endif  // _WIN32
+
+namespace mindquantum {
+/**
+ * A persistent pool of threads that run parallel loops of independent tasks.
+ *
+ * Tasks of a loop are claimed one at a time, so that an expensive task does not hold back a static partition. The
+ * thread that starts a loop runs tasks of it as well and only waits for the tasks claimed by others, thus a loop can
+ * be started inside a task of another loop. The OpenMP threads of the starting thread are divided among the threads
+ * that run the loop, so that the kernels called by tasks do not oversubscribe the cores.
+ *
+ * The pool is owned by the process that started its workers. A child process created by fork() does not inherit the
+ * threads of workers, the pool of the child forgets them and starts its own workers when needed.
+ */
+class ThreadPool {
+ public:
+    static ThreadPool& GetInstance() {
+        static ThreadPool instance;
+        return instance;
+    }
+
+    ThreadPool(const ThreadPool&) = delete;
+    ThreadPool& operator=(const ThreadPool&) = delete;
+
+    ~ThreadPool() {
+        CheckOwner();
+        StopWorkers();
+    }
+
+    //! Get the number of threads that can run a loop, including the thread that starts it.
+    size_t GetSize() const {
+        return size_;
+    }
+
+    //! Set the number of threads that can run a loop, including the thread that starts it, and limit the OpenMP
+    //! threads of calling thread to the same number. Workers are started lazily by the next loop. Should not be
+    //! called while a loop is running.
+    void ReSize(size_t n_threads) {
+        CheckOwner();
+        StopWorkers();
+        size_ = std::max<size_t>(n_threads, 1);
+        SetOmpThreads(static_cast<int>(size_));
+    }
+
+    //! Run task(n) for n in [0, n_task) with at most max_threads threads. The first exception thrown by a task is
+    //! rethrown after all tasks are finished or skipped.
+    template <typename task_t>
+    void ParallelFor(size_t n_task, size_t max_threads, const task_t& task) {
+        size_t n_threads = std::min({n_task, max_threads, size_});
+        if (n_threads <= 1) {
+            for (size_t n = 0; n < n_task; n++) {
+                task(n);
+            }
+            return;
+        }
+        CheckOwner();
+        auto loop = std::make_shared<Loop>();
+        loop->task = [&task](size_t n) { task(n); };
+        loop->n_task = n_task;
+        loop->helpers = n_threads - 1;
+        loop->omp_threads = std::max(1, GetOmpThreads() / static_cast<int>(n_threads));
+        {
+            std::lock_guard<std::mutex> lock(mtx_);
+            if (workers_.size() + 1 < size_) {
+                StartWorkers(size_ - 1 - workers_.size());
+            }
+            loops_.push_front(loop);
+        }
+        cv_.notify_all();
+        RunLoop(loop.get());
+        {
+            std::unique_lock<std::mutex> lock(loop->mtx);
+            loop->cv.wait(lock, [&loop]() { return loop->finished == loop->n_task; });
+        }
+        {
+            std::lock_guard<std::mutex> lock(mtx_);
+            auto it = std::find(loops_.begin(), loops_.end(), loop);
+            if (it != loops_.end()) {
+                loops_.erase(it);
+            }
+        }
+        if (loop->error) {
+            std::rethrow_exception(loop->error);
+        }
+    }
+
+ private:
+    struct Loop {
+        std::function<void(size_t)> task;
+        size_t n_task = 0;
+        size_t helpers = 0;  // guarded by the mutex of pool
+        int omp_threads = 1;
+        std::atomic<size_t> next{0};
+        std::atomic<bool> failed{false};
+        std::exception_ptr error;
+        size_t finished = 0;
+        std::mutex mtx;
+        std::condition_variable cv;
+    };
+
+    ThreadPool() : size_(std::max<size_t>(std::thread::hardware_concurrency(), 1)) {
+#ifndef _WIN32
+        owner_ = getpid();
+#endif  // _WIN32
+    }
+
+    //! Forget the workers inherited from the parent process if this process is a child created by fork(). Their
+    //! threads do not exist here, so joining them, or destroying the mutex and condition variable they were waiting
+    //! on, may block forever. The inherited handles are leaked on purpose and the synchronization objects rebuilt.
+    void CheckOwner() {
+#ifndef _WIN32
+        if (owner_ == getpid()) {
+            return;
+        }
+        owner_ = getpid();
+        new std::vector<std::thread>(std::move(workers_));         // NOLINT(cppcoreguidelines-owning-memory)
+        new std::deque<std::shared_ptr<Loop>>(std::move(loops_));  // NOLINT(cppcoreguidelines-owning-memory)
+        workers_.clear();
+        loops_.clear();
+        new (&mtx_) std::mutex();
+        new (&cv_) std::condition_variable();
+        stop_ = false;
+#endif  // _WIN32
+    }
+
+    static int GetOmpThreads() {
+#ifdef _OPENMP
+        return omp_get_max_threads();
+#else
+        return 1;
+#endif  // _OPENMP
+    }
+
+    static void SetOmpThreads(int n_threads) {
+#ifdef _OPENMP
+        omp_set_num_threads(n_threads);
+#endif  // _OPENMP
+    }
+
+    static void RunLoop(Loop* loop) {
+        int omp_threads = GetOmpThreads();
+        SetOmpThreads(loop->omp_threads);
+        size_t n_done = 0;
+        for (size_t n = loop->next++; n < loop->n_task; n = loop->next++) {
+            if (!loop->failed) {
+                try {
+                    loop->task(n);
+                } catch (...) {
+                    std::lock_guard<std::mutex> lock(loop->mtx);
+                    if (!loop->error) {
+                        loop->error = std::current_exception();
+                    }
+                    loop->failed = true;
+                }
+            }
+            n_done++;
+        }
+        SetOmpThreads(omp_threads);
+        if (n_done != 0) {
+            std::lock_guard<std::mutex> lock(loop->mtx);
+            loop->finished += n_done;
+            if (loop->finished == loop->n_task) {
+                loop->cv.notify_all();
+            }
+        }
+    }
+
+    //! Take a loop that still has unclaimed tasks and a free slot, the newest loop first so that nested loops finish
+    //! early. Must be called with the mutex of pool held.
+    std::shared_ptr<Loop> TakeLoop() {
+        for (auto it = loops_.begin(); it != loops_.end();) {
+            if ((*it)->next >= (*it)->n_task) {
+                it = loops_.erase(it);
+            } else if ((*it)->helpers != 0) {
+                (*it)->helpers--;
+                return *it;
+            } else {
+                ++it;
+            }
+        }
+        return nullptr;
+    }
+
+    void StartWorkers(size_t n_workers) {
+        for (size_t i = 0; i < n_workers; i++) {
+            workers_.emplace_back([this]() {
+                while (true) {
+                    std::shared_ptr<Loop> loop;
+                    {
+                        std::unique_lock<std::mutex> lock(mtx_);
+                        cv_.wait(lock, [this, &loop]() { return stop_ || (loop = TakeLoop()) != nullptr; });
+                        if (loop == nullptr) {
+                            return;
+                        }
+                    }
+                    RunLoop(loop.get());
+                }
+            });
+        }
+    }
+
+    void StopWorkers() {
+        {
+            std::lock_guard<std::mutex> lock(mtx_);
+            stop_ = true;
+        }
+        cv_.notify_all();
+        for (auto& worker : workers_) {
+            if (worker.joinable()) {
+                worker.join();
+            }
+        }
+        workers_.clear();
+        stop_ = false;
+    }
+
+    size_t size_;
+#ifndef _WIN32
+    pid_t owner_;
+#endif  // _WIN32
+    bool stop_ = false;
+    std::vector<std::thread> workers_;
+    std::deque<std::shared_ptr<Loop>> loops_;
+    std::mutex mtx_;
+    std::condition_variable cv_;
+};
+}  // namespace mindquantum
+#endif  // MINDQUANTUM_CORE_THREAD_POOL_HPP_
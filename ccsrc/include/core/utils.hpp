@@ -86,6 +86,25 @@ Index GetControlMask(const VT<Index> &ctrls);
 
 PauliMask GetPauliMask(const VT<PauliWord> &pws);
 
+template <typename T>
+VT<PauliTermGroup<T>> GroupPauliTerms(const VT<PauliTerm<T>> &ham) {
+    std::map<Index, PauliTermGroup<T>> groups;
+    for (auto &[pws, coeff] : ham) {
+        auto mask = GetPauliMask(pws);
+        auto mask_f = mask.mask_x | mask.mask_y;
+        auto &group = groups[mask_f];
+        group.mask_f = mask_f;
+        group.phase_masks.push_back(mask.mask_y | mask.mask_z);
+        group.coeffs.push_back(static_cast<CT<T>>(POLAR[mask.num_y & 3]) * coeff);
+    }
+    VT<PauliTermGroup<T>> out;
+    out.reserve(groups.size());
+    for (auto &it : groups) {
+        out.push_back(std::move(it.second));
+    }
+    return out;
+}
+
 #ifdef _MSC_VER
 inline uint32_t CountOne(uint32_t n) {
     return __popcnt(n);
@@ -0,0 +1,246 @@
+/**
+ * Copyright 2023 Huawei Technologies Co., Ltd
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ * http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#ifndef MINDQUANTUM_GATE_FUSION_HPP_
+#define MINDQUANTUM_GATE_FUSION_HPP_
+
+#include <algorithm>
+#include <iterator>
+#include <map>
+#include <memory>
+#include <set>
+#include <stdexcept>
+#include <string>
+#include <utility>
+
+#include "core/mq_base_types.hpp"
+#include "core/parameter_resolver.hpp"
+#include "core/two_dim_matrix.hpp"
+#include "ops/basic_gate.hpp"
+#include "ops/gates.hpp"
+
+namespace mindquantum {
+/**
+ * A gate made of several adjacent gates. The object qubits are sorted in ascending order, and the i-th object qubit
+ * is the i-th bit of the row and column index of the fused matrix.
+ */
+template <typename T>
+struct FusedGate : BasicGate<T> {
+    VT<std::shared_ptr<BasicGate<T>>> gates;
+    FusedGate(const VT<Index>& obj_qubits, const VT<std::shared_ptr<BasicGate<T>>>& gates) : gates(gates) {
+        this->name_ = gFused;
+        this->obj_qubits_ = obj_qubits;
+        std::sort(this->obj_qubits_.begin(), this->obj_qubits_.end());
+        this->parameterized_ = std::any_of(gates.begin(), gates.end(),
+                                           [](const auto& gate) { return gate->parameterized_; });
+    }
+};
+
+//! Get the target qubits and the control qubits of a gate that can be fused.
+template <typename T>
+std::pair<VT<Index>, VT<Index>> GetFusionQubits(const BasicGate<T>& gate) {
+    if (gate.name_ == gCNOT && !gate.is_custom_) {
+        VT<Index> ctrls = gate.ctrl_qubits_;
+        std::copy(gate.obj_qubits_.begin() + 1, gate.obj_qubits_.end(), std::back_inserter(ctrls));
+        return {{gate.obj_qubits_[0]}, ctrls};
+    }
+    return {gate.obj_qubits_, gate.ctrl_qubits_};
+}
+
+//! Whether a gate can be fused into a dense matrix acting on at most max_qubits qubits.
+template <typename T>
+bool IsFusable(const BasicGate<T>& gate, size_t max_qubits) {
+    static const std::set<std::string> fusable_gates = {gI,  gX,  gY,  gZ,  gH,  gS,  gT,  gCNOT, gSWAP, gISWAP,
+                                                        gRX, gRY, gRZ, gXX, gYY, gZZ, gPS, gGP,   gU3,   gFSim};
+    if (gate.is_measure_ || gate.is_channel_) {
+        return false;
+    }
+    if (!gate.is_custom_ && fusable_gates.count(gate.name_) == 0) {
+        return false;
+    }
+    return gate.obj_qubits_.size() + gate.ctrl_qubits_.size() <= max_qubits;
+}
+
+//! Get the matrix of a fusable gate on its target qubits, with sorted target qubits as the bits of index.
+template <typename T>
+Dim2Matrix<T> GetFusionMatrix(const std::shared_ptr<BasicGate<T>>& gate, const ParameterResolver<T>& pr) {
+    if (gate->name_ == gCNOT && !gate->is_custom_) {
+        return XGate<T>.base_matrix_;
+    }
+    if (!gate->parameterized_) {
+        return gate->base_matrix_;
+    }
+    if (gate->is_custom_) {
+        return gate->numba_param_matrix_(gate->params_.Combination(pr).const_value);
+    }
+    if (gate->name_ == gU3) {
+        auto u3 = static_cast<U3<T>*>(gate.get());
+        return U3Matrix<T>(u3->theta.Combination(pr).const_value, u3->phi.Combination(pr).const_value,
+                           u3->lambda.Combination(pr).const_value);
+    }
+    if (gate->name_ == gFSim) {
+        auto fsim = static_cast<FSim<T>*>(gate.get());
+        return FSimMatrix<T>(fsim->theta.Combination(pr).const_value, fsim->phi.Combination(pr).const_value);
+    }
+    return gate->param_matrix_(gate->params_.Combination(pr).const_value);
+}
+
+//! Get the matrix of a fused gate with the given parameters.
+template <typename T>
+Dim2Matrix<T> GetFusedMatrix(const FusedGate<T>& fused, const ParameterResolver<T>& pr) {
+    const auto& qubits = fused.obj_qubits_;
+    size_t dim = static_cast<size_t>(1) << qubits.size();
+    auto local_mask = [&](const VT<Index>& qs) {
+        size_t mask = 0;
+        for (auto q : qs) {
+            mask |= static_cast<size_t>(1) << (std::find(qubits.begin(), qubits.end(), q) - qubits.begin());
+        }
+        return mask;
+    };
+    VVT<CT<T>> out(dim, VT<CT<T>>(dim, 0));
+    for (size_t i = 0; i < dim; i++) {
+        out[i][i] = 1;
+    }
+    for (const auto& gate : fused.gates) {
+        auto [objs, ctrls] = GetFusionQubits(*gate);
+        std::sort(objs.begin(), objs.end());
+        auto m = GetFusionMatrix(gate, pr).matrix_;
+        VT<size_t> obj_bits;
+        for (auto q : objs) {
+            obj_bits.push_back(local_mask({q}));
+        }
+        size_t obj_mask = local_mask(objs);
+        size_t ctrl_mask = local_mask(ctrls);
+        // Expand the gate matrix to all qubits of fused gate.
+        VVT<CT<T>> g(dim, VT<CT<T>>(dim, 0));
+        for (size_t col = 0; col < dim; col++) {
+            if ((col & ctrl_mask) != ctrl_mask) {
+                g[col][col] = 1;
+                continue;
+            }
+            size_t col_t = 0;
+            for (size_t j = 0; j < obj_bits.size(); j++) {
+                col_t |= static_cast<size_t>((col & obj_bits[j]) != 0) << j;
+            }
+            for (size_t row_t = 0; row_t < m.size(); row_t++) {
+                size_t row = col & ~obj_mask;
+                for (size_t j = 0; j < obj_bits.size(); j++) {
+                    row |= ((row_t >> j) & 1) ? obj_bits[j] : 0;
+                }
+                g[row][col] = m[row_t][col_t];
+            }
+        }
+        VVT<CT<T>> tmp(dim, VT<CT<T>>(dim, 0));
+        for (size_t i = 0; i < dim; i++) {
+            for (size_t k = 0; k < dim; k++) {
+                if (g[i][k] == CT<T>(0)) {
+                    continue;
+                }
+                for (size_t j = 0; j < dim; j++) {
+                    tmp[i][j] += g[i][k] * out[k][j];
+                }
+            }
+        }
+        out.swap(tmp);
+    }
+    return Dim2Matrix<T>(out);
+}
+
+/**
+ * Fuse adjacent gates of a circuit into dense matrix gates, so that a state vector is swept fewer times.
+ *
+ * Gates acting on disjoint qubits commute, so every group of qubits keeps its own open block. A gate joins the
+ * blocks it touches if all of them together act on no more than max_qubits qubits, otherwise these blocks are
+ * emitted and the gate starts a new block. Measurements, noise channels and gates that can not be fused emit the
+ * blocks they touch and are kept as they are. The matrices of fused gates are built when they are applied, so the
+ * fused circuit works with any parameters.
+ */
+template <typename T>
+VT<std::shared_ptr<BasicGate<T>>> FuseCircuit(const VT<std::shared_ptr<BasicGate<T>>>& circ, size_t max_qubits) {
+    using gate_ptr_t = std::shared_ptr<BasicGate<T>>;
+    VT<gate_ptr_t> out;
+    VT<std::pair<VT<Index>, VT<gate_ptr_t>>> blocks;
+    std::map<Index, size_t> owner;  // qubit -> index of the open block acting on it.
+    auto emit = [&](size_t idx) {
+        auto& [qubits, gates] = blocks[idx];
+        for (auto q : qubits) {
+            owner.erase(q);
+        }
+        if (gates.size() == 1) {
+            out.push_back(gates[0]);
+        } else {
+            out.push_back(std::make_shared<FusedGate<T>>(qubits, gates));
+        }
+        qubits.clear();
+        gates.clear();
+    };
+    for (const auto& gate : circ) {
+        auto [objs, ctrls] = GetFusionQubits(*gate);
+        std::set<Index> qubits(objs.begin(), objs.end());
+        qubits.insert(ctrls.begin(), ctrls.end());
+        std::set<size_t> touched;
+        for (auto q : qubits) {
+            if (auto it = owner.find(q); it != owner.end()) {
+                touched.insert(it->second);
+            }
+        }
+        std::set<Index> all_qubits = qubits;
+        for (auto idx : touched) {
+            all_qubits.insert(blocks[idx].first.begin(), blocks[idx].first.end());
+        }
+        if (IsFusable(*gate, max_qubits) && all_qubits.size() <= max_qubits) {
+            size_t target = blocks.size();
+            if (touched.empty()) {
+                blocks.emplace_back();
+            } else {
+                target = *touched.begin();
+                for (auto idx : touched) {
+                    if (idx != target) {
+                        auto& gates = blocks[idx].second;
+                        std::copy(gates.begin(), gates.end(), std::back_inserter(blocks[target].second));
+                        blocks[idx].first.clear();
+                        gates.clear();
+                    }
+                }
+            }
+            blocks[target].first.assign(all_qubits.begin(), all_qubits.end());
+            blocks[target].second.push_back(gate);
+            for (auto q : all_qubits) {
+                owner[q] = target;
+            }
+            continue;
+        }
+        for (auto idx : touched) {
+            emit(idx);
+        }
+        if (IsFusable(*gate, max_qubits)) {
+            blocks.emplace_back(VT<Index>(qubits.begin(), qubits.end()), VT<gate_ptr_t>{gate});
+            for (auto q : qubits) {
+                owner[q] = blocks.size() - 1;
+            }
+        } else {
+            out.push_back(gate);
+        }
+    }
+    for (size_t idx = 0; idx < blocks.size(); idx++) {
+        if (!blocks[idx].second.empty()) {
+            emit(idx);
+        }
+    }
+    return out;
+}
+}  // namespace mindquantum
+#endif  // MINDQUANTUM_GATE_FUSION_HPP_
@@ -0,0 +1,199 @@
+//   Copyright 2022 <Huawei Technologies Co., Ltd>
+//
+//   Licensed under the Apache License, Version 2.0 (the "License");
+//   you may not use this file except in compliance with the License.
+//   You may obtain a copy of the License at
+//
+//       http://www.apache.org/licenses/LICENSE-2.0
+//
+//   Unless required by applicable law or agreed to in writing, software
+//   distributed under the License is distributed on an "AS IS" BASIS,
+//   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+//   See the License for the specific language governing permissions and
+//   limitations under the License.
+
+#ifndef DETAILS_PAULI_STRING_HPP
+#define DETAILS_PAULI_STRING_HPP
+
+#include <complex>
+#include <cstdint>
+#include <type_traits>
+#include <unordered_map>
+#include <utility>
+#include <vector>
+
+#include <boost/container_hash/hash.hpp>
+
+#include "core/utils.hpp"
+#include "ops/gates/details/qubit_operator_term_policy.hpp"
+#include "ops/gates/term_value.hpp"
+
+namespace mindquantum::ops::details {
+//! Whether a term policy describes Pauli strings, ie. terms of a QubitOperator
+template <typename term_policy_t>
+inline constexpr auto is_pauli_term_policy_v = std::is_base_of_v<QubitOperatorTermPolicyBase, term_policy_t>;
+
+//! Packed (symplectic) representation of a Pauli string.
+/*!
+ * Every qubit is encoded by one bit in x and one bit in z: X = (1, 0), Y = (1, 1), Z = (0, 1) and I = (0, 0). The
+ * product of two Pauli strings is then a XOR of the bits together with a power of i obtained by counting bits, and two
+ * Pauli strings anticommute if and only if the symplectic product of their bits is odd.
+ */
+struct PauliString {
+    using word_t = uint64_t;
+    static constexpr uint32_t word_size = 64;
+
+    std::vector<word_t> x;
+    std::vector<word_t> z;
+
+    PauliString() = default;
+    explicit PauliString(std::size_t n_words) : x(n_words, 0), z(n_words, 0) {
+    }
+
+    //! Number of words needed to pack a Pauli string acting on qubits with index less than n_qubits
+    static std::size_t n_words(uint32_t n_qubits) {
+        return n_qubits / word_size + 1;
+    }
+
+    //! Pack a list of local operators, that is not necessarily simplified.
+    /*!
+     * \param terms A list of local operators, multiplied from left to right.
+     * \param n_words Number of words of the packed Pauli string.
+     * \return The packed Pauli string and the power of i such that terms = i^power * string.
+     */
+    static std::pair<PauliString, uint8_t> from_terms(const terms_t& terms, std::size_t n_words) {
+        PauliString result(n_words);
+        uint8_t power = 0;
+        for (const auto& [qubit_id, value] : terms) {
+            PauliString local(n_words);
+            const auto word = qubit_id / word_size;
+            const auto bit = word_t{1} << (qubit_id % word_size);
+            if (value == TermValue::X || value == TermValue::Y) {
+                local.x[word] = bit;
+            }
+            if (value == TermValue::Z || value == TermValue::Y) {
+                local.z[word] = bit;
+            }
+            power = (power + mul(result, local, &result)) & 3U;
+        }
+        return {std::move(result), power};
+    }
+
+    //! Convert back to a list of local operators, sorted by qubit index and without identities.
+    terms_t to_terms() const {
+        terms_t terms;
+        for (std::size_t word = 0; word < x.size(); ++word) {
+            auto mask = x[word] | z[word];
+            while (mask != 0) {
+                const auto bit = mask & (~mask + 1);
+                const auto qubit_id = static_cast<uint32_t>(word * word_size + CountOne(static_cast<int64_t>(bit - 1)));
+                if ((x[word] & bit) == 0) {
+                    terms.emplace_back(qubit_id, TermValue::Z);
+                } else if ((z[word] & bit) == 0) {
+                    terms.emplace_back(qubit_id, TermValue::X);
+                } else {
+                    terms.emplace_back(qubit_id, TermValue::Y);
+                }
+                mask ^= bit;
+            }
+        }
+        return terms;
+    }
+
+    //! Compute lhs * rhs into out (which may alias lhs or rhs) and return the power of i of the product.
+    static uint8_t mul(const PauliString& lhs, const PauliString& rhs, PauliString* out) {
+        uint64_t n_pos = 0;
+        uint64_t n_neg = 0;
+        for (std::size_t word = 0; word < lhs.x.size(); ++word) {
+            const auto x1 = lhs.x[word];
+            const auto z1 = lhs.z[word];
+            const auto x2 = rhs.x[word];
+            const auto z2 = rhs.z[word];
+            // XY = iZ, YZ = iX, ZX = iY and the reversed products give -i
+            const auto pos = (x1 & ~z1 & x2 & z2) | (x1 & z1 & ~x2 & z2) | (~x1 & z1 & x2 & ~z2);
+            const auto neg = (x1 & z1 & x2 & ~z2) | (~x1 & z1 & x2 & z2) | (x1 & ~z1 & ~x2 & z2);
+            n_pos += CountOne(static_cast<int64_t>(pos));
+            n_neg += CountOne(static_cast<int64_t>(neg));
+            out->x[word] = x1 ^ x2;
+            out->z[word] = z1 ^ z2;
+        }
+        return static_cast<uint8_t>((n_pos + 3 * n_neg) & 3U);
+    }
+
+    //! Check whether two Pauli strings commute.
+    static bool commutes(const PauliString& lhs, const PauliString& rhs) {
+        uint64_t parity = 0;
+        for (std::size_t word = 0; word < lhs.x.size(); ++word) {
+            parity ^= (lhs.x[word] & rhs.z[word]) ^ (lhs.z[word] & rhs.x[word]);
+        }
+        return (CountOne(static_cast<int64_t>(parity)) & 1U) == 0;
+    }
+
+    //! Value of i^power
+    static std::complex<double> i_pow(uint8_t power) {
+        constexpr std::complex<double> values[] = {{1., 0.}, {0., 1.}, {-1., 0.}, {0., -1.}};
+        return values[power & 3U];
+    }
+
+    bool operator==(const PauliString& other) const {
+        return x == other.x && z == other.z;
+    }
+
+    struct hash {
+        std::size_t operator()(const PauliString& string) const {
+            auto seed = boost::hash_range(begin(string.x), end(string.x));
+            boost::hash_combine(seed, boost::hash_range(begin(string.z), end(string.z)));
+            return seed;
+        }
+    };
+};
+
+// -----------------------------------------------------------------------------
+
+//! Sum of packed Pauli strings, that keeps the insertion order of the strings.
+template <typename coefficient_t>
+class PauliStringSum {
+ public:
+    using value_t = std::pair<PauliString, coefficient_t>;
+
+    //! Pack all the terms of a terms dictionary, the power of i of every term is absorbed into its coefficient.
+    template <typename terms_dict_t, typename conv_func_t>
+    static std::vector<value_t> pack(const terms_dict_t& terms, std::size_t n_words, const conv_func_t& conv_func) {
+        std::vector<value_t> packed;
+        packed.reserve(std::size(terms));
+        for (const auto& [local_ops, coeff] : terms) {
+            auto [string, power] = PauliString::from_terms(local_ops, n_words);
+            auto new_coeff = conv_func(coeff);
+            if (power != 0) {
+                new_coeff *= static_cast<coefficient_t>(PauliString::i_pow(power));
+            }
+            packed.emplace_back(std::move(string), std::move(new_coeff));
+        }
+        return packed;
+    }
+
+    //! Add coeff * i^power * string to the sum.
+    template <typename coeff_policy_t>
+    void add(const PauliString& string, coefficient_t coeff, uint8_t power) {
+        if (power != 0) {
+            coeff *= static_cast<coefficient_t>(PauliString::i_pow(power));
+        }
+        if (auto it = index_.find(string); it != index_.end()) {
+            coeff_policy_t::iadd(values_[it->second].second, coeff);
+        } else {
+            index_.emplace(string, values_.size());
+            values_.emplace_back(string, std::move(coeff));
+        }
+    }
+
+    const std::vector<value_t>& values() const {
+        return values_;
+    }
+
+ private:
+    std::unordered_map<PauliString, std::size_t, PauliString::hash> index_;
+    std::vector<value_t> values_;
+};
+}  // namespace mindquantum::ops::details
+
+#endif /* DETAILS_PAULI_STRING_HPP */
@@ -110,6 +110,13 @@ class QubitOperator
     //! Return the sparse matrix representing a QubitOperator
     MQ_NODISCARD std::optional<sparse_matrix_t> sparse_matrix(std::optional<uint32_t> n_qubits = std::nullopt) const;
 
+    //! Return the commutator [*this, other] = *this * other - other * *this
+    /*!
+     * For complex coefficients, only the pairs of terms that anticommute are multiplied, in the packed form of the
+     * Pauli strings (\sa details::PauliString), since all other pairs cancel out.
+     */
+    MQ_NODISCARD self_t commutator(const self_t& other) const;
+
  private:
 #ifdef UNIT_TESTS
     friend class ::UnitTestAccessor;
@@ -17,6 +17,7 @@
 
 #include <cstdint>
 #include <numeric>
+#include <algorithm>
 #include <optional>
 #include <utility>
 #include <vector>
@@ -30,6 +31,7 @@
 #include "config/type_traits.hpp"
 
 #include "ops/gates/details/eigen_sparse_identity.hpp"
+#include "ops/gates/details/pauli_string.hpp"
 #include "ops/gates/qubit_operator.hpp"
 
 // =============================================================================
@@ -211,6 +213,49 @@ auto QubitOperator<coeff_t>::sparse_matrix(std::optional<uint32_t> n_qubits) con
     return result;
 }
 
+// =============================================================================
+
+template <typename coeff_t>
+auto QubitOperator<coeff_t>::commutator(const self_t& other) const -> self_t {
+    if constexpr (!traits::is_complex_v<coefficient_t>) {
+        auto result = *this;
+        result *= other;
+        auto reversed = other;
+        reversed *= *this;
+        result -= reversed;
+        return result;
+    } else {
+        const auto n_words = details::PauliString::n_words(std::max(base_t::count_qubits(), other.count_qubits()));
+        const auto identity_conv = [](const coefficient_t& coeff) { return coeff; };
+        const auto left_terms = details::PauliStringSum<coefficient_t>::pack(base_t::terms_, n_words, identity_conv);
+        const auto right_terms = details::PauliStringSum<coefficient_t>::pack(other.get_terms(), n_words,
+                                                                              identity_conv);
+
+        // P_i P_j - P_j P_i is 2 P_i P_j if the two strings anticommute and 0 otherwise
+        details::PauliStringSum<coefficient_t> products;
+        details::PauliString new_string(n_words);
+        for (const auto& [left_string, left_coeff] : left_terms) {
+            for (const auto& [right_string, right_coeff] : right_terms) {
+                if (details::PauliString::commutes(left_string, right_string)) {
+                    continue;
+                }
+                const auto power = details::PauliString::mul(left_string, right_string, &new_string);
+                auto new_coeff = coeff_policy_t::mul(left_coeff, right_coeff);
+                new_coeff *= static_cast<coefficient_t>(2.);
+                products.template add<coeff_policy_t>(new_string, std::move(new_coeff), power);
+            }
+        }
+
+        coeff_term_dict_t terms;
+        for (const auto& [string, coeff] : products.values()) {
+            if (!coeff_policy_t::is_zero(coeff)) {
+                terms.emplace_back(string.to_terms(), coeff);
+            }
+        }
+        return self_t{std::move(terms)};
+    }
+}
+
 }  // namespace mindquantum::ops
 
 #endif /* QUBIT_OPERATOR_TPP */
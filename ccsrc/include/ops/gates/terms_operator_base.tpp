@@ -41,6 +41,7 @@
 #include "config/logging.hpp"
 #include "config/real_cast.hpp"
 
+#include "ops/gates/details/pauli_string.hpp"
 #include "ops/gates/terms_operator_base.hpp"
 #include "ops/gates/traits.hpp"
 // #include "ops/meta/dagger.hpp"
@@ -798,6 +799,30 @@ auto TermsOperatorBase<derived_t_, coefficient_t_, term_policy_t_>::mul_impl_(co
     using conv_helper_t = traits::conversion_helper<coefficient_t>;
     using value_t = typename coeff_term_dict_t::value_type;
 
+    if constexpr (details::is_pauli_term_policy_v<term_policy_t> && traits::is_complex_v<coefficient_t>) {
+        // Pauli strings are multiplied in their packed form, so that no term needs to be sorted or simplified
+        const auto n_words = details::PauliString::n_words(std::max(count_qubits(), other.count_qubits()));
+        const auto identity_conv = [](const coefficient_t& coeff) { return coeff; };
+        const auto left_terms = details::PauliStringSum<coefficient_t>::pack(terms_, n_words, identity_conv);
+        const auto right_terms = details::PauliStringSum<coefficient_t>::pack(
+            other.get_terms(), n_words, [](const auto& coeff) { return conv_helper_t::apply(coeff); });
+
+        details::PauliStringSum<coefficient_t> products;
+        details::PauliString new_string(n_words);
+        for (const auto& [left_string, left_coeff] : left_terms) {
+            for (const auto& [right_string, right_coeff] : right_terms) {
+                const auto power = details::PauliString::mul(left_string, right_string, &new_string);
+                products.template add<coeff_policy_t>(new_string, coeff_policy_t::mul(left_coeff, right_coeff), power);
+            }
+        }
+        coeff_term_dict_t product_results;
+        for (const auto& [string, coeff] : products.values()) {
+            product_results.emplace_back(string.to_terms(), coeff);
+        }
+        terms_ = std::move(product_results);
+        return *static_cast<derived_t*>(this);
+    }
+
     coeff_term_dict_t product_results;
     for (const auto& [left_op, left_coeff] : terms_) {
         for (const auto& [right_op, right_coeff] : other.get_terms()) {
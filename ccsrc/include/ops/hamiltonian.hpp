@@ -17,6 +17,7 @@
 #ifndef MINDQUANTUM_HAMILTONIAN_HAMILTONIAN_H_
 #define MINDQUANTUM_HAMILTONIAN_HAMILTONIAN_H_
 #include <memory>
+#include <stdexcept>
 
 #include "core/sparse/algo.hpp"
 #include "core/utils.hpp"
@@ -31,12 +32,14 @@ struct Hamiltonian {
     int64_t how_to_ = 0;
     Index n_qubits_ = 0;
     VT<PauliTerm<T>> ham_;
+    VT<PauliTermGroup<T>> ham_groups_;
     std::shared_ptr<CsrHdMatrix<T>> ham_sparse_main_;
     std::shared_ptr<CsrHdMatrix<T>> ham_sparse_second_;
 
     Hamiltonian() = default;
 
-    explicit Hamiltonian(const VT<PauliTerm<T>> &ham) : how_to_(ORIGIN), ham_(ham) {
+    explicit Hamiltonian(const VT<PauliTerm<T>> &ham)
+        : how_to_(ORIGIN), ham_(ham), ham_groups_(GroupPauliTerms(ham)) {
     }
 
     Hamiltonian(const VT<PauliTerm<T>> &ham, Index n_qubits) : how_to_(BACKEND), n_qubits_(n_qubits), ham_(ham) {
@@ -50,9 +53,45 @@ struct Hamiltonian {
         }
     }
 
+    //! BACKEND hamiltonian whose sparse matrix, as returned by SparseHamiltonian, has already been computed.
+    Hamiltonian(const VT<PauliTerm<T>> &ham, Index n_qubits, std::shared_ptr<CsrHdMatrix<T>> ham_sparse_main)
+        : how_to_(BACKEND)
+        , n_qubits_(n_qubits)
+        , ham_(ham)
+        , ham_sparse_main_(ham_sparse_main)
+        , ham_sparse_second_(TransposeCsrHdMatrix(ham_sparse_main)) {
+    }
+
     Hamiltonian(std::shared_ptr<CsrHdMatrix<T>> csr_mat, Index n_qubits)
         : n_qubits_(n_qubits), how_to_(FRONTEND), ham_sparse_main_(csr_mat) {
     }
+
+    //! Set the pauli terms, and group them by the qubits they flip.
+    void SetTerms(const VT<PauliTerm<T>> &ham) {
+        ham_ = ham;
+        ham_groups_ = GroupPauliTerms(ham_);
+    }
 };
+
+//! Sum of hamiltonians weighted by given real coefficients, only hamiltonians given by pauli terms are supported.
+template <typename T>
+Hamiltonian<T> WeightedHamiltonian(const VT<std::shared_ptr<Hamiltonian<T>>> &hams, const VT<T> &weights) {
+    if (hams.size() != weights.size()) {
+        throw std::invalid_argument("Number of weights does not match number of hamiltonians.");
+    }
+    VT<PauliTerm<T>> terms;
+    for (size_t i = 0; i < hams.size(); i++) {
+        if (hams[i]->how_to_ != ORIGIN) {
+            throw std::invalid_argument("Weighted sum only supports hamiltonian given by pauli terms.");
+        }
+        if (weights[i] == 0) {
+            continue;
+        }
+        for (const auto &[word, coeff] : hams[i]->ham_) {
+            terms.emplace_back(word, coeff * weights[i]);
+        }
+    }
+    return Hamiltonian<T>(terms);
+}
 }  // namespace mindquantum
 #endif  // MINDQUANTUM_HAMILTONIAN_HAMILTONIAN_H_
@@ -0,0 +1,171 @@
+//   Copyright 2022 <Huawei Technologies Co., Ltd>
+//
+//   Licensed under the Apache License, Version 2.0 (the "License");
+//   you may not use this file except in compliance with the License.
+//   You may obtain a copy of the License at
+//
+//       http://www.apache.org/licenses/LICENSE-2.0
+//
+//   Unless required by applicable law or agreed to in writing, software
+//   distributed under the License is distributed on an "AS IS" BASIS,
+//   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+//   See the License for the specific language governing permissions and
+//   limitations under the License.
+
+#ifndef INCLUDE_DENSITYMATRIX_DENSITYMATRIXSTATE_HPP
+#define INCLUDE_DENSITYMATRIX_DENSITYMATRIXSTATE_HPP
+
+#include <map>
+#include <memory>
+#include <random>
+#include <string>
+#include <vector>
+
+#include "core/mq_base_types.hpp"
+#include "core/parameter_resolver.hpp"
+#include "ops/basic_gate.hpp"
+#include "ops/hamiltonian.hpp"
+#include "simulator/types.hpp"
+#include "simulator/vector/vector_state.hpp"
+
+namespace mindquantum::sim::densitymatrix::detail {
+//! Density matrix simulator. The density matrix is kept as a column major state vector of 2n qubits, see
+//! CPUDensityMatrixPolicyBase, so that gates are applied by the kernels of vector simulator. Noise channels are
+//! applied exactly with their Kraus operators instead of being sampled, thus every run is deterministic except for
+//! measurement.
+template <typename qs_policy_t_>
+class DensityMatrixState {
+ public:
+    using qs_policy_t = qs_policy_t_;
+    using vector_policy_t = typename qs_policy_t::vector_policy_t;
+    using vector_state_t = vector::detail::VectorState<vector_policy_t>;
+    using derived_t = DensityMatrixState<qs_policy_t>;
+    using circuit_t = std::vector<std::shared_ptr<BasicGate<calc_type>>>;
+    using qs_data_t = typename qs_policy_t::qs_data_t;
+    using qs_data_p_t = typename qs_policy_t::qs_data_p_t;
+    using py_qs_data_t = typename qs_policy_t::py_qs_data_t;
+    using py_qs_datas_t = typename qs_policy_t::py_qs_datas_t;
+    using matrix_t = std::vector<std::vector<py_qs_data_t>>;
+    using RndEngine = std::mt19937;
+
+    //! ctor
+    DensityMatrixState() = default;
+    explicit DensityMatrixState(qbit_t n_qubits, unsigned seed = 42);
+
+    //! Reset the density matrix to quantum zero state
+    void Reset();
+
+    //! Get the density matrix in column major order
+    py_qs_datas_t GetQS() const;
+
+    //! Set the density matrix from a contiguous column major buffer with given size
+    void SetQS(const py_qs_data_t* qs_out, index_t size);
+
+    //! Get the dimension of density matrix
+    index_t GetDim() const {
+        return dim;
+    }
+
+    //! Apply a quantum gate, a measurement gate or a noise channel on this density matrix
+    index_t ApplyGate(const std::shared_ptr<BasicGate<calc_type>>& gate,
+                      const ParameterResolver<calc_type>& pr = ParameterResolver<calc_type>(), bool diff = false);
+
+    //! Apply a measurement gate on this density matrix, return the collapsed qubit state
+    index_t ApplyMeasure(const std::shared_ptr<BasicGate<calc_type>>& gate);
+
+    //! Apply a noise channel exactly as sum_k E_k rho E_k^\dagger
+    void ApplyChannel(const std::shared_ptr<BasicGate<calc_type>>& gate);
+
+    //! Apply a quantum circuit on this density matrix
+    std::map<std::string, int> ApplyCircuit(const circuit_t& circ,
+                                            const ParameterResolver<calc_type>& pr = ParameterResolver<calc_type>());
+
+    //! Replace the density matrix rho by H rho H^\dagger
+    void ApplyHamiltonian(const Hamiltonian<calc_type>& ham);
+
+    //! Get Tr(H rho) of given hamiltonian
+    py_qs_data_t GetExpectation(const Hamiltonian<calc_type>& ham) const;
+
+    //! Get the expectation of multiple hamiltonians without gradient, the circuit is applied on this density matrix
+    //! with every row of parameters.
+    VT<py_qs_datas_t> GetExpectationBatch(const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams,
+                                          const circuit_t& circ, const VVT<calc_type>& data, const VS& name,
+                                          size_t batch_threads);
+
+    //! Get the expectation of hamiltonians and the gradient w.r.t. parameters in grad_name. The adjoint of
+    //! hamiltonian is evolved backward through the hermitian conjugate of gates and the adjoint of noise channels,
+    //! and the density matrix before every noise channel is kept during the forward pass to restore it.
+    VT<VT<py_qs_datas_t>> GetExpectationWithGradMultiMulti(
+        const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams, const circuit_t& circ,
+        const circuit_t& herm_circ, const VVT<calc_type>& enc_data, const VT<calc_type>& ans_data, const VS& enc_name,
+        const VS& ans_name, const VS& grad_name, size_t batch_threads, size_t mea_threads);
+
+    //! Sample the measurement gates in circuit. The circuit is simulated only once, and the density matrix will be
+    //! forked only when meeting a measurement gate. At most kMaxSamplingParents parent density matrices are kept
+    //! alive, so the memory does not grow with the number of measurement gates.
+    VT<unsigned> Sampling(const circuit_t& circ, const ParameterResolver<calc_type>& pr, size_t shots,
+                          const MST<size_t>& key_map, unsigned seed);
+
+    //! Sample a circuit whose measurement gates are all at the end, noise channels are allowed. All shots are drawn
+    //! from the marginal distribution of measured qubits.
+    VT<unsigned> SamplingMeasurementEnding(const circuit_t& circ, const ParameterResolver<calc_type>& pr,
+                                           size_t shots, const MST<size_t>& key_map, unsigned seed);
+
+ private:
+    //! Get the Kraus operators of a noise channel.
+    static VT<matrix_t> KrausOperators(const std::shared_ptr<BasicGate<calc_type>>& gate);
+
+    //! Replace rho by sum_k E_k rho E_k^\dagger, or by sum_k E_k^\dagger rho E_k if adjoint is true.
+    static void ApplyKraus(vector_state_t* rho, const VT<matrix_t>& kraus, qbit_t obj, qbit_t n_qubits, bool adjoint);
+
+    //! Replace rho by U rho U^\dagger, where rho is hermitian.
+    static void ApplyUnitary(vector_state_t* rho, const std::shared_ptr<BasicGate<calc_type>>& gate,
+                             const ParameterResolver<calc_type>& pr, index_t dim);
+
+    //! Get the vectorized matrix of hamiltonian.
+    vector_state_t HamiltonianMatrix(const Hamiltonian<calc_type>& ham) const;
+
+    //! Project the given qubit of rho into given value, and renormalize it with the probability of this value.
+    void Collapse(qbit_t obj, bool one, calc_type prob);
+
+    //! Adjoint sweep from this density matrix, which has been evolved by the circuit. snapshots are the density
+    //! matrices before every noise channel of the circuit.
+    VT<py_qs_datas_t> AdjointGradOneMulti(const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams,
+                                          const VT<vector_state_t>& snapshots, const circuit_t& herm_circ,
+                                          const ParameterResolver<calc_type>& pr, const MST<size_t>& p_map,
+                                          size_t n_thread) const;
+
+    //! Outcome of the measurement gate with index idx of the circuit.
+    struct SamplingStep {
+        size_t idx;
+        bool one;
+        calc_type prob;
+    };
+
+    //! Maximum number of parent density matrices saved along a sampling path.
+    static constexpr size_t kMaxSamplingParents = 2;
+
+    //! Sample circuit from gate with index start, with given shots distributed on this branch. origin is the density
+    //! matrix before the first gate, path records the outcomes so far and parents the saved density matrices.
+    void SamplingBranch(const circuit_t& circ, const ParameterResolver<calc_type>& pr, size_t start, size_t shots,
+                        const MST<size_t>& key_map, VT<unsigned> outcome, VT<unsigned>* res, size_t* n_done,
+                        RndEngine* rnd_eng, const vector_state_t& origin, VT<SamplingStep>* path,
+                        VT<std::pair<size_t, vector_state_t>>* parents);
+
+    //! Restore this density matrix to the one before gate idx on the sampling path, by copying the nearest saved
+    //! density matrix and replaying the outcomes after it.
+    void RestoreSamplingParent(const circuit_t& circ, const ParameterResolver<calc_type>& pr, size_t idx,
+                               const vector_state_t& origin, const VT<SamplingStep>& path,
+                               const VT<std::pair<size_t, vector_state_t>>& parents);
+
+    vector_state_t rho_;
+    qbit_t n_qubits = 0;
+    index_t dim = 0;
+    unsigned seed = 0;
+    RndEngine rnd_eng_;
+};
+}  // namespace mindquantum::sim::densitymatrix::detail
+
+#include "simulator/densitymatrix/density_matrix_state.tpp"  // NOLINT
+
+#endif
@@ -0,0 +1,456 @@
+//   Copyright 2022 <Huawei Technologies Co., Ltd>
+//
+//   Licensed under the Apache License, Version 2.0 (the "License");
+//   you may not use this file except in compliance with the License.
+//   You may obtain a copy of the License at
+//
+//       http://www.apache.org/licenses/LICENSE-2.0
+//
+//   Unless required by applicable law or agreed to in writing, software
+//   distributed under the License is distributed on an "AS IS" BASIS,
+//   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+//   See the License for the specific language governing permissions and
+//   limitations under the License.
+
+#ifndef INCLUDE_DENSITYMATRIX_DENSITYMATRIXSTATE_TPP
+#define INCLUDE_DENSITYMATRIX_DENSITYMATRIXSTATE_TPP
+
+#include <cmath>
+
+#include <algorithm>
+#include <complex>
+#include <map>
+#include <memory>
+#include <numeric>
+#include <random>
+#include <stdexcept>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "core/mq_base_types.hpp"
+#include "core/parameter_resolver.hpp"
+#include "core/thread_pool.hpp"
+#include "ops/basic_gate.hpp"
+#include "ops/hamiltonian.hpp"
+#include "simulator/densitymatrix/density_matrix_state.hpp"
+#include "simulator/types.hpp"
+
+namespace mindquantum::sim::densitymatrix::detail {
+
+template <typename qs_policy_t_>
+DensityMatrixState<qs_policy_t_>::DensityMatrixState(qbit_t n_qubits, unsigned seed)
+    : rho_(2 * n_qubits, seed), n_qubits(n_qubits), dim(1UL << n_qubits), seed(seed), rnd_eng_(seed) {
+}
+
+template <typename qs_policy_t_>
+void DensityMatrixState<qs_policy_t_>::Reset() {
+    rho_.Reset();
+}
+
+template <typename qs_policy_t_>
+auto DensityMatrixState<qs_policy_t_>::GetQS() const -> py_qs_datas_t {
+    return rho_.GetQS();
+}
+
+template <typename qs_policy_t_>
+void DensityMatrixState<qs_policy_t_>::SetQS(const py_qs_data_t* qs_out, index_t size) {
+    if (size != dim * dim) {
+        throw std::invalid_argument("density matrix size not match");
+    }
+    rho_.SetQS(qs_out, size);
+}
+
+template <typename qs_policy_t_>
+index_t DensityMatrixState<qs_policy_t_>::ApplyGate(const std::shared_ptr<BasicGate<calc_type>>& gate,
+                                                    const ParameterResolver<calc_type>& pr, bool diff) {
+    if (gate->is_measure_) {
+        return ApplyMeasure(gate);
+    }
+    if (gate->is_channel_) {
+        ApplyChannel(gate);
+        return 2;
+    }
+    if (diff) {
+        throw std::invalid_argument("Can not apply differential format of gate on density matrix.");
+    }
+    ApplyUnitary(&rho_, gate, pr, dim);
+    return 2;  // qubit should be 1 or 0, 2 means nothing.
+}
+
+template <typename qs_policy_t_>
+index_t DensityMatrixState<qs_policy_t_>::ApplyMeasure(const std::shared_ptr<BasicGate<calc_type>>& gate) {
+    auto obj = gate->obj_qubits_[0];
+    index_t one_mask = (1UL << obj);
+    auto one_prob = qs_policy_t::DiagonalCollect(rho_.QSData(), one_mask, one_mask, dim);
+    bool one = std::uniform_real_distribution<calc_type>(0, 1)(rnd_eng_) < one_prob;
+    Collapse(obj, one, one ? one_prob : 1 - one_prob);
+    return static_cast<index_t>(one);
+}
+
+template <typename qs_policy_t_>
+void DensityMatrixState<qs_policy_t_>::Collapse(qbit_t obj, bool one, calc_type prob) {
+    // Both the row and the column of remaining elements should have the given value on obj.
+    index_t mask = (1UL << obj) | (1UL << (obj + n_qubits));
+    vector_policy_t::ConditionalMul(rho_.QSData(), rho_.QSData(), mask, one ? mask : 0, 1 / prob, 0, dim * dim);
+}
+
+template <typename qs_policy_t_>
+void DensityMatrixState<qs_policy_t_>::ApplyChannel(const std::shared_ptr<BasicGate<calc_type>>& gate) {
+    if (!gate->ctrl_qubits_.empty()) {
+        throw std::invalid_argument("Noise channel with control qubits is not supported by density matrix simulator.");
+    }
+    ApplyKraus(&rho_, KrausOperators(gate), gate->obj_qubits_[0], n_qubits, false);
+}
+
+template <typename qs_policy_t_>
+auto DensityMatrixState<qs_policy_t_>::KrausOperators(const std::shared_ptr<BasicGate<calc_type>>& gate)
+    -> VT<matrix_t> {
+    if (gate->name_ == "PL") {
+        // probs_ are the probabilities of X, Y, Z and I.
+        auto px = std::sqrt(gate->probs_[0]);
+        auto py = std::sqrt(gate->probs_[1]);
+        auto pz = std::sqrt(gate->probs_[2]);
+        auto pi = std::sqrt(std::max<calc_type>(gate->probs_[3], 0));
+        VT<matrix_t> out;
+        for (auto& [p, m] : VT<std::pair<calc_type, matrix_t>>{
+                 {px, {{0, px}, {px, 0}}},
+                 {py, {{0, py_qs_data_t(0, -py)}, {py_qs_data_t(0, py), 0}}},
+                 {pz, {{pz, 0}, {0, -pz}}},
+                 {pi, {{pi, 0}, {0, pi}}},
+             }) {
+            if (p != 0) {
+                out.push_back(m);
+            }
+        }
+        return out;
+    }
+    if (gate->kraus_operator_set_.size() != 0) {
+        return gate->kraus_operator_set_;
+    }
+    if (gate->name_ == "ADC" || gate->name_ == "PDC") {
+        auto gamma = gate->damping_coeff_;
+        matrix_t k0 = {{1, 0}, {0, std::sqrt(1 - gamma)}};
+        if (gate->name_ == "ADC") {
+            return {k0, {{0, std::sqrt(gamma)}, {0, 0}}};
+        }
+        return {k0, {{0, 0}, {0, std::sqrt(gamma)}}};
+    }
+    throw std::runtime_error("This noise channel not implemented.");
+}
+
+template <typename qs_policy_t_>
+void DensityMatrixState<qs_policy_t_>::ApplyKraus(vector_state_t* rho, const VT<matrix_t>& kraus, qbit_t obj,
+                                                  qbit_t n_qubits, bool adjoint) {
+    // E rho E^\dagger applies E on the row qubit and conj(E) on the column qubit, and E^\dagger rho E applies
+    // E^\dagger on the row qubit and E^T on the column qubit.
+    auto size = rho->GetDim();
+    auto out = vector_policy_t::InitState(size, false);
+    auto tmp = vector_policy_t::InitState(size, false);
+    for (const auto& k : kraus) {
+        matrix_t row(2, py_qs_datas_t(2));
+        matrix_t col(2, py_qs_datas_t(2));
+        for (size_t a = 0; a < 2; a++) {
+            for (size_t b = 0; b < 2; b++) {
+                row[a][b] = adjoint ? std::conj(k[b][a]) : k[a][b];
+                col[a][b] = adjoint ? k[b][a] : std::conj(k[a][b]);
+            }
+        }
+        vector_policy_t::ApplySingleQubitMatrix(rho->QSData(), tmp, obj, {}, row, size);
+        vector_policy_t::ApplySingleQubitMatrix(tmp, tmp, obj + n_qubits, {}, col, size);
+        qs_policy_t::AddMulValue(tmp, out, 1, size);
+    }
+    vector_policy_t::FreeState(tmp);
+    *rho = vector_state_t(out, 2 * n_qubits);
+}
+
+template <typename qs_policy_t_>
+void DensityMatrixState<qs_policy_t_>::ApplyUnitary(vector_state_t* rho,
+                                                    const std::shared_ptr<BasicGate<calc_type>>& gate,
+                                                    const ParameterResolver<calc_type>& pr, index_t dim) {
+    // U rho U^\dagger = U (U rho)^\dagger for hermitian rho, and U acts on the row qubits only.
+    rho->ApplyGate(gate, pr);
+    qs_policy_t::ConjTranspose(rho->QSData(), dim);
+    rho->ApplyGate(gate, pr);
+}
+
+template <typename qs_policy_t_>
+auto DensityMatrixState<qs_policy_t_>::ApplyCircuit(const circuit_t& circ, const ParameterResolver<calc_type>& pr)
+    -> std::map<std::string, int> {
+    std::map<std::string, int> result;
+    for (auto& g : circ) {
+        if (g->is_measure_) {
+            result[g->name_] = ApplyMeasure(g);
+        } else {
+            ApplyGate(g, pr, false);
+        }
+    }
+    return result;
+}
+
+template <typename qs_policy_t_>
+void DensityMatrixState<qs_policy_t_>::ApplyHamiltonian(const Hamiltonian<calc_type>& ham) {
+    auto apply_rows = [&ham, this](qs_data_p_t qs) {
+        if (ham.how_to_ == ORIGIN) {
+            return vector_policy_t::ApplyTerms(qs, ham.ham_groups_, dim * dim);
+        }
+        if (ham.how_to_ == BACKEND) {
+            return qs_policy_t::CsrDotMatrix(ham.ham_sparse_main_, ham.ham_sparse_second_, qs, dim);
+        }
+        return qs_policy_t::CsrDotMatrix(ham.ham_sparse_main_, qs, dim);
+    };
+    rho_ = vector_state_t(apply_rows(rho_.QSData()), 2 * n_qubits, seed);
+    qs_policy_t::ConjTranspose(rho_.QSData(), dim);
+    rho_ = vector_state_t(apply_rows(rho_.QSData()), 2 * n_qubits, seed);
+}
+
+template <typename qs_policy_t_>
+auto DensityMatrixState<qs_policy_t_>::GetExpectation(const Hamiltonian<calc_type>& ham) const -> py_qs_data_t {
+    if (ham.how_to_ == ORIGIN) {
+        return qs_policy_t::ExpectationOfTerms(rho_.QSData(), ham.ham_groups_, dim);
+    }
+    if (ham.how_to_ == BACKEND) {
+        return qs_policy_t::ExpectationOfCsr(ham.ham_sparse_main_, ham.ham_sparse_second_, rho_.QSData(), dim);
+    }
+    return qs_policy_t::ExpectationOfCsr(ham.ham_sparse_main_, rho_.QSData(), dim);
+}
+
+template <typename qs_policy_t_>
+auto DensityMatrixState<qs_policy_t_>::HamiltonianMatrix(const Hamiltonian<calc_type>& ham) const -> vector_state_t {
+    auto out = vector_policy_t::InitState(dim * dim, false);
+    if (ham.how_to_ == ORIGIN) {
+        qs_policy_t::AddTerms(out, ham.ham_groups_, dim);
+    } else {
+        qs_policy_t::AddCsr(out, ham.ham_sparse_main_, dim);
+        if (ham.how_to_ == BACKEND) {
+            qs_policy_t::AddCsr(out, ham.ham_sparse_second_, dim);
+        }
+    }
+    return vector_state_t(out, 2 * n_qubits);
+}
+
+template <typename qs_policy_t_>
+auto DensityMatrixState<qs_policy_t_>::GetExpectationBatch(
+    const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams, const circuit_t& circ,
+    const VVT<calc_type>& data, const VS& name, size_t batch_threads) -> VT<py_qs_datas_t> {
+    VT<py_qs_datas_t> output(data.size(), py_qs_datas_t(hams.size(), 0));
+    ThreadPool::GetInstance().ParallelFor(data.size(), batch_threads, [&](size_t n) {
+        ParameterResolver<calc_type> pr = ParameterResolver<calc_type>();
+        pr.SetItems(name, data[n]);
+        auto sim = *this;
+        sim.ApplyCircuit(circ, pr);
+        for (size_t j = 0; j < hams.size(); j++) {
+            output[n][j] = sim.GetExpectation(*hams[j]);
+        }
+    });
+    return output;
+}
+
+template <typename qs_policy_t_>
+auto DensityMatrixState<qs_policy_t_>::GetExpectationWithGradMultiMulti(
+    const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams, const circuit_t& circ, const circuit_t& herm_circ,
+    const VVT<calc_type>& enc_data, const VT<calc_type>& ans_data, const VS& enc_name, const VS& ans_name,
+    const VS& grad_name, size_t batch_threads, size_t mea_threads) -> VT<VT<py_qs_datas_t>> {
+    MST<size_t> p_map;
+    for (size_t i = 0; i < grad_name.size(); i++) {
+        p_map[grad_name[i]] = i;
+    }
+    VT<VT<py_qs_datas_t>> output(enc_data.size());
+    ThreadPool::GetInstance().ParallelFor(enc_data.size(), batch_threads, [&](size_t n) {
+        ParameterResolver<calc_type> pr = ParameterResolver<calc_type>();
+        pr.SetItems(enc_name, enc_data[n]);
+        pr.SetItems(ans_name, ans_data);
+        auto sim = *this;
+        VT<vector_state_t> snapshots;
+        for (const auto& g : circ) {
+            if (g->is_channel_) {
+                snapshots.push_back(sim.rho_);
+            }
+            sim.ApplyGate(g, pr);
+        }
+        output[n] = sim.AdjointGradOneMulti(hams, snapshots, herm_circ, pr, p_map, mea_threads);
+    });
+    return output;
+}
+
+template <typename qs_policy_t_>
+auto DensityMatrixState<qs_policy_t_>::AdjointGradOneMulti(
+    const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams, const VT<vector_state_t>& snapshots,
+    const circuit_t& herm_circ, const ParameterResolver<calc_type>& pr, const MST<size_t>& p_map,
+    size_t n_thread) const -> VT<py_qs_datas_t> {
+    // With lambda = H evolved backward to gate U, the gradient of U is 2 Re Tr(lambda dU rho U^\dagger), which is
+    // 2 Re <rho| dU^\dagger |lambda U> for the vectorized matrices, where rho is the density matrix before U.
+    auto n_hams = hams.size();
+    VT<py_qs_datas_t> f_and_g(n_hams, py_qs_datas_t((1 + p_map.size()), 0));
+    auto n_gates = vector_state_t::GradGatesEnd(herm_circ, p_map);
+    ThreadPool::GetInstance().ParallelFor(n_hams, n_thread, [&](size_t j) {
+        f_and_g[j][0] = GetExpectation(*hams[j]);
+        auto rho = rho_;
+        auto lambda = HamiltonianMatrix(*hams[j]);
+        auto n_snapshots = snapshots.size();
+        for (size_t k = 0; k < n_gates; k++) {
+            const auto& g = herm_circ[k];
+            if (g->is_channel_) {
+                rho = snapshots[--n_snapshots];
+                ApplyKraus(&lambda, KrausOperators(g), g->obj_qubits_[0], n_qubits, true);
+                continue;
+            }
+            ApplyUnitary(&rho, g, pr, dim);
+            lambda.ApplyGate(g, pr);
+            qs_policy_t::ConjTranspose(lambda.QSData(), dim);
+            if (vector_state_t::GateRequiresGrad(g, p_map)) {
+                vector_state_t::AddGateGrad(g, pr, p_map, rho.QSData(), lambda.QSData(), dim * dim,
+                                            f_and_g[j].data());
+            }
+            lambda.ApplyGate(g, pr);
+        }
+        for (size_t k = 1; k < f_and_g[j].size(); k++) {
+            f_and_g[j][k] = 2 * std::real(f_and_g[j][k]);
+        }
+    });
+    return f_and_g;
+}
+
+template <typename qs_policy_t_>
+VT<unsigned> DensityMatrixState<qs_policy_t_>::Sampling(const circuit_t& circ, const ParameterResolver<calc_type>& pr,
+                                                        size_t shots, const MST<size_t>& key_map, unsigned seed) {
+    auto key_size = key_map.size();
+    VT<unsigned> res(shots * key_size);
+    RndEngine rnd_eng = RndEngine(seed);
+    auto sim = *this;
+    size_t n_done = 0;
+    VT<SamplingStep> path;
+    VT<std::pair<size_t, vector_state_t>> parents;
+    sim.SamplingBranch(circ, pr, 0, shots, key_map, VT<unsigned>(key_size, 0), &res, &n_done, &rnd_eng, rho_, &path,
+                       &parents);
+
+    // Shots are generated branch by branch, shuffle them so that the order of shots is still random.
+    VT<size_t> order(shots);
+    std::iota(order.begin(), order.end(), 0);
+    std::shuffle(order.begin(), order.end(), rnd_eng);
+    VT<unsigned> out(shots * key_size);
+    for (size_t i = 0; i < shots; i++) {
+        std::copy(res.begin() + order[i] * key_size, res.begin() + (order[i] + 1) * key_size,
+                  out.begin() + i * key_size);
+    }
+    return out;
+}
+
+template <typename qs_policy_t_>
+VT<unsigned> DensityMatrixState<qs_policy_t_>::SamplingMeasurementEnding(const circuit_t& circ,
+                                                                         const ParameterResolver<calc_type>& pr,
+                                                                         size_t shots, const MST<size_t>& key_map,
+                                                                         unsigned seed) {
+    auto sim = *this;
+    qbits_t objs;
+    // Column of every measurement key in result and position of its qubit in objs.
+    VT<std::pair<size_t, size_t>> key_pos;
+    for (const auto& g : circ) {
+        if (!g->is_measure_) {
+            sim.ApplyGate(g, pr, false);
+            continue;
+        }
+        auto obj = g->obj_qubits_[0];
+        auto pos = static_cast<size_t>(std::find(objs.begin(), objs.end(), obj) - objs.begin());
+        if (pos == objs.size()) {
+            objs.push_back(obj);
+        }
+        key_pos.emplace_back(key_map.at(g->name_), pos);
+    }
+    auto cum_probs = qs_policy_t::GetMarginalProbs(sim.rho_.QSData(), objs, dim);
+    std::partial_sum(cum_probs.begin(), cum_probs.end(), cum_probs.begin());
+    RndEngine rnd_eng = RndEngine(seed);
+    std::uniform_real_distribution<calc_type> dist(0, cum_probs.back());
+    auto key_size = key_map.size();
+    VT<unsigned> res(shots * key_size, 0);
+    for (size_t i = 0; i < shots; i++) {
+        auto outcome = static_cast<size_t>(std::upper_bound(cum_probs.begin(), cum_probs.end(), dist(rnd_eng))
+                                           - cum_probs.begin());
+        outcome = std::min(outcome, cum_probs.size() - 1);
+        for (const auto& [col, pos] : key_pos) {
+            res[i * key_size + col] = (outcome >> pos) & 1;
+        }
+    }
+    return res;
+}
+
+template <typename qs_policy_t_>
+void DensityMatrixState<qs_policy_t_>::SamplingBranch(const circuit_t& circ, const ParameterResolver<calc_type>& pr,
+                                                      size_t start, size_t shots, const MST<size_t>& key_map,
+                                                      VT<unsigned> outcome, VT<unsigned>* res, size_t* n_done,
+                                                      RndEngine* rnd_eng, const vector_state_t& origin,
+                                                      VT<SamplingStep>* path,
+                                                      VT<std::pair<size_t, vector_state_t>>* parents) {
+    auto path_size = path->size();
+    for (size_t idx = start; idx < circ.size(); idx++) {
+        const auto& g = circ[idx];
+        if (!g->is_measure_) {
+            ApplyGate(g, pr, false);
+            continue;
+        }
+        auto obj = g->obj_qubits_[0];
+        auto one_prob = qs_policy_t::DiagonalCollect(rho_.QSData(), 1UL << obj, 1UL << obj, dim);
+        one_prob = std::clamp<calc_type>(one_prob, 0, 1);
+        auto n_one = std::binomial_distribution<size_t>(shots, one_prob)(*rnd_eng);
+        // If both branches are populated, the branch of one is sampled first on this density matrix, and the parent
+        // is restored afterwards, either from a saved copy or by replaying the path from the nearest saved one.
+        bool both = n_one != 0 && n_one != shots;
+        bool save_parent = both && parents->size() < kMaxSamplingParents;
+        if (save_parent) {
+            parents->emplace_back(idx, rho_);
+        }
+        if (both) {
+            auto branch_outcome = outcome;
+            Collapse(obj, true, one_prob);
+            if (key_map.count(g->name_) != 0) {
+                branch_outcome[key_map.at(g->name_)] = 1;
+            }
+            path->push_back({idx, true, one_prob});
+            SamplingBranch(circ, pr, idx + 1, n_one, key_map, branch_outcome, res, n_done, rnd_eng, origin, path,
+                           parents);
+            path->pop_back();
+            RestoreSamplingParent(circ, pr, idx, origin, *path, *parents);
+        }
+        if (save_parent) {
+            parents->pop_back();
+        }
+        bool one = n_one == shots;
+        auto prob = one ? one_prob : 1 - one_prob;
+        Collapse(obj, one, prob);
+        if (key_map.count(g->name_) != 0) {
+            outcome[key_map.at(g->name_)] = one;
+        }
+        path->push_back({idx, one, prob});
+        shots = one ? n_one : shots - n_one;
+    }
+    path->erase(path->begin() + path_size, path->end());
+    auto key_size = outcome.size();
+    for (size_t i = 0; i < shots; i++) {
+        std::copy(outcome.begin(), outcome.end(), res->begin() + (*n_done + i) * key_size);
+    }
+    *n_done += shots;
+}
+
+template <typename qs_policy_t_>
+void DensityMatrixState<qs_policy_t_>::RestoreSamplingParent(const circuit_t& circ,
+                                                             const ParameterResolver<calc_type>& pr, size_t idx,
+                                                             const vector_state_t& origin,
+                                                             const VT<SamplingStep>& path,
+                                                             const VT<std::pair<size_t, vector_state_t>>& parents) {
+    size_t base_idx = parents.empty() ? 0 : parents.back().first;
+    const auto& base = parents.empty() ? origin : parents.back().second;
+    vector_policy_t::QSMulValue(base.QSData(), rho_.QSData(), 1, dim * dim);
+    auto step = std::find_if(path.begin(), path.end(), [&](const SamplingStep& s) { return s.idx >= base_idx; });
+    for (size_t j = base_idx; j < idx; j++) {
+        const auto& g = circ[j];
+        if (!g->is_measure_) {
+            ApplyGate(g, pr, false);
+            continue;
+        }
+        Collapse(g->obj_qubits_[0], step->one, step->prob);
+        ++step;
+    }
+}
+}  // namespace mindquantum::sim::densitymatrix::detail
+
+#endif
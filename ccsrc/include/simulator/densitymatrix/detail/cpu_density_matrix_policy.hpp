@@ -0,0 +1,68 @@
+//   Copyright 2022 <Huawei Technologies Co., Ltd>
+//
+//   Licensed under the Apache License, Version 2.0 (the "License");
+//   you may not use this file except in compliance with the License.
+//   You may obtain a copy of the License at
+//
+//       http://www.apache.org/licenses/LICENSE-2.0
+//
+//   Unless required by applicable law or agreed to in writing, software
+//   distributed under the License is distributed on an "AS IS" BASIS,
+//   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+//   See the License for the specific language governing permissions and
+//   limitations under the License.
+
+#ifndef INCLUDE_DENSITYMATRIX_DETAIL_CPU_DENSITY_MATRIX_POLICY_HPP
+#define INCLUDE_DENSITYMATRIX_DETAIL_CPU_DENSITY_MATRIX_POLICY_HPP
+
+#include <complex>
+#include <memory>
+#include <vector>
+
+#include "core/mq_base_types.hpp"
+#include "core/sparse/csrhdmatrix.hpp"
+#include "simulator/types.hpp"
+#include "simulator/vector/detail/cpu_vector_policy.hpp"
+
+namespace mindquantum::sim::densitymatrix::detail {
+// A density matrix rho of n qubits is stored in column major order as a state vector of 2n qubits, where rho[r][c]
+// is at index c * dim + r. So the low n qubits are the row index and the high n qubits are the column index, and
+// the kernels of vector policy act on rows of density matrix. Here dim is the dimension of density matrix.
+struct CPUDensityMatrixPolicyBase {
+    using vector_policy_t = vector::detail::CPUVectorPolicyBase;
+    using qs_data_t = vector_policy_t::qs_data_t;
+    using qs_data_p_t = vector_policy_t::qs_data_p_t;
+    using py_qs_data_t = vector_policy_t::py_qs_data_t;
+    using py_qs_datas_t = vector_policy_t::py_qs_datas_t;
+    static constexpr index_t DimTh = vector_policy_t::DimTh;
+
+    //! Replace rho by its hermitian conjugate in place.
+    static void ConjTranspose(qs_data_p_t qs, index_t dim);
+    //! des += value * src for vectorized matrices with size elements.
+    static void AddMulValue(qs_data_p_t src, qs_data_p_t des, qs_data_t value, index_t size);
+    //! Sum of rho[i][i] over i with (i & mask) == condi.
+    static calc_type DiagonalCollect(qs_data_p_t qs, index_t mask, index_t condi, index_t dim);
+    //! Get the probability of every outcome of objs, where the k-th bit of an outcome is the value of objs[k].
+    static VT<calc_type> GetMarginalProbs(qs_data_p_t qs, const qbits_t& objs, index_t dim);
+    //! Tr(H rho) of hamiltonian given by pauli term groups.
+    static py_qs_data_t ExpectationOfTerms(qs_data_p_t qs, const VT<PauliTermGroup<calc_type>>& groups, index_t dim);
+    //! Tr(H rho) of sparse hamiltonian a, or a + b.
+    static py_qs_data_t ExpectationOfCsr(const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& a, qs_data_p_t qs,
+                                         index_t dim);
+    static py_qs_data_t ExpectationOfCsr(const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& a,
+                                         const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& b, qs_data_p_t qs,
+                                         index_t dim);
+    //! Add hamiltonian given by pauli term groups onto the vectorized matrix qs.
+    static void AddTerms(qs_data_p_t qs, const VT<PauliTermGroup<calc_type>>& groups, index_t dim);
+    //! Add sparse hamiltonian onto the vectorized matrix qs.
+    static void AddCsr(qs_data_p_t qs, const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& a, index_t dim);
+    //! Get H rho of sparse hamiltonian a, or a + b, as a new buffer.
+    static qs_data_p_t CsrDotMatrix(const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& a, qs_data_p_t qs,
+                                    index_t dim);
+    static qs_data_p_t CsrDotMatrix(const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& a,
+                                    const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& b, qs_data_p_t qs,
+                                    index_t dim);
+};
+}  // namespace mindquantum::sim::densitymatrix::detail
+
+#endif
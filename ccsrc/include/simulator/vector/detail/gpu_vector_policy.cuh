@@ -18,6 +18,7 @@
 #include <cstddef>
 #include <iostream>
 #include <memory>
+#include <string>
 #include <vector>
 
 #include "core/mq_base_types.hpp"
@@ -36,6 +37,9 @@ struct GPUVectorPolicyBase {
     static qs_data_p_t InitState(index_t dim, bool zero_state = true);
     static void Reset(qs_data_p_t qs, index_t dim);
     static void FreeState(qs_data_p_t qs);
+    static qs_data_p_t InitMappedState(index_t dim, const std::string& path, bool restore = false);
+    static void FreeMappedState(qs_data_p_t qs, index_t dim);
+    static void SyncMappedState(qs_data_p_t qs, index_t dim);
     static void Display(qs_data_p_t qs, qbit_t n_qubits, qbit_t q_limit = 10);
     static void SetToZeroExcept(qs_data_p_t qs, index_t ctrl_mask, index_t dim);
     template <index_t mask, index_t condi, class binary_op>
@@ -54,14 +58,21 @@ struct GPUVectorPolicyBase {
                                qs_data_t fail_coeff, index_t dim);
     static void QSMulValue(qs_data_p_t src, qs_data_p_t des, qs_data_t value, index_t dim);
     static qs_data_t ConditionalCollect(qs_data_p_t qs, index_t mask, index_t condi, bool abs, index_t dim);
+    static VT<calc_type> GetMarginalProbs(qs_data_p_t qs, const qbits_t& objs, index_t dim);
     static py_qs_datas_t GetQS(qs_data_p_t qs, index_t dim);
     static void SetQS(qs_data_p_t qs, const py_qs_datas_t& qs_out, index_t dim);
-    static qs_data_p_t ApplyTerms(qs_data_p_t qs, const std::vector<PauliTerm<calc_type>>& ham, index_t dim);
+    static void SetQS(qs_data_p_t qs, const py_qs_data_t* qs_out, index_t dim);
+    static qs_data_p_t ApplyTerms(qs_data_p_t qs, const VT<PauliTermGroup<calc_type>>& groups, index_t dim);
+    static py_qs_data_t ExpectationOfTerms(qs_data_p_t qs, const VT<PauliTermGroup<calc_type>>& groups, index_t dim);
     static qs_data_p_t Copy(qs_data_p_t qs, index_t dim);
     template <index_t mask, index_t condi>
     static py_qs_data_t ConditionVdot(qs_data_p_t bra, qs_data_p_t ket, index_t dim);
     static py_qs_data_t OneStateVdot(qs_data_p_t bra, qs_data_p_t ket, qbit_t obj_qubit, index_t dim);
     static py_qs_data_t ZeroStateVdot(qs_data_p_t bra, qs_data_p_t ket, qbit_t obj_qubit, index_t dim);
+    //! Get the reduced density matrix rho[a][b] = sum_i psi[i|a] conj(psi[i|b]) of obj_qubit, where only the basis
+    //! states with all ctrls set are counted.
+    static VVT<py_qs_data_t> GetReducedDensityMatrix(qs_data_p_t qs, qbit_t obj_qubit, const qbits_t& ctrls,
+                                                     index_t dim);
     static py_qs_data_t Vdot(qs_data_p_t bra, qs_data_p_t ket, index_t dim);
     static qs_data_p_t CsrDotVec(const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& a, qs_data_p_t vec,
                                  index_t dim);
@@ -152,8 +163,6 @@ struct conj_a_dot_b
         return thrust::conj(a) * b;
     }
 };
-__global__ void ApplyTerm(GPUVectorPolicyBase::qs_data_p_t des, GPUVectorPolicyBase::qs_data_p_t src, calc_type coeff,
-                          index_t num_y, index_t mask_y, index_t mask_z, index_t mask_f, index_t dim);
 }  // namespace mindquantum::sim::vector::detail
 
 #endif
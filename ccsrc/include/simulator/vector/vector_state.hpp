@@ -26,8 +26,11 @@
 #include <mutex>
 #include <random>
 #include <stdexcept>
+#include <string>
 #include <thread>
+#include <tuple>
 #include <type_traits>
+#include <utility>
 #include <vector>
 
 #include "core/mq_base_types.hpp"
@@ -62,6 +65,8 @@ class VectorState {
     explicit VectorState(qbit_t n_qubits, unsigned seed = 42);
     VectorState(qbit_t n_qubits, unsigned seed, qs_data_p_t vec);
     VectorState(qs_data_p_t qs, qbit_t n_qubits, unsigned seed = 42);
+    //! Keep the quantum state in a memory mapped file, restore the state from this file if restore is true.
+    VectorState(qbit_t n_qubits, unsigned seed, const std::string& path, bool restore = false);
 
     VectorState(const VectorState<qs_policy_t>& sim);
     derived_t& operator=(const VectorState<qs_policy_t>& sim);
@@ -70,7 +75,7 @@ class VectorState {
 
     //! dtor
     ~VectorState() {
-        qs_policy_t::FreeState(qs);
+        ReleaseQS();
     }
 
     //! Reset the quantum state to quantum zero state
@@ -85,6 +90,33 @@ class VectorState {
     //! Set the quantum state value
     void SetQS(const py_qs_datas_t& qs_out);
 
+    //! Set the quantum state value from a contiguous buffer with given size
+    void SetQS(const py_qs_data_t* qs_out, index_t size);
+
+    //! Get the raw pointer of quantum state, which is invalid once the state is reallocated
+    qs_data_p_t QSData() const {
+        return qs;
+    }
+
+    //! Count a view that is created on the raw pointer of quantum state. The buffer is not reallocated while any view
+    //! is counted.
+    void AcquireView() {
+        n_views_++;
+    }
+
+    //! Stop counting a view created by AcquireView.
+    void ReleaseView() {
+        n_views_--;
+    }
+
+    //! Get the dimension of quantum state
+    index_t GetDim() const {
+        return dim;
+    }
+
+    //! Flush the memory mapped quantum state to its file, do nothing if the state is in memory
+    void Sync();
+
     //! Apply a quantum gate on this quantum state, quantum gate can be normal quantum gate, measurement gate and noise
     //! channel
     index_t ApplyGate(const std::shared_ptr<BasicGate<calc_type>>& gate,
@@ -124,11 +156,14 @@ class VectorState {
     //! Apply a hamiltonian on this quantum state
     void ApplyHamiltonian(const Hamiltonian<calc_type>& ham);
 
-    //! Get the matrix of quantum circuit.
-    VT<py_qs_datas_t> GetCircuitMatrix(const circuit_t& circ, const ParameterResolver<calc_type>& pr);
+    //! Get the matrix of quantum circuit in column major order.
+    py_qs_datas_t GetCircuitMatrix(const circuit_t& circ, const ParameterResolver<calc_type>& pr);
 
     //! Get expectation of given hamiltonian
     py_qs_data_t GetExpectation(const Hamiltonian<calc_type>& ham) {
+        if (ham.how_to_ == ORIGIN) {
+            return qs_policy_t::ExpectationOfTerms(this->qs, ham.ham_groups_, dim);
+        }
         auto ket = *this;
         ket.ApplyHamiltonian(ham);
         return qs_policy_t::Vdot(this->qs, ket.qs, dim);
@@ -147,11 +182,59 @@ class VectorState {
                                                      const ParameterResolver<calc_type>& pr, const MST<size_t>& p_map,
                                                      int n_thread);
     //! Get the expectation of hamiltonian
-    //! Here multiple hamiltonian and multiple parameters are needed
+    //! Here multiple hamiltonian and multiple parameters are needed. Gradient is only calculated for parameters in
+    //! grad_name and is ordered as grad_name. If states is given, the circuit of every row of parameters is applied
+    //! on the corresponding row of states instead of this quantum state, and so for the other batch methods below.
     VT<VT<py_qs_datas_t>> GetExpectationWithGradMultiMulti(
         const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams, const circuit_t& circ,
         const circuit_t& herm_circ, const VVT<calc_type>& enc_data, const VT<calc_type>& ans_data, const VS& enc_name,
-        const VS& ans_name, size_t batch_threads, size_t mea_threads);
+        const VS& ans_name, const VS& grad_name, size_t batch_threads, size_t mea_threads,
+        const py_qs_data_t* states = nullptr);
+
+    //! Get the vector-Jacobian product of expectations of multiple hamiltonians, where every row of dout is the
+    //! cotangent of expectations for the corresponding row of encoder data. Instead of the full Jacobian, a single
+    //! adjoint sweep against the weighted hamiltonian sum_m dout_m H_m is done for every row.
+    VVT<calc_type> GetExpectationVJPMultiMulti(const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams,
+                                               const circuit_t& circ, const circuit_t& herm_circ,
+                                               const VVT<calc_type>& dout, const VVT<calc_type>& enc_data,
+                                               const VT<calc_type>& ans_data, const VS& enc_name, const VS& ans_name,
+                                               const VS& grad_name, size_t batch_threads,
+                                               const py_qs_data_t* states = nullptr);
+
+    //! Get the expectation of multiple hamiltonians without gradient, the circuit is applied on this quantum state
+    //! with every row of parameters.
+    VT<py_qs_datas_t> GetExpectationBatch(const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams,
+                                          const circuit_t& circ, const VVT<calc_type>& data, const VS& name,
+                                          size_t batch_threads, const py_qs_data_t* states = nullptr);
+
+    //! Get the expectation of multiple hamiltonians on n_traj noise trajectories of circuit, which starts from this
+    //! quantum state. The gates before the first noise channel or measurement are applied only once, and all
+    //! trajectories fork from the quantum state after them. Every trajectory has its own random engine seeded by seed
+    //! and its index, so the result does not depend on n_threads.
+    VT<py_qs_datas_t> GetExpectationTrajectories(const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams,
+                                                 const circuit_t& circ, const ParameterResolver<calc_type>& pr,
+                                                 size_t n_traj, unsigned seed, size_t n_threads);
+
+    //! Get A_{ij} = <\partial_i psi|\partial_j psi> and B_i = <\partial_i psi|psi> of |psi> = circ|this>, where i and
+    //! j run over the parameterized gates of circ, and the derivative is taken w.r.t. the value of gate. A_{ij} is only
+    //! calculated if blocks[i] == blocks[j], and is zero otherwise. Every gate i takes one forward sweep from it to the
+    //! last gate of its block, and the sweeps run on at most n_threads threads.
+    std::pair<VT<py_qs_datas_t>, py_qs_datas_t> GetQFIParts(const circuit_t& circ,
+                                                            const ParameterResolver<calc_type>& pr,
+                                                            const VT<size_t>& blocks, size_t n_threads);
+
+    //! Get the expectation with gradient of hamiltonians as GetExpectationWithGradOneMulti, together with the QFI parts
+    //! of circ as GetQFIParts, where circ only has ansatz parameters. The derivative state of every parameterized gate
+    //! rides on the forward sweep of the expectation until the last gate of its block, instead of a forward sweep of
+    //! its own. At most kMaxQFIStates derivative states are alive, the gates left over take another shared sweep.
+    std::tuple<VT<py_qs_datas_t>, VT<py_qs_datas_t>, py_qs_datas_t> GetExpectationWithGradAndQFIParts(
+        const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams, const circuit_t& circ,
+        const circuit_t& herm_circ, const VT<calc_type>& ans_data, const VS& ans_name, const VS& grad_name,
+        const VT<size_t>& blocks, size_t n_threads);
+
+    //! Get the quantum states after applying circuit on this quantum state with every row of parameters.
+    VT<py_qs_datas_t> GetQSBatch(const circuit_t& circ, const VVT<calc_type>& data, const VS& name,
+                                 size_t batch_threads);
 
     VT<py_qs_datas_t> GetExpectationNonHermitianWithGradOneMulti(
         const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams,
@@ -170,13 +253,110 @@ class VectorState {
         const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& herm_hams, const circuit_t& left_circ,
         const circuit_t& herm_left_circ, const circuit_t& right_circ, const circuit_t& herm_right_circ,
         const VVT<calc_type>& enc_data, const VT<calc_type>& ans_data, const VS& enc_name, const VS& ans_name,
-        const derived_t& simulator_left, size_t batch_threads, size_t mea_threads);
+        const VS& grad_name, const derived_t& simulator_left, size_t batch_threads, size_t mea_threads);
 
+    //! Sample the measurement gates in circuit. The circuit is simulated only once, and the quantum state will be
+    //! forked only when meeting a measurement gate or a noise channel, so the cost depends on the number of distinct
+    //! branches instead of the number of shots. At most kMaxSamplingParents parent states are kept alive, so the
+    //! memory does not grow with the number of measurement gates and noise channels.
     VT<unsigned> Sampling(const circuit_t& circ, const ParameterResolver<calc_type>& pr, size_t shots,
                           const MST<size_t>& key_map, unsigned seed);
 
+    //! Sample a noiseless circuit whose measurement gates are all at the end, with at most one measurement gate on
+    //! every qubit. The marginal distribution of measured qubits is computed once, and all shots are drawn from it
+    //! directly.
+    VT<unsigned> SamplingMeasurementEndingWithoutNoise(const circuit_t& circ, const ParameterResolver<calc_type>& pr,
+                                                       size_t shots, const MST<size_t>& key_map, unsigned seed);
+
+    //! Whether gate has parameters that require gradient and are in p_map.
+    static bool GateRequiresGrad(const std::shared_ptr<BasicGate<calc_type>>& g, const MST<size_t>& p_map);
+
+    //! Add <bra| \partial_\theta{g} |ket> onto grad[1 + p_map[\theta]] for every parameter \theta of g in p_map.
+    static void AddGateGrad(const std::shared_ptr<BasicGate<calc_type>>& g, const ParameterResolver<calc_type>& pr,
+                            const MST<size_t>& p_map, qs_data_p_t bra, qs_data_p_t ket, index_t dim,
+                            py_qs_data_t* grad);
+
+    //! Get the number of leading gates in herm_circ that the adjoint sweep needs, i.e. up to the last gate with
+    //! parameters that require gradient and are in p_map.
+    static size_t GradGatesEnd(const circuit_t& herm_circ, const MST<size_t>& p_map);
+
  private:
+    //! Free the quantum state according to how it is allocated.
+    void ReleaseQS();
+
+    //! Whether gate only acts inside one block of a memory mapped state, see ApplyBlocked.
+    bool IsBlockLocal(const std::shared_ptr<BasicGate<calc_type>>& gate) const;
+
+    //! Apply gates [begin, end) of circ block by block, where every block of 2^kMappedBlockQubits amplitudes takes all
+    //! the gates before the next block is read, instead of one pass over the whole state per gate. All the gates
+    //! should be block local.
+    void ApplyBlocked(const circuit_t& circ, size_t begin, size_t end, const ParameterResolver<calc_type>& pr);
+
+    //! Qubit number of a block of memory mapped state, so that a block stays in cache while its gates are applied.
+    static constexpr qbit_t kMappedBlockQubits = 16;
+
+    //! Take new_qs as the quantum state. A memory mapped state, or a state with views counted by AcquireView, keeps
+    //! its buffer and copies new_qs into it, so that the views stay valid. Otherwise the buffers are swapped.
+    void ReplaceQS(qs_data_p_t new_qs);
+
+    //! Get the expectation of hamiltonians and the gradient by an adjoint sweep, where sim is the quantum state that
+    //! has been evolved by the circuit, and herm_circ is the hermitian conjugate of the circuit.
+    VT<py_qs_datas_t> AdjointGradOneMulti(const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams,
+                                          const derived_t& sim, const circuit_t& herm_circ,
+                                          const ParameterResolver<calc_type>& pr, const MST<size_t>& p_map,
+                                          int n_thread);
+
+    //! Get the indices of parameterized gates of circ, and the end of the forward sweep of every parameterized gate
+    //! for the QFI parts, which is one past the last parameterized gate in the same block.
+    static std::pair<VT<size_t>, VT<size_t>> QFISweepEnds(const circuit_t& circ, const VT<size_t>& blocks);
+
+    //! Maximum number of derivative states that ride on one forward sweep for the QFI parts.
+    static constexpr size_t kMaxQFIStates = 15;
+
+    //! Get a copy of this simulator, with the quantum state replaced by the row n of states if states is given.
+    derived_t BatchInitState(const py_qs_data_t* states, size_t n) const;
+
+    //! Branch taken at the measurement gate or noise channel with index idx of the circuit.
+    struct SamplingStep {
+        size_t idx;
+        size_t branch;
+        calc_type prob;
+    };
+
+    //! Maximum number of parent states saved along a sampling path.
+    static constexpr size_t kMaxSamplingParents = 2;
+
+    //! Sample circuit from gate with index start, with given shots distributed on this branch. origin is the state
+    //! before the first gate, path records the branches taken so far and parents the saved states of the path.
+    void SamplingBranch(const circuit_t& circ, const ParameterResolver<calc_type>& pr, size_t start, size_t shots,
+                        const MST<size_t>& key_map, VT<unsigned> outcome, VT<unsigned>* res, size_t* n_done,
+                        RndEngine* rnd_eng, const derived_t& origin, VT<SamplingStep>* path,
+                        VT<std::pair<size_t, derived_t>>* parents);
+
+    //! Restore this state to the one before gate idx on the sampling path, by copying the nearest saved state and
+    //! replaying the branches taken after it.
+    void RestoreSamplingParent(const circuit_t& circ, const ParameterResolver<calc_type>& pr, size_t idx,
+                               const derived_t& origin, const VT<SamplingStep>& path,
+                               const VT<std::pair<size_t, derived_t>>& parents);
+
+    //! Get the probability of every branch of a measurement gate or a noise channel.
+    VT<calc_type> BranchProbs(const std::shared_ptr<BasicGate<calc_type>>& gate);
+
+    //! Evolve this quantum state into the given branch of a measurement gate or a noise channel.
+    void ApplyBranch(const std::shared_ptr<BasicGate<calc_type>>& gate, size_t branch, calc_type prob);
+
+    //! Get the probability of every Kraus operator of a Kraus channel, without applying any of them.
+    VT<calc_type> KrausProbs(const std::shared_ptr<BasicGate<calc_type>>& gate);
+
+    //! Get the branch where the cumulative probability first exceeds r.
+    static size_t SelectBranch(const VT<calc_type>& probs, calc_type r);
+
+    //! Distribute shots into branches with given probabilities.
+    static VT<size_t> Multinomial(size_t shots, const VT<calc_type>& probs, RndEngine* rnd_eng);
+
     qs_data_p_t qs = nullptr;
+    bool mapped_ = false;
+    size_t n_views_ = 0;
     qbit_t n_qubits = 0;
     index_t dim = 0;
     unsigned seed = 0;
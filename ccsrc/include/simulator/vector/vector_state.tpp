@@ -26,16 +26,19 @@
 #include <map>
 #include <memory>
 #include <mutex>
+#include <numeric>
 #include <random>
 #include <stdexcept>
 #include <string>
-#include <thread>
 #include <type_traits>
+#include <utility>
 #include <vector>
 
 #include "core/mq_base_types.hpp"
 #include "core/parameter_resolver.hpp"
+#include "core/thread_pool.hpp"
 #include "ops/basic_gate.hpp"
+#include "ops/fusion.hpp"
 #include "ops/gates.hpp"
 #include "ops/hamiltonian.hpp"
 #include "simulator/types.hpp"
@@ -66,6 +69,14 @@ VectorState<qs_policy_t_>::VectorState(qs_data_p_t qs, qbit_t n_qubits, unsigned
     rng_ = std::bind(dist, std::ref(rnd_eng_));
 }
 
+template <typename qs_policy_t_>
+VectorState<qs_policy_t_>::VectorState(qbit_t n_qubits, unsigned seed, const std::string& path, bool restore)
+    : mapped_(true), n_qubits(n_qubits), dim(1UL << n_qubits), seed(seed), rnd_eng_(seed) {
+    qs = qs_policy_t::InitMappedState(dim, path, restore);
+    std::uniform_real_distribution<double> dist(0., 1.);
+    rng_ = std::bind(dist, std::ref(rnd_eng_));
+}
+
 template <typename qs_policy_t_>
 VectorState<qs_policy_t_>::VectorState(const VectorState<qs_policy_t>& sim) {
     this->qs = qs_policy_t::Copy(sim.qs, sim.dim);
@@ -79,8 +90,16 @@ VectorState<qs_policy_t_>::VectorState(const VectorState<qs_policy_t>& sim) {
 
 template <typename qs_policy_t_>
 auto VectorState<qs_policy_t_>::operator=(const VectorState<qs_policy_t>& sim) -> derived_t& {
-    qs_policy_t::FreeState(this->qs);
-    this->qs = qs_policy_t::Copy(sim.qs, sim.dim);
+    if (this == &sim) {
+        return *this;
+    }
+    if (qs != nullptr && dim == sim.dim) {
+        // Keep the buffer, numpy views of this state stay valid.
+        qs_policy_t::QSMulValue(sim.qs, qs, 1, dim);
+    } else {
+        ReleaseQS();
+        this->qs = qs_policy_t::Copy(sim.qs, sim.dim);
+    }
     this->dim = sim.dim;
     this->n_qubits = sim.n_qubits;
     this->seed = sim.seed;
@@ -93,10 +112,12 @@ auto VectorState<qs_policy_t_>::operator=(const VectorState<qs_policy_t>& sim) -
 template <typename qs_policy_t_>
 VectorState<qs_policy_t_>::VectorState(VectorState<qs_policy_t>&& sim) {
     this->qs = sim.qs;
+    this->mapped_ = sim.mapped_;
     this->dim = sim.dim;
     this->n_qubits = sim.n_qubits;
     this->seed = sim.seed;
     sim.qs = nullptr;
+    sim.mapped_ = false;
     this->rnd_eng_ = RndEngine(seed);
     std::uniform_real_distribution<double> dist(0., 1.);
     this->rng_ = std::bind(dist, std::ref(this->rnd_eng_));
@@ -104,12 +125,14 @@ VectorState<qs_policy_t_>::VectorState(VectorState<qs_policy_t>&& sim) {
 
 template <typename qs_policy_t_>
 auto VectorState<qs_policy_t_>::operator=(VectorState<qs_policy_t>&& sim) -> derived_t& {
-    qs_policy_t::FreeState(this->qs);
+    ReleaseQS();
     this->qs = sim.qs;
+    this->mapped_ = sim.mapped_;
     this->dim = sim.dim;
     this->n_qubits = sim.n_qubits;
     this->seed = sim.seed;
     sim.qs = nullptr;
+    sim.mapped_ = false;
     this->rnd_eng_ = RndEngine(seed);
     std::uniform_real_distribution<double> dist(0., 1.);
     this->rng_ = std::bind(dist, std::ref(this->rnd_eng_));
@@ -121,6 +144,35 @@ void VectorState<qs_policy_t_>::Reset() {
     qs_policy_t::Reset(qs, dim);
 }
 
+template <typename qs_policy_t_>
+void VectorState<qs_policy_t_>::Sync() {
+    if (mapped_) {
+        qs_policy_t::SyncMappedState(qs, dim);
+    }
+}
+
+template <typename qs_policy_t_>
+void VectorState<qs_policy_t_>::ReleaseQS() {
+    if (mapped_) {
+        qs_policy_t::FreeMappedState(qs, dim);
+    } else {
+        qs_policy_t::FreeState(qs);
+    }
+    qs = nullptr;
+    mapped_ = false;
+}
+
+template <typename qs_policy_t_>
+void VectorState<qs_policy_t_>::ReplaceQS(qs_data_p_t new_qs) {
+    if (mapped_ || n_views_ != 0) {
+        qs_policy_t::QSMulValue(new_qs, qs, 1, dim);
+        qs_policy_t::FreeState(new_qs);
+    } else {
+        qs_policy_t::FreeState(qs);
+        qs = new_qs;
+    }
+}
+
 template <typename qs_policy_t_>
 void VectorState<qs_policy_t_>::Display(qbit_t qubits_limit) const {
     qs_policy_t::Display(qs, n_qubits, qubits_limit);
@@ -136,6 +188,14 @@ void VectorState<qs_policy_t_>::SetQS(const py_qs_datas_t& qs_out) {
     qs_policy_t::SetQS(qs, qs_out, dim);
 }
 
+template <typename qs_policy_t_>
+void VectorState<qs_policy_t_>::SetQS(const py_qs_data_t* qs_out, index_t size) {
+    if (size != dim) {
+        throw std::invalid_argument("state size not match");
+    }
+    qs_policy_t::SetQS(qs, qs_out, dim);
+}
+
 template <typename qs_policy_t_>
 index_t VectorState<qs_policy_t_>::ApplyGate(const std::shared_ptr<BasicGate<calc_type>>& gate,
                                              const ParameterResolver<calc_type>& pr, bool diff) {
@@ -276,6 +336,12 @@ index_t VectorState<qs_policy_t_>::ApplyGate(const std::shared_ptr<BasicGate<cal
             m = FSimMatrix<calc_type>(theta, phi);
         }
         qs_policy_t::ApplyTwoQubitsMatrix(qs, qs, gate->obj_qubits_, gate->ctrl_qubits_, m.matrix_, dim);
+    } else if (name == gFused && !gate->is_measure_) {
+        if (diff) {
+            throw std::runtime_error("Can not apply differential format of fused gate on quantum states.");
+        }
+        auto m = GetFusedMatrix(*static_cast<FusedGate<calc_type>*>(gate.get()), pr);
+        qs_policy_t::ApplyMatrixGate(qs, qs, gate->obj_qubits_, gate->ctrl_qubits_, m.matrix_, dim);
     } else if (gate->is_measure_) {
         return ApplyMeasure(gate);
     } else if (gate->is_channel_) {
@@ -334,48 +400,63 @@ auto VectorState<qs_policy_t_>::ApplyPauliChannel(const std::shared_ptr<BasicGat
 template <typename qs_policy_t_>
 auto VectorState<qs_policy_t_>::ApplyKrausChannel(const std::shared_ptr<BasicGate<calc_type>>& gate) {
     assert(gate->kraus_operator_set_.size() != 0);
-    auto tmp_qs = qs_policy_t::InitState(dim);
-    calc_type prob = 0;
-    for (size_t n_kraus = 0; n_kraus < gate->kraus_operator_set_.size(); n_kraus++) {
-        qs_policy_t::ApplySingleQubitMatrix(qs, tmp_qs, gate->obj_qubits_[0], gate->ctrl_qubits_,
-                                            gate->kraus_operator_set_[n_kraus], dim);
-        calc_type renormal_factor_square = qs_policy_t::Vdot(tmp_qs, tmp_qs, dim).real();
-        prob = renormal_factor_square / (1 - prob);
-        calc_type renormal_factor = 1 / std::sqrt(renormal_factor_square);
-        if (static_cast<calc_type>(rng_()) <= prob) {
-            qs_policy_t::QSMulValue(tmp_qs, tmp_qs, renormal_factor, dim);
-            qs_policy_t::FreeState(qs);
-            qs = tmp_qs;
-            tmp_qs = nullptr;
-        }
-    }
-    qs_policy_t::FreeState(tmp_qs);
+    // The branch is chosen before any operator is applied, and then applied in place.
+    auto probs = KrausProbs(gate);
+    auto branch = SelectBranch(probs, static_cast<calc_type>(rng_()));
+    ApplyBranch(gate, branch, probs[branch]);
 }
 
 template <typename qs_policy_t_>
 auto VectorState<qs_policy_t_>::ApplyDampingChannel(const std::shared_ptr<BasicGate<calc_type>>& gate) {
     calc_type reduced_factor_b_square = qs_policy_t::OneStateVdot(qs, qs, gate->obj_qubits_[0], dim).real();
-    calc_type reduced_factor_b = std::sqrt(reduced_factor_b_square);
-    if (reduced_factor_b < 1e-8) {
+    if (reduced_factor_b_square < 1e-16) {
         return;
     }
     calc_type prob = gate->damping_coeff_ * reduced_factor_b_square;
     if (static_cast<calc_type>(rng_()) <= prob) {
-        auto tmp_qs = qs_policy_t::InitState(dim);
-        if (gate->name_ == "ADC") {
-            std::vector<std::vector<py_qs_data_t>> m({{0, 1 / reduced_factor_b}, {0, 0}});
-            qs_policy_t::ApplySingleQubitMatrix(qs, tmp_qs, gate->obj_qubits_[0], gate->ctrl_qubits_, m, dim);
-        } else {
-            qs_policy_t::ConditionalMul(qs, tmp_qs, (1UL << gate->obj_qubits_[0]), 1, 1 / reduced_factor_b, 0, dim);
-        }
-        qs = tmp_qs;
-        tmp_qs = nullptr;
-        qs_policy_t::FreeState(tmp_qs);
+        ApplyBranch(gate, 1, prob);
     } else {
-        calc_type coeff_a = 1 / sqrt(1 - prob);
-        calc_type coeff_b = std::sqrt(1 - gate->damping_coeff_) / std::sqrt(1 - prob);
-        qs_policy_t::ConditionalMul(qs, qs, (1UL << gate->obj_qubits_[0]), 0, coeff_a, coeff_b, dim);
+        ApplyBranch(gate, 0, 1 - prob);
+    }
+}
+
+template <typename qs_policy_t_>
+auto VectorState<qs_policy_t_>::KrausProbs(const std::shared_ptr<BasicGate<calc_type>>& gate) -> VT<calc_type> {
+    // |K psi|^2 = Tr(K rho K^\dagger), where rho is the reduced density matrix of object qubit, so the probabilities of
+    // all Kraus operators need only one pass over the quantum state. Basis states that do not satisfy the control
+    // qubits are left unchanged by every Kraus operator.
+    auto rho = qs_policy_t::GetReducedDensityMatrix(qs, gate->obj_qubits_[0], gate->ctrl_qubits_, dim);
+    calc_type uncontrolled = 0;
+    if (!gate->ctrl_qubits_.empty()) {
+        uncontrolled = 1 - rho[0][0].real() - rho[1][1].real();
+    }
+    VT<calc_type> probs;
+    for (auto& k : gate->kraus_operator_set_) {
+        calc_type prob = uncontrolled;
+        for (size_t r = 0; r < 2; r++) {
+            for (size_t a = 0; a < 2; a++) {
+                for (size_t b = 0; b < 2; b++) {
+                    prob += (k[r][a] * rho[a][b] * std::conj(k[r][b])).real();
+                }
+            }
+        }
+        probs.push_back(prob);
+    }
+    return probs;
+}
+
+template <typename qs_policy_t_>
+size_t VectorState<qs_policy_t_>::SelectBranch(const VT<calc_type>& probs, calc_type r) {
+    size_t branch = 0;
+    calc_type cumulative = probs[0];
+    while (branch + 1 < probs.size() && r >= cumulative) {
+        cumulative += probs[++branch];
+    }
+    // Rounding error may leave r beyond the total probability, never end in an impossible branch.
+    while (branch > 0 && probs[branch] <= 0) {
+        branch--;
     }
+    return branch;
 }
 
 template <typename qs_policy_t_>
@@ -474,9 +555,16 @@ auto VectorState<qs_policy_t_>::ExpectDiffFSim(qs_data_p_t bra, qs_data_p_t ket,
 template <typename qs_policy_t_>
 auto VectorState<qs_policy_t_>::ApplyCircuit(const circuit_t& circ, const ParameterResolver<calc_type>& pr) {
     std::map<std::string, int> result;
-    for (auto& g : circ) {
+    for (size_t k = 0; k < circ.size(); k++) {
+        const auto& g = circ[k];
         if (g->is_measure_) {
             result[g->name_] = ApplyMeasure(g);
+        } else if (mapped_ && IsBlockLocal(g)) {
+            size_t end = k + 1;
+            for (; end < circ.size() && IsBlockLocal(circ[end]); end++) {
+            }
+            ApplyBlocked(circ, k, end, pr);
+            k = end - 1;
         } else {
             ApplyGate(g, pr, false);
         }
@@ -484,35 +572,66 @@ auto VectorState<qs_policy_t_>::ApplyCircuit(const circuit_t& circ, const Parame
     return result;
 }
 
+template <typename qs_policy_t_>
+bool VectorState<qs_policy_t_>::IsBlockLocal(const std::shared_ptr<BasicGate<calc_type>>& gate) const {
+    // Measurements and channels need the norm of the whole state.
+    if (gate->is_measure_ || gate->is_channel_) {
+        return false;
+    }
+    auto block_qubits = std::min<qbit_t>(n_qubits, kMappedBlockQubits);
+    auto inside = [block_qubits](auto qubit) { return static_cast<qbit_t>(qubit) < block_qubits; };
+    return std::all_of(gate->obj_qubits_.begin(), gate->obj_qubits_.end(), inside)
+           && std::all_of(gate->ctrl_qubits_.begin(), gate->ctrl_qubits_.end(), inside);
+}
+
+template <typename qs_policy_t_>
+void VectorState<qs_policy_t_>::ApplyBlocked(const circuit_t& circ, size_t begin, size_t end,
+                                             const ParameterResolver<calc_type>& pr) {
+    auto block_qubits = std::min<qbit_t>(n_qubits, kMappedBlockQubits);
+    index_t block_dim = 1UL << block_qubits;
+    // A view of one block, it never owns the buffer it points to.
+    derived_t block(static_cast<qs_data_p_t>(nullptr), block_qubits, seed);
+    for (index_t offset = 0; offset < dim; offset += block_dim) {
+        block.qs = qs + offset;
+        try {
+            for (size_t k = begin; k < end; k++) {
+                block.ApplyGate(circ[k], pr, false);
+            }
+        } catch (...) {
+            block.qs = nullptr;
+            throw;
+        }
+    }
+    block.qs = nullptr;
+}
+
 template <typename qs_policy_t_>
 void VectorState<qs_policy_t_>::ApplyHamiltonian(const Hamiltonian<calc_type>& ham) {
     qs_data_p_t new_qs;
     if (ham.how_to_ == ORIGIN) {
-        new_qs = qs_policy_t::ApplyTerms(qs, ham.ham_, dim);
+        new_qs = qs_policy_t::ApplyTerms(qs, ham.ham_groups_, dim);
     } else if (ham.how_to_ == BACKEND) {
         new_qs = qs_policy_t::CsrDotVec(ham.ham_sparse_main_, ham.ham_sparse_second_, qs, dim);
     } else {
         new_qs = qs_policy_t::CsrDotVec(ham.ham_sparse_main_, qs, dim);
     }
-    qs_policy_t::FreeState(qs);
-    qs = new_qs;
+    ReplaceQS(new_qs);
 }
 
 template <typename qs_policy_t_>
 auto VectorState<qs_policy_t_>::GetCircuitMatrix(const circuit_t& circ, const ParameterResolver<calc_type>& pr)
-    -> VT<py_qs_datas_t> {
-    VVT<CT<calc_type>> out((1 << n_qubits));
-    for (size_t i = 0; i < (1UL << n_qubits); i++) {
-        auto sim = VectorState<qs_policy_t>(n_qubits, seed);
-        for (qbit_t j = 0; j < n_qubits; ++j) {
-            if ((i >> j) & 1) {
-                qs_policy_t_::ApplyX(sim.qs, qbits_t({j}), qbits_t({}), sim.dim);
-            }
-        }
-        sim.ApplyCircuit(circ, pr);
-        out[i] = sim.GetQS();
+    -> py_qs_datas_t {
+    // The column major matrix is a state of 2n qubits, where the low n qubits are the row index and the high n
+    // qubits are the column index. Gates acting on the low n qubits evolve all columns in one pass.
+    auto sim = VectorState<qs_policy_t>(2 * n_qubits, seed);
+    for (qbit_t j = 0; j < n_qubits; ++j) {
+        qs_policy_t::ApplyH(sim.qs, qbits_t({j + n_qubits}), qbits_t({}), sim.dim);
+        qs_policy_t::ApplyX(sim.qs, qbits_t({j}), qbits_t({j + n_qubits}), sim.dim);
     }
-    return out;
+    // Every column is now a basis state with amplitude 1/sqrt(dim), rescale it to identity matrix.
+    qs_policy_t::QSMulValue(sim.qs, sim.qs, std::sqrt(static_cast<calc_type>(dim)), sim.dim);
+    sim.ApplyCircuit(circ, pr);
+    return sim.GetQS();
 }
 
 template <typename qs_policy_t_>
@@ -520,47 +639,24 @@ auto VectorState<qs_policy_t_>::GetExpectationWithGradOneOne(const Hamiltonian<c
                                                              const circuit_t& herm_circ,
                                                              const ParameterResolver<calc_type>& pr,
                                                              const MST<size_t>& p_map) -> py_qs_datas_t {
-    // auto timer = Timer();
-    // timer.Start("First part");
     py_qs_datas_t f_and_g(1 + p_map.size(), 0);
     VectorState<qs_policy_t> sim_l = *this;
     sim_l.ApplyCircuit(circ, pr);
     VectorState<qs_policy_t> sim_r = sim_l;
     sim_r.ApplyHamiltonian(ham);
     f_and_g[0] = qs_policy_t::Vdot(sim_l.qs, sim_r.qs, dim);
-    // timer.EndAndStartOther("First part", "Second part");
-    for (const auto& g : herm_circ) {
+    auto n_gates = GradGatesEnd(herm_circ, p_map);
+    for (size_t k = 0; k < n_gates; k++) {
+        const auto& g = herm_circ[k];
         sim_l.ApplyGate(g, pr);
-        if (g->name_ == gU3) {
-            auto u3 = static_cast<U3<calc_type>*>(g.get());
-            if (const auto& [title, jac] = u3->jacobi; title.size() != 0) {
-                auto intrin_grad = ExpectDiffU3(sim_l.qs, sim_r.qs, g, pr, dim);
-                auto u3_grad = Dim2MatrixMatMul<calc_type>(intrin_grad, jac);
-                for (const auto& [name, idx] : title) {
-                    f_and_g[1 + p_map.at(name)] += 2 * std::real(u3_grad.matrix_[0][idx]);
-                }
-            }
-        } else if (g->name_ == gFSim) {
-            auto fsim = static_cast<FSim<calc_type>*>(g.get());
-            if (const auto& [title, jac] = fsim->jacobi; title.size() != 0) {
-                auto intrin_grad = ExpectDiffFSim(sim_l.qs, sim_r.qs, g, pr, dim);
-                auto fsim_grad = Dim2MatrixMatMul<calc_type>(intrin_grad, jac);
-                for (const auto& [name, idx] : title) {
-                    f_and_g[1 + p_map.at(name)] += 2 * std::real(fsim_grad.matrix_[0][idx]);
-                }
-            }
-        } else if (g->params_.data_.size() != g->params_.no_grad_parameters_.size()) {
-            // timer.Start("ExpectDiffGate");
-            auto gi = ExpectDiffGate(sim_l.qs, sim_r.qs, g, pr, dim);
-            // timer.End("ExpectDiffGate");
-            for (auto& it : g->params_.GetRequiresGradParameters()) {
-                f_and_g[1 + p_map.at(it)] += 2 * std::real(gi) * g->params_.data_.at(it);
-            }
+        if (GateRequiresGrad(g, p_map)) {
+            AddGateGrad(g, pr, p_map, sim_l.qs, sim_r.qs, dim, f_and_g.data());
         }
         sim_r.ApplyGate(g, pr);
     }
-    // timer.End("Second part");
-    // timer.Analyze();
+    for (size_t i = 1; i < f_and_g.size(); i++) {
+        f_and_g[i] = 2 * std::real(f_and_g[i]);
+    }
     return f_and_g;
 }
 
@@ -595,27 +691,16 @@ auto VectorState<qs_policy_t_>::LeftSizeGradOneMulti(const std::vector<std::shar
                                                      int n_thread, const derived_t& simulator_left,
                                                      const derived_t& simulator_right) -> VT<py_qs_datas_t> {
     auto n_hams = hams.size();
-    int max_thread = 15;
-    if (n_thread > max_thread) {
-        n_thread = max_thread;
-    }
-
-    if (n_thread > static_cast<int>(n_hams)) {
-        n_thread = n_hams;
-    }
-
     VT<py_qs_datas_t> f_and_g(n_hams, py_qs_datas_t((1 + p_map.size()), 0));
-
-    int n_group = n_hams / n_thread;
-    if (n_hams % n_thread) {
-        n_group += 1;
-    }
-    for (int i = 0; i < n_group; i++) {
-        int start = i * n_thread;
-        int end = (i + 1) * n_thread;
-        if (end > static_cast<int>(n_hams)) {
-            end = n_hams;
-        }
+    auto n_gates = GradGatesEnd(herm_left_circ, p_map);
+    // Hamiltonians are split into groups that run on n_thread threads, and every group shares one adjoint sweep of
+    // the left state. A group holds at most max_group_size extra states to bound the memory.
+    constexpr size_t max_group_size = 15;
+    size_t n_group = std::max<size_t>(n_thread, (n_hams + max_group_size - 1) / max_group_size);
+    n_group = std::min<size_t>(n_group, n_hams);
+    ThreadPool::GetInstance().ParallelFor(n_group, n_thread, [&](size_t i) {
+        int start = static_cast<int>(i * n_hams / n_group);
+        int end = static_cast<int>((i + 1) * n_hams / n_group);
         std::vector<VectorState<qs_policy_t>> sim_rs(end - start);
         auto sim_l = simulator_left;
         for (int j = start; j < end; j++) {
@@ -623,43 +708,19 @@ auto VectorState<qs_policy_t_>::LeftSizeGradOneMulti(const std::vector<std::shar
             sim_rs[j - start].ApplyHamiltonian(*hams[j]);
             f_and_g[j][0] = qs_policy_t::Vdot(sim_l.qs, sim_rs[j - start].qs, dim);
         }
-        for (const auto& g : herm_left_circ) {
+        for (size_t k = 0; k < n_gates; k++) {
+            const auto& g = herm_left_circ[k];
             sim_l.ApplyGate(g, pr);
-            if (g->name_ == gU3) {
-                auto u3 = static_cast<U3<calc_type>*>(g.get());
-                for (int j = start; j < end; j++) {
-                    if (const auto& [title, jac] = u3->jacobi; title.size() != 0) {
-                        auto intrin_grad = ExpectDiffU3(sim_l.qs, sim_rs[j - start].qs, g, pr, dim);
-                        auto u3_grad = Dim2MatrixMatMul<calc_type>(intrin_grad, jac);
-                        for (const auto& [name, idx] : title) {
-                            f_and_g[j][1 + p_map.at(name)] += u3_grad.matrix_[0][idx];
-                        }
-                    }
-                }
-            } else if (g->name_ == gFSim) {
-                auto fsim = static_cast<FSim<calc_type>*>(g.get());
-                for (int j = start; j < end; j++) {
-                    if (const auto& [title, jac] = fsim->jacobi; title.size() != 0) {
-                        auto intrin_grad = ExpectDiffFSim(sim_l.qs, sim_rs[j - start].qs, g, pr, dim);
-                        auto fsim_grad = Dim2MatrixMatMul<calc_type>(intrin_grad, jac);
-                        for (const auto& [name, idx] : title) {
-                            f_and_g[j][1 + p_map.at(name)] += fsim_grad.matrix_[0][idx];
-                        }
-                    }
-                }
-            } else if (g->params_.data_.size() != g->params_.no_grad_parameters_.size()) {
+            if (GateRequiresGrad(g, p_map)) {
                 for (int j = start; j < end; j++) {
-                    auto gi = ExpectDiffGate(sim_l.qs, sim_rs[j - start].qs, g, pr, dim);
-                    for (auto& it : g->params_.GetRequiresGradParameters()) {
-                        f_and_g[j][1 + p_map.at(it)] += gi * g->params_.data_.at(it);
-                    }
+                    AddGateGrad(g, pr, p_map, sim_l.qs, sim_rs[j - start].qs, dim, f_and_g[j].data());
                 }
             }
             for (int j = start; j < end; j++) {
                 sim_rs[j - start].ApplyGate(g, pr);
             }
         }
-    }
+    });
     return f_and_g;
 }
 
@@ -667,27 +728,92 @@ template <typename qs_policy_t_>
 auto VectorState<qs_policy_t_>::GetExpectationWithGradOneMulti(
     const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams, const circuit_t& circ, const circuit_t& herm_circ,
     const ParameterResolver<calc_type>& pr, const MST<size_t>& p_map, int n_thread) -> VT<py_qs_datas_t> {
-    auto n_hams = hams.size();
-    int max_thread = 15;
-    if (n_thread > max_thread) {
-        n_thread = max_thread;
-    }
-    if (n_thread > static_cast<int>(n_hams)) {
-        n_thread = n_hams;
-    }
-    VT<py_qs_datas_t> f_and_g(n_hams, py_qs_datas_t((1 + p_map.size()), 0));
     VectorState<qs_policy_t> sim = *this;
     sim.ApplyCircuit(circ, pr);
-    int n_group = n_hams / n_thread;
-    if (n_hams % n_thread) {
-        n_group += 1;
+    return AdjointGradOneMulti(hams, sim, herm_circ, pr, p_map, n_thread);
+}
+
+template <typename qs_policy_t_>
+auto VectorState<qs_policy_t_>::BatchInitState(const py_qs_data_t* states, size_t n) const -> derived_t {
+    derived_t sim = *this;
+    if (states != nullptr) {
+        sim.SetQS(states + n * dim, dim);
+    }
+    return sim;
+}
+
+template <typename qs_policy_t_>
+bool VectorState<qs_policy_t_>::GateRequiresGrad(const std::shared_ptr<BasicGate<calc_type>>& g,
+                                                 const MST<size_t>& p_map) {
+    auto requested = [&p_map](const std::string& name) { return p_map.find(name) != p_map.end(); };
+    if (g->name_ == gU3 || g->name_ == gFSim) {
+        const auto& title = g->name_ == gU3 ? static_cast<U3<calc_type>*>(g.get())->jacobi.first
+                                            : static_cast<FSim<calc_type>*>(g.get())->jacobi.first;
+        return std::any_of(title.begin(), title.end(), [&requested](const auto& it) { return requested(it.first); });
+    }
+    if (g->params_.data_.size() == g->params_.no_grad_parameters_.size()) {
+        return false;
     }
-    for (int i = 0; i < n_group; i++) {
-        int start = i * n_thread;
-        int end = (i + 1) * n_thread;
-        if (end > static_cast<int>(n_hams)) {
-            end = n_hams;
+    auto names = g->params_.GetRequiresGradParameters();
+    return std::any_of(names.begin(), names.end(), requested);
+}
+
+template <typename qs_policy_t_>
+void VectorState<qs_policy_t_>::AddGateGrad(const std::shared_ptr<BasicGate<calc_type>>& g,
+                                            const ParameterResolver<calc_type>& pr, const MST<size_t>& p_map,
+                                            qs_data_p_t bra, qs_data_p_t ket, index_t dim, py_qs_data_t* grad) {
+    auto add = [&p_map, grad](const std::string& name, py_qs_data_t value) {
+        if (auto it = p_map.find(name); it != p_map.end()) {
+            grad[1 + it->second] += value;
+        }
+    };
+    if (g->name_ == gU3) {
+        const auto& [title, jac] = static_cast<U3<calc_type>*>(g.get())->jacobi;
+        auto u3_grad = Dim2MatrixMatMul<calc_type>(ExpectDiffU3(bra, ket, g, pr, dim), jac);
+        for (const auto& [name, idx] : title) {
+            add(name, u3_grad.matrix_[0][idx]);
+        }
+    } else if (g->name_ == gFSim) {
+        const auto& [title, jac] = static_cast<FSim<calc_type>*>(g.get())->jacobi;
+        auto fsim_grad = Dim2MatrixMatMul<calc_type>(ExpectDiffFSim(bra, ket, g, pr, dim), jac);
+        for (const auto& [name, idx] : title) {
+            add(name, fsim_grad.matrix_[0][idx]);
+        }
+    } else {
+        auto gi = ExpectDiffGate(bra, ket, g, pr, dim);
+        for (auto& name : g->params_.GetRequiresGradParameters()) {
+            add(name, gi * g->params_.data_.at(name));
+        }
+    }
+}
+
+template <typename qs_policy_t_>
+size_t VectorState<qs_policy_t_>::GradGatesEnd(const circuit_t& herm_circ, const MST<size_t>& p_map) {
+    for (size_t k = herm_circ.size(); k > 0; k--) {
+        if (GateRequiresGrad(herm_circ[k - 1], p_map)) {
+            return k;
         }
+    }
+    return 0;
+}
+
+template <typename qs_policy_t_>
+auto VectorState<qs_policy_t_>::AdjointGradOneMulti(const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams,
+                                                    const derived_t& sim, const circuit_t& herm_circ,
+                                                    const ParameterResolver<calc_type>& pr, const MST<size_t>& p_map,
+                                                    int n_thread) -> VT<py_qs_datas_t> {
+    auto n_hams = hams.size();
+    VT<py_qs_datas_t> f_and_g(n_hams, py_qs_datas_t((1 + p_map.size()), 0));
+    // No gradient is collected after the last gate with parameters that require gradient, so the sweep stops there.
+    auto n_gates = GradGatesEnd(herm_circ, p_map);
+    // Hamiltonians are split into groups that run on n_thread threads, and every group shares one adjoint sweep of
+    // the left state. A group holds at most max_group_size extra states to bound the memory.
+    constexpr size_t max_group_size = 15;
+    size_t n_group = std::max<size_t>(n_thread, (n_hams + max_group_size - 1) / max_group_size);
+    n_group = std::min<size_t>(n_group, n_hams);
+    ThreadPool::GetInstance().ParallelFor(n_group, n_thread, [&](size_t i) {
+        int start = static_cast<int>(i * n_hams / n_group);
+        int end = static_cast<int>((i + 1) * n_hams / n_group);
         std::vector<VectorState<qs_policy_t>> sim_rs(end - start);
         auto sim_l = sim;
         for (int j = start; j < end; j++) {
@@ -695,43 +821,24 @@ auto VectorState<qs_policy_t_>::GetExpectationWithGradOneMulti(
             sim_rs[j - start].ApplyHamiltonian(*hams[j]);
             f_and_g[j][0] = qs_policy_t::Vdot(sim_l.qs, sim_rs[j - start].qs, dim);
         }
-        for (const auto& g : herm_circ) {
+        for (size_t k = 0; k < n_gates; k++) {
+            const auto& g = herm_circ[k];
             sim_l.ApplyGate(g, pr);
-            if (g->name_ == gU3) {
-                auto u3 = static_cast<U3<calc_type>*>(g.get());
-                for (int j = start; j < end; j++) {
-                    if (const auto& [title, jac] = u3->jacobi; title.size() != 0) {
-                        auto intrin_grad = ExpectDiffU3(sim_l.qs, sim_rs[j - start].qs, g, pr, dim);
-                        auto u3_grad = Dim2MatrixMatMul<calc_type>(intrin_grad, jac);
-                        for (const auto& [name, idx] : title) {
-                            f_and_g[j][1 + p_map.at(name)] += 2 * std::real(u3_grad.matrix_[0][idx]);
-                        }
-                    }
-                }
-            } else if (g->name_ == gFSim) {
-                auto fsim = static_cast<FSim<calc_type>*>(g.get());
-                for (int j = start; j < end; j++) {
-                    if (const auto& [title, jac] = fsim->jacobi; title.size() != 0) {
-                        auto intrin_grad = ExpectDiffFSim(sim_l.qs, sim_rs[j - start].qs, g, pr, dim);
-                        auto fsim_grad = Dim2MatrixMatMul<calc_type>(intrin_grad, jac);
-                        for (const auto& [name, idx] : title) {
-                            f_and_g[j][1 + p_map.at(name)] += 2 * std::real(fsim_grad.matrix_[0][idx]);
-                        }
-                    }
-                }
-            } else if (g->params_.data_.size() != g->params_.no_grad_parameters_.size()) {
+            if (GateRequiresGrad(g, p_map)) {
                 for (int j = start; j < end; j++) {
-                    auto gi = ExpectDiffGate(sim_l.qs, sim_rs[j - start].qs, g, pr, dim);
-                    for (auto& it : g->params_.GetRequiresGradParameters()) {
-                        f_and_g[j][1 + p_map.at(it)] += 2 * std::real(gi) * g->params_.data_.at(it);
-                    }
+                    AddGateGrad(g, pr, p_map, sim_l.qs, sim_rs[j - start].qs, dim, f_and_g[j].data());
                 }
             }
             for (int j = start; j < end; j++) {
                 sim_rs[j - start].ApplyGate(g, pr);
             }
         }
-    }
+        for (int j = start; j < end; j++) {
+            for (size_t k = 1; k < f_and_g[j].size(); k++) {
+                f_and_g[j][k] = 2 * std::real(f_and_g[j][k]);
+            }
+        }
+    });
     return f_and_g;
 }
 
@@ -741,10 +848,11 @@ auto VectorState<qs_policy_t_>::GetExpectationNonHermitianWithGradMultiMulti(
     const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& herm_hams, const circuit_t& left_circ,
     const circuit_t& herm_left_circ, const circuit_t& right_circ, const circuit_t& herm_right_circ,
     const VVT<calc_type>& enc_data, const VT<calc_type>& ans_data, const VS& enc_name, const VS& ans_name,
-    const derived_t& simulator_left, size_t batch_threads, size_t mea_threads) -> VT<VT<py_qs_datas_t>> {
+    const VS& grad_name, const derived_t& simulator_left, size_t batch_threads, size_t mea_threads)
+    -> VT<VT<py_qs_datas_t>> {
     auto n_hams = hams.size();
     auto n_prs = enc_data.size();
-    auto n_params = enc_name.size() + ans_name.size();
+    auto n_params = grad_name.size();
     VT<VT<py_qs_datas_t>> output;
     for (size_t i = 0; i < n_prs; i++) {
         output.push_back({});
@@ -756,47 +864,16 @@ auto VectorState<qs_policy_t_>::GetExpectationNonHermitianWithGradMultiMulti(
         }
     }
     MST<size_t> p_map;
-    for (size_t i = 0; i < enc_name.size(); i++) {
-        p_map[enc_name[i]] = i;
-    }
-    for (size_t i = 0; i < ans_name.size(); i++) {
-        p_map[ans_name[i]] = i + enc_name.size();
+    for (size_t i = 0; i < grad_name.size(); i++) {
+        p_map[grad_name[i]] = i;
     }
-    if (n_prs == 1) {
+    ThreadPool::GetInstance().ParallelFor(n_prs, batch_threads, [&](size_t n) {
         ParameterResolver<calc_type> pr = ParameterResolver<calc_type>();
-        pr.SetItems(enc_name, enc_data[0]);
+        pr.SetItems(enc_name, enc_data[n]);
         pr.SetItems(ans_name, ans_data);
-        output[0] = GetExpectationNonHermitianWithGradOneMulti(hams, herm_hams, left_circ, herm_left_circ, right_circ,
+        output[n] = GetExpectationNonHermitianWithGradOneMulti(hams, herm_hams, left_circ, herm_left_circ, right_circ,
                                                                herm_right_circ, pr, p_map, mea_threads, simulator_left);
-    } else {
-        std::vector<std::thread> tasks;
-        tasks.reserve(batch_threads);
-        size_t end = 0;
-        size_t offset = n_prs / batch_threads;
-        size_t left = n_prs % batch_threads;
-        for (size_t i = 0; i < batch_threads; ++i) {
-            size_t start = end;
-            end = start + offset;
-            if (i < left) {
-                end += 1;
-            }
-            auto task = [&, start, end]() {
-                for (size_t n = start; n < end; n++) {
-                    ParameterResolver<calc_type> pr = ParameterResolver<calc_type>();
-                    pr.SetItems(enc_name, enc_data[n]);
-                    pr.SetItems(ans_name, ans_data);
-                    auto f_g = GetExpectationNonHermitianWithGradOneMulti(hams, herm_hams, left_circ, herm_left_circ,
-                                                                          right_circ, herm_right_circ, pr, p_map,
-                                                                          mea_threads, simulator_left);
-                    output[n] = f_g;
-                }
-            };
-            tasks.emplace_back(task);
-        }
-        for (auto& t : tasks) {
-            t.join();
-        }
-    }
+    });
     return output;
 }
 
@@ -804,10 +881,11 @@ template <typename qs_policy_t_>
 auto VectorState<qs_policy_t_>::GetExpectationWithGradMultiMulti(
     const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams, const circuit_t& circ, const circuit_t& herm_circ,
     const VVT<calc_type>& enc_data, const VT<calc_type>& ans_data, const VS& enc_name, const VS& ans_name,
-    size_t batch_threads, size_t mea_threads) -> VT<VT<py_qs_datas_t>> {
+    const VS& grad_name, size_t batch_threads, size_t mea_threads, const py_qs_data_t* states)
+    -> VT<VT<py_qs_datas_t>> {
     auto n_hams = hams.size();
     auto n_prs = enc_data.size();
-    auto n_params = enc_name.size() + ans_name.size();
+    auto n_params = grad_name.size();
     VT<VT<py_qs_datas_t>> output;
     for (size_t i = 0; i < n_prs; i++) {
         output.push_back({});
@@ -819,44 +897,237 @@ auto VectorState<qs_policy_t_>::GetExpectationWithGradMultiMulti(
         }
     }
     MST<size_t> p_map;
-    for (size_t i = 0; i < enc_name.size(); i++) {
-        p_map[enc_name[i]] = i;
+    for (size_t i = 0; i < grad_name.size(); i++) {
+        p_map[grad_name[i]] = i;
+    }
+    ThreadPool::GetInstance().ParallelFor(n_prs, batch_threads, [&](size_t n) {
+        ParameterResolver<calc_type> pr = ParameterResolver<calc_type>();
+        pr.SetItems(enc_name, enc_data[n]);
+        pr.SetItems(ans_name, ans_data);
+        auto sim = BatchInitState(states, n);
+        sim.ApplyCircuit(circ, pr);
+        output[n] = AdjointGradOneMulti(hams, sim, herm_circ, pr, p_map, mea_threads);
+    });
+    return output;
+}
+
+template <typename qs_policy_t_>
+auto VectorState<qs_policy_t_>::GetExpectationVJPMultiMulti(
+    const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams, const circuit_t& circ, const circuit_t& herm_circ,
+    const VVT<calc_type>& dout, const VVT<calc_type>& enc_data, const VT<calc_type>& ans_data, const VS& enc_name,
+    const VS& ans_name, const VS& grad_name, size_t batch_threads, const py_qs_data_t* states) -> VVT<calc_type> {
+    if (dout.size() != enc_data.size()) {
+        throw std::invalid_argument("Number of cotangent rows does not match batch size of encoder data.");
     }
-    for (size_t i = 0; i < ans_name.size(); i++) {
-        p_map[ans_name[i]] = i + enc_name.size();
+    MST<size_t> p_map;
+    for (size_t i = 0; i < grad_name.size(); i++) {
+        p_map[grad_name[i]] = i;
     }
-    if (n_prs == 1) {
+    VVT<calc_type> output(enc_data.size(), VT<calc_type>(p_map.size(), 0));
+    ThreadPool::GetInstance().ParallelFor(enc_data.size(), batch_threads, [&](size_t n) {
         ParameterResolver<calc_type> pr = ParameterResolver<calc_type>();
-        pr.SetItems(enc_name, enc_data[0]);
+        pr.SetItems(enc_name, enc_data[n]);
         pr.SetItems(ans_name, ans_data);
-        output[0] = GetExpectationWithGradOneMulti(hams, circ, herm_circ, pr, p_map, mea_threads);
-    } else {
-        std::vector<std::thread> tasks;
-        tasks.reserve(batch_threads);
-        size_t end = 0;
-        size_t offset = n_prs / batch_threads;
-        size_t left = n_prs % batch_threads;
-        for (size_t i = 0; i < batch_threads; ++i) {
-            size_t start = end;
-            end = start + offset;
-            if (i < left) {
-                end += 1;
+        auto ham = WeightedHamiltonian(hams, dout[n]);
+        auto f_and_g = BatchInitState(states, n).GetExpectationWithGradOneOne(ham, circ, herm_circ, pr, p_map);
+        for (size_t i = 0; i < p_map.size(); i++) {
+            output[n][i] = std::real(f_and_g[i + 1]);
+        }
+    });
+    return output;
+}
+
+template <typename qs_policy_t_>
+auto VectorState<qs_policy_t_>::GetExpectationBatch(const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams,
+                                                    const circuit_t& circ, const VVT<calc_type>& data, const VS& name,
+                                                    size_t batch_threads, const py_qs_data_t* states)
+    -> VT<py_qs_datas_t> {
+    VT<py_qs_datas_t> output(data.size(), py_qs_datas_t(hams.size(), 0));
+    ThreadPool::GetInstance().ParallelFor(data.size(), batch_threads, [&](size_t n) {
+        ParameterResolver<calc_type> pr = ParameterResolver<calc_type>();
+        pr.SetItems(name, data[n]);
+        auto sim = BatchInitState(states, n);
+        sim.ApplyCircuit(circ, pr);
+        for (size_t j = 0; j < hams.size(); j++) {
+            output[n][j] = sim.GetExpectation(*hams[j]);
+        }
+    });
+    return output;
+}
+
+template <typename qs_policy_t_>
+auto VectorState<qs_policy_t_>::GetExpectationTrajectories(
+    const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams, const circuit_t& circ,
+    const ParameterResolver<calc_type>& pr, size_t n_traj, unsigned seed, size_t n_threads) -> VT<py_qs_datas_t> {
+    auto prefix = *this;
+    size_t start = 0;
+    for (; start < circ.size() && !circ[start]->is_channel_ && !circ[start]->is_measure_; start++) {
+        prefix.ApplyGate(circ[start], pr, false);
+    }
+    VT<py_qs_datas_t> output(n_traj, py_qs_datas_t(hams.size(), 0));
+    // One chunk of trajectories per thread, so that every thread refills a single quantum state.
+    size_t n_chunk = std::max<size_t>(std::min({n_traj, n_threads, ThreadPool::GetInstance().GetSize()}), 1);
+    ThreadPool::GetInstance().ParallelFor(n_chunk, n_chunk, [&](size_t k) {
+        // Every chunk of trajectories reuses one quantum state, which is refilled from prefix for each trajectory.
+        auto sim = prefix;
+        size_t begin = k * n_traj / n_chunk;
+        for (size_t n = begin; n < (k + 1) * n_traj / n_chunk; n++) {
+            if (n != begin) {
+                qs_policy_t::QSMulValue(prefix.qs, sim.qs, 1, dim);
+            }
+            std::seed_seq seq{seed, static_cast<unsigned>(n)};
+            sim.rnd_eng_.seed(seq);
+            for (size_t i = start; i < circ.size(); i++) {
+                sim.ApplyGate(circ[i], pr, false);
+            }
+            for (size_t j = 0; j < hams.size(); j++) {
+                output[n][j] = sim.GetExpectation(*hams[j]);
+            }
+        }
+    });
+    return output;
+}
+
+template <typename qs_policy_t_>
+auto VectorState<qs_policy_t_>::QFISweepEnds(const circuit_t& circ, const VT<size_t>& blocks)
+    -> std::pair<VT<size_t>, VT<size_t>> {
+    VT<size_t> p_gates;
+    for (size_t k = 0; k < circ.size(); k++) {
+        if (circ[k]->parameterized_) {
+            p_gates.push_back(k);
+        }
+    }
+    auto n_params = p_gates.size();
+    if (blocks.size() != n_params) {
+        throw std::invalid_argument("Size of blocks does not match the number of parameterized gates.");
+    }
+    VT<size_t> sweep_end(n_params);
+    for (size_t i = 0; i < n_params; i++) {
+        sweep_end[i] = p_gates[i] + 1;
+        for (size_t j = i + 1; j < n_params; j++) {
+            if (blocks[j] == blocks[i]) {
+                sweep_end[i] = p_gates[j] + 1;
+            }
+        }
+    }
+    return {p_gates, sweep_end};
+}
+
+template <typename qs_policy_t_>
+auto VectorState<qs_policy_t_>::GetQFIParts(const circuit_t& circ, const ParameterResolver<calc_type>& pr,
+                                            const VT<size_t>& blocks, size_t n_threads)
+    -> std::pair<VT<py_qs_datas_t>, py_qs_datas_t> {
+    auto [p_gates, sweep_end] = QFISweepEnds(circ, blocks);
+    auto n_params = p_gates.size();
+    VT<py_qs_datas_t> part_a(n_params, py_qs_datas_t(n_params, 0));
+    py_qs_datas_t part_b(n_params, 0);
+    // Parameterized gates are split into contiguous chunks, so that the quantum state before the gates of a chunk is
+    // evolved once. For gate i, chi is the derivative state and phi is the quantum state, and both are evolved by
+    // the following gates, then A_{ij} = <U_j chi|\partial U_j|phi> before U_j is applied on phi.
+    size_t n_chunk = std::min<size_t>(n_params, 4 * std::max<size_t>(n_threads, 1));
+    ThreadPool::GetInstance().ParallelFor(n_chunk, n_threads, [&](size_t c) {
+        size_t start = c * n_params / n_chunk;
+        size_t end = (c + 1) * n_params / n_chunk;
+        derived_t psi = *this;
+        size_t pos = 0;
+        for (size_t i = start; i < end; i++) {
+            for (; pos < p_gates[i]; pos++) {
+                psi.ApplyGate(circ[pos], pr);
+            }
+            derived_t chi = psi;
+            chi.ApplyGate(circ[pos], pr, true);
+            derived_t phi = psi;
+            phi.ApplyGate(circ[pos], pr);
+            part_a[i][i] = qs_policy_t::Vdot(chi.qs, chi.qs, dim);
+            part_b[i] = qs_policy_t::Vdot(chi.qs, phi.qs, dim);
+            size_t j = i + 1;
+            for (size_t k = pos + 1; k < sweep_end[i]; k++) {
+                const auto& g = circ[k];
+                chi.ApplyGate(g, pr);
+                if (j < n_params && p_gates[j] == k) {
+                    if (blocks[j] == blocks[i]) {
+                        part_a[i][j] = ExpectDiffGate(chi.qs, phi.qs, g, pr, dim);
+                        part_a[j][i] = std::conj(part_a[i][j]);
+                    }
+                    j++;
+                }
+                phi.ApplyGate(g, pr);
+            }
+        }
+    });
+    return {part_a, part_b};
+}
+
+template <typename qs_policy_t_>
+auto VectorState<qs_policy_t_>::GetExpectationWithGradAndQFIParts(
+    const std::vector<std::shared_ptr<Hamiltonian<calc_type>>>& hams, const circuit_t& circ, const circuit_t& herm_circ,
+    const VT<calc_type>& ans_data, const VS& ans_name, const VS& grad_name, const VT<size_t>& blocks,
+    size_t n_threads) -> std::tuple<VT<py_qs_datas_t>, VT<py_qs_datas_t>, py_qs_datas_t> {
+    ParameterResolver<calc_type> pr = ParameterResolver<calc_type>();
+    pr.SetItems(ans_name, ans_data);
+    MST<size_t> p_map;
+    for (size_t i = 0; i < grad_name.size(); i++) {
+        p_map[grad_name[i]] = i;
+    }
+    auto [p_gates, sweep_end] = QFISweepEnds(circ, blocks);
+    auto n_params = p_gates.size();
+    VT<py_qs_datas_t> part_a(n_params, py_qs_datas_t(n_params, 0));
+    py_qs_datas_t part_b(n_params, 0);
+    VT<py_qs_datas_t> f_and_g;
+    // psi is the quantum state of the forward sweep, and plays the role of phi in GetQFIParts for every derivative
+    // state chi that rides on it. The first sweep runs through the whole circuit for the expectation, and a following
+    // sweep only starts if some gates were left over because too many derivative states were alive.
+    size_t next = 0;
+    for (bool first_sweep = true; first_sweep || next < n_params; first_sweep = false) {
+        derived_t psi = *this;
+        VT<std::pair<size_t, derived_t>> chis;
+        size_t j = 0;
+        for (size_t k = 0; k < circ.size() && (first_sweep || !chis.empty() || next < n_params); k++) {
+            const auto& g = circ[k];
+            bool is_param = j < n_params && p_gates[j] == k;
+            for (auto& [i, chi] : chis) {
+                chi.ApplyGate(g, pr);
+                if (is_param && blocks[i] == blocks[j]) {
+                    part_a[i][j] = ExpectDiffGate(chi.qs, psi.qs, g, pr, dim);
+                    part_a[j][i] = std::conj(part_a[i][j]);
+                }
             }
-            auto task = [&, start, end]() {
-                for (size_t n = start; n < end; n++) {
-                    ParameterResolver<calc_type> pr = ParameterResolver<calc_type>();
-                    pr.SetItems(enc_name, enc_data[n]);
-                    pr.SetItems(ans_name, ans_data);
-                    auto f_g = GetExpectationWithGradOneMulti(hams, circ, herm_circ, pr, p_map, mea_threads);
-                    output[n] = f_g;
+            if (is_param && j == next && chis.size() < kMaxQFIStates) {
+                derived_t chi = psi;
+                chi.ApplyGate(g, pr, true);
+                psi.ApplyGate(g, pr);
+                part_a[j][j] = qs_policy_t::Vdot(chi.qs, chi.qs, dim);
+                part_b[j] = qs_policy_t::Vdot(chi.qs, psi.qs, dim);
+                if (sweep_end[j] > k + 1) {
+                    chis.emplace_back(j, std::move(chi));
                 }
-            };
-            tasks.emplace_back(task);
+                next++;
+            } else {
+                psi.ApplyGate(g, pr);
+            }
+            j += is_param ? 1 : 0;
+            chis.erase(std::remove_if(chis.begin(), chis.end(),
+                                      [&ends = sweep_end, k](const auto& chi) { return ends[chi.first] <= k + 1; }),
+                       chis.end());
         }
-        for (auto& t : tasks) {
-            t.join();
+        if (first_sweep) {
+            f_and_g = AdjointGradOneMulti(hams, psi, herm_circ, pr, p_map, n_threads);
         }
     }
+    return {f_and_g, part_a, part_b};
+}
+
+template <typename qs_policy_t_>
+auto VectorState<qs_policy_t_>::GetQSBatch(const circuit_t& circ, const VVT<calc_type>& data, const VS& name,
+                                           size_t batch_threads) -> VT<py_qs_datas_t> {
+    VT<py_qs_datas_t> output(data.size());
+    ThreadPool::GetInstance().ParallelFor(data.size(), batch_threads, [&](size_t n) {
+        ParameterResolver<calc_type> pr = ParameterResolver<calc_type>();
+        pr.SetItems(name, data[n]);
+        VectorState<qs_policy_t> sim = *this;
+        sim.ApplyCircuit(circ, pr);
+        output[n] = sim.GetQS();
+    });
     return output;
 }
 
@@ -866,21 +1137,233 @@ VT<unsigned> VectorState<qs_policy_t_>::Sampling(const circuit_t& circ, const Pa
     auto key_size = key_map.size();
     VT<unsigned> res(shots * key_size);
     RndEngine rnd_eng = RndEngine(seed);
-    std::uniform_real_distribution<double> dist(1.0, (1 << 20) * 1.0);
-    std::function<double()> rng = std::bind(dist, std::ref(rnd_eng));
+    auto sim = *this;
+    size_t n_done = 0;
+    VT<SamplingStep> path;
+    VT<std::pair<size_t, derived_t>> parents;
+    sim.SamplingBranch(circ, pr, 0, shots, key_map, VT<unsigned>(key_size, 0), &res, &n_done, &rnd_eng, *this, &path,
+                       &parents);
+
+    // Shots are generated branch by branch, shuffle them so that the order of shots is still random.
+    VT<size_t> order(shots);
+    std::iota(order.begin(), order.end(), 0);
+    std::shuffle(order.begin(), order.end(), rnd_eng);
+    VT<unsigned> out(shots * key_size);
     for (size_t i = 0; i < shots; i++) {
-        auto sim = derived_t(n_qubits, static_cast<unsigned>(rng()), qs);
-        auto res0 = sim.ApplyCircuit(circ, pr);
-        VT<unsigned> res1(key_map.size());
-        for (const auto& [name, val] : key_map) {
-            res1[val] = res0[name];
+        std::copy(res.begin() + order[i] * key_size, res.begin() + (order[i] + 1) * key_size,
+                  out.begin() + i * key_size);
+    }
+    return out;
+}
+
+template <typename qs_policy_t_>
+VT<unsigned> VectorState<qs_policy_t_>::SamplingMeasurementEndingWithoutNoise(const circuit_t& circ,
+                                                                             const ParameterResolver<calc_type>& pr,
+                                                                             size_t shots, const MST<size_t>& key_map,
+                                                                             unsigned int seed) {
+    auto sim = *this;
+    qbits_t objs;
+    // Column in result of the measurement key on every qubit of objs.
+    VT<size_t> cols;
+    for (const auto& g : circ) {
+        if (!g->is_measure_) {
+            sim.ApplyGate(g, pr, false);
+            continue;
         }
-        for (size_t j = 0; j < key_size; j++) {
-            res[i * key_size + j] = res1[j];
+        objs.push_back(g->obj_qubits_[0]);
+        cols.push_back(key_map.at(g->name_));
+    }
+    auto cum_probs = qs_policy_t::GetMarginalProbs(sim.qs, objs, dim);
+    std::partial_sum(cum_probs.begin(), cum_probs.end(), cum_probs.begin());
+    RndEngine rnd_eng = RndEngine(seed);
+    std::uniform_real_distribution<calc_type> dist(0, cum_probs.back());
+    auto key_size = key_map.size();
+    VT<unsigned> res(shots * key_size, 0);
+    for (size_t i = 0; i < shots; i++) {
+        auto outcome = static_cast<size_t>(std::upper_bound(cum_probs.begin(), cum_probs.end(), dist(rnd_eng))
+                                           - cum_probs.begin());
+        outcome = std::min(outcome, cum_probs.size() - 1);
+        for (size_t pos = 0; pos < cols.size(); pos++) {
+            res[i * key_size + cols[pos]] = (outcome >> pos) & 1;
         }
     }
     return res;
 }
+
+template <typename qs_policy_t_>
+void VectorState<qs_policy_t_>::SamplingBranch(const circuit_t& circ, const ParameterResolver<calc_type>& pr,
+                                               size_t start, size_t shots, const MST<size_t>& key_map,
+                                               VT<unsigned> outcome, VT<unsigned>* res, size_t* n_done,
+                                               RndEngine* rnd_eng, const derived_t& origin, VT<SamplingStep>* path,
+                                               VT<std::pair<size_t, derived_t>>* parents) {
+    auto path_size = path->size();
+    for (size_t idx = start; idx < circ.size(); idx++) {
+        const auto& g = circ[idx];
+        if (!g->is_measure_ && !g->is_channel_) {
+            ApplyGate(g, pr, false);
+            continue;
+        }
+        auto probs = BranchProbs(g);
+        auto counts = Multinomial(shots, probs, rnd_eng);
+        size_t first = 0;
+        while (first + 1 < counts.size() && counts[first] == 0) {
+            first++;
+        }
+        size_t last = counts.size() - 1;
+        while (last > first && counts[last] == 0) {
+            last--;
+        }
+        // Populated branches are sampled one after another on this state, the parent state is restored before every
+        // branch but the first one. Only the first kMaxSamplingParents branching gates of the path save their parent,
+        // the deeper ones replay the path from the nearest saved state instead.
+        bool save_parent = first != last && parents->size() < kMaxSamplingParents;
+        if (save_parent) {
+            parents->emplace_back(idx, *this);
+        }
+        for (size_t k = first; k < last; k++) {
+            if (counts[k] == 0) {
+                continue;
+            }
+            if (k != first) {
+                RestoreSamplingParent(circ, pr, idx, origin, *path, *parents);
+            }
+            auto branch_outcome = outcome;
+            ApplyBranch(g, k, probs[k]);
+            if (g->is_measure_ && key_map.count(g->name_) != 0) {
+                branch_outcome[key_map.at(g->name_)] = k;
+            }
+            path->push_back({idx, k, probs[k]});
+            SamplingBranch(circ, pr, idx + 1, counts[k], key_map, branch_outcome, res, n_done, rnd_eng, origin, path,
+                           parents);
+            path->pop_back();
+        }
+        if (first != last) {
+            RestoreSamplingParent(circ, pr, idx, origin, *path, *parents);
+        }
+        if (save_parent) {
+            parents->pop_back();
+        }
+        ApplyBranch(g, last, probs[last]);
+        if (g->is_measure_ && key_map.count(g->name_) != 0) {
+            outcome[key_map.at(g->name_)] = last;
+        }
+        path->push_back({idx, last, probs[last]});
+        shots = counts[last];
+    }
+    path->erase(path->begin() + path_size, path->end());
+    auto key_size = outcome.size();
+    for (size_t i = 0; i < shots; i++) {
+        std::copy(outcome.begin(), outcome.end(), res->begin() + (*n_done + i) * key_size);
+    }
+    *n_done += shots;
+}
+
+template <typename qs_policy_t_>
+void VectorState<qs_policy_t_>::RestoreSamplingParent(const circuit_t& circ, const ParameterResolver<calc_type>& pr,
+                                                      size_t idx, const derived_t& origin,
+                                                      const VT<SamplingStep>& path,
+                                                      const VT<std::pair<size_t, derived_t>>& parents) {
+    size_t base_idx = parents.empty() ? 0 : parents.back().first;
+    const auto& base = parents.empty() ? origin : parents.back().second;
+    qs_policy_t::QSMulValue(base.qs, qs, 1, dim);
+    auto step = std::find_if(path.begin(), path.end(), [&](const SamplingStep& s) { return s.idx >= base_idx; });
+    for (size_t j = base_idx; j < idx; j++) {
+        const auto& g = circ[j];
+        if (!g->is_measure_ && !g->is_channel_) {
+            ApplyGate(g, pr, false);
+            continue;
+        }
+        ApplyBranch(g, step->branch, step->prob);
+        ++step;
+    }
+}
+
+template <typename qs_policy_t_>
+auto VectorState<qs_policy_t_>::BranchProbs(const std::shared_ptr<BasicGate<calc_type>>& gate) -> VT<calc_type> {
+    if (gate->is_measure_) {
+        index_t one_mask = (1UL << gate->obj_qubits_[0]);
+        auto one_amp = qs_policy_t::ConditionalCollect(qs, one_mask, one_mask, true, dim).real();
+        return {1 - one_amp, one_amp};
+    }
+    if (gate->name_ == "PL") {
+        // branch 0, 1, 2 and 3 stand for X, Y, Z and I.
+        return gate->probs_;
+    }
+    if (gate->kraus_operator_set_.size() != 0) {
+        return KrausProbs(gate);
+    }
+    if (gate->name_ == "ADC" || gate->name_ == "PDC") {
+        // branch 0 means no damping happened, branch 1 means damping happened.
+        calc_type reduced_factor_b_square = qs_policy_t::OneStateVdot(qs, qs, gate->obj_qubits_[0], dim).real();
+        calc_type prob = gate->damping_coeff_ * reduced_factor_b_square;
+        return {1 - prob, prob};
+    }
+    throw std::runtime_error("This noise channel not implemented.");
+}
+
+template <typename qs_policy_t_>
+void VectorState<qs_policy_t_>::ApplyBranch(const std::shared_ptr<BasicGate<calc_type>>& gate, size_t branch,
+                                            calc_type prob) {
+    if (gate->is_measure_) {
+        index_t one_mask = (1UL << gate->obj_qubits_[0]);
+        index_t collapse_mask = (static_cast<index_t>(branch) << gate->obj_qubits_[0]);
+        qs_policy_t::ConditionalMul(qs, qs, one_mask, collapse_mask, 1 / std::sqrt(prob), 0.0, dim);
+    } else if (gate->name_ == "PL") {
+        if (branch == 0) {
+            qs_policy_t::ApplyX(qs, gate->obj_qubits_, gate->ctrl_qubits_, dim);
+        } else if (branch == 1) {
+            qs_policy_t::ApplyY(qs, gate->obj_qubits_, gate->ctrl_qubits_, dim);
+        } else if (branch == 2) {
+            qs_policy_t::ApplyZ(qs, gate->obj_qubits_, gate->ctrl_qubits_, dim);
+        }
+    } else if (gate->kraus_operator_set_.size() != 0) {
+        auto m = gate->kraus_operator_set_[branch];
+        if (gate->ctrl_qubits_.empty()) {
+            // Renormalize within the same pass.
+            for (auto& row : m) {
+                for (auto& v : row) {
+                    v /= std::sqrt(prob);
+                }
+            }
+            qs_policy_t::ApplySingleQubitMatrix(qs, qs, gate->obj_qubits_[0], gate->ctrl_qubits_, m, dim);
+        } else {
+            qs_policy_t::ApplySingleQubitMatrix(qs, qs, gate->obj_qubits_[0], gate->ctrl_qubits_, m, dim);
+            qs_policy_t::QSMulValue(qs, qs, 1 / std::sqrt(prob), dim);
+        }
+    } else if (gate->name_ == "ADC" || gate->name_ == "PDC") {
+        index_t one_mask = (1UL << gate->obj_qubits_[0]);
+        if (branch == 0) {
+            calc_type coeff_a = 1 / std::sqrt(prob);
+            calc_type coeff_b = std::sqrt(1 - gate->damping_coeff_) / std::sqrt(prob);
+            qs_policy_t::ConditionalMul(qs, qs, one_mask, 0, coeff_a, coeff_b, dim);
+        } else {
+            calc_type reduced_factor_b = std::sqrt(prob / gate->damping_coeff_);
+            if (gate->name_ == "ADC") {
+                std::vector<std::vector<py_qs_data_t>> m({{0, 1 / reduced_factor_b}, {0, 0}});
+                qs_policy_t::ApplySingleQubitMatrix(qs, qs, gate->obj_qubits_[0], gate->ctrl_qubits_, m, dim);
+            } else {
+                qs_policy_t::ConditionalMul(qs, qs, one_mask, one_mask, 1 / reduced_factor_b, 0, dim);
+            }
+        }
+    } else {
+        throw std::runtime_error("This noise channel not implemented.");
+    }
+}
+
+template <typename qs_policy_t_>
+auto VectorState<qs_policy_t_>::Multinomial(size_t shots, const VT<calc_type>& probs, RndEngine* rnd_eng)
+    -> VT<size_t> {
+    VT<size_t> counts(probs.size(), 0);
+    calc_type remain_prob = 1;
+    for (size_t k = 0; k + 1 < probs.size() && shots > 0; k++) {
+        double p = remain_prob > 0 ? std::clamp(probs[k] / remain_prob, 0.0, 1.0) : 1.0;
+        counts[k] = std::binomial_distribution<size_t>(shots, p)(*rnd_eng);
+        shots -= counts[k];
+        remain_prob -= probs[k];
+    }
+    counts.back() += shots;
+    return counts;
+}
 }  // namespace mindquantum::sim::vector::detail
 
 #endif
@@ -0,0 +1,200 @@
+//   Copyright 2022 <Huawei Technologies Co., Ltd>
+//
+//   Licensed under the Apache License, Version 2.0 (the "License");
+//   you may not use this file except in compliance with the License.
+//   You may obtain a copy of the License at
+//
+//       http://www.apache.org/licenses/LICENSE-2.0
+//
+//   Unless required by applicable law or agreed to in writing, software
+//   distributed under the License is distributed on an "AS IS" BASIS,
+//   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+//   See the License for the specific language governing permissions and
+//   limitations under the License.
+
+#include "simulator/densitymatrix/detail/cpu_density_matrix_policy.hpp"
+
+#include <complex>
+#include <cstdint>
+#include <memory>
+#include <stdexcept>
+#include <utility>
+#include <vector>
+
+#include "config/openmp.hpp"
+
+#include "core/utils.hpp"
+#include "simulator/utils.hpp"
+
+namespace mindquantum::sim::densitymatrix::detail {
+namespace {
+// Combined phase of terms in a pauli term group on basis state |i>, see PauliTermGroup.
+inline std::complex<calc_type> GroupPhase(index_t i, const Index* phase_masks, const std::complex<calc_type>* coeffs,
+                                          size_t n_terms) {
+    calc_type c_real = 0, c_imag = 0;
+    for (size_t k = 0; k < n_terms; k++) {
+        calc_type sign = 1 - 2 * static_cast<calc_type>(CountOne(static_cast<int64_t>(i & phase_masks[k])) & 1);
+        c_real += sign * coeffs[k].real();
+        c_imag += sign * coeffs[k].imag();
+    }
+    return {c_real, c_imag};
+}
+
+void CheckCsrDim(const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& a, index_t dim) {
+    if (dim != a->dim_) {
+        throw std::runtime_error("Sparse hamiltonian size not match with density matrix size.");
+    }
+}
+}  // namespace
+
+void CPUDensityMatrixPolicyBase::ConjTranspose(qs_data_p_t qs, index_t dim) {
+    THRESHOLD_OMP(
+        MQ_DO_PRAGMA(omp parallel for schedule(dynamic, 16)), dim * dim, DimTh, for (omp::idx_t r = 0; r < dim; r++) {
+            qs[r * dim + r] = std::conj(qs[r * dim + r]);
+            for (index_t c = r + 1; c < dim; c++) {
+                auto tmp = qs[c * dim + r];
+                qs[c * dim + r] = std::conj(qs[r * dim + c]);
+                qs[r * dim + c] = std::conj(tmp);
+            }
+        })
+}
+
+void CPUDensityMatrixPolicyBase::AddMulValue(qs_data_p_t src, qs_data_p_t des, qs_data_t value, index_t size) {
+    THRESHOLD_OMP_FOR(
+        size, DimTh, for (omp::idx_t i = 0; i < size; i++) { des[i] += value * src[i]; })
+}
+
+calc_type CPUDensityMatrixPolicyBase::DiagonalCollect(qs_data_p_t qs, index_t mask, index_t condi, index_t dim) {
+    calc_type res = 0;
+    // clang-format off
+    THRESHOLD_OMP(
+        MQ_DO_PRAGMA(omp parallel for reduction(+:res) schedule(static)), dim, DimTh,
+            for (omp::idx_t i = 0; i < dim; i++) {
+                if ((i & mask) == condi) {
+                    res += qs[i * dim + i].real();
+                }
+            })
+    // clang-format on
+    return res;
+}
+
+VT<calc_type> CPUDensityMatrixPolicyBase::GetMarginalProbs(qs_data_p_t qs, const qbits_t& objs, index_t dim) {
+    VT<calc_type> probs(static_cast<index_t>(1) << objs.size(), 0);
+    for (index_t i = 0; i < dim; i++) {
+        index_t outcome = 0;
+        for (size_t k = 0; k < objs.size(); k++) {
+            outcome |= ((i >> objs[k]) & 1) << k;
+        }
+        probs[outcome] += qs[i * dim + i].real();
+    }
+    return probs;
+}
+
+auto CPUDensityMatrixPolicyBase::ExpectationOfTerms(qs_data_p_t qs, const VT<PauliTermGroup<calc_type>>& groups,
+                                                    index_t dim) -> py_qs_data_t {
+    // H|j> = GroupPhase(j)|j^mask_f>, so that Tr(H rho) = sum_j GroupPhase(j) rho[j][j^mask_f].
+    calc_type res_real = 0, res_imag = 0;
+    for (const auto& group : groups) {
+        index_t mask_f = group.mask_f;
+        auto phase_masks = group.phase_masks.data();
+        auto coeffs = group.coeffs.data();
+        auto n_terms = group.coeffs.size();
+        calc_type this_real = 0, this_imag = 0;
+        // clang-format off
+        THRESHOLD_OMP(
+            MQ_DO_PRAGMA(omp parallel for reduction(+:this_real, this_imag) schedule(static)), dim, DimTh,
+                for (omp::idx_t j = 0; j < dim; j++) {
+                    auto v = GroupPhase(j, phase_masks, coeffs, n_terms) * qs[(j ^ mask_f) * dim + j];
+                    this_real += v.real();
+                    this_imag += v.imag();
+                })
+        // clang-format on
+        res_real += this_real;
+        res_imag += this_imag;
+    }
+    return {res_real, res_imag};
+}
+
+auto CPUDensityMatrixPolicyBase::ExpectationOfCsr(const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& a,
+                                                  qs_data_p_t qs, index_t dim) -> py_qs_data_t {
+    CheckCsrDim(a, dim);
+    auto data = a->data_;
+    auto indptr = a->indptr_;
+    auto indices = a->indices_;
+    calc_type res_real = 0, res_imag = 0;
+    // clang-format off
+    THRESHOLD_OMP(
+        MQ_DO_PRAGMA(omp parallel for reduction(+:res_real, res_imag) schedule(static)), dim, DimTh,
+            for (omp::idx_t i = 0; i < dim; i++) {
+                for (Index k = indptr[i]; k < indptr[i + 1]; k++) {
+                    auto v = data[k] * qs[i * dim + indices[k]];
+                    res_real += v.real();
+                    res_imag += v.imag();
+                }
+            })
+    // clang-format on
+    return {res_real, res_imag};
+}
+
+auto CPUDensityMatrixPolicyBase::ExpectationOfCsr(const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& a,
+                                                  const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& b,
+                                                  qs_data_p_t qs, index_t dim) -> py_qs_data_t {
+    return ExpectationOfCsr(a, qs, dim) + ExpectationOfCsr(b, qs, dim);
+}
+
+void CPUDensityMatrixPolicyBase::AddTerms(qs_data_p_t qs, const VT<PauliTermGroup<calc_type>>& groups, index_t dim) {
+    for (const auto& group : groups) {
+        index_t mask_f = group.mask_f;
+        auto phase_masks = group.phase_masks.data();
+        auto coeffs = group.coeffs.data();
+        auto n_terms = group.coeffs.size();
+        THRESHOLD_OMP_FOR(
+            dim, DimTh, for (omp::idx_t j = 0; j < dim; j++) {
+                qs[j * dim + (j ^ mask_f)] += GroupPhase(j, phase_masks, coeffs, n_terms);
+            })
+    }
+}
+
+void CPUDensityMatrixPolicyBase::AddCsr(qs_data_p_t qs, const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& a,
+                                        index_t dim) {
+    CheckCsrDim(a, dim);
+    auto data = a->data_;
+    auto indptr = a->indptr_;
+    auto indices = a->indices_;
+    THRESHOLD_OMP_FOR(
+        dim, DimTh, for (omp::idx_t i = 0; i < dim; i++) {
+            for (Index k = indptr[i]; k < indptr[i + 1]; k++) {
+                qs[indices[k] * dim + i] += data[k];
+            }
+        })
+}
+
+auto CPUDensityMatrixPolicyBase::CsrDotMatrix(const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& a,
+                                              qs_data_p_t qs, index_t dim) -> qs_data_p_t {
+    CheckCsrDim(a, dim);
+    auto out = vector_policy_t::InitState(dim * dim, false);
+    auto data = a->data_;
+    auto indptr = a->indptr_;
+    auto indices = a->indices_;
+    THRESHOLD_OMP_FOR(
+        dim * dim, DimTh, for (omp::idx_t c = 0; c < dim; c++) {
+            auto col = qs + c * dim;
+            for (index_t i = 0; i < dim; i++) {
+                for (Index k = indptr[i]; k < indptr[i + 1]; k++) {
+                    out[c * dim + i] += data[k] * col[indices[k]];
+                }
+            }
+        })
+    return out;
+}
+
+auto CPUDensityMatrixPolicyBase::CsrDotMatrix(const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& a,
+                                              const std::shared_ptr<sparse::CsrHdMatrix<calc_type>>& b,
+                                              qs_data_p_t qs, index_t dim) -> qs_data_p_t {
+    auto out = CsrDotMatrix(a, qs, dim);
+    auto out_b = CsrDotMatrix(b, qs, dim);
+    AddMulValue(out_b, out, 1, dim * dim);
+    vector_policy_t::FreeState(out_b);
+    return out;
+}
+}  // namespace mindquantum::sim::densitymatrix::detail
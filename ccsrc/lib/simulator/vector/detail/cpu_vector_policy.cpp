@@ -24,8 +24,16 @@
 #include <memory>
 #include <ratio>
 #include <stdexcept>
+#include <string>
 #include <vector>
 
+#ifndef _WIN32
+#    include <fcntl.h>
+#    include <sys/mman.h>
+#    include <sys/stat.h>
+#    include <unistd.h>
+#endif  // _WIN32
+
 #include "config/openmp.hpp"
 
 #include "core/sparse/algo.hpp"
@@ -54,6 +62,58 @@ void CPUVectorPolicyBase::FreeState(qs_data_p_t qs) {
     }
 }
 
+auto CPUVectorPolicyBase::InitMappedState(index_t dim, const std::string& path, bool restore) -> qs_data_p_t {
+#ifdef _WIN32
+    throw std::runtime_error("Memory mapped quantum state is not supported on Windows.");
+#else
+    auto size = sizeof(qs_data_t) * dim;
+    int fd = open(path.c_str(), restore ? O_RDWR : (O_RDWR | O_CREAT), 0644);
+    if (fd < 0) {
+        throw std::runtime_error("Can not open quantum state file " + path);
+    }
+    struct stat st;
+    if (restore) {
+        if (fstat(fd, &st) != 0 || static_cast<index_t>(st.st_size) != size) {
+            close(fd);
+            throw std::invalid_argument("Size of quantum state file " + path + " does not match the qubit number.");
+        }
+    } else if (ftruncate(fd, 0) != 0 || ftruncate(fd, static_cast<off_t>(size)) != 0) {
+        close(fd);
+        throw std::runtime_error("Can not resize quantum state file " + path);
+    }
+    void* data = mmap(nullptr, size, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+    close(fd);
+    if (data == MAP_FAILED) {
+        throw std::runtime_error("Can not map quantum state file " + path);
+    }
+    // The state is swept again for every run of gates, so pages must stay cached after a pass. A restored state is
+    // read in full by the first gate, so start reading it now.
+    madvise(data, size, restore ? MADV_WILLNEED : MADV_NORMAL);
+    auto qs = reinterpret_cast<qs_data_p_t>(data);
+    if (!restore) {
+        // The truncated file is already filled with zero.
+        qs[0] = 1;
+    }
+    return qs;
+#endif  // _WIN32
+}
+
+void CPUVectorPolicyBase::FreeMappedState(qs_data_p_t qs, index_t dim) {
+#ifndef _WIN32
+    if (qs != nullptr) {
+        munmap(qs, sizeof(qs_data_t) * dim);
+    }
+#endif  // _WIN32
+}
+
+void CPUVectorPolicyBase::SyncMappedState(qs_data_p_t qs, index_t dim) {
+#ifndef _WIN32
+    if (msync(qs, sizeof(qs_data_t) * dim, MS_SYNC) != 0) {
+        throw std::runtime_error("Failed to flush quantum state to file.");
+    }
+#endif  // _WIN32
+}
+
 void CPUVectorPolicyBase::Display(qs_data_p_t qs, qbit_t n_qubits, qbit_t q_limit) {
     if (n_qubits > q_limit) {
         n_qubits = q_limit;
@@ -147,6 +207,56 @@ auto CPUVectorPolicyBase::ConditionalCollect(qs_data_p_t qs, index_t mask, index
     return qs_data_t(res_real, res_imag);
 }
 
+auto CPUVectorPolicyBase::GetMarginalProbs(qs_data_p_t qs, const qbits_t& objs, index_t dim) -> VT<calc_type> {
+    // The k-th bit of an outcome is the measured value of objs[k].
+    index_t n_out = static_cast<index_t>(1) << objs.size();
+    index_t rest_mask = (dim - 1) & (~QIndexToMask(objs));
+    VT<qbit_t> rest_qubits;
+    for (qbit_t q = 0; (static_cast<index_t>(1) << q) < dim; q++) {
+        if ((rest_mask >> q) & 1) {
+            rest_qubits.push_back(q);
+        }
+    }
+    // Split the highest unmeasured qubits out of the inner loop, so that there is enough outer tasks to run in
+    // parallel even if only few qubits are measured.
+    size_t n_split = 0;
+    while (n_split < rest_qubits.size() && (n_out << n_split) < 256) {
+        n_split++;
+    }
+    auto deposit = [](const VT<qbit_t>& qubits, index_t value) {
+        index_t out = 0;
+        for (size_t j = 0; j < qubits.size(); j++) {
+            out |= ((value >> j) & 1) << qubits[j];
+        }
+        return out;
+    };
+    VT<qbit_t> split_qubits(rest_qubits.end() - n_split, rest_qubits.end());
+    index_t inner_mask = rest_mask & (~QIndexToMask(split_qubits));
+    index_t n_task = n_out << n_split;
+    VT<index_t> offsets(n_task);
+    for (index_t t = 0; t < n_task; t++) {
+        offsets[t] = deposit(objs, t & (n_out - 1)) | deposit(split_qubits, t >> objs.size());
+    }
+    VT<calc_type> partial(n_task, 0);
+    THRESHOLD_OMP_FOR(
+        dim, DimTh, for (omp::idx_t t = 0; t < static_cast<omp::idx_t>(n_task); t++) {
+            calc_type p = 0;
+            index_t r = 0;
+            // Enumerate all sub masks of inner_mask in increasing order.
+            do {
+                auto i = offsets[t] | r;
+                p += qs[i].real() * qs[i].real() + qs[i].imag() * qs[i].imag();
+                r = ((r | ~inner_mask) + 1) & inner_mask;
+            } while (r != 0);
+            partial[t] = p;
+        })
+    VT<calc_type> out(n_out, 0);
+    for (index_t t = 0; t < n_task; t++) {
+        out[t & (n_out - 1)] += partial[t];
+    }
+    return out;
+}
+
 auto CPUVectorPolicyBase::Copy(qs_data_p_t qs, index_t dim) -> qs_data_p_t {
     qs_data_p_t out = CPUVectorPolicyBase::InitState(dim, false);
     THRESHOLD_OMP_FOR(
@@ -215,6 +325,28 @@ auto CPUVectorPolicyBase::ZeroStateVdot(qs_data_p_t bra, qs_data_p_t ket, qbit_t
     return {res_real, res_imag};
 }
 
+auto CPUVectorPolicyBase::GetReducedDensityMatrix(qs_data_p_t qs, qbit_t obj_qubit, const qbits_t& ctrls,
+                                                  index_t dim) -> VVT<py_qs_data_t> {
+    SingleQubitGateMask mask({obj_qubit}, ctrls);
+    calc_type rho_00 = 0, rho_11 = 0, rho_01_real = 0, rho_01_imag = 0;
+    // clang-format off
+    THRESHOLD_OMP(
+        MQ_DO_PRAGMA(omp parallel for reduction(+:rho_00, rho_11, rho_01_real, rho_01_imag) schedule(static)), dim,
+            DimTh,
+            for (omp::idx_t l = 0; l < (dim / 2); l++) {
+                auto i = ((l & mask.obj_high_mask) << 1) + (l & mask.obj_low_mask);
+                if ((i & mask.ctrl_mask) == mask.ctrl_mask) {
+                    auto j = i + mask.obj_mask;
+                    rho_00 += std::norm(qs[i]);
+                    rho_11 += std::norm(qs[j]);
+                    rho_01_real += qs[i].real() * qs[j].real() + qs[i].imag() * qs[j].imag();
+                    rho_01_imag += qs[i].imag() * qs[j].real() - qs[i].real() * qs[j].imag();
+                }
+            })
+    // clang-format on
+    return {{rho_00, {rho_01_real, rho_01_imag}}, {{rho_01_real, -rho_01_imag}, rho_11}};
+}
+
 auto CPUVectorPolicyBase::GetQS(qs_data_p_t qs, index_t dim) -> py_qs_datas_t {
     py_qs_datas_t out(dim);
     THRESHOLD_OMP_FOR(
@@ -230,30 +362,98 @@ void CPUVectorPolicyBase::SetQS(qs_data_p_t qs, const py_qs_datas_t& qs_out, ind
         dim, DimTh, for (omp::idx_t i = 0; i < dim; i++) { qs[i] = qs_out[i]; })
 }
 
-auto CPUVectorPolicyBase::ApplyTerms(qs_data_p_t qs, const std::vector<PauliTerm<calc_type>>& ham, index_t dim)
+void CPUVectorPolicyBase::SetQS(qs_data_p_t qs, const py_qs_data_t* qs_out, index_t dim) {
+    THRESHOLD_OMP_FOR(
+        dim, DimTh, for (omp::idx_t i = 0; i < dim; i++) { qs[i] = qs_out[i]; })
+}
+
+namespace {
+// Combined phase of terms in a pauli term group on basis state |i>, see PauliTermGroup.
+inline std::complex<calc_type> GroupPhase(index_t i, const Index* phase_masks, const std::complex<calc_type>* coeffs,
+                                          size_t n_terms) {
+    calc_type c_real = 0, c_imag = 0;
+    for (size_t k = 0; k < n_terms; k++) {
+        calc_type sign = 1 - 2 * static_cast<calc_type>(CountOne(static_cast<int64_t>(i & phase_masks[k])) & 1);
+        c_real += sign * coeffs[k].real();
+        c_imag += sign * coeffs[k].imag();
+    }
+    return {c_real, c_imag};
+}
+
+// Mask of all bits lower than the highest set bit of mask.
+inline index_t LowerBitsMask(index_t mask) {
+    while (mask & (mask - 1)) {
+        mask &= mask - 1;
+    }
+    return mask - 1;
+}
+}  // namespace
+
+auto CPUVectorPolicyBase::ApplyTerms(qs_data_p_t qs, const VT<PauliTermGroup<calc_type>>& groups, index_t dim)
     -> qs_data_p_t {
     qs_data_p_t out = CPUVectorPolicyBase::InitState(dim, false);
-    for (const auto& [pauli_string, coeff_] : ham) {
-        auto mask = GenPauliMask(pauli_string);
-        auto mask_f = mask.mask_x | mask.mask_y;
-        auto coeff = coeff_;
+    for (const auto& group : groups) {
+        index_t mask_f = group.mask_f;
+        auto phase_masks = group.phase_masks.data();
+        auto coeffs = group.coeffs.data();
+        auto n_terms = group.coeffs.size();
+        if (mask_f == 0) {
+            THRESHOLD_OMP_FOR(
+                dim, DimTh,
+                for (omp::idx_t i = 0; i < dim; i++) { out[i] += qs[i] * GroupPhase(i, phase_masks, coeffs, n_terms); })
+            continue;
+        }
+        // Only visit i whose highest flipped bit is zero, and update the pair (i, i^mask_f) together.
+        auto low_mask = LowerBitsMask(mask_f);
         THRESHOLD_OMP_FOR(
-            dim, DimTh, for (omp::idx_t i = 0; i < dim; i++) {
-                auto j = (i ^ mask_f);
-                if (i <= j) {
-                    auto axis2power = CountOne(static_cast<int64_t>(i & mask.mask_z));  // -1
-                    auto axis3power = CountOne(static_cast<int64_t>(i & mask.mask_y));  // -1j
-                    auto c = POLAR[static_cast<char>((mask.num_y + 2 * axis3power + 2 * axis2power) & 3)];
-                    out[j] += qs[i] * coeff * c;
-                    if (i != j) {
-                        out[i] += qs[j] * coeff / c;
-                    }
-                }
+            dim, DimTh, for (omp::idx_t l = 0; l < (dim >> 1); l++) {
+                index_t i = ((l & ~low_mask) << 1) | (l & low_mask);
+                index_t j = i ^ mask_f;
+                auto c = GroupPhase(i, phase_masks, coeffs, n_terms);
+                out[j] += qs[i] * c;
+                out[i] += qs[j] * std::conj(c);
             })
     }
     return out;
 };
 
+auto CPUVectorPolicyBase::ExpectationOfTerms(qs_data_p_t qs, const VT<PauliTermGroup<calc_type>>& groups,
+                                             index_t dim) -> py_qs_data_t {
+    calc_type res = 0;
+    for (const auto& group : groups) {
+        index_t mask_f = group.mask_f;
+        auto phase_masks = group.phase_masks.data();
+        auto coeffs = group.coeffs.data();
+        auto n_terms = group.coeffs.size();
+        calc_type this_res = 0;
+        if (mask_f == 0) {
+            // clang-format off
+            THRESHOLD_OMP(
+                MQ_DO_PRAGMA(omp parallel for reduction(+:this_res) schedule(static)), dim, DimTh,
+                    for (omp::idx_t i = 0; i < dim; i++) {
+                        this_res += std::norm(qs[i]) * GroupPhase(i, phase_masks, coeffs, n_terms).real();
+                    })
+            // clang-format on
+            res += this_res;
+            continue;
+        }
+        // The group is hermitian, so the pair (i, i^mask_f) contributes 2 * Re(conj(qs[i^mask_f]) * c * qs[i]).
+        auto low_mask = LowerBitsMask(mask_f);
+        // clang-format off
+        THRESHOLD_OMP(
+            MQ_DO_PRAGMA(omp parallel for reduction(+:this_res) schedule(static)), dim, DimTh,
+                for (omp::idx_t l = 0; l < (dim >> 1); l++) {
+                    index_t i = ((l & ~low_mask) << 1) | (l & low_mask);
+                    auto v = std::conj(qs[i ^ mask_f]) * qs[i];
+                    auto c = GroupPhase(i, phase_masks, coeffs, n_terms);
+                    this_res += v.real() * c.real() - v.imag() * c.imag();
+                })
+        // clang-format on
+        res += 2 * this_res;
+    }
+    return {res, 0};
+}
+
 void CPUVectorPolicyBase::ApplySWAP(qs_data_p_t qs, const qbits_t& objs, const qbits_t& ctrls, index_t dim) {
     DoubleQubitGateMask mask(objs, ctrls);
     if (!mask.ctrl_mask) {
@@ -123,7 +123,7 @@ auto CPUVectorPolicyBase::ExpectDiffSingleQubitMatrix(qs_data_p_t bra, qs_data_p
                     auto i = ((l & mask.obj_high_mask) << 1) + (l & mask.obj_low_mask);
                     auto j = i + mask.obj_mask;
                     auto t1 = m[0][0] * ket[i] + m[0][1] * ket[j];
-                    auto t2 = m[1][0] * ket[i] + [1][1] * ket[j];
+                    auto t2 = m[1][0] * ket[i] + m[1][1] * ket[j];
                     auto this_res = std::conj(bra[i]) * t1 + std::conj(bra[j]) * t2;
                     res_real += this_res.real();
                     res_imag += this_res.imag();
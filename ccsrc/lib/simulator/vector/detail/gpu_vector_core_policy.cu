@@ -428,30 +428,4 @@ __global__ void ApplyPSCoreWithCtrlDiff(GPUVectorPolicyBase::qs_data_p_t qs, ind
     }
 }
 
-__global__ void ApplyTerm(GPUVectorPolicyBase::qs_data_p_t des, GPUVectorPolicyBase::qs_data_p_t src, calc_type coeff,
-                          index_t num_y, index_t mask_y, index_t mask_z, index_t mask_f, index_t dim) {
-    index_t index = threadIdx.x + blockIdx.x * blockDim.x;
-    index_t stride = blockDim.x * gridDim.x;
-    for (index_t i = index; i < dim; i += stride) {
-        auto j = (i ^ mask_f);
-        if (i <= j) {
-            auto axis2power = __popcll(i & mask_z);
-            auto axis3power = __popcll(i & mask_y);
-            auto idx = (num_y + 2 * axis3power + 2 * axis2power) & 3;
-            auto c = GPUVectorPolicyBase::qs_data_t(1, 0);
-            if (idx == 1) {
-                c = GPUVectorPolicyBase::qs_data_t(0, 1);
-            } else if (idx == 2) {
-                c = GPUVectorPolicyBase::qs_data_t(-1, 0);
-            } else if (idx == 3) {
-                c = GPUVectorPolicyBase::qs_data_t(0, -1);
-            }
-            des[j] += src[i] * coeff * c;
-            if (i != j) {
-                des[i] += src[j] * coeff / c;
-            }
-        }
-    }
-}
-
 }  // namespace mindquantum::sim::vector::detail
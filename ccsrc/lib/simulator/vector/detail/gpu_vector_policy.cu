@@ -17,6 +17,7 @@
 #include <complex>
 #include <cstdlib>
 #include <stdexcept>
+#include <string>
 
 #include <thrust/transform_reduce.h>
 
@@ -46,6 +47,16 @@ void GPUVectorPolicyBase::FreeState(qs_data_p_t qs) {
     }
 }
 
+auto GPUVectorPolicyBase::InitMappedState(index_t dim, const std::string& path, bool restore) -> qs_data_p_t {
+    throw std::runtime_error("Memory mapped quantum state is not supported by gpu simulator.");
+}
+
+void GPUVectorPolicyBase::FreeMappedState(qs_data_p_t qs, index_t dim) {
+}
+
+void GPUVectorPolicyBase::SyncMappedState(qs_data_p_t qs, index_t dim) {
+}
+
 void GPUVectorPolicyBase::Reset(qs_data_p_t qs, index_t dim) {
     cudaMemset(qs, 0, sizeof(qs_data_t) * dim);
     qs_data_t one(1, 0);
@@ -149,6 +160,31 @@ auto GPUVectorPolicyBase::ConditionalCollect(qs_data_p_t qs, index_t mask, index
     return res;
 }
 
+auto GPUVectorPolicyBase::GetMarginalProbs(qs_data_p_t qs, const qbits_t& objs, index_t dim) -> VT<calc_type> {
+    // The k-th bit of an outcome is the measured value of objs[k].
+    index_t n_out = static_cast<index_t>(1) << objs.size();
+    auto n_objs = objs.size();
+    qbit_t* dev_objs;
+    calc_type* dev_out;
+    cudaMalloc((void**) &dev_objs, sizeof(qbit_t) * n_objs);  // NOLINT
+    cudaMemcpy(dev_objs, objs.data(), sizeof(qbit_t) * n_objs, cudaMemcpyHostToDevice);
+    cudaMalloc((void**) &dev_out, sizeof(calc_type) * n_out);  // NOLINT
+    cudaMemset(dev_out, 0, sizeof(calc_type) * n_out);
+    thrust::counting_iterator<index_t> l(0);
+    thrust::for_each(l, l + dim, [=] __device__(index_t l) {
+        index_t k = 0;
+        for (size_t j = 0; j < n_objs; j++) {
+            k |= ((l >> dev_objs[j]) & 1) << j;
+        }
+        atomicAdd(dev_out + k, qs[l].real() * qs[l].real() + qs[l].imag() * qs[l].imag());
+    });
+    VT<calc_type> out(n_out);
+    cudaMemcpy(out.data(), dev_out, sizeof(calc_type) * n_out, cudaMemcpyDeviceToHost);
+    cudaFree(dev_objs);
+    cudaFree(dev_out);
+    return out;
+}
+
 auto GPUVectorPolicyBase::GetQS(qs_data_p_t qs, index_t dim) -> py_qs_datas_t {
     py_qs_datas_t out(dim);
     cudaMemcpy(out.data(), qs, sizeof(qs_data_t) * dim, cudaMemcpyDeviceToHost);
@@ -162,44 +198,126 @@ void GPUVectorPolicyBase::SetQS(qs_data_p_t qs, const py_qs_datas_t& qs_out, ind
     cudaMemcpy(qs, qs_out.data(), sizeof(qs_data_t) * dim, cudaMemcpyHostToDevice);
 }
 
-auto GPUVectorPolicyBase::ApplyTerms(qs_data_p_t qs, const std::vector<PauliTerm<calc_type>>& ham, index_t dim)
+void GPUVectorPolicyBase::SetQS(qs_data_p_t qs, const py_qs_data_t* qs_out, index_t dim) {
+    cudaMemcpy(qs, qs_out, sizeof(qs_data_t) * dim, cudaMemcpyHostToDevice);
+}
+
+namespace {
+// Pauli term groups in device memory, the terms of k-th group are in [offsets[k], offsets[k + 1]).
+struct DevicePauliTermGroups {
+    Index* phase_masks = nullptr;
+    GPUVectorPolicyBase::qs_data_t* coeffs = nullptr;
+    VT<size_t> offsets = {0};
+
+    explicit DevicePauliTermGroups(const VT<PauliTermGroup<calc_type>>& groups) {
+        VT<Index> host_masks;
+        VT<std::complex<calc_type>> host_coeffs;
+        for (const auto& group : groups) {
+            host_masks.insert(host_masks.end(), group.phase_masks.begin(), group.phase_masks.end());
+            host_coeffs.insert(host_coeffs.end(), group.coeffs.begin(), group.coeffs.end());
+            offsets.push_back(host_masks.size());
+        }
+        cudaMalloc((void**) &phase_masks, sizeof(Index) * host_masks.size());                        // NOLINT
+        cudaMalloc((void**) &coeffs, sizeof(GPUVectorPolicyBase::qs_data_t) * host_coeffs.size());  // NOLINT
+        cudaMemcpy(phase_masks, host_masks.data(), sizeof(Index) * host_masks.size(), cudaMemcpyHostToDevice);
+        cudaMemcpy(coeffs, host_coeffs.data(), sizeof(GPUVectorPolicyBase::qs_data_t) * host_coeffs.size(),
+                   cudaMemcpyHostToDevice);
+    }
+
+    DevicePauliTermGroups(const DevicePauliTermGroups&) = delete;
+    DevicePauliTermGroups& operator=(const DevicePauliTermGroups&) = delete;
+
+    ~DevicePauliTermGroups() {
+        cudaFree(phase_masks);
+        cudaFree(coeffs);
+    }
+};
+
+// Combined phase of terms in a pauli term group on basis state |i>, see PauliTermGroup.
+__device__ GPUVectorPolicyBase::qs_data_t GroupPhase(index_t i, const Index* phase_masks,
+                                                     const GPUVectorPolicyBase::qs_data_t* coeffs, size_t n_terms) {
+    GPUVectorPolicyBase::qs_data_t c(0, 0);
+    for (size_t k = 0; k < n_terms; k++) {
+        if (__popcll(i & phase_masks[k]) & 1) {
+            c -= coeffs[k];
+        } else {
+            c += coeffs[k];
+        }
+    }
+    return c;
+}
+
+// Mask of all bits lower than the highest set bit of mask.
+index_t LowerBitsMask(index_t mask) {
+    while (mask & (mask - 1)) {
+        mask &= mask - 1;
+    }
+    return mask - 1;
+}
+}  // namespace
+
+auto GPUVectorPolicyBase::ApplyTerms(qs_data_p_t qs, const VT<PauliTermGroup<calc_type>>& groups, index_t dim)
     -> qs_data_p_t {
     qs_data_p_t out = GPUVectorPolicyBase::InitState(dim, false);
-    for (const auto& [pauli_string, coeff] : ham) {
-        auto mask = GenPauliMask(pauli_string);
-        auto mask_f = mask.mask_x | mask.mask_y;
-        if (dim >= (1UL << 18)) {
-            auto mask_z = mask.mask_z;
-            auto mask_y = mask.mask_y;
-            auto num_y = mask.num_y;
-            auto this_coeff = qs_data_t(coeff);
-            thrust::counting_iterator<index_t> i(0);
-            thrust::for_each(i, i + dim, [=] __device__(index_t i) {
-                auto j = (i ^ mask_f);
-                if (i <= j) {
-                    auto axis2power = __popcll(i & mask_z);
-                    auto axis3power = __popcll(i & mask_y);
-                    auto idx = (num_y + 2 * axis3power + 2 * axis2power) & 3;
-                    auto c = GPUVectorPolicyBase::qs_data_t(1, 0);
-                    if (idx == 1) {
-                        c = GPUVectorPolicyBase::qs_data_t(0, 1);
-                    } else if (idx == 2) {
-                        c = GPUVectorPolicyBase::qs_data_t(-1, 0);
-                    } else if (idx == 3) {
-                        c = GPUVectorPolicyBase::qs_data_t(0, -1);
-                    }
-                    out[j] += qs[i] * this_coeff * c;
-                    if (i != j) {
-                        out[i] += qs[j] * this_coeff / c;
-                    }
-                }
+    DevicePauliTermGroups dev_groups(groups);
+    thrust::counting_iterator<index_t> l(0);
+    for (size_t k = 0; k < groups.size(); k++) {
+        index_t mask_f = groups[k].mask_f;
+        auto phase_masks = dev_groups.phase_masks + dev_groups.offsets[k];
+        auto coeffs = dev_groups.coeffs + dev_groups.offsets[k];
+        auto n_terms = groups[k].coeffs.size();
+        if (mask_f == 0) {
+            thrust::for_each(l, l + dim, [=] __device__(index_t i) {
+                out[i] += qs[i] * GroupPhase(i, phase_masks, coeffs, n_terms);
             });
-        } else {
-            ApplyTerm<<<128, 128>>>(out, qs, coeff, mask.num_y, mask.mask_y, mask.mask_z, mask_f, dim);
+            continue;
         }
+        // Only visit i whose highest flipped bit is zero, and update the pair (i, i^mask_f) together.
+        auto low_mask = LowerBitsMask(mask_f);
+        thrust::for_each(l, l + dim / 2, [=] __device__(index_t l) {
+            index_t i = ((l & ~low_mask) << 1) | (l & low_mask);
+            index_t j = i ^ mask_f;
+            auto c = GroupPhase(i, phase_masks, coeffs, n_terms);
+            out[j] += qs[i] * c;
+            out[i] += qs[j] * thrust::conj(c);
+        });
     }
     return out;
 };
+
+auto GPUVectorPolicyBase::ExpectationOfTerms(qs_data_p_t qs, const VT<PauliTermGroup<calc_type>>& groups,
+                                             index_t dim) -> py_qs_data_t {
+    calc_type res = 0;
+    DevicePauliTermGroups dev_groups(groups);
+    thrust::counting_iterator<index_t> l(0);
+    for (size_t k = 0; k < groups.size(); k++) {
+        index_t mask_f = groups[k].mask_f;
+        auto phase_masks = dev_groups.phase_masks + dev_groups.offsets[k];
+        auto coeffs = dev_groups.coeffs + dev_groups.offsets[k];
+        auto n_terms = groups[k].coeffs.size();
+        if (mask_f == 0) {
+            res += thrust::transform_reduce(
+                l, l + dim,
+                [=] __device__(index_t i) {
+                    return thrust::norm(qs[i]) * GroupPhase(i, phase_masks, coeffs, n_terms).real();
+                },
+                calc_type(0), thrust::plus<calc_type>());
+            continue;
+        }
+        // The group is hermitian, so the pair (i, i^mask_f) contributes 2 * Re(conj(qs[i^mask_f]) * c * qs[i]).
+        auto low_mask = LowerBitsMask(mask_f);
+        auto pair_sum = thrust::transform_reduce(
+            l, l + dim / 2,
+            [=] __device__(index_t l) {
+                index_t i = ((l & ~low_mask) << 1) | (l & low_mask);
+                return (thrust::conj(qs[i ^ mask_f]) * qs[i] * GroupPhase(i, phase_masks, coeffs, n_terms)).real();
+            },
+            calc_type(0), thrust::plus<calc_type>());
+        res += 2 * pair_sum;
+    }
+    return {res, 0};
+}
+
 auto GPUVectorPolicyBase::Copy(qs_data_p_t qs, index_t dim) -> qs_data_p_t {
     qs_data_p_t out;
     cudaMalloc((void**) &out, sizeof(qs_data_t) * dim);  // NOLINT
@@ -261,6 +379,39 @@ auto GPUVectorPolicyBase::ZeroStateVdot(qs_data_p_t bra, qs_data_p_t ket, qbit_t
         qs_data_t(0, 0), thrust::plus<qs_data_t>());
 }
 
+auto GPUVectorPolicyBase::GetReducedDensityMatrix(qs_data_p_t qs, qbit_t obj_qubit, const qbits_t& ctrls,
+                                                  index_t dim) -> VVT<py_qs_data_t> {
+    SingleQubitGateMask mask({obj_qubit}, ctrls);
+    auto obj_high_mask = mask.obj_high_mask;
+    auto obj_low_mask = mask.obj_low_mask;
+    auto obj_mask = mask.obj_mask;
+    auto ctrl_mask = mask.ctrl_mask;
+    thrust::counting_iterator<size_t> l(0);
+    // The diagonal elements rho_00 and rho_11 are packed into the real and imaginary part.
+    qs_data_t diag = thrust::transform_reduce(
+        l, l + dim / 2,
+        [=] __device__(size_t l) {
+            auto i = ((l & obj_high_mask) << 1) + (l & obj_low_mask);
+            if ((i & ctrl_mask) != ctrl_mask) {
+                return qs_data_t(0, 0);
+            }
+            return qs_data_t(thrust::norm(qs[i]), thrust::norm(qs[i + obj_mask]));
+        },
+        qs_data_t(0, 0), thrust::plus<qs_data_t>());
+    qs_data_t rho_01 = thrust::transform_reduce(
+        l, l + dim / 2,
+        [=] __device__(size_t l) {
+            auto i = ((l & obj_high_mask) << 1) + (l & obj_low_mask);
+            if ((i & ctrl_mask) != ctrl_mask) {
+                return qs_data_t(0, 0);
+            }
+            return qs[i] * thrust::conj(qs[i + obj_mask]);
+        },
+        qs_data_t(0, 0), thrust::plus<qs_data_t>());
+    py_qs_data_t off_diag(rho_01.real(), rho_01.imag());
+    return {{diag.real(), off_diag}, {std::conj(off_diag), diag.imag()}};
+}
+
 void GPUVectorPolicyBase::ApplySWAP(qs_data_p_t qs, const qbits_t& objs, const qbits_t& ctrls, index_t dim) {
     DoubleQubitGateMask mask(objs, ctrls);
     thrust::counting_iterator<index_t> l(0);
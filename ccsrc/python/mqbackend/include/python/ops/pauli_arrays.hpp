@@ -0,0 +1,282 @@
+//   Copyright 2022 <Huawei Technologies Co., Ltd>
+//
+//   Licensed under the Apache License, Version 2.0 (the "License");
+//   you may not use this file except in compliance with the License.
+//   You may obtain a copy of the License at
+//
+//       http://www.apache.org/licenses/LICENSE-2.0
+//
+//   Unless required by applicable law or agreed to in writing, software
+//   distributed under the License is distributed on an "AS IS" BASIS,
+//   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+//   See the License for the specific language governing permissions and
+//   limitations under the License.
+
+#ifndef MQ_PYTHON_PAULI_ARRAYS_HPP
+#define MQ_PYTHON_PAULI_ARRAYS_HPP
+
+#include <algorithm>
+#include <complex>
+#include <cstdint>
+#include <map>
+#include <stdexcept>
+#include <string>
+#include <type_traits>
+#include <utility>
+
+#include <pybind11/numpy.h>
+#include <pybind11/pybind11.h>
+
+#include "config/type_traits.hpp"
+
+#include "core/mq_base_types.hpp"
+#include "core/parameter_resolver.hpp"
+#include "core/sparse/algo.hpp"
+#include "core/utils.hpp"
+#include "ops/gates/details/pauli_string.hpp"
+#include "ops/gates/qubit_operator.hpp"
+#include "ops/gates/term_value.hpp"
+
+// Terms of a qubit operator are exchanged with NumPy as four flat arrays:
+//   - indices (uint32): qubit index of every local operator, term after term
+//   - paulis (uint8): Pauli code of every local operator, with 0 = I, 1 = X, 2 = Y and 3 = Z
+//   - coeffs: coefficient of every term
+//   - offsets (int64): the local operators of term i are indices[offsets[i]:offsets[i + 1]]
+
+namespace mindquantum::python {
+template <typename T>
+using array_in_t = pybind11::array_t<T, pybind11::array::c_style | pybind11::array::forcecast>;
+
+namespace details {
+template <typename coeff_t>
+struct array_scalar {
+    using type = coeff_t;
+};
+
+template <typename float_t>
+struct array_scalar<ParameterResolver<float_t>> {
+    using type = float_t;
+};
+
+template <typename coeff_t>
+using array_scalar_t = typename array_scalar<coeff_t>::type;
+
+template <typename coeff_t>
+auto numerical_value(const coeff_t& coeff) {
+    return coeff;
+}
+
+template <typename float_t>
+auto numerical_value(const ParameterResolver<float_t>& coeff) {
+    if (!coeff.IsConst()) {
+        throw std::invalid_argument("Cannot convert a parameterized operator to arrays.");
+    }
+    return coeff.const_value;
+}
+
+//! Check the consistency of the arrays describing a list of Pauli terms and return the number of terms.
+template <typename coeff_t>
+pybind11::ssize_t CheckPauliArrays(const array_in_t<uint32_t>& indices, const array_in_t<uint8_t>& paulis,
+                                   const array_in_t<coeff_t>& coeffs, const array_in_t<int64_t>& offsets) {
+    if (indices.ndim() != 1 || paulis.ndim() != 1 || coeffs.ndim() != 1 || offsets.ndim() != 1) {
+        throw std::invalid_argument("Pauli term arrays must be one dimension.");
+    }
+    if (indices.size() != paulis.size()) {
+        throw std::invalid_argument("indices and paulis must have the same size.");
+    }
+    if (offsets.size() != coeffs.size() + 1) {
+        throw std::invalid_argument("offsets must have one more element than coeffs.");
+    }
+    const auto* offsets_ptr = offsets.data();
+    if (offsets_ptr[0] != 0 || offsets_ptr[coeffs.size()] != indices.size()) {
+        throw std::invalid_argument("offsets must start at 0 and end at the size of indices.");
+    }
+    if (!std::is_sorted(offsets_ptr, offsets_ptr + offsets.size())) {
+        throw std::invalid_argument("offsets must be non-decreasing.");
+    }
+    const auto* paulis_ptr = paulis.data();
+    if (std::any_of(paulis_ptr, paulis_ptr + paulis.size(), [](uint8_t code) { return code > 3; })) {
+        throw std::invalid_argument("Pauli codes must be 0 (I), 1 (X), 2 (Y) or 3 (Z).");
+    }
+    return coeffs.size();
+}
+}  // namespace details
+
+// -----------------------------------------------------------------------------
+
+//! Export the terms of a qubit operator as (indices, paulis, coeffs, offsets) arrays.
+template <typename op_t>
+pybind11::tuple QubitOperatorToArrays(const op_t& qubit_op) {
+    using scalar_t = details::array_scalar_t<typename op_t::coefficient_t>;
+    const auto& terms = qubit_op.get_terms();
+
+    std::size_t n_local_ops = 0;
+    for (const auto& [local_ops, coeff] : terms) {
+        n_local_ops += local_ops.size();
+    }
+
+    pybind11::array_t<uint32_t> indices(n_local_ops);
+    pybind11::array_t<uint8_t> paulis(n_local_ops);
+    pybind11::array_t<scalar_t> coeffs(std::size(terms));
+    pybind11::array_t<int64_t> offsets(std::size(terms) + 1);
+    auto* indices_ptr = indices.mutable_data();
+    auto* paulis_ptr = paulis.mutable_data();
+    auto* coeffs_ptr = coeffs.mutable_data();
+    auto* offsets_ptr = offsets.mutable_data();
+
+    int64_t pos = 0;
+    offsets_ptr[0] = 0;
+    for (const auto& [local_ops, coeff] : terms) {
+        for (const auto& [qubit_id, value] : local_ops) {
+            indices_ptr[pos] = qubit_id;
+            paulis_ptr[pos] = static_cast<uint8_t>(value) - static_cast<uint8_t>(ops::TermValue::I);
+            ++pos;
+        }
+        *coeffs_ptr++ = details::numerical_value(coeff);
+        *++offsets_ptr = pos;
+    }
+    return pybind11::make_tuple(indices, paulis, coeffs, offsets);
+}
+
+//! Build a qubit operator from (indices, paulis, coeffs, offsets) arrays.
+/*!
+ * The local operators of a term need neither be sorted nor be acting on distinct qubits, and identical terms are
+ * summed together.
+ */
+template <typename op_t>
+op_t QubitOperatorFromArrays(const array_in_t<uint32_t>& indices, const array_in_t<uint8_t>& paulis,
+                             const array_in_t<details::array_scalar_t<typename op_t::coefficient_t>>& coeffs,
+                             const array_in_t<int64_t>& offsets) {
+    using coeff_t = typename op_t::coefficient_t;
+    static_assert(traits::is_complex_v<coeff_t>, "Pauli products require complex coefficients.");
+    using pauli_string_t = ops::details::PauliString;
+
+    const auto n_terms = details::CheckPauliArrays(indices, paulis, coeffs, offsets);
+    const auto* indices_ptr = indices.data();
+    const auto* paulis_ptr = paulis.data();
+    const auto* coeffs_ptr = coeffs.data();
+    const auto* offsets_ptr = offsets.data();
+
+    const auto max_index = indices.size() == 0 ? 0U : *std::max_element(indices_ptr, indices_ptr + indices.size());
+    const auto n_words = pauli_string_t::n_words(max_index);
+
+    ops::details::PauliStringSum<coeff_t> sum;
+    ops::terms_t local_ops;
+    for (pybind11::ssize_t term = 0; term < n_terms; ++term) {
+        local_ops.clear();
+        for (auto pos = offsets_ptr[term]; pos < offsets_ptr[term + 1]; ++pos) {
+            if (paulis_ptr[pos] != 0) {
+                local_ops.emplace_back(indices_ptr[pos],
+                                       static_cast<ops::TermValue>(paulis_ptr[pos]
+                                                                   + static_cast<uint8_t>(ops::TermValue::I)));
+            }
+        }
+        const auto [string, power] = pauli_string_t::from_terms(local_ops, n_words);
+        sum.template add<typename op_t::coeff_policy_t>(string, coeff_t{coeffs_ptr[term]}, power);
+    }
+
+    typename op_t::coeff_term_dict_t terms;
+    for (const auto& [string, coeff] : sum.values()) {
+        terms.emplace_back(string.to_terms(), coeff);
+    }
+    return op_t{std::move(terms)};
+}
+
+//! Convert (indices, paulis, coeffs, offsets) arrays to the Pauli terms of a Hamiltonian.
+/*!
+ * \note Contrary to QubitOperatorFromArrays, the terms are expected to be already simplified.
+ */
+template <typename T>
+VT<PauliTerm<T>> PauliTermsFromArrays(const array_in_t<uint32_t>& indices, const array_in_t<uint8_t>& paulis,
+                                      const array_in_t<T>& coeffs, const array_in_t<int64_t>& offsets) {
+    constexpr char pauli_names[] = {'I', 'X', 'Y', 'Z'};
+
+    const auto n_terms = details::CheckPauliArrays(indices, paulis, coeffs, offsets);
+    const auto* indices_ptr = indices.data();
+    const auto* paulis_ptr = paulis.data();
+    const auto* coeffs_ptr = coeffs.data();
+    const auto* offsets_ptr = offsets.data();
+
+    VT<PauliTerm<T>> terms;
+    terms.reserve(n_terms);
+    for (pybind11::ssize_t term = 0; term < n_terms; ++term) {
+        VT<PauliWord> words;
+        words.reserve(offsets_ptr[term + 1] - offsets_ptr[term]);
+        for (auto pos = offsets_ptr[term]; pos < offsets_ptr[term + 1]; ++pos) {
+            if (paulis_ptr[pos] != 0) {
+                words.emplace_back(indices_ptr[pos], pauli_names[paulis_ptr[pos]]);
+            }
+        }
+        terms.emplace_back(std::move(words), coeffs_ptr[term]);
+    }
+    return terms;
+}
+
+//! Group (indices, paulis, coeffs, offsets) arrays of simplified pauli terms by the qubits they flip.
+/*!
+ * Same as GroupPauliTerms, but for complex coefficients.
+ */
+template <typename T>
+VT<PauliTermGroup<T>> PauliTermGroupsFromArrays(const array_in_t<uint32_t>& indices, const array_in_t<uint8_t>& paulis,
+                                                const array_in_t<CT<T>>& coeffs, const array_in_t<int64_t>& offsets,
+                                                Index n_qubits) {
+    const auto n_terms = details::CheckPauliArrays(indices, paulis, coeffs, offsets);
+    const auto* indices_ptr = indices.data();
+    const auto* paulis_ptr = paulis.data();
+    const auto* coeffs_ptr = coeffs.data();
+    const auto* offsets_ptr = offsets.data();
+
+    std::map<Index, PauliTermGroup<T>> groups;
+    for (pybind11::ssize_t term = 0; term < n_terms; ++term) {
+        Index masks[4] = {0, 0, 0, 0};
+        for (auto pos = offsets_ptr[term]; pos < offsets_ptr[term + 1]; ++pos) {
+            if (indices_ptr[pos] >= n_qubits) {
+                throw std::invalid_argument("Qubit index " + std::to_string(indices_ptr[pos]) + " is out of range for "
+                                            + std::to_string(n_qubits) + " qubits.");
+            }
+            masks[paulis_ptr[pos]] |= Index{1} << indices_ptr[pos];
+        }
+        const auto mask_f = masks[1] | masks[2];
+        auto& group = groups[mask_f];
+        group.mask_f = mask_f;
+        group.phase_masks.push_back(masks[2] | masks[3]);
+        group.coeffs.push_back(static_cast<CT<T>>(POLAR[CountOne(masks[2]) & 3]) * coeffs_ptr[term]);
+    }
+    VT<PauliTermGroup<T>> out;
+    out.reserve(groups.size());
+    for (auto& it : groups) {
+        out.push_back(std::move(it.second));
+    }
+    return out;
+}
+
+//! Build the CSR matrix of a sum of simplified pauli terms given as (indices, paulis, coeffs, offsets) arrays.
+/*!
+ * \return The (data, indices, indptr) arrays of the matrix, data being complex64 if single_precision is true and
+ * complex128 otherwise.
+ */
+inline pybind11::tuple PauliArraysToCsr(const array_in_t<uint32_t>& indices, const array_in_t<uint8_t>& paulis,
+                                        const array_in_t<std::complex<double>>& coeffs,
+                                        const array_in_t<int64_t>& offsets, Index n_qubits, bool single_precision) {
+    if (n_qubits < 0 || n_qubits > 62) {
+        throw std::invalid_argument("n_qubits should be between 0 and 62, but get " + std::to_string(n_qubits) + ".");
+    }
+    const auto groups = PauliTermGroupsFromArrays<double>(indices, paulis, coeffs, offsets, n_qubits);
+    const auto dim = Index{1} << n_qubits;
+    const auto nnz = dim * static_cast<Index>(groups.size());
+
+    pybind11::array_t<Index> indptr(dim + 1);
+    pybind11::array_t<Index> col_indices(nnz);
+    if (single_precision) {
+        pybind11::array_t<std::complex<float>> data(nnz);
+        sparse::PauliTermGroupsToCsr(groups, dim, indptr.mutable_data(), col_indices.mutable_data(),
+                                     data.mutable_data());
+        return pybind11::make_tuple(data, col_indices, indptr);
+    }
+    pybind11::array_t<std::complex<double>> data(nnz);
+    sparse::PauliTermGroupsToCsr(groups, dim, indptr.mutable_data(), col_indices.mutable_data(), data.mutable_data());
+    return pybind11::make_tuple(data, col_indices, indptr);
+}
+}  // namespace mindquantum::python
+
+#endif /* MQ_PYTHON_PAULI_ARRAYS_HPP */
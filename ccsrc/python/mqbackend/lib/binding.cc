@@ -13,6 +13,7 @@
  * See the License for the specific language governing permissions and
  * limitations under the License.
  */
+#include <algorithm>
 #include <memory>
 
 #include <fmt/format.h>
@@ -44,6 +45,7 @@
 #include "core/sparse/csrhdmatrix.hpp"
 #include "core/sparse/paulimat.hpp"
 #include "core/two_dim_matrix.hpp"
+#include "ops/fusion.hpp"
 #include "ops/gates.hpp"
 #include "ops/hamiltonian.hpp"
 
@@ -51,6 +53,7 @@
 #include "python/details/create_from_container_class.hpp"
 #include "python/details/define_binary_operator_helpers.hpp"
 #include "python/ops/basic_gate.hpp"
+#include "python/ops/pauli_arrays.hpp"
 
 namespace py = pybind11;
 
@@ -228,6 +231,7 @@ PYBIND11_MODULE(mqbackend, m) {
                       const VT<Index> &>());
     m.def("get_gate_by_name", &GetGateByName<MT>);
     m.def("get_measure_gate", &GetMeasureGate<MT>);
+    m.def("fuse_circuit", &mindquantum::FuseCircuit<MT>, "circ"_a, "max_qubits"_a);
 
     py::class_<BasicGate<MT>, mindquantum::BasicGate<MT>, std::shared_ptr<BasicGate<MT>>>(m, "basic_gate")
         .def(py::init<>())
@@ -314,6 +318,8 @@ PYBIND11_MODULE(mqbackend, m) {
     m.def("csr_plus_csr", &Csr_Plus_Csr<MT>);
     m.def("transpose_csr_hd_matrix", &TransposeCsrHdMatrix<MT>);
     m.def("pauli_mat_to_csr_hd_matrix", &PauliMatToCsrHdMatrix<MT>);
+    m.def("pauli_arrays_to_csr", &mindquantum::python::PauliArraysToCsr, py::arg("indices"), py::arg("paulis"),
+          py::arg("coeffs"), py::arg("offsets"), py::arg("n_qubits"), py::arg("single_precision") = false);
 
     // hamiltonian
     py::class_<Hamiltonian<MT>, std::shared_ptr<Hamiltonian<MT>>>(m, "hamiltonian")
@@ -321,9 +327,68 @@ PYBIND11_MODULE(mqbackend, m) {
         .def(py::init<const VT<PauliTerm<MT>> &>())
         .def(py::init<const VT<PauliTerm<MT>> &, Index>())
         .def(py::init<std::shared_ptr<CsrHdMatrix<MT>>, Index>())
+        .def_static(
+            "from_arrays",
+            [](const mindquantum::python::array_in_t<uint32_t> &indices,
+               const mindquantum::python::array_in_t<uint8_t> &paulis,
+               const mindquantum::python::array_in_t<MT> &coeffs,
+               const mindquantum::python::array_in_t<int64_t> &offsets, Index n_qubits) {
+                auto terms = mindquantum::python::PauliTermsFromArrays<MT>(indices, paulis, coeffs, offsets);
+                if (n_qubits < 0) {
+                    return Hamiltonian<MT>(terms);
+                }
+                return Hamiltonian<MT>(terms, n_qubits);
+            },
+            py::arg("indices"), py::arg("paulis"), py::arg("coeffs"), py::arg("offsets"), py::arg("n_qubits") = -1)
+        .def_static(
+            "from_sparse_arrays",
+            [](const mindquantum::python::array_in_t<uint32_t> &indices,
+               const mindquantum::python::array_in_t<uint8_t> &paulis,
+               const mindquantum::python::array_in_t<MT> &coeffs,
+               const mindquantum::python::array_in_t<int64_t> &offsets, Index n_qubits,
+               const mindquantum::python::array_in_t<CT<MT>> &sparse_data,
+               const mindquantum::python::array_in_t<Index> &sparse_indices,
+               const mindquantum::python::array_in_t<Index> &sparse_indptr) {
+                const auto dim = Index{1} << n_qubits;
+                const auto nnz = static_cast<Index>(sparse_data.size());
+                if (sparse_indptr.size() != dim + 1 || sparse_indices.size() != nnz
+                    || sparse_indptr.data()[dim] != nnz) {
+                    throw std::invalid_argument("Sparse matrix does not match a hamiltonian of "
+                                                + std::to_string(n_qubits) + " qubits.");
+                }
+                // The arrays may come from a corrupt file, so check them before the CSR kernels index with them. Every
+                // entry should lie in the upper triangular part, as built by SparseHamiltonian.
+                const auto *indptr_in = sparse_indptr.data();
+                const auto *indices_in = sparse_indices.data();
+                if (indptr_in[0] != 0 || !std::is_sorted(indptr_in, indptr_in + dim + 1)) {
+                    throw std::invalid_argument("Sparse matrix has invalid indptr.");
+                }
+                for (Index row = 0; row < dim; row++) {
+                    if (std::any_of(indices_in + indptr_in[row], indices_in + indptr_in[row + 1],
+                                    [row, dim](Index col) { return col < row || col >= dim; })) {
+                        throw std::invalid_argument("Sparse matrix has invalid indices.");
+                    }
+                }
+                auto terms = mindquantum::python::PauliTermsFromArrays<MT>(indices, paulis, coeffs, offsets);
+                auto csr_mat = std::make_shared<CsrHdMatrix<MT>>(dim, nnz, sparse_indptr, sparse_indices, sparse_data);
+                return Hamiltonian<MT>(terms, n_qubits, csr_mat);
+            },
+            py::arg("indices"), py::arg("paulis"), py::arg("coeffs"), py::arg("offsets"), py::arg("n_qubits"),
+            py::arg("sparse_data"), py::arg("sparse_indices"), py::arg("sparse_indptr"))
+        .def("sparse_arrays",
+             [](const Hamiltonian<MT> &ham) {
+                 const auto &mat = ham.ham_sparse_main_;
+                 if (!mat) {
+                     throw std::runtime_error("Hamiltonian has not been sparsed.");
+                 }
+                 return py::make_tuple(py::array_t<CT<MT>>(mat->nnz_, mat->data_),
+                                       py::array_t<Index>(mat->nnz_, mat->indices_),
+                                       py::array_t<Index>(mat->dim_ + 1, mat->indptr_));
+             })
         .def_readwrite("how_to", &Hamiltonian<MT>::how_to_)
         .def_readwrite("n_qubits", &Hamiltonian<MT>::n_qubits_)
-        .def_readwrite("ham", &Hamiltonian<MT>::ham_)
+        .def_property(
+            "ham", [](const Hamiltonian<MT> &ham) { return ham.ham_; }, &Hamiltonian<MT>::SetTerms)
         .def_readwrite("ham_sparse_main", &Hamiltonian<MT>::ham_sparse_main_)
         .def_readwrite("ham_sparse_second", &Hamiltonian<MT>::ham_sparse_second_);
     m.def("sparse_hamiltonian", &SparseHamiltonian<MT>);
@@ -35,6 +35,7 @@
 #include "ops/transform/parity.hpp"
 
 #include "python/core/boost_multi_index.hpp"
+#include "python/ops/pauli_arrays.hpp"
 
 namespace ops = mindquantum::ops;
 namespace py = pybind11;
@@ -94,6 +95,22 @@ void init_qubit_operators(py::module& module) {  // NOLINT(runtime/references)
     qop_pr_double.def_static("simplify", QubitOperatorPRD::simplify);
     qop_pr_cmplx_double.def_static("simplify", QubitOperatorPRCD::simplify);
 
+    qop_double.def("commutator", &QubitOperatorD::commutator);
+    qop_cmplx_double.def("commutator", &QubitOperatorCD::commutator);
+    qop_pr_double.def("commutator", &QubitOperatorPRD::commutator);
+    qop_pr_cmplx_double.def("commutator", &QubitOperatorPRCD::commutator);
+
+    qop_double.def("to_arrays", &mq::python::QubitOperatorToArrays<QubitOperatorD>);
+    qop_cmplx_double.def("to_arrays", &mq::python::QubitOperatorToArrays<QubitOperatorCD>);
+    qop_pr_double.def("to_arrays", &mq::python::QubitOperatorToArrays<QubitOperatorPRD>);
+    qop_pr_cmplx_double.def("to_arrays", &mq::python::QubitOperatorToArrays<QubitOperatorPRCD>);
+
+    // NB: products of Pauli operators may generate imaginary phases, hence only complex operators are supported
+    qop_cmplx_double.def_static("from_arrays", &mq::python::QubitOperatorFromArrays<QubitOperatorCD>,
+                                py::arg("indices"), py::arg("paulis"), py::arg("coeffs"), py::arg("offsets"));
+    qop_pr_cmplx_double.def_static("from_arrays", &mq::python::QubitOperatorFromArrays<QubitOperatorPRCD>,
+                                   py::arg("indices"), py::arg("paulis"), py::arg("coeffs"), py::arg("offsets"));
+
     // ---------------------------------
 
     using qop_t = decltype(qop_double);
@@ -0,0 +1,58 @@
+//   Copyright 2022 <Huawei Technologies Co., Ltd>
+//
+//   Licensed under the Apache License, Version 2.0 (the "License");
+//   you may not use this file except in compliance with the License.
+//   You may obtain a copy of the License at
+//
+//       http://www.apache.org/licenses/LICENSE-2.0
+//
+//   Unless required by applicable law or agreed to in writing, software
+//   distributed under the License is distributed on an "AS IS" BASIS,
+//   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+//   See the License for the specific language governing permissions and
+//   limitations under the License.
+#ifndef PYTHON_LIB_QUANTUMSTATE_BIND_MAT_STATE_HPP
+#define PYTHON_LIB_QUANTUMSTATE_BIND_MAT_STATE_HPP
+
+#include <string>
+#include <string_view>
+
+#include <pybind11/complex.h>
+#include <pybind11/numpy.h>
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+#include "core/parameter_resolver.hpp"
+#include "simulator/densitymatrix/density_matrix_state.hpp"
+#include "simulator/densitymatrix/detail/cpu_density_matrix_policy.hpp"
+#include "simulator/types.hpp"
+
+template <typename sim_t>
+auto BindSim(pybind11::module& module, const std::string_view& name) {  // NOLINT
+    using namespace pybind11::literals;                                 // NOLINT
+    using qbit_t = mindquantum::sim::qbit_t;
+    using calc_type = mindquantum::sim::calc_type;
+    using py_qs_data_t = typename sim_t::py_qs_data_t;
+    using qs_buffer_t = pybind11::array_t<py_qs_data_t, pybind11::array::c_style | pybind11::array::forcecast>;
+
+    return pybind11::class_<sim_t>(module, name.data())
+        .def(pybind11::init<qbit_t, unsigned>(), "n_qubits"_a, "seed"_a = 42)
+        .def("apply_gate", &sim_t::ApplyGate, "gate"_a, "pr"_a = mindquantum::ParameterResolver<calc_type>(),
+             "diff"_a = false)
+        .def("apply_circuit", &sim_t::ApplyCircuit, "gate"_a, "pr"_a = mindquantum::ParameterResolver<calc_type>())
+        .def("reset", &sim_t::Reset)
+        .def("get_qs", &sim_t::GetQS)
+        .def("set_qs_buffer",
+             [](sim_t& sim, const qs_buffer_t& qs_out) {
+                 sim.SetQS(qs_out.data(), static_cast<mindquantum::sim::index_t>(qs_out.size()));
+             })
+        .def("apply_hamiltonian", &sim_t::ApplyHamiltonian)
+        .def("copy", [](const sim_t& sim) { return sim; })
+        .def("sampling", &sim_t::Sampling)
+        .def("sampling_measure_ending", &sim_t::SamplingMeasurementEnding)
+        .def("get_expectation", &sim_t::GetExpectation)
+        .def("get_expectation_batch", &sim_t::GetExpectationBatch)
+        .def("get_expectation_with_grad_multi_multi", &sim_t::GetExpectationWithGradMultiMulti);
+}
+
+#endif
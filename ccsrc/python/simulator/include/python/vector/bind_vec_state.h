@@ -13,10 +13,17 @@
 //   limitations under the License.
 #ifndef PYTHON_LIB_QUANTUMSTATE_BIND_VEC_STATE_HPP
 #define PYTHON_LIB_QUANTUMSTATE_BIND_VEC_STATE_HPP
+#include <cmath>
+
 #include <memory>
+#include <optional>
+#include <stdexcept>
+#include <string>
 #include <string_view>
+#include <vector>
 
 #include <pybind11/complex.h>
+#include <pybind11/numpy.h>
 #include <pybind11/operators.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
@@ -38,26 +45,112 @@ auto BindSim(pybind11::module& module, const std::string_view& name) {  // NOLIN
     using namespace pybind11::literals;                                 // NOLINT
     using qbit_t = mindquantum::sim::qbit_t;
     using calc_type = mindquantum::sim::calc_type;
+    using py_qs_data_t = typename sim_t::py_qs_data_t;
+    using py_qs_datas_t = typename sim_t::py_qs_datas_t;
+    using qs_buffer_t = pybind11::array_t<py_qs_data_t, pybind11::array::c_style | pybind11::array::forcecast>;
+    using circuit_t = typename sim_t::circuit_t;
+    using hams_t = std::vector<std::shared_ptr<mindquantum::Hamiltonian<calc_type>>>;
+
+    // Batch methods optionally start each row from its own quantum state instead of the state of simulator.
+    auto batch_states = [](const sim_t& sim, const std::optional<qs_buffer_t>& states,
+                           size_t n_batch) -> const py_qs_data_t* {
+        if (!states.has_value()) {
+            return nullptr;
+        }
+        if (states->ndim() != 2 || static_cast<size_t>(states->shape(0)) != n_batch
+            || static_cast<size_t>(states->shape(1)) != sim.GetDim()) {
+            throw std::invalid_argument("Shape of quantum states does not match encoder data.");
+        }
+        return states->data();
+    };
 
-    pybind11::class_<sim_t>(module, name.data())
+    auto sim_class = pybind11::class_<sim_t>(module, name.data())
         .def(pybind11::init<qbit_t, unsigned>(), "n_qubits"_a, "seed"_a = 42)
+        .def(pybind11::init<qbit_t, unsigned, const std::string&, bool>(), "n_qubits"_a, "seed"_a, "path"_a,
+             "restore"_a = false)
+        .def("sync", &sim_t::Sync)
         .def("display", &sim_t::Display, "qubits_limit"_a = 10)
         .def("apply_gate", &sim_t::ApplyGate, "gate"_a, "pr"_a = mindquantum::ParameterResolver<calc_type>(),
              "diff"_a = false)
         .def("apply_circuit", &sim_t::ApplyCircuit, "gate"_a, "pr"_a = mindquantum::ParameterResolver<calc_type>())
         .def("reset", &sim_t::Reset)
         .def("get_qs", &sim_t::GetQS)
-        .def("set_qs", &sim_t::SetQS)
+        .def("set_qs", pybind11::overload_cast<const py_qs_datas_t&>(&sim_t::SetQS))
+        .def("set_qs_buffer",
+             [](sim_t& sim, const qs_buffer_t& qs_out) {
+                 sim.SetQS(qs_out.data(), static_cast<mindquantum::sim::index_t>(qs_out.size()));
+             })
         .def("apply_hamiltonian", &sim_t::ApplyHamiltonian)
         .def("copy", [](const sim_t& sim) { return sim; })
         .def("sampling", &sim_t::Sampling)
-        .def("get_circuit_matrix", &sim_t::GetCircuitMatrix)
+        .def("sampling_measure_ending_without_noise", &sim_t::SamplingMeasurementEndingWithoutNoise)
+        .def("get_circuit_matrix",
+             [](sim_t& sim, const typename sim_t::circuit_t& circ,
+                const mindquantum::ParameterResolver<calc_type>& pr) {
+                 // Hand the column major buffer over to numpy without copy.
+                 auto mat = new py_qs_datas_t(sim.GetCircuitMatrix(circ, pr));
+                 auto dim = static_cast<pybind11::ssize_t>(std::llround(std::sqrt(mat->size())));
+                 pybind11::capsule owner(mat, [](void* p) { delete reinterpret_cast<py_qs_datas_t*>(p); });
+                 return pybind11::array_t<py_qs_data_t>(
+                     {dim, dim},
+                     {static_cast<pybind11::ssize_t>(sizeof(py_qs_data_t)),
+                      static_cast<pybind11::ssize_t>(sizeof(py_qs_data_t)) * dim},
+                     mat->data(), owner);
+             })
         .def("get_expectation", &sim_t::GetExpectation)
         .def("get_expectation_with_grad_one_one", &sim_t::GetExpectationWithGradOneOne)
         .def("get_expectation_with_grad_one_multi", &sim_t::GetExpectationWithGradOneMulti)
-        .def("get_expectation_with_grad_multi_multi", &sim_t::GetExpectationWithGradMultiMulti)
+        .def("get_expectation_with_grad_multi_multi",
+             [batch_states](sim_t& sim, const hams_t& hams, const circuit_t& circ, const circuit_t& herm_circ,
+                            const mindquantum::VVT<calc_type>& enc_data, const mindquantum::VT<calc_type>& ans_data,
+                            const mindquantum::VS& enc_name, const mindquantum::VS& ans_name,
+                            const mindquantum::VS& grad_name, size_t batch_threads, size_t mea_threads,
+                            const std::optional<qs_buffer_t>& states) {
+                 return sim.GetExpectationWithGradMultiMulti(hams, circ, herm_circ, enc_data, ans_data, enc_name,
+                                                             ans_name, grad_name, batch_threads, mea_threads,
+                                                             batch_states(sim, states, enc_data.size()));
+             })
+        .def("get_expectation_vjp_multi_multi",
+             [batch_states](sim_t& sim, const hams_t& hams, const circuit_t& circ, const circuit_t& herm_circ,
+                            const mindquantum::VVT<calc_type>& dout, const mindquantum::VVT<calc_type>& enc_data,
+                            const mindquantum::VT<calc_type>& ans_data, const mindquantum::VS& enc_name,
+                            const mindquantum::VS& ans_name, const mindquantum::VS& grad_name,
+                            size_t batch_threads, const std::optional<qs_buffer_t>& states) {
+                 return sim.GetExpectationVJPMultiMulti(hams, circ, herm_circ, dout, enc_data, ans_data, enc_name,
+                                                        ans_name, grad_name, batch_threads,
+                                                        batch_states(sim, states, enc_data.size()));
+             })
+        .def("get_expectation_batch",
+             [batch_states](sim_t& sim, const hams_t& hams, const circuit_t& circ,
+                            const mindquantum::VVT<calc_type>& data, const mindquantum::VS& name,
+                            size_t batch_threads, const std::optional<qs_buffer_t>& states) {
+                 return sim.GetExpectationBatch(hams, circ, data, name, batch_threads,
+                                                batch_states(sim, states, data.size()));
+             })
+        .def("get_qs_batch", &sim_t::GetQSBatch)
+        .def("get_expectation_trajectories", &sim_t::GetExpectationTrajectories)
+        .def("get_qfi_parts", &sim_t::GetQFIParts)
+        .def("get_expectation_with_grad_and_qfi_parts", &sim_t::GetExpectationWithGradAndQFIParts)
         .def("get_expectation_with_grad_non_hermitian_multi_multi",
              &sim_t::GetExpectationNonHermitianWithGradMultiMulti);
+#ifndef __CUDACC__
+    // Expose the state buffer to numpy directly, the simulator is kept alive by the base of the returned array. The
+    // simulator does not reallocate its buffer while the view is alive (see VectorState::ReplaceQS), so the view
+    // follows the state it evolves.
+    sim_class.def("get_qs_view", [](pybind11::object self) {
+        auto& sim = self.cast<sim_t&>();
+        sim.AcquireView();
+        pybind11::capsule base(new pybind11::object(self), [](void* owner) {
+            auto* sim_obj = static_cast<pybind11::object*>(owner);
+            sim_obj->cast<sim_t&>().ReleaseView();
+            delete sim_obj;
+        });
+        return pybind11::array_t<py_qs_data_t>({static_cast<pybind11::ssize_t>(sim.GetDim())},
+                                              {static_cast<pybind11::ssize_t>(sizeof(py_qs_data_t))},
+                                              sim.QSData(), base);
+    });
+#endif  // __CUDACC__
+    return sim_class;
 }
 
 template <typename sim_t>
@@ -0,0 +1,30 @@
+//   Copyright 2022 <Huawei Technologies Co., Ltd>
+//
+//   Licensed under the Apache License, Version 2.0 (the "License");
+//   you may not use this file except in compliance with the License.
+//   You may obtain a copy of the License at
+//
+//       http://www.apache.org/licenses/LICENSE-2.0
+//
+//   Unless required by applicable law or agreed to in writing, software
+//   distributed under the License is distributed on an "AS IS" BASIS,
+//   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+//   See the License for the specific language governing permissions and
+//   limitations under the License.
+
+#include <pybind11/pybind11.h>
+
+#include "core/thread_pool.hpp"
+#include "python/densitymatrix/bind_mat_state.h"
+
+PYBIND11_MODULE(_mq_matrix, module) {
+    using policy_t = mindquantum::sim::densitymatrix::detail::CPUDensityMatrixPolicyBase;
+    using mat_sim = mindquantum::sim::densitymatrix::detail::DensityMatrixState<policy_t>;
+
+    module.doc() = "MindQuantum c++ density matrix simulator.";
+    BindSim<mat_sim>(module, "mqmatrix");
+    module.def(
+        "set_threads_number", [](size_t n_threads) { mindquantum::ThreadPool::GetInstance().ReSize(n_threads); },
+        pybind11::arg("n_threads"), "Set the number of threads used by batch and gradient calculation.");
+    module.def("get_threads_number", []() { return mindquantum::ThreadPool::GetInstance().GetSize(); });
+}
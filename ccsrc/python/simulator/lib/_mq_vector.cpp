@@ -14,6 +14,7 @@
 
 #include <pybind11/pybind11.h>
 
+#include "core/thread_pool.hpp"
 #include "python/vector/bind_vec_state.h"
 
 PYBIND11_MODULE(_mq_vector, module) {
@@ -27,6 +28,10 @@ PYBIND11_MODULE(_mq_vector, module) {
 
     module.doc() = "MindQuantum c++ vector state simulator.";
     BindSim<vec_sim>(module, "mqvector");
+    module.def(
+        "set_threads_number", [](size_t n_threads) { mindquantum::ThreadPool::GetInstance().ReSize(n_threads); },
+        pybind11::arg("n_threads"), "Set the number of threads used by batch and gradient calculation.");
+    module.def("get_threads_number", []() { return mindquantum::ThreadPool::GetInstance().GetSize(); });
 
     pybind11::module blas = module.def_submodule("blas", "MindQuantum simulator algebra module.");
     BindBlas<vec_sim>(blas);
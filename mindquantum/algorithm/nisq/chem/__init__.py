@@ -24,6 +24,7 @@ from .hardware_efficient_ansatz import HardwareEfficientAnsatz
 from .qubit_hamiltonian import get_qubit_hamiltonian
 from .qubit_ucc_ansatz import QubitUCCAnsatz
 from .quccsd import quccsd_generator
+from .tensor_transform import transform_interaction_tensors
 from .transform import Transform
 from .uccsd import generate_uccsd
 from .uccsd0 import uccsd0_singlet_generator
@@ -36,6 +37,7 @@ __all__ = [
     'uccsd_singlet_get_packed_amplitudes',
     'uccsd0_singlet_generator',
     'quccsd_generator',
+    'transform_interaction_tensors',
     'HardwareEfficientAnsatz',
     'QubitUCCAnsatz',
     'generate_uccsd',
@@ -14,15 +14,18 @@
 # ============================================================================
 """Get qubit hamiltonian."""
 
-from mindquantum.core.operators import FermionOperator, InteractionOperator
+from mindquantum.core.operators import QubitOperator
 
-from .transform import Transform
+from .tensor_transform import transform_interaction_tensors
 
 
 def get_qubit_hamiltonian(mol):
     r"""
     Get the qubit hamiltonian of a molecular data.
 
+    The Jordan-Wigner transform is applied directly on the tensors of the molecular hamiltonian, see
+    :func:`~.algorithm.nisq.transform_interaction_tensors`.
+
     Args:
         mol (MolecularData): molecular data.
 
@@ -30,6 +33,4 @@ def get_qubit_hamiltonian(mol):
         QubitOperator, qubit operator of this molecular.
     """
     m_ham = mol.get_molecular_hamiltonian()
-    int_ham = InteractionOperator(*(m_ham.n_body_tensors.values()))
-    f_ham = FermionOperator(int_ham)
-    return Transform(f_ham).jordan_wigner()
+    return QubitOperator.from_arrays(*transform_interaction_tensors(*(m_ham.n_body_tensors.values())))
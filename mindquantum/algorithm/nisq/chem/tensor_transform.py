@@ -0,0 +1,320 @@
+# Copyright 2022 Huawei Technologies Co., Ltd
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Transform the tensors of an interaction operator into Pauli strings without building fermion operators."""
+
+import numpy as np
+
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+# Number of bytes of the expanded Pauli strings that are processed at once.
+_CHUNK_BYTES = 1 << 26
+
+SUPPORTED_METHODS = ('jordan_wigner', 'parity', 'bravyi_kitaev')
+
+
+def _parity_set(idx):
+    """Qubits whose parity store the parity of modes 0 .. idx (Bravyi-Kitaev)."""
+    indices = set()
+    index = idx + 1
+    while index > 0:
+        indices.add(index - 1)
+        index &= index - 1
+    return indices
+
+
+def _occupation_set(idx):
+    """Qubits whose parity store the occupation of mode idx (Bravyi-Kitaev)."""
+    index = idx + 1
+    indices = {index - 1}
+    parent = index & (index - 1)
+    index -= 1
+    while index != parent:
+        indices.add(index - 1)
+        index &= index - 1
+    return indices
+
+
+def _update_set(idx, n_qubits):
+    """Qubits to update when the occupation of mode idx flips (Bravyi-Kitaev)."""
+    indices = set()
+    index = idx + 1
+    while index <= n_qubits:
+        indices.add(index - 1)
+        index += index & -index
+    return indices
+
+
+def _majorana_strings(n_qubits, method):
+    """
+    Get the Majorana Pauli strings of every mode.
+
+    A creation (annihilation) operator of mode j is mapped to (c_j - i d_j) / 2 ((c_j + i d_j) / 2), where c_j and d_j
+    are Pauli strings. They are the same strings as the ones used by `Transform`.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray], the x and z bits of c_j (index 0) and d_j (index 1), with shape
+        (n_qubits, 2, n_qubits).
+    """
+    x_bits = np.zeros((n_qubits, 2, n_qubits), dtype=bool)
+    z_bits = np.zeros((n_qubits, 2, n_qubits), dtype=bool)
+    for j in range(n_qubits):
+        if method == 'jordan_wigner':
+            x_c, z_c = {j}, set(range(j))
+            x_d, z_d = {j}, set(range(j + 1))
+        elif method == 'parity':
+            x_c, z_c = set(range(j, n_qubits)), ({j - 1} if j > 0 else set())
+            x_d, z_d = set(range(j, n_qubits)), {j}
+        else:
+            update_set = _update_set(j, n_qubits)
+            parity_set = _parity_set(j - 1)
+            x_c, z_c = update_set, parity_set
+            x_d, z_d = update_set, ((parity_set ^ _occupation_set(j)) - {j}) | {j}
+        x_bits[j, 0, list(x_c)] = True
+        z_bits[j, 0, list(z_c)] = True
+        x_bits[j, 1, list(x_d)] = True
+        z_bits[j, 1, list(z_d)] = True
+    return x_bits, z_bits
+
+
+def _pack(bits, n_bytes):
+    """Pack boolean bits along the last axis, bit q of the result is in byte q // 8 (little endian)."""
+    packed = np.packbits(bits, axis=-1, bitorder='little')
+    pad = n_bytes - packed.shape[-1]
+    if pad:
+        packed = np.concatenate([packed, np.zeros(packed.shape[:-1] + (pad,), dtype=np.uint8)], axis=-1)
+    return packed
+
+
+def _pauli_mul(x_1, z_1, x_2, z_2):
+    """Multiply packed Pauli strings and get the power of i of the product."""
+    # XY = iZ, YZ = iX, ZX = iY and the reversed products give -i
+    pos = (x_1 & ~z_1 & x_2 & z_2) | (x_1 & z_1 & ~x_2 & z_2) | (~x_1 & z_1 & x_2 & ~z_2)
+    neg = (x_1 & z_1 & x_2 & ~z_2) | (~x_1 & z_1 & x_2 & z_2) | (x_1 & ~z_1 & ~x_2 & z_2)
+    power = _POPCOUNT[pos].sum(axis=-1) + 3 * _POPCOUNT[neg].sum(axis=-1)
+    return x_1 ^ x_2, z_1 ^ z_2, power
+
+
+def _reduce(keys, coeffs):
+    """Sum up the coefficients of identical Pauli strings, keys are the packed x and z bits of every string."""
+    n_key = keys.shape[1]
+    void_keys = np.ascontiguousarray(keys).view(np.dtype((np.void, n_key))).ravel()
+    unique_keys, inverse = np.unique(void_keys, return_inverse=True)
+    inverse = inverse.ravel()
+    summed = np.bincount(inverse, weights=coeffs.real, minlength=len(unique_keys)) + 1j * np.bincount(
+        inverse, weights=coeffs.imag, minlength=len(unique_keys)
+    )
+    return unique_keys.view(np.uint8).reshape(-1, n_key), summed
+
+
+def _expand(indices, daggers, coeffs, majorana_x, majorana_z):
+    """
+    Expand products of ladder operators into Pauli strings.
+
+    Args:
+        indices (numpy.ndarray): Modes of the ladder operators, with shape (n_terms, len(daggers)).
+        daggers (tuple[bool]): Whether each ladder operator is a creation operator.
+        coeffs (numpy.ndarray): Coefficients of the products.
+        majorana_x (numpy.ndarray): Packed x bits of the Majorana strings.
+        majorana_z (numpy.ndarray): Packed z bits of the Majorana strings.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray], the packed x and z bits of the Pauli strings and their coefficients.
+    """
+    n_terms = len(coeffs)
+    n_bytes = majorana_x.shape[-1]
+    x_bits = np.zeros((n_terms, 1, n_bytes), dtype=np.uint8)
+    z_bits = np.zeros((n_terms, 1, n_bytes), dtype=np.uint8)
+    power = np.zeros((n_terms, 1), dtype=np.int64)
+    weight = coeffs.astype(np.complex128)[:, None]
+    for k, dagger in enumerate(daggers):
+        x_factor = majorana_x[indices[:, k]][:, None]
+        z_factor = majorana_z[indices[:, k]][:, None]
+        x_bits, z_bits, new_power = _pauli_mul(x_bits[:, :, None], z_bits[:, :, None], x_factor, z_factor)
+        power = power[:, :, None] + new_power
+        weight = weight[:, :, None] * np.array([0.5, -0.5j if dagger else 0.5j])
+        n_strings = x_bits.shape[1] * x_bits.shape[2]
+        x_bits = x_bits.reshape(n_terms, n_strings, n_bytes)
+        z_bits = z_bits.reshape(n_terms, n_strings, n_bytes)
+        power = power.reshape(n_terms, n_strings)
+        weight = weight.reshape(n_terms, n_strings)
+    weight = weight * np.array([1, 1j, -1, -1j])[power & 3]
+    keys = np.concatenate([x_bits, z_bits], axis=-1).reshape(-1, 2 * n_bytes)
+    return keys, weight.ravel()
+
+
+def _antisymmetrize(two_body_tensor):
+    r"""
+    Get the non-zero two-body coefficients on a^\dagger_p a^\dagger_q a_r a_s with p < q and r < s.
+
+    Since a^\dagger_q a^\dagger_p = -a^\dagger_p a^\dagger_q and a_s a_r = -a_r a_s, the four orderings of every
+    term are merged together, and terms with p = q or r = s vanish.
+    """
+    n_qubits = two_body_tensor.shape[0]
+    p, q, r, s = np.nonzero(two_body_tensor)
+    coeffs = two_body_tensor[p, q, r, s]
+    mask = (p != q) & (r != s)
+    p, q, r, s, coeffs = p[mask], q[mask], r[mask], s[mask], coeffs[mask]
+    sign = np.where(p > q, -1, 1) * np.where(r > s, -1, 1)
+    p, q = np.minimum(p, q), np.maximum(p, q)
+    r, s = np.minimum(r, s), np.maximum(r, s)
+    flat = ((p * n_qubits + q) * n_qubits + r) * n_qubits + s
+    unique_flat, inverse = np.unique(flat, return_inverse=True)
+    inverse = inverse.ravel()
+    coeffs = coeffs * sign
+    summed = np.bincount(inverse, weights=np.real(coeffs), minlength=len(unique_flat))
+    if np.iscomplexobj(coeffs):
+        summed = summed + 1j * np.bincount(inverse, weights=np.imag(coeffs), minlength=len(unique_flat))
+    indices = np.stack(np.unravel_index(unique_flat, (n_qubits,) * 4), axis=1)
+    return indices, summed
+
+
+def _hermitian_fold(left, right, coeffs, n_keys):
+    """
+    Keep one term out of every hermitian pair.
+
+    The term with left key A and right key B is the hermitian conjugate of the term with keys (B, A). If all
+    coefficients satisfy W[B, A] = conj(W[A, B]), only the terms with A <= B are kept and the terms with A < B are
+    doubled, the caller then has to take the real part of the expanded coefficients.
+
+    Returns:
+        Union[numpy.ndarray, None], the mask and the multiplier of the kept terms, or None if the terms are not
+        hermitian.
+    """
+    flat = left * n_keys + right
+    order = np.argsort(flat)
+    flat_sorted = flat[order]
+    partner = np.searchsorted(flat_sorted, right * n_keys + left)
+    partner = np.minimum(partner, len(flat_sorted) - 1)
+    found = flat_sorted[partner] == right * n_keys + left
+    if not np.all(found):
+        return None
+    if not np.allclose(coeffs[order[partner]], np.conj(coeffs), rtol=0, atol=1e-12):
+        return None
+    mask = left <= right
+    return mask, np.where(left[mask] < right[mask], 2.0, 1.0)
+
+
+def transform_interaction_tensors(  # pylint: disable=too-many-locals
+    constant, one_body_tensor, two_body_tensor, method='jordan_wigner', tol=1e-12
+):
+    r"""
+    Transform a fermionic interaction operator into Pauli strings directly from its tensors.
+
+    The operator has the form of :class:`~.core.operators.InteractionOperator`,
+
+    .. math::
+
+        C + \sum_{p, q} h_{[p, q]} a^\dagger_p a_q + \sum_{p, q, r, s} h_{[p, q, r, s]} a^\dagger_p a^\dagger_q a_r a_s.
+
+    Every ladder operator is written with two Majorana Pauli strings and all terms are expanded at once on packed
+    x/z bit arrays, instead of building a :class:`~.core.operators.FermionOperator` and multiplying the transformed
+    ladder operators term by term. The four orderings of every two-body term are merged before the expansion, and
+    when the operator is hermitian only one term of every hermitian pair is expanded, which makes use of the
+    eight-fold symmetry of molecular integrals. The Pauli strings are the same as the ones given by
+    :class:`~.algorithm.nisq.Transform`.
+
+    Args:
+        constant (numbers.Number): The constant term :math:`C`.
+        one_body_tensor (numpy.ndarray): The one-body tensor :math:`h_{[p, q]}`.
+        two_body_tensor (numpy.ndarray): The two-body tensor :math:`h_{[p, q, r, s]}`.
+        method (str): The transform, could be ``'jordan_wigner'``, ``'parity'`` or ``'bravyi_kitaev'``.
+            Default: ``'jordan_wigner'``.
+        tol (float): Pauli strings with coefficient whose absolute value is not larger than `tol` are dropped.
+            Default: ``1e-12``.
+
+    Returns:
+        Tuple[numpy.ndarray], the qubit indices (uint32) and the Pauli codes (uint8) of the local operators of all the
+        Pauli strings, the coefficients (complex128) of the Pauli strings and the offsets (int64) of the Pauli strings,
+        in the same layout as :meth:`~.core.operators.QubitOperator.to_arrays`, so that they can be passed to
+        :meth:`~.core.operators.QubitOperator.from_arrays`.
+
+    Examples:
+        >>> import numpy as np
+        >>> from mindquantum.algorithm.nisq import transform_interaction_tensors
+        >>> from mindquantum.core.operators import QubitOperator
+        >>> one_body = np.array([[1.0, 0.5], [0.5, -1.0]])
+        >>> indices, paulis, coeffs, offsets = transform_interaction_tensors(0.0, one_body, np.zeros((2, 2, 2, 2)))
+        >>> indices, paulis, offsets
+        (array([0, 1, 0, 1, 0, 1], dtype=uint32), array([3, 3, 1, 1, 2, 2], dtype=uint8), array([0, 1, 2, 4, 6]))
+        >>> print(QubitOperator.from_arrays(indices, paulis, coeffs, offsets))
+        -1/2 [Z0] +
+        1/2 [Z1] +
+        1/4 [X0 X1] +
+        1/4 [Y0 Y1]
+    """
+    if method not in SUPPORTED_METHODS:
+        raise ValueError(f"method should be one of {SUPPORTED_METHODS}, but get {method}.")
+    one_body_tensor = np.asarray(one_body_tensor)
+    two_body_tensor = np.asarray(two_body_tensor)
+    n_qubits = one_body_tensor.shape[0]
+    if one_body_tensor.shape != (n_qubits,) * 2 or two_body_tensor.shape != (n_qubits,) * 4:
+        raise ValueError(
+            f"Shape of tensors should be {(n_qubits,) * 2} and {(n_qubits,) * 4}, but get "
+            f"{one_body_tensor.shape} and {two_body_tensor.shape}."
+        )
+    n_words = n_qubits // 64 + 1
+    n_bytes = 8 * n_words
+    majorana_x, majorana_z = _majorana_strings(n_qubits, method)
+    majorana_x = _pack(majorana_x, n_bytes)
+    majorana_z = _pack(majorana_z, n_bytes)
+
+    keys = [np.zeros((1, 2 * n_bytes), dtype=np.uint8)]
+    coeffs = [np.array([constant], dtype=np.complex128)]
+
+    p, q = np.nonzero(one_body_tensor)
+    two_body_indices, two_body_values = _antisymmetrize(two_body_tensor)
+    for indices, values, left, right, n_keys in (
+        (np.stack([p, q], axis=1), one_body_tensor[p, q], p, q, n_qubits),
+        (
+            two_body_indices,
+            two_body_values,
+            two_body_indices[:, 0] * n_qubits + two_body_indices[:, 1],
+            two_body_indices[:, 2] * n_qubits + two_body_indices[:, 3],
+            n_qubits * n_qubits,
+        ),
+    ):
+        fold = _hermitian_fold(left, right, values, n_keys)
+        if fold is not None:
+            mask, multiplier = fold
+            indices, values = indices[mask], values[mask] * multiplier
+        daggers = (True,) * (indices.shape[1] // 2) + (False,) * (indices.shape[1] // 2)
+        chunk = max(1, _CHUNK_BYTES // (2 * n_bytes * 2 ** len(daggers)))
+        for start in range(0, len(values), chunk):
+            chunk_keys, chunk_coeffs = _expand(
+                indices[start : start + chunk], daggers, values[start : start + chunk], majorana_x, majorana_z
+            )
+            if fold is not None:
+                # A term plus its hermitian conjugate only keeps the real part of every Pauli string.
+                chunk_coeffs = chunk_coeffs.real.astype(np.complex128)
+            chunk_keys, chunk_coeffs = _reduce(chunk_keys, chunk_coeffs)
+            keys.append(chunk_keys)
+            coeffs.append(chunk_coeffs)
+
+    keys, coeffs = _reduce(np.concatenate(keys), np.concatenate(coeffs))
+    mask = np.abs(coeffs) > tol
+    keys, coeffs = keys[mask], coeffs[mask]
+    return _to_term_arrays(keys, n_bytes, n_qubits, coeffs)
+
+
+def _to_term_arrays(keys, n_bytes, n_qubits, coeffs):
+    """Convert packed x and z bits of Pauli strings into the term arrays of QubitOperator.from_arrays."""
+    x_bits = np.unpackbits(keys[:, :n_bytes], axis=1, count=n_qubits, bitorder='little')
+    z_bits = np.unpackbits(keys[:, n_bytes:], axis=1, count=n_qubits, bitorder='little')
+    # (x, z) bits to the Pauli codes of QubitOperator.from_arrays: I = 0, X = 1, Y = 2 and Z = 3
+    paulis = np.array([0, 1, 3, 2], dtype=np.uint8)[x_bits + 2 * z_bits]
+    rows, indices = np.nonzero(paulis)
+    offsets = np.zeros(len(coeffs) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(coeffs)), out=offsets[1:])
+    return indices.astype(np.uint32), paulis[rows, indices], coeffs.astype(np.complex128), offsets
@@ -24,6 +24,7 @@ from typing import List
 import numpy as np
 from rich.console import Console
 
+from mindquantum import mqbackend as mb
 from mindquantum.io import bprint
 from mindquantum.io.display import brick_model
 from mindquantum.utils.type_value_check import (
@@ -287,6 +288,7 @@ class Circuit(list):  # pylint: disable=too-many-instance-attributes,too-many-pu
         self.has_cpp_obj = False
         self.cpp_obj = None
         self.herm_cpp_obj = None
+        self.fused_cpp_obj = {}
 
     def _collect_parameterized_gate(self, gate: ParameterGate):
         """Collect parameterized gate information."""
@@ -763,7 +765,7 @@ class Circuit(list):  # pylint: disable=too-many-instance-attributes,too-many-pu
         from mindquantum.simulator import Simulator
 
         sim = Simulator(backend, self.n_qubits, seed=seed)
-        return np.array(sim.backend.get_circuit_matrix(circ, pr)).T
+        return np.array(sim.backend.get_circuit_matrix(circ, pr))
 
     def apply_value(self, pr):
         """
@@ -857,6 +859,7 @@ class Circuit(list):  # pylint: disable=too-many-instance-attributes,too-many-pu
             self.has_cpp_obj = True
             self.cpp_obj = [i.get_cpp_obj() for i in self if not isinstance(i, mq_gates.BarrierGate)]
             self.herm_cpp_obj = [i.get_cpp_obj() for i in self.hermitian() if not isinstance(i, mq_gates.BarrierGate)]
+            self.fused_cpp_obj = {}
 
         if hasattr(self, 'cpp_obj') and hasattr(self, 'herm_cpp_obj'):
             if hermitian:
@@ -864,6 +867,21 @@ class Circuit(list):  # pylint: disable=too-many-instance-attributes,too-many-pu
             return self.cpp_obj
         raise ValueError("Circuit does not generate cpp obj yet.")
 
+    def get_fused_cpp_obj(self, max_qubits):
+        """
+        Get cpp obj of circuit with adjacent gates fused into dense matrix gates.
+
+        The fusion only depends on the structure of circuit, so it is cached together with the cpp obj of
+        circuit and can be applied with any parameters. Fused circuit can not be used to calculate gradient.
+
+        Args:
+            max_qubits (int): The maximum number of qubits that a fused gate can act on.
+        """
+        cpp_obj = self.get_cpp_obj()
+        if max_qubits not in self.fused_cpp_obj:
+            self.fused_cpp_obj[max_qubits] = mb.fuse_circuit(cpp_obj, max_qubits)
+        return self.fused_cpp_obj[max_qubits]
+
     def h(self, obj_qubits, ctrl_qubits=None):
         """
         Add a hadamard gate.
@@ -39,17 +39,33 @@ def apply_gate(sim, gate, g_cpp, pr_cpp, diff):
         sim.apply_gate(g_cpp)
 
 
-# pylint: disable=too-many-statements,too-many-locals
-def _qfi_matrix_base(circuit: Circuit, which_part='both', backend='mqvector'):
-    """Calculate Quantum Fisher Information (QFI)."""
-    from ...simulator import (  # pylint: disable=import-outside-toplevel,cyclic-import
-        Simulator,
-        inner_product,
-    )
-
-    _check_input_type('circuit', Circuit, circuit)
-    if which_part not in ['A', 'B', 'both']:
-        raise ValueError(f"which part should be 'A', 'B' or 'both', but get {which_part}.")
+def _params_block(circuit: Circuit, blocks):
+    """Get the block index of every parameter, a parameter that not in any block forms a block itself."""
+    params_name = circuit.params_name
+    if blocks is None:
+        return np.zeros(len(params_name), int)
+    _check_input_type('blocks', (list, tuple), blocks)
+    block_map = {}
+    for idx, block in enumerate(blocks):
+        _check_input_type('element of blocks', (list, tuple), block)
+        for name in block:
+            if name not in params_name:
+                raise ValueError(f"Parameter {name} in blocks is not a parameter of circuit.")
+            if name in block_map:
+                raise ValueError(f"Parameter {name} appears in more than one block.")
+            block_map[name] = idx
+    n_blocks = len(blocks)
+    res = []
+    for name in params_name:
+        if name not in block_map:
+            block_map[name] = n_blocks
+            n_blocks += 1
+        res.append(block_map[name])
+    return np.array(res)
+
+
+def _check_qfi_circuit(circuit: Circuit):
+    """Check that circuit is a parameterized circuit without measure gate and noise, and remove its barriers."""
     circuit = circuit.remove_barrier()
     if circuit.has_measure_gate:
         raise ValueError("circuit can not has measure gate for calculate qfi similar value.")
@@ -57,7 +73,16 @@ def _qfi_matrix_base(circuit: Circuit, which_part='both', backend='mqvector'):
         raise ValueError("circuit can not be noise circuit for calculate qfi similar value.")
     if not circuit.params_name:
         raise ValueError("circuit need a parameterized quantum circuit, but get non-parameterized one.")
+    return circuit
 
+
+def _redefine_gate_params(circuit: Circuit, blocks):
+    """
+    Redefine every parameterized gate of circuit with a parameter of its own.
+
+    Returns the redefined circuit, the jacobian of the new parameters with respect to the parameters of circuit,
+    the map from new parameters to the coefficients of gates, and the block index of every parameterized gate.
+    """
     pure_circ = Circuit()
     n_params = 0
     jac = {}
@@ -75,30 +100,69 @@ def _qfi_matrix_base(circuit: Circuit, which_part='both', backend='mqvector'):
             pure_circ += gate
     old_idx_map = {p: idx for idx, p in enumerate(circuit.params_name)}
     new_idx_map = {p: idx for idx, p in enumerate(pure_circ.params_name)}
+    params_block = _params_block(circuit, blocks)
+    gates_block = []
+    for new_p in pure_circ.params_name:
+        block = {params_block[old_idx_map[old_p]] for old_p in jac[new_p]}
+        if len(block) != 1:
+            raise ValueError(f"Parameters of one gate should be in the same block, but get {list(jac[new_p])}.")
+        gates_block.append(block.pop())
     tmp = np.zeros((len(new_idx_map), len(old_idx_map)), np.complex128)
     for new_p, matrix in jac.items():
         for old_p, v in matrix.items():
             tmp[new_idx_map[new_p], old_idx_map[old_p]] = v
-    jac = tmp
+    return pure_circ, tmp, pr_map, np.array(gates_block)
+
+
+# pylint: disable=too-many-statements,too-many-locals
+def _qfi_matrix_base(circuit: Circuit, which_part='both', backend='mqvector', blocks=None, simulator=None):
+    """
+    Calculate Quantum Fisher Information (QFI).
+
+    If `simulator` is given, the circuit is applied on the quantum state that `simulator` has when the returned
+    function is called, and the width and backend of `simulator` are used. Otherwise the circuit is applied on
+    zero state.
+    """
+    from ...simulator import (  # pylint: disable=import-outside-toplevel,cyclic-import
+        Simulator,
+        inner_product,
+    )
+    from ...simulator.mqsim import (  # pylint: disable=import-outside-toplevel,cyclic-import
+        MQSim,
+    )
+
+    _check_input_type('circuit', Circuit, circuit)
+    if which_part not in ['A', 'B', 'both']:
+        raise ValueError(f"which part should be 'A', 'B' or 'both', but get {which_part}.")
+    if (backend if simulator is None else simulator.name) == 'mqmatrix':
+        raise ValueError("qfi is not supported by density matrix simulator.")
+    circuit = _check_qfi_circuit(circuit)
+    pure_circ, jac, pr_map, gates_block = _redefine_gate_params(circuit, blocks)
+    new_idx_map = {p: idx for idx, p in enumerate(pure_circ.params_name)}
     cpp_obj = pure_circ.get_cpp_obj()
     c_len = len(pure_circ)
-    ket = Simulator(backend, pure_circ.n_qubits)
+    if simulator is None:
+        ket = Simulator(backend, pure_circ.n_qubits)
+    elif isinstance(simulator, MQSim):
+        # The sweeps copy the quantum state of simulator themselves and leave it unchanged.
+        ket = None
+    else:
+        ket = Simulator(simulator.name, simulator.n_qubits)
 
     # pylint: disable=too-many-branches
-    def qfi_ops(pr: ParameterResolver):
-        pr = _check_and_generate_pr_type(pr, circuit.params_name)
-        ket.reset()
-        pr_cpp = pr_converter(pr_map, pr).to_real_obj()
+    def replay_parts(pr_cpp):
+        """Calculate the parts of gates by replaying the gates between every pair of parameterized gates."""
         if which_part != 'B':
             part_a = np.zeros((len(new_idx_map), len(new_idx_map)), np.complex128)
         if which_part != 'A':
             part_b = np.zeros(len(new_idx_map), np.complex128)
+        init = ket.copy()
         for i in range(c_len):
             gate = pure_circ[i]
             g_cpp = cpp_obj[i]
             if gate.parameterized:
                 idx_i = new_idx_map[gate.coeff.params_name[0]]
-                bra = Simulator(backend, pure_circ.n_qubits)
+                bra = init.copy()
                 ket_tmp = ket.copy()
                 ket_tmp.backend.sim.apply_gate(g_cpp, pr_cpp, True)
                 if which_part != 'B':
@@ -130,6 +194,29 @@ def _qfi_matrix_base(circuit: Circuit, which_part='both', backend='mqvector'):
             else:
                 ket.backend.sim.apply_gate(g_cpp)
             ket.flush()
+        if which_part == 'B':
+            return None, part_b
+        part_a *= gates_block[:, None] == gates_block[None, :]
+        if which_part == 'A':
+            return part_a, None
+        return part_a, part_b
+
+    def qfi_ops(pr: ParameterResolver):
+        pr = _check_and_generate_pr_type(pr, circuit.params_name)
+        if simulator is None:
+            ket.reset()
+        elif ket is not None:
+            ket.set_qs(simulator.get_qs(), False)
+        pr_cpp = pr_converter(pr_map, pr).to_real_obj()
+        start = simulator if ket is None else ket.backend
+        if isinstance(start, MQSim):
+            # Every sweep stops at the gate itself if only B is required.
+            blocks_cpp = list(range(len(gates_block))) if which_part == 'B' else gates_block.tolist()
+            part_a, part_b = start.sim.get_qfi_parts(cpp_obj, pr_cpp, blocks_cpp, len(gates_block))
+            part_a = np.array(part_a).reshape((len(gates_block), len(gates_block)))
+            part_b = np.array(part_b)
+        else:
+            part_a, part_b = replay_parts(pr_cpp)
         if which_part != 'B':
             first_part = jac.T @ part_a @ jac
         if which_part != 'A':
@@ -143,7 +230,43 @@ def _qfi_matrix_base(circuit: Circuit, which_part='both', backend='mqvector'):
     return qfi_ops
 
 
-def qfi(circuit: Circuit, backend='mqvector'):
+def _fubini_study_metric(circuit: Circuit, backend='mqvector', blocks=None, simulator=None):
+    """Calculate the Fubini-Study metric Re(A - B), which is a quarter of quantum fisher information."""
+    parts_ops = _qfi_matrix_base(circuit, backend=backend, blocks=blocks, simulator=simulator)
+    params_block = _params_block(circuit, blocks)
+    mask = params_block[:, None] == params_block[None, :]
+
+    def metric_ops(pr):
+        # pylint: disable=invalid-name
+        a, b = parts_ops(pr)
+        b = np.outer(b, np.conj(b)) * mask
+        return np.real(a - b)
+
+    return metric_ops
+
+
+def _fubini_study_metric_from_parts(circuit: Circuit, blocks=None):
+    """
+    Get the gate blocks of circuit and the map from native QFI parts to the Fubini-Study metric.
+
+    Returns the block index of every parameterized gate of circuit, and the function that maps the parts A and B of
+    parameterized gates calculated natively by `mqvector` backend to the Fubini-Study metric of parameters.
+    """
+    circuit = _check_qfi_circuit(circuit)
+    _, jac, _, gates_block = _redefine_gate_params(circuit, blocks)
+    params_block = _params_block(circuit, blocks)
+    mask = params_block[:, None] == params_block[None, :]
+
+    def metric_ops(part_a, part_b):
+        # pylint: disable=invalid-name
+        a = jac.T @ np.array(part_a).reshape((len(gates_block), len(gates_block))) @ jac
+        b = jac.T @ np.array(part_b)
+        return np.real(a - np.outer(b, np.conj(b)) * mask)
+
+    return gates_block.tolist(), metric_ops
+
+
+def qfi(circuit: Circuit, backend='mqvector', blocks=None):
     r"""
     Calculate the quantum fisher information of the given parameterized circuit with given parameters.
 
@@ -167,10 +290,18 @@ def qfi(circuit: Circuit, backend='mqvector'):
         B_{i,j} = \frac{\partial \left<\psi\right| }{\partial x_i}\left|\psi\right>
         \left<\psi\right|\frac{\partial \left|\psi\right> }{\partial x_{j}}
 
+    For `mqvector` backend, every parameterized gate takes one forward sweep of the circuit, and the
+    sweeps run in parallel threads.
+
     Args:
         circuit (Circuit): A parameterized quantum circuit.
         backend (str): A supported simulator backend. Please refer description
             of :class:`mindquantum.simulator.Simulator`. Default: 'mqvector'.
+        blocks (list[list[str]]): Parameters name grouped into blocks, for example the parameters of every
+            layer of the ansatz. If given, only the elements between parameters in the same block are
+            calculated and the others are zero, which is the block-diagonal approximation of quantum fisher
+            information. A parameter that is not in any block forms a block itself. If ``None``, the full
+            quantum fisher information is calculated. Default: ``None``.
 
     Returns:
         Function, a function that can calculate quantum fisher information.
@@ -185,18 +316,15 @@ def qfi(circuit: Circuit, backend='mqvector'):
                [ 0.        ,  0.29192658, -0.18920062],
                [-0.90929743, -0.18920062,  0.94944468]])
     """
-    qfi_ops_tmp = _qfi_matrix_base(circuit, backend=backend)
+    metric_ops = _fubini_study_metric(circuit, backend=backend, blocks=blocks)
 
     def qfi_ops(pr):
-        # pylint: disable=invalid-name
-        a, b = qfi_ops_tmp(pr)
-        b = np.outer(b, np.conj(b))
-        return np.real(a - b) * 4
+        return metric_ops(pr) * 4
 
     return qfi_ops
 
 
-def partial_psi_partial_psi(circuit: Circuit, backend='mqvector'):
+def partial_psi_partial_psi(circuit: Circuit, backend='mqvector', blocks=None):
     r"""
     Calculate the following value of the given parameterized quantum circuit.
 
@@ -209,6 +337,9 @@ def partial_psi_partial_psi(circuit: Circuit, backend='mqvector'):
         circuit (Circuit): A parameterized quantum circuit.
         backend (str): A supported simulator backend. Please refer description
             of :class:`mindquantum.simulator.Simulator`. Default: 'mqvector'.
+        blocks (list[list[str]]): Parameters name grouped into blocks. If given, only the elements between
+            parameters in the same block are calculated and the others are zero. A parameter that is not in
+            any block forms a block itself. If ``None``, all elements are calculated. Default: ``None``.
 
     Returns:
         Function, a function that can calculate inner product of partial psi and partial psi.
@@ -226,7 +357,7 @@ def partial_psi_partial_psi(circuit: Circuit, backend='mqvector'):
                [-0.22732436+0.08754387j,  0.        -0.12282387j,
                  0.25      +0.j        ]])
     """
-    return _qfi_matrix_base(circuit, 'A', backend=backend)
+    return _qfi_matrix_base(circuit, 'A', backend=backend, blocks=blocks)
 
 
 def partial_psi_psi(circuit: Circuit, backend='mqvector'):
@@ -151,6 +151,25 @@ class Measure(FunctionalGate):
         return self.__class__(self.key).on(self.obj_qubits[0])
 
 
+def _select_bits(packed, idx):
+    """Select the bits with given index from every row of bit-packed samples and pack them again."""
+    idx = np.asarray(idx, dtype=np.int64)
+    bits = (packed[:, idx // 8] >> (idx % 8).astype(np.uint8)) & 1
+    return np.packbits(bits, axis=1, bitorder='little')
+
+
+def _count_packed(packed):
+    """Get the unique rows of bit-packed samples and how many times they appear."""
+    n_bytes = packed.shape[1]
+    if n_bytes > 8:
+        return np.unique(packed, axis=0, return_counts=True)
+    # Rows of no more than 64 bits can be counted as uint64 integers.
+    values = np.zeros((len(packed), 8), dtype=np.uint8)
+    values[:, :n_bytes] = packed
+    values, counts = np.unique(values.view('<u8').ravel(), return_counts=True)
+    return values.astype('<u8').view(np.uint8).reshape(-1, 8)[:, :n_bytes], counts
+
+
 class MeasureResult:
     """
     Measurement result container.
@@ -181,9 +200,14 @@ class MeasureResult:
         """Initialize a MeasureResult object."""
         self.measures = []
         self.keys = []
-        self.samples = np.array([])
-        self.bit_string_data = {}
         self.shots = 0
+        self._n_bits = 0
+        self._packed = np.zeros((0, 0), dtype=np.uint8)
+        self._unique = np.zeros((0, 0), dtype=np.uint8)
+        self._counts = np.array([], dtype=np.int64)
+        self._samples_dtype = np.dtype(np.int64)
+        self._samples = None
+        self._bit_string_data = None
 
     def add_measure(self, measure):
         """
@@ -219,18 +243,64 @@ class MeasureResult:
                 the sampling bit string in 0 or 1, where N represents the number of shot
                 times, and M represents the number of keys in this measurement container
         """
-        self.samples = samples
-        out = {}
-        res = np.fliplr(self.samples)
-        self.shots = len(self.samples)
-        for string in res:
-            string = ''.join([str(i) for i in string])
-            if string in out:
-                out[string] += 1
-            else:
-                out[string] = 1
-        keys = sorted(out.keys())
-        self.bit_string_data = {key: out[key] for key in keys}
+        samples = np.asarray(samples)
+        packed = np.packbits(samples.astype(np.uint8), axis=1, bitorder='little')
+        self._set_packed(packed, samples.shape[1], samples.dtype)
+
+    def _set_packed(self, packed, n_bits, dtype):
+        """Set the samples with bit-packed data, where the first key is stored in the lowest bit."""
+        self._packed = packed
+        self._n_bits = n_bits
+        self._samples_dtype = dtype
+        self.shots = len(packed)
+        self._unique, self._counts = _count_packed(packed)
+        self._samples = None
+        self._bit_string_data = None
+
+    @classmethod
+    def _from_packed(cls, measures, packed, n_bits, dtype):
+        """Construct a measurement result of given measure gates from bit-packed samples."""
+        res = cls()
+        res.add_measure(measures)
+        res._set_packed(packed, n_bits, dtype)
+        return res
+
+    @property
+    def samples(self):
+        """
+        Get the sampling bit strings of every shot.
+
+        The samples are stored bit-packed, and are unpacked at the first access with the data type they were
+        collected with. Setting the samples is the same as calling :func:`collect_data`.
+
+        Returns:
+            numpy.ndarray, a two dimensional (N x M) array, where N is the number of shots and M is the number of keys.
+        """
+        if self._samples is None:
+            bits = np.unpackbits(self._packed, axis=1, count=self._n_bits, bitorder='little')
+            self._samples = bits.astype(self._samples_dtype)
+        return self._samples
+
+    @samples.setter
+    def samples(self, samples):
+        """Set the sampling bit strings of every shot."""
+        self.collect_data(samples)
+
+    @property
+    def bit_string_data(self):
+        """
+        Get the number of times every bit string appears, with the first key as the rightmost bit.
+
+        This data is counted from the samples, so it is read-only. Set the samples to change it.
+
+        Returns:
+            dict, The sampling data.
+        """
+        if self._bit_string_data is None:
+            bits = np.unpackbits(self._unique, axis=1, count=self._n_bits, bitorder='little')[:, ::-1]
+            strings = [row.tobytes().decode() for row in bits + ord('0')]
+            self._bit_string_data = dict(sorted(zip(strings, self._counts.tolist())))
+        return self._bit_string_data
 
     def select_keys(self, *keys):
         """
@@ -271,11 +341,9 @@ class MeasureResult:
                 raise ValueError(f'{key} not in this measure result.')
         keys_map = self.keys_map
         idx = [keys_map[key] for key in keys]
-        samples = self.samples[:, idx]
-        res = MeasureResult()
-        res.add_measure([self.measures[i] for i in idx])
-        res.collect_data(samples)
-        return res
+        return MeasureResult._from_packed(
+            [self.measures[i] for i in idx], _select_bits(self._packed, idx), len(idx), self._samples_dtype
+        )
 
     @property
     def data(self):
@@ -15,12 +15,22 @@
 
 """Hamiltonian module."""
 
+import hashlib
+import os
+import tempfile
+import warnings
+import zipfile
+from collections import OrderedDict
 from enum import Enum
 
 import numpy as np
 import scipy.sparse as sp
 
 from mindquantum import mqbackend as mb
+from mindquantum.utils.type_value_check import (
+    _check_int_type,
+    _check_value_should_not_less,
+)
 
 from ._term_value import TermValue
 
@@ -33,6 +43,75 @@ class HowTo(Enum):
     FRONTEND = 2
 
 
+# Sparse BACKEND hamiltonians, keyed by the content hash of their terms and shared by all Hamiltonian objects
+_SPARSE_CACHE = OrderedDict()
+_SPARSE_CACHE_SIZE = 8
+
+
+def _sparse_cache_key(term_arrays, n_qubits):
+    """Get the content hash of some pauli terms sparsed on n_qubits qubits."""
+    digest = hashlib.sha256(f'{n_qubits}'.encode())
+    for array in term_arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def _get_sparse_hamiltonian(term_arrays, n_qubits, cache_dir=None):
+    """
+    Get the BACKEND C++ hamiltonian of some pauli terms, sparsing them only if they were never sparsed before.
+
+    Args:
+        term_arrays (tuple[numpy.ndarray]): The pauli terms as returned by `QubitOperator.to_arrays`, with real
+            coefficients.
+        n_qubits (int): The total qubit of the hamiltonian.
+        cache_dir (str): Directory where the sparse matrices are stored as `.npz` files. Default: None.
+    """
+    key = _sparse_cache_key(term_arrays, n_qubits)
+    ham = _SPARSE_CACHE.pop(key, None)
+    if ham is None:
+        path = None if cache_dir is None else os.path.join(cache_dir, f'{key}.npz')
+        if path is not None and os.path.isfile(path):
+            ham = _load_sparse_hamiltonian(term_arrays, n_qubits, path)
+        if ham is None:
+            ham = mb.hamiltonian.from_arrays(*term_arrays, n_qubits)
+            if path is not None:
+                _store_sparse_hamiltonian(ham, cache_dir, path)
+    _SPARSE_CACHE[key] = ham
+    while len(_SPARSE_CACHE) > _SPARSE_CACHE_SIZE:
+        _SPARSE_CACHE.popitem(last=False)
+    return ham
+
+
+def _load_sparse_hamiltonian(term_arrays, n_qubits, path):
+    """Load the BACKEND C++ hamiltonian from a cached `.npz` file, or return None with a warning if it is corrupt."""
+    try:
+        with np.load(path) as sparse_arrays:
+            return mb.hamiltonian.from_sparse_arrays(
+                *term_arrays, n_qubits, sparse_arrays['data'], sparse_arrays['indices'], sparse_arrays['indptr']
+            )
+    except (OSError, EOFError, KeyError, TypeError, ValueError, zipfile.BadZipFile) as err:
+        warnings.warn(f"Sparse hamiltonian cache {path} is corrupt and will be rebuilt: {err}", stacklevel=4)
+        return None
+
+
+def _store_sparse_hamiltonian(ham, cache_dir, path):
+    """Store the sparse matrix of a BACKEND C++ hamiltonian as a `.npz` file, only warn if it can not be written."""
+    data, indices, indptr = ham.sparse_arrays()
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # NB: write to a temporary file first, since other processes may read the cache at the same time
+        with tempfile.NamedTemporaryFile(dir=cache_dir, suffix='.npz', delete=False) as tmp_file:
+            tmp_path = tmp_file.name
+        np.savez(tmp_path, data=data, indices=indices, indptr=indptr)
+        os.replace(tmp_path, path)
+    except OSError as err:
+        warnings.warn(f"Can not store sparse hamiltonian cache {path}: {err}", stacklevel=4)
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 class Hamiltonian:
     """
     A QubitOperator hamiltonian wrapper.
@@ -72,11 +151,13 @@ class Hamiltonian:
             self.sparse_mat = sp.csr_matrix(np.eye(2, dtype=np.complex64))
             self.how_to = HowTo.ORIGIN
             self.n_qubits = count_qubits(hamiltonian)
-        self.ham_termlist = []
-        for i, j in self.hamiltonian.terms.items():
-            if not j.is_const():
-                raise ValueError("Hamiltonian cannot be parameterized.")
-            self.ham_termlist.append((tuple((k, TermValue[l]) for k, l in i), j.const.real))
+        try:
+            indices, paulis, coeffs, offsets = self.hamiltonian.to_arrays()
+        except ValueError as err:
+            raise ValueError("Hamiltonian cannot be parameterized.") from err
+        self._term_arrays = (indices, paulis, np.ascontiguousarray(coeffs.real), offsets)
+        self._cache_dir = None
+        self._ham_termlist = None
 
         self.ham_cpp = None
         self.herm_ham_cpp = None
@@ -93,13 +174,35 @@ class Hamiltonian:
             return self.sparse_mat.__str__()
         return self.hamiltonian.__repr__()
 
-    def sparse(self, n_qubits=1):
+    @property
+    def ham_termlist(self):
+        """Get the pauli terms of this hamiltonian together with the real part of their coefficient."""
+        if self._ham_termlist is None:
+            indices, paulis, coeffs, offsets = self._term_arrays
+            self._ham_termlist = [
+                (
+                    tuple(
+                        (int(idx), TermValue['IXYZ'[code]]) for idx, code in zip(indices[begin:end], paulis[begin:end])
+                    ),
+                    float(coeff),
+                )
+                for begin, end, coeff in zip(offsets[:-1], offsets[1:], coeffs)
+            ]
+        return self._ham_termlist
+
+    def sparse(self, n_qubits=1, cache_dir=None):
         """
         Calculate the sparse matrix of this hamiltonian in pqc operator.
 
+        The sparse matrix is cached according to the content of the hamiltonian, so that it is computed only once for
+        all the Hamiltonian objects with the same terms in a process.
+
         Args:
             n_qubits (int): The total qubit of this hamiltonian, only need when mode is
                 'frontend'. Default: 1.
+            cache_dir (str): If not None, the sparse matrix is also cached as a `.npz` file in this directory, so
+                that it can be reused by other processes. A file that can not be written or read back only causes a
+                warning, and the sparse matrix is computed again. Default: None.
         """
         if self.how_to != HowTo.ORIGIN:
             raise ValueError('Already a sparse hamiltonian.')
@@ -107,8 +210,46 @@ class Hamiltonian:
             raise ValueError(f"Can not sparse a {self.n_qubits} qubits hamiltonian to {n_qubits} hamiltonian.")
         self.n_qubits = n_qubits
         self.how_to = HowTo.BACKEND
+        self.ham_cpp = None
+        self._cache_dir = cache_dir
         return self
 
+    @staticmethod
+    def clear_sparse_cache():
+        """
+        Clear the sparse matrices cached in memory by :meth:`sparse`.
+
+        The `.npz` files in `cache_dir` are not removed.
+
+        Examples:
+            >>> from mindquantum.core.operators import Hamiltonian
+            >>> Hamiltonian.clear_sparse_cache()
+        """
+        _SPARSE_CACHE.clear()
+
+    @staticmethod
+    def set_sparse_cache_size(size):
+        """
+        Set the maximum number of sparse matrices cached in memory by :meth:`sparse`.
+
+        The least recently used sparse matrices are released first if the cache is larger than `size`. Hamiltonian
+        objects that already got their sparse matrix still hold it.
+
+        Args:
+            size (int): The maximum number of cached sparse matrices. If ``0``, sparse matrices are not cached in
+                memory. Default size is ``8``.
+
+        Examples:
+            >>> from mindquantum.core.operators import Hamiltonian
+            >>> Hamiltonian.set_sparse_cache_size(2)
+        """
+        global _SPARSE_CACHE_SIZE  # pylint: disable=global-statement
+        _check_int_type('size', size)
+        _check_value_should_not_less('size', 0, size)
+        _SPARSE_CACHE_SIZE = size
+        while len(_SPARSE_CACHE) > _SPARSE_CACHE_SIZE:
+            _SPARSE_CACHE.popitem(last=False)
+
     def get_cpp_obj(self, hermitian=False):
         """
         Get the underlying C++ object.
@@ -119,9 +260,9 @@ class Hamiltonian:
         if not hermitian:
             if self.ham_cpp is None:
                 if self.how_to == HowTo.ORIGIN:
-                    ham = mb.hamiltonian(self.ham_termlist)
+                    ham = mb.hamiltonian.from_arrays(*self._term_arrays)
                 elif self.how_to == HowTo.BACKEND:
-                    ham = mb.hamiltonian(self.ham_termlist, self.n_qubits)
+                    ham = _get_sparse_hamiltonian(self._term_arrays, self.n_qubits, self._cache_dir)
                 else:
                     dim = self.sparse_mat.shape[0]
                     nnz = self.sparse_mat.nnz
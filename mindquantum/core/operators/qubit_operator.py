@@ -18,6 +18,9 @@
 #   Apache 2.0 license.
 """This is the module for the Qubit Operator."""
 
+import numpy as np
+import scipy.sparse as sp
+
 from ... import mqbackend
 from ...core.parameterresolver import ParameterResolver
 from ._term_value import TermValue
@@ -129,6 +132,34 @@ class QubitOperator(TermsOperator):
         """
         return self.__class__(self._cpp_obj.real)
 
+    @classmethod
+    def from_arrays(cls, indices, paulis, coeffs, offsets):
+        """
+        Build a qubit operator from the packed arrays returned by :meth:`to_arrays`.
+
+        The local operators of the i-th term are given by ``indices[offsets[i]:offsets[i + 1]]`` and
+        ``paulis[offsets[i]:offsets[i + 1]]``, with Pauli codes 0, 1, 2 and 3 standing for I, X, Y and Z. The local
+        operators of a term may be unsorted or act several times on the same qubit, and identical terms are summed up.
+
+        Args:
+            indices (numpy.ndarray): The qubit index of every local operator.
+            paulis (numpy.ndarray): The Pauli code of every local operator.
+            coeffs (numpy.ndarray): The coefficient of every term.
+            offsets (numpy.ndarray): The offsets of the terms in `indices` and `paulis`, of size ``len(coeffs) + 1``.
+
+        Returns:
+            QubitOperator, the qubit operator built from the arrays.
+
+        Examples:
+            >>> import numpy as np
+            >>> from mindquantum.core.operators import QubitOperator
+            >>> indices, paulis = np.array([0, 2, 1]), np.array([1, 2, 3])
+            >>> QubitOperator.from_arrays(indices, paulis, np.array([0.5, 1]), np.array([0, 2, 3]))
+            1/2 [X0 Y2] +
+            1 [Z1]
+        """
+        return cls(cls.complex_pr_klass.from_arrays(indices, paulis, coeffs, offsets))
+
     @classmethod
     def from_openfermion(cls, of_ops, dtype=None):
         """
@@ -204,15 +235,50 @@ class QubitOperator(TermsOperator):
         """Return Hermitian conjugate of QubitOperator."""
         return self.__class__(self._cpp_obj.hermitian())
 
-    def matrix(self, n_qubits: int = None):
+    def matrix(self, n_qubits: int = None, dtype=None):
         """
         Convert this qubit operator to csr_matrix.
 
+        The matrix is assembled natively in a single pass over its rows, every row having one entry per set of terms
+        that flip the same qubits. This makes it practical to build a frontend
+        :class:`~.core.operators.Hamiltonian` of more than 20 qubits.
+
         Args:
             n_qubits (int): The total qubits of final matrix. If None, the value will be
                 the maximum local qubit number. Default: None.
+            dtype (type): The data type of the matrix, either `numpy.complex128` or `numpy.complex64`. If None,
+                `numpy.complex128` will be used. Default: None.
+
+        Returns:
+            scipy.sparse.csr_matrix, the matrix of this qubit operator.
+
+        Examples:
+            >>> from mindquantum.core.operators import QubitOperator
+            >>> QubitOperator('X0 Z1', 0.5).matrix().toarray().real
+            array([[ 0. ,  0.5,  0. ,  0. ],
+                   [ 0.5,  0. ,  0. ,  0. ],
+                   [ 0. ,  0. ,  0. , -0.5],
+                   [ 0. ,  0. , -0.5,  0. ]])
         """
-        return self._cpp_obj.matrix(n_qubits)
+        if dtype is None:
+            dtype = np.complex128
+        if np.dtype(dtype) not in (np.complex128, np.complex64):
+            raise TypeError(f"dtype of matrix should be numpy.complex128 or numpy.complex64, but get {dtype}.")
+        indices, paulis, coeffs, offsets = self.to_arrays()
+        n_qubits_local = self.count_qubits()
+        if n_qubits is None:
+            n_qubits = n_qubits_local
+        if n_qubits < n_qubits_local:
+            raise ValueError(
+                f"Given n_qubits {n_qubits} is smaller than the number of qubits of this qubit operator, "
+                f"which is {n_qubits_local}."
+            )
+        data, col_indices, indptr = mqbackend.pauli_arrays_to_csr(
+            indices, paulis, coeffs, offsets, n_qubits, np.dtype(dtype) == np.complex64
+        )
+        matrix = sp.csr_matrix((data, col_indices, indptr), shape=(1 << n_qubits, 1 << n_qubits))
+        matrix.eliminate_zeros()
+        return matrix
 
     def split(self):
         """
@@ -230,6 +296,28 @@ class QubitOperator(TermsOperator):
         for i, j in self._cpp_obj.split():
             yield [ParameterResolver(i), self.__class__(j)]
 
+    def to_arrays(self):
+        """
+        Export the terms of this qubit operator as packed NumPy arrays in a single call.
+
+        Returns:
+            Tuple[numpy.ndarray], the qubit indices (uint32) and the Pauli codes (uint8) of the local operators of all
+            the terms, the coefficients (complex128) of the terms and the offsets (int64) of the terms, see
+            :meth:`from_arrays`.
+
+        Raises:
+            ValueError: If a coefficient of the qubit operator is parameterized.
+
+        Examples:
+            >>> from mindquantum.core.operators import QubitOperator
+            >>> indices, paulis, coeffs, offsets = (QubitOperator('X0 Y2', 0.5) + QubitOperator('Z1')).to_arrays()
+            >>> indices, paulis, offsets
+            (array([0, 2, 1], dtype=uint32), array([1, 2, 3], dtype=uint8), array([0, 2, 3]))
+            >>> coeffs
+            array([0.5+0.j, 1. +0.j])
+        """
+        return self._cpp_obj.to_arrays()
+
     # pylint: disable=useless-super-delegation
     def to_openfermion(self):
         """Convert qubit operator to openfermion format."""
@@ -101,6 +101,11 @@ def commutator(left_operator, right_operator):
     if not isinstance(left_operator, valuable_type):
         raise TypeError("Operator should be QubitOperator, FermionOperator or QubitExcitationOperator.")
 
+    # pylint: disable=protected-access
+    if isinstance(left_operator, QubitOperator) and isinstance(right_operator._cpp_obj, type(left_operator._cpp_obj)):
+        # Only the anticommuting pairs of Pauli strings are multiplied, using packed x/z bits in C++.
+        return QubitOperator(left_operator._cpp_obj.commutator(right_operator._cpp_obj))
+
     result = left_operator * right_operator
     result -= right_operator * left_operator
     return result
@@ -28,6 +28,7 @@ try:
         MQN2Ops,
         MQOps,
     )
+    from .optimizer import QuantumNaturalGradient
 
     __all__.extend(
         [
@@ -41,6 +42,7 @@ try:
             "MQN2AnsatzOnlyOps",
             "MQEncoderOnlyOps",
             "MQN2EncoderOnlyOps",
+            "QuantumNaturalGradient",
         ]
     )
     try:
@@ -105,8 +105,6 @@ class MQOps(nn.Cell):
         _check_grad_ops(expectation_with_grad)
         self.expectation_with_grad = expectation_with_grad
         self.shape_ops = operations.Shape()
-        self.g_enc = None
-        self.g_ans = None
 
     def extend_repr(self):
         """Extend string representation."""
@@ -116,16 +114,12 @@ class MQOps(nn.Cell):
         """Construct an MQOps node."""
         check_enc_input_shape(enc_data, self.shape_ops(enc_data), len(self.expectation_with_grad.encoder_params_name))
         check_ans_input_shape(ans_data, self.shape_ops(ans_data), len(self.expectation_with_grad.ansatz_params_name))
-        fval, g_enc, g_ans = self.expectation_with_grad(enc_data.asnumpy(), ans_data.asnumpy())
-        self.g_enc = np.real(g_enc)
-        self.g_ans = np.real(g_ans)
+        fval = self.expectation_with_grad.forward(enc_data.asnumpy(), ans_data.asnumpy())
         return ms.Tensor(np.real(fval), dtype=ms.float32)
 
     def bprop(self, enc_data, ans_data, out, dout):  # pylint: disable=unused-argument
         """Implement the bprop function."""
-        dout = dout.asnumpy()
-        enc_grad = np.einsum('smp,sm->sp', self.g_enc, dout)
-        ans_grad = np.einsum('smp,sm->p', self.g_ans, dout)
+        enc_grad, ans_grad = self.expectation_with_grad.vjp(dout.asnumpy(), enc_data.asnumpy(), ans_data.asnumpy())
         return ms.Tensor(enc_grad, dtype=ms.float32), ms.Tensor(ans_grad, dtype=ms.float32)
 
 
@@ -205,8 +199,8 @@ class MQN2Ops(nn.Cell):
         check_ans_input_shape(ans_data, self.shape_ops(ans_data), len(self.expectation_with_grad.ansatz_params_name))
         fval, g_enc, g_ans = self.expectation_with_grad(enc_data.asnumpy(), ans_data.asnumpy())
         self.f = fval
-        self.g_enc = g_enc
-        self.g_ans = g_ans
+        self.g_enc = _fill_grad(self.expectation_with_grad, g_enc, self.expectation_with_grad.encoder_params_name)
+        self.g_ans = _fill_grad(self.expectation_with_grad, g_ans, self.expectation_with_grad.ansatz_params_name)
         return ms.Tensor(np.abs(fval) ** 2, dtype=ms.float32)
 
     def bprop(self, enc_data, ans_data, out, dout):  # pylint: disable=unused-argument
@@ -269,7 +263,6 @@ class MQAnsatzOnlyOps(nn.Cell):
         _check_grad_ops(expectation_with_grad)
         self.expectation_with_grad = expectation_with_grad
         self.shape_ops = operations.Shape()
-        self.g = None  # pylint: disable=invalid-name
 
     def extend_repr(self):
         """Extend string representation."""
@@ -278,14 +271,12 @@ class MQAnsatzOnlyOps(nn.Cell):
     def construct(self, arg):
         """Construct a MQAnsatzOnlyOps node."""
         check_ans_input_shape(arg, self.shape_ops(arg), len(self.expectation_with_grad.ansatz_params_name))
-        fval, g_ans = self.expectation_with_grad(arg.asnumpy())
-        self.g = np.real(g_ans[0])
+        fval = self.expectation_with_grad.forward(arg.asnumpy())
         return ms.Tensor(np.real(fval[0]), dtype=ms.float32)
 
     def bprop(self, arg, out, dout):  # pylint: disable=unused-argument
         """Implement the bprop function."""
-        dout = dout.asnumpy()
-        grad = dout @ self.g
+        grad = self.expectation_with_grad.vjp(dout.asnumpy()[None, :], arg.asnumpy())
         return ms.Tensor(grad, dtype=ms.float32)
 
 
@@ -354,7 +345,7 @@ class MQN2AnsatzOnlyOps(nn.Cell):
         check_ans_input_shape(arg, self.shape_ops(arg), len(self.expectation_with_grad.ansatz_params_name))
         fval, g_ans = self.expectation_with_grad(arg.asnumpy())
         self.f = fval[0]
-        self.g = g_ans[0]
+        self.g = _fill_grad(self.expectation_with_grad, g_ans[0], self.expectation_with_grad.ansatz_params_name)
         return ms.Tensor(np.abs(fval[0]) ** 2, dtype=ms.float32)
 
     def bprop(self, arg, out, dout):  # pylint: disable=unused-argument
@@ -420,7 +411,6 @@ class MQEncoderOnlyOps(nn.Cell):
         _check_grad_ops(expectation_with_grad)
         self.expectation_with_grad = expectation_with_grad
         self.shape_ops = operations.Shape()
-        self.g = None  # pylint: disable=invalid-name
 
     def extend_repr(self):
         """Extend string representation."""
@@ -429,14 +419,12 @@ class MQEncoderOnlyOps(nn.Cell):
     def construct(self, arg):
         """Construct a MQEncoderOnlyOps node."""
         check_enc_input_shape(arg, self.shape_ops(arg), len(self.expectation_with_grad.encoder_params_name))
-        fval, g_enc = self.expectation_with_grad(arg.asnumpy())
-        self.g = np.real(g_enc)
+        fval = self.expectation_with_grad.forward(arg.asnumpy())
         return ms.Tensor(np.real(fval), dtype=ms.float32)
 
     def bprop(self, arg, out, dout):  # pylint: disable=unused-argument
         """Implement the bprop function."""
-        dout = dout.asnumpy()
-        grad = np.einsum('smp,sm->sp', self.g, dout)
+        grad = self.expectation_with_grad.vjp(dout.asnumpy(), arg.asnumpy())
         return ms.Tensor(grad, dtype=ms.float32)
 
 
@@ -508,7 +496,7 @@ class MQN2EncoderOnlyOps(nn.Cell):
         check_enc_input_shape(arg, self.shape_ops(arg), len(self.expectation_with_grad.encoder_params_name))
         fval, g_enc = self.expectation_with_grad(arg.asnumpy())
         self.f = fval
-        self.g = g_enc
+        self.g = _fill_grad(self.expectation_with_grad, g_enc, self.expectation_with_grad.encoder_params_name)
         return ms.Tensor(np.abs(fval) ** 2, dtype=ms.float32)
 
     def bprop(self, arg, out, dout):  # pylint: disable=unused-argument
@@ -527,6 +515,11 @@ def _mode_check(self):
         )
 
 
+def _fill_grad(expectation_with_grad, grad, params_name):
+    """Expand gradient to all parameters, the parameters excluded by grad_wrt get zero gradient."""
+    return expectation_with_grad._fill_grad(grad, params_name)  # pylint: disable=protected-access
+
+
 def _check_grad_ops(expectation_with_grad):
     if not isinstance(expectation_with_grad, GradOpsWrapper):
         raise TypeError(f'expectation_with_grad requires a GradOpsWrapper, but get {type(expectation_with_grad)}')
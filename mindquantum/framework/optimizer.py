@@ -0,0 +1,130 @@
+# Copyright 2022 Huawei Technologies Co., Ltd
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Mindspore quantum optimizer."""
+
+import mindspore as ms
+import numpy as np
+from mindspore import nn
+from mindspore.ops import operations
+from scipy.linalg import cho_factor, cho_solve
+
+from mindquantum.utils.type_value_check import (
+    _check_input_type,
+    _check_int_type,
+    _check_value_should_not_less,
+)
+
+from .operations import _check_grad_ops, _mode_check
+
+
+class QuantumNaturalGradient(nn.Optimizer):  # pylint: disable=too-many-instance-attributes
+    r"""
+    Quantum natural gradient optimizer.
+
+    The ansatz parameters are updated along the gradient preconditioned by the Fubini-Study metric :math:`g` of
+    the ansatz circuit, which is a quarter of quantum fisher information,
+
+    .. math::
+
+        \theta_{t+1} = \theta_t - \eta (g + \lambda I)^{-1} \nabla E(\theta_t)
+
+    where :math:`\eta` is the learning rate and :math:`\lambda` is the regularization. The metric is calculated
+    on the quantum state of the simulator that generates `expectation_with_grad`, and is refreshed every
+    `refresh_period` steps, so that the steps between two refreshes only cost a gradient and a triangular solve.
+    This optimizer is `PYNATIVE_MODE` supported only.
+
+    Args:
+        params (list[Parameter]): The ansatz weight of a quantum layer, such as the `weight` of
+            :class:`~.framework.MQAnsatzOnlyLayer`.
+        expectation_with_grad (GradOpsWrapper): The grad ops of the quantum layer. Only grad ops of a hermitian
+            ansatz circuit without encoder parameters that generated by `mqvector` or `mqvector_gpu` simulator
+            is supported.
+        learning_rate (Union[float, Tensor, Iterable, LearningRateSchedule]): The learning rate. Default: 0.1.
+        regularization (float): The :math:`\lambda` that makes the metric invertible, should be greater than 0.
+            Default: 1e-3.
+        refresh_period (int): The number of steps that reuse one metric. Default: 1.
+        blocks (list[list[str]]): Parameters name grouped into blocks, for example the parameters of every layer
+            of the ansatz. If given, the block-diagonal approximation of metric is used, please refer to
+            :func:`~.core.circuit.qfi`. Default: ``None``.
+
+    Inputs:
+        - **gradients** (tuple[Tensor]) - The gradient of `params`.
+
+    Outputs:
+        bool, always ``True``.
+
+    Examples:
+        >>> import numpy as np
+        >>> import mindspore as ms
+        >>> from mindquantum.core.circuit import Circuit
+        >>> from mindquantum.core.operators import Hamiltonian, QubitOperator
+        >>> from mindquantum.framework import MQAnsatzOnlyLayer, QuantumNaturalGradient
+        >>> from mindquantum.simulator import Simulator
+        >>> ms.set_seed(42)
+        >>> ms.set_context(mode=ms.PYNATIVE_MODE, device_target="CPU")
+        >>> circ = Circuit().ry('a', 0)
+        >>> ham = Hamiltonian(QubitOperator('Z0'))
+        >>> sim = Simulator('mqvector', 1)
+        >>> grad_ops = sim.get_expectation_with_grad(ham, circ)
+        >>> net = MQAnsatzOnlyLayer(grad_ops)
+        >>> opti = QuantumNaturalGradient(net.trainable_params(), grad_ops, learning_rate=0.1)
+        >>> train_net = ms.nn.TrainOneStepCell(net, opti)
+        >>> for i in range(100):
+        ...     train_net()
+        >>> np.round(net().asnumpy(), 4)
+        array([-1.], dtype=float32)
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self, params, expectation_with_grad, learning_rate=0.1, regularization=1e-3, refresh_period=1, blocks=None
+    ):
+        """Initialize a QuantumNaturalGradient object."""
+        super().__init__(learning_rate, params)
+        _mode_check(self)
+        _check_grad_ops(expectation_with_grad)
+        _check_input_type('regularization', (int, float), regularization)
+        if regularization <= 0:
+            raise ValueError(f"regularization should be greater than 0, but get {regularization}")
+        _check_int_type('refresh_period', refresh_period)
+        _check_value_should_not_less('refresh_period', 1, refresh_period)
+        if expectation_with_grad.metric_ops is None:
+            raise ValueError(f"Metric is not supported by {expectation_with_grad.str or 'given grad ops'}.")
+        if len(self.parameters) != 1 or self.parameters[0].size != len(expectation_with_grad.ansatz_params_name):
+            raise ValueError("params should only contain the weight of ansatz parameters.")
+        self.expectation_with_grad = expectation_with_grad
+        self.regularization = regularization
+        self.refresh_period = refresh_period
+        self.blocks = blocks
+        self.n_steps = 0
+        self.metric_factor = None
+        self.assign = operations.Assign()
+        self.expectation_with_grad.request_metric(blocks)
+
+    def construct(self, gradients):
+        """Construct a QuantumNaturalGradient node."""
+        weight = self.parameters[0]
+        if self.n_steps % self.refresh_period == 0:
+            metric = self.expectation_with_grad.metric(weight.asnumpy().astype(np.float64), blocks=self.blocks)
+            self.metric_factor = cho_factor(metric + self.regularization * np.eye(len(metric)))
+        self.n_steps += 1
+        if self.n_steps % self.refresh_period == 0:
+            # The metric of next refresh is calculated in the same evolution as the forward value of that step.
+            self.expectation_with_grad.request_metric(self.blocks)
+        step = cho_solve(self.metric_factor, gradients[0].asnumpy().astype(np.float64))
+        learning_rate = float(self.get_lr().asnumpy())
+        new_weight = weight.asnumpy() - learning_rate * step
+        self.assign(weight, ms.Tensor(new_weight.astype(weight.asnumpy().dtype)))
+        return True
@@ -22,6 +22,11 @@ from mindquantum.core.circuit import Circuit
 from mindquantum.core.gates import BasicGate
 from mindquantum.core.operators import Hamiltonian
 from mindquantum.core.parameterresolver import ParameterResolver
+from mindquantum.utils.type_value_check import (
+    _check_and_generate_pr_type,
+    _check_hamiltonian_qubits_number,
+    _check_input_type,
+)
 
 
 class BackendBase:
@@ -54,6 +59,10 @@ class BackendBase:
         """Apply a hamiltonian."""
         raise NotImplementedError(f"apply_hamiltonian not implemented for {self.device_name()}")
 
+    def checkpoint(self, path: str):
+        """Save the quantum state to given file."""
+        raise NotImplementedError(f"checkpoint not implemented for {self.device_name()}")
+
     def copy(self) -> "BackendBase":
         """Copy this backend."""
         raise NotImplementedError(f"copy not implemented for {self.device_name()}")
@@ -81,11 +90,39 @@ class BackendBase:
         circ_left: Circuit = None,
         simulator_left: "BackendBase" = None,
         parallel_worker: int = None,
+        encoder_cache_size: int = 0,
+        grad_wrt=None,
     ):
         """Get expectation and the gradient w.r.t parameters."""
         raise NotImplementedError(f"get_qs not implemented for {self.device_name()}")
 
-    def get_qs(self, ket=False) -> Union[str, np.ndarray]:
+    def get_expectation_batch(
+        self,
+        circuit: Circuit,
+        hams: List[Hamiltonian],
+        params: np.ndarray,
+        parallel_worker: int = None,
+    ) -> np.ndarray:
+        """Get expectation of hamiltonians for a batch of parameters."""
+        raise NotImplementedError(f"get_expectation_batch not implemented for {self.device_name()}")
+
+    def get_expectation_trajectories(  # pylint: disable=too-many-arguments
+        self,
+        circuit: Circuit,
+        hams: List[Hamiltonian],
+        n_traj: int,
+        pr: Union[Dict, ParameterResolver] = None,
+        seed: int = None,
+        parallel_worker: int = None,
+    ) -> np.ndarray:
+        """Get expectation of hamiltonians on every noise trajectory of circuit."""
+        raise NotImplementedError(f"get_expectation_trajectories not implemented for {self.device_name()}")
+
+    def get_qs_batch(self, circuit: Circuit, params: np.ndarray, parallel_worker: int = None) -> np.ndarray:
+        """Get quantum states for a batch of parameters."""
+        raise NotImplementedError(f"get_qs_batch not implemented for {self.device_name()}")
+
+    def get_qs(self, ket=False, copy=True) -> Union[str, np.ndarray]:
         """Get quantum state."""
         raise NotImplementedError(f"get_qs not implemented for {self.device_name()}")
 
@@ -103,10 +140,34 @@ class BackendBase:
         """Sample a quantum state based on this backend."""
         raise NotImplementedError(f"sampling not implemented for {self.device_name()}")
 
-    def set_qs(self, quantum_state: np.ndarray):
+    def set_qs(self, quantum_state: np.ndarray, normalize=True):
         """Set quantum state of this backend."""
         raise NotImplementedError(f"set_qs not implemented for {self.device_name()}")
 
     def set_threads_number(self, number):
         """Set maximum number of threads."""
         raise NotImplementedError(f"set_threads_number not implemented for {self.device_name()}")
+
+    def _check_hams(self, hams) -> List[Hamiltonian]:
+        """Check the hamiltonians to measure on this backend and get them as a list."""
+        if isinstance(hams, Hamiltonian):
+            hams = [hams]
+        elif not isinstance(hams, list):
+            raise TypeError(f"hams requires a Hamiltonian or a list of Hamiltonian, but get {type(hams)}")
+        for h_tmp in hams:
+            _check_input_type("hams's element", Hamiltonian, h_tmp)
+            _check_hamiltonian_qubits_number(h_tmp, self.n_qubits)
+        return hams
+
+    @staticmethod
+    def _circuit_pr(circuit: Circuit, pr: Union[Dict, ParameterResolver] = None) -> ParameterResolver:
+        """Get the parameter resolver to apply given circuit with."""
+        if circuit.params_name:
+            if pr is None:
+                raise ValueError("Applying a parameterized circuit needs a parameter_resolver.")
+            return _check_and_generate_pr_type(pr, circuit.params_name)
+        return ParameterResolver()
+
+    def _vqa_operator_str(self) -> str:
+        """Get the string of gradient operator generated by this backend."""
+        return f'{self.n_qubits} qubit' + ('' if self.n_qubits == 1 else 's') + f' {self.name} VQA Operator'
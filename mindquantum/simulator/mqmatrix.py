@@ -0,0 +1,346 @@
+# Copyright 2022 Huawei Technologies Co., Ltd
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Mindquantum density matrix simulator."""
+from typing import Dict, List, Union
+
+import numpy as np
+
+from mindquantum.core.circuit import Circuit
+from mindquantum.core.gates import BarrierGate, BasicGate, Measure, MeasureResult
+from mindquantum.core.operators import Hamiltonian
+from mindquantum.core.parameterresolver import ParameterResolver
+from mindquantum.utils.type_value_check import (
+    _check_and_generate_pr_type,
+    _check_encoder,
+    _check_hamiltonian_qubits_number,
+    _check_input_type,
+    _check_int_type,
+    _check_seed,
+    _check_value_should_not_less,
+)
+
+# This import is required to register some of the C++ types (e.g. ParameterResolver)
+from .. import mqbackend  # noqa: F401  # pylint: disable=unused-import
+from .backend_base import BackendBase
+from .utils import (
+    GradOpsWrapper,
+    _grad_version,
+    _parse_grad_inputs,
+    _parse_grad_wrt,
+    _split_grad_result,
+    _thread_balance,
+)
+
+# isort: split
+
+from mindquantum import _mq_matrix  # pylint: disable=wrong-import-order
+from mindquantum import _mq_vector  # pylint: disable=wrong-import-order
+
+
+# pylint: disable=abstract-method
+class MQMatrix(BackendBase):
+    r"""
+    Mindquantum density matrix backend.
+
+    The density matrix is evolved by :math:`\rho\rightarrow U\rho U^\dagger` for quantum gates, and noise
+    channels are applied exactly by their Kraus operators :math:`\rho\rightarrow\sum_k E_k\rho E_k^\dagger`,
+    so that the expectation of a noisy circuit is given by a single deterministic run.
+    """
+
+    def __init__(self, name: str, n_qubits: int, seed=42):
+        """Initialize a mindquantum density matrix backend."""
+        super().__init__(name, n_qubits, seed)
+        if name != 'mqmatrix':
+            raise NotImplementedError(f"{name} backend not implemented.")
+        self.sim = _mq_matrix.mqmatrix(n_qubits, seed)
+
+    def __str__(self):
+        """Return a string representation of the object."""
+        ret = f"{self.name} simulator with {self.n_qubits} qubit{'s' if self.n_qubits > 1 else ''} (little endian)."
+        ret += "\nCurrent density matrix:\n"
+        ret += self.get_qs().__str__()
+        return ret
+
+    def __repr__(self):
+        """Return a string representation of the object."""
+        return self.__str__()
+
+    def apply_circuit(
+        self,
+        circuit: Circuit,
+        pr: Union[Dict, ParameterResolver] = None,
+    ):
+        """Apply a quantum circuit."""
+        _check_input_type('circuit', Circuit, circuit)
+        if self.n_qubits < circuit.n_qubits:
+            raise ValueError(f"Circuit has {circuit.n_qubits} qubits, which is more than simulator qubits.")
+        pr = self._circuit_pr(circuit, pr)
+        res = self.sim.apply_circuit(circuit.get_cpp_obj(), pr.get_cpp_obj())
+        if res:
+            out = MeasureResult()
+            out.add_measure(circuit.all_measures.keys())
+            out.collect_data([[res[i] for i in out.keys_map]])
+            return out
+        return None
+
+    def apply_gate(
+        self,
+        gate: BasicGate,
+        pr: Union[Dict, ParameterResolver] = None,
+        diff: bool = False,
+    ):
+        """Apply a quantum gate."""
+        _check_input_type("gate", BasicGate, gate)
+        if diff:
+            raise ValueError("Differential form of gate is not supported by density matrix simulator.")
+        if not isinstance(gate, BarrierGate):
+            gate_max = max(max(gate.obj_qubits, gate.ctrl_qubits))
+            if self.n_qubits < gate_max:
+                raise ValueError(f"qubits of gate {gate} is higher than simulator qubits.")
+            if gate.parameterized:
+                if pr is None:
+                    raise ValueError("apply a parameterized gate needs a parameter_resolver")
+                pr = _check_and_generate_pr_type(pr, gate.coeff.params_name)
+            else:
+                pr = ParameterResolver()
+            if isinstance(gate, Measure):
+                return self.sim.apply_gate(gate.get_cpp_obj(), pr.get_cpp_obj(), diff)
+            self.sim.apply_gate(gate.get_cpp_obj(), pr.get_cpp_obj(), diff)
+        return None
+
+    def apply_hamiltonian(self, hamiltonian: Hamiltonian):
+        """Apply a hamiltonian, the density matrix becomes H rho H^dagger."""
+        _check_input_type('hamiltonian', Hamiltonian, hamiltonian)
+        _check_hamiltonian_qubits_number(hamiltonian, self.n_qubits)
+        self.sim.apply_hamiltonian(hamiltonian.get_cpp_obj())
+
+    def copy(self) -> "BackendBase":
+        """Copy a density matrix simulator."""
+        sim = MQMatrix(self.name, self.n_qubits, self.seed)
+        sim.sim = self.sim.copy()
+        return sim
+
+    def device_name(self) -> str:
+        """Return the device name."""
+        return f"{self.n_qubits} qubits {self.name} simulator."
+
+    def flush(self):
+        """Execute all command."""
+
+    def get_circuit_matrix(self, circuit: Circuit, pr: ParameterResolver) -> np.ndarray:
+        """Get the matrix of given circuit."""
+        if circuit.is_noise_circuit:
+            raise ValueError("Noise circuit does not have a unitary matrix.")
+        vec_sim = _mq_vector.mqvector(self.n_qubits, self.seed)
+        return vec_sim.get_circuit_matrix(circuit.get_cpp_obj(), pr.get_cpp_obj())
+
+    def get_expectation(self, hamiltonian: Hamiltonian) -> np.ndarray:
+        """Get expectation of a hamiltonian."""
+        if not isinstance(hamiltonian, Hamiltonian):
+            raise TypeError(f"hamiltonian requires a Hamiltonian, but got {type(hamiltonian)}")
+        _check_hamiltonian_qubits_number(hamiltonian, self.n_qubits)
+        return self.sim.get_expectation(hamiltonian.get_cpp_obj())
+
+    def get_expectation_batch(
+        self,
+        circuit: Circuit,
+        hams: List[Hamiltonian],
+        params: np.ndarray,
+        parallel_worker: int = None,
+    ) -> np.ndarray:
+        """Get expectation of hamiltonians for a batch of parameters."""
+        hams = self._check_hams(hams)
+        _check_input_type("circuit", Circuit, circuit)
+        if circuit.has_measure_gate:
+            raise ValueError("circuit for batched evaluation cannot have measure gate")
+        if self.n_qubits < circuit.n_qubits:
+            raise ValueError(f"Simulator has {self.n_qubits} qubits, but circuit has {circuit.n_qubits} qubits.")
+        _check_encoder(params, len(circuit.params_name))
+        if parallel_worker is not None:
+            _check_int_type("parallel_worker", parallel_worker)
+        batch_threads, _ = _thread_balance(params.shape[0], len(hams), parallel_worker)
+        return np.array(
+            self.sim.get_expectation_batch(
+                [i.get_cpp_obj() for i in hams], circuit.get_cpp_obj(), params, circuit.params_name, batch_threads
+            )
+        ).reshape((params.shape[0], len(hams)))
+
+    def get_expectation_with_grad(  # pylint: disable=R0912,R0913,R0914
+        self,
+        hams: List[Hamiltonian],
+        circ_right: Circuit,
+        circ_left: Circuit = None,
+        simulator_left: "BackendBase" = None,
+        parallel_worker: int = None,
+        encoder_cache_size: int = 0,
+        grad_wrt=None,
+    ):
+        """Get expectation with grad, noise channels in circuit are supported."""
+        hams = self._check_hams(hams)
+        _check_input_type("circ_right", Circuit, circ_right)
+        if circ_left is not None or simulator_left is not None:
+            raise ValueError("Non hermitian expectation is not supported by density matrix simulator.")
+        if circ_right.has_measure_gate:
+            raise ValueError("circuit for variational algorithm cannot have measure gate")
+        if parallel_worker is not None:
+            _check_int_type("parallel_worker", parallel_worker)
+        _check_int_type("encoder_cache_size", encoder_cache_size)
+        if encoder_cache_size:
+            raise ValueError("encoder_cache_size is not supported by density matrix simulator.")
+        if self.n_qubits < circ_right.n_qubits:
+            raise ValueError(f"Simulator has {self.n_qubits} qubits, but circuit has {circ_right.n_qubits} qubits.")
+
+        ansatz_params_name = circ_right.all_ansatz.keys()
+        encoder_params_name = circ_right.all_encoder.keys()
+        if set(ansatz_params_name) & set(encoder_params_name):
+            raise RuntimeError("Parameter cannot be both encoder and ansatz parameter.")
+        enc_grad_name, ans_grad_name = _parse_grad_wrt(grad_wrt, encoder_params_name, ansatz_params_name)
+        grad_name = enc_grad_name + ans_grad_name
+        version = _grad_version(encoder_params_name, ansatz_params_name)
+
+        def parse_inputs(inputs):
+            return _parse_grad_inputs(
+                inputs, version, len(encoder_params_name), len(ansatz_params_name), len(hams), parallel_worker
+            )
+
+        def expectation_ops(*inputs):
+            inputs0, inputs1, batch_threads, _ = parse_inputs(inputs)
+            data = np.hstack([inputs0, np.tile(inputs1, (inputs0.shape[0], 1))])
+            return np.array(
+                self.sim.get_expectation_batch(
+                    [i.get_cpp_obj() for i in hams],
+                    circ_right.get_cpp_obj(),
+                    data,
+                    encoder_params_name + ansatz_params_name,
+                    batch_threads,
+                )
+            ).reshape((data.shape[0], len(hams)))
+
+        def grad_ops(*inputs):
+            inputs0, inputs1, batch_threads, mea_threads = parse_inputs(inputs)
+            res = np.array(
+                self.sim.get_expectation_with_grad_multi_multi(
+                    [i.get_cpp_obj() for i in hams],
+                    circ_right.get_cpp_obj(),
+                    circ_right.get_cpp_obj(hermitian=True),
+                    inputs0,
+                    inputs1,
+                    encoder_params_name,
+                    ansatz_params_name,
+                    grad_name,
+                    batch_threads,
+                    mea_threads,
+                )
+            )
+            return _split_grad_result(res, version, len(enc_grad_name))
+
+        grad_wrapper = GradOpsWrapper(
+            grad_ops,
+            hams,
+            circ_right,
+            circ_right,
+            encoder_params_name,
+            ansatz_params_name,
+            parallel_worker,
+            expectation_ops=expectation_ops,
+            grad_params_name=grad_name,
+        )
+        grad_wrapper.set_str(self._vqa_operator_str())
+        return grad_wrapper
+
+    def get_qs(self, ket=False, copy=True) -> np.ndarray:
+        """Get density matrix of mqmatrix simulator."""
+        if not isinstance(ket, bool):
+            raise TypeError(f"ket requires a bool, but get {type(ket)}")
+        if not isinstance(copy, bool):
+            raise TypeError(f"copy requires a bool, but get {type(copy)}")
+        if ket:
+            raise ValueError("Density matrix can not be shown in ket format.")
+        dim = 1 << self.n_qubits
+        # The density matrix is stored in column major order.
+        return np.array(self.sim.get_qs()).reshape((dim, dim)).T
+
+    def reset(self):
+        """Reset mindquantum simulator to quantum zero state."""
+        return self.sim.reset()
+
+    def sampling(
+        self,
+        circuit: Circuit,
+        pr: Union[Dict, ParameterResolver] = None,
+        shots: int = 1,
+        seed: int = None,
+    ):
+        """Sample the density matrix."""
+        if not circuit.all_measures.map:
+            raise ValueError("circuit must have at least one measurement gate.")
+        _check_input_type("circuit", Circuit, circuit)
+        if self.n_qubits < circuit.n_qubits:
+            raise ValueError(f"Circuit has {circuit.n_qubits} qubits, which is more than simulator qubits.")
+        _check_int_type("sampling shots", shots)
+        _check_value_should_not_less("sampling shots", 1, shots)
+        if circuit.parameterized:
+            if pr is None:
+                raise ValueError("Sampling a parameterized circuit need a ParameterResolver")
+            if not isinstance(pr, (dict, ParameterResolver)):
+                raise TypeError(f"pr requires a dict or a ParameterResolver, but get {type(pr)}!")
+            pr = ParameterResolver(pr)
+        else:
+            pr = ParameterResolver()
+        if seed is None:
+            seed = int(np.random.randint(1, 2 << 20))
+        else:
+            _check_seed(seed)
+        res = MeasureResult()
+        res.add_measure(circuit.all_measures.keys())
+        # Noise channels are applied exactly, so measurement at the end can always be sampled from the marginal
+        # distribution of a single run.
+        if circuit.is_measure_end:
+            sampling = self.sim.sampling_measure_ending
+        else:
+            sampling = self.sim.sampling
+        samples = np.array(sampling(circuit.get_cpp_obj(), pr.get_cpp_obj(), shots, res.keys_map, seed))
+        res.collect_data(samples.reshape((shots, -1)))
+        return res
+
+    def set_qs(self, quantum_state: np.ndarray, normalize=True):
+        """Set density matrix of mqmatrix simulator, a state vector is converted into a pure density matrix."""
+        if not isinstance(quantum_state, np.ndarray):
+            raise TypeError(f"quantum state must be a ndarray, but get {type(quantum_state)}")
+        if len(quantum_state.shape) not in (1, 2):
+            raise ValueError(
+                f"quantum state requires a 1-dimensional or 2-dimensional array, but get {quantum_state.shape}"
+            )
+        if len(quantum_state.shape) == 2 and quantum_state.shape[0] != quantum_state.shape[1]:
+            raise ValueError(f"density matrix requires a square matrix, but get {quantum_state.shape}")
+        n_qubits = np.log2(quantum_state.shape[0])
+        if n_qubits % 1 != 0:
+            raise ValueError(f"quantum state size {quantum_state.shape[0]} is not power of 2")
+        n_qubits = int(n_qubits)
+        if self.n_qubits != n_qubits:
+            raise ValueError(f"{n_qubits} qubits state does not match with simulation qubits ({self.n_qubits})")
+        if len(quantum_state.shape) == 1:
+            if normalize:
+                quantum_state = quantum_state / np.sqrt(np.vdot(quantum_state, quantum_state).real)
+            quantum_state = np.outer(quantum_state, quantum_state.conj())
+        elif normalize:
+            quantum_state = quantum_state / np.trace(quantum_state).real
+        self.sim.set_qs_buffer(quantum_state.flatten(order='F'))
+
+    def set_threads_number(self, number):
+        """Set maximum number of threads."""
+        _check_int_type('number', number)
+        _check_value_should_not_less('number', 1, number)
+        _mq_matrix.set_threads_number(number)
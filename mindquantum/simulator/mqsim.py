@@ -13,22 +13,29 @@
 # limitations under the License.
 # ============================================================================
 """Mindquantum simulator."""
+import os
+import shutil
 from typing import Dict, List, Union
 
 import numpy as np
 
 from mindquantum.core.circuit import Circuit
+from mindquantum.core.circuit.qfi import (
+    _fubini_study_metric,
+    _fubini_study_metric_from_parts,
+)
 from mindquantum.core.gates import BarrierGate, BasicGate, Measure, MeasureResult
 from mindquantum.core.operators import Hamiltonian
+from mindquantum.core.operators.hamiltonian import HowTo
 from mindquantum.core.parameterresolver import ParameterResolver
 from mindquantum.utils.type_value_check import (
     _check_and_generate_pr_type,
-    _check_ansatz,
     _check_encoder,
     _check_hamiltonian_qubits_number,
     _check_input_type,
     _check_int_type,
     _check_seed,
+    _check_value_should_between_close_set,
     _check_value_should_not_less,
 )
 
@@ -36,7 +43,15 @@ from mindquantum.utils.type_value_check import (
 from .. import mqbackend  # noqa: F401  # pylint: disable=unused-import
 from ..utils.string_utils import ket_string
 from .backend_base import BackendBase
-from .utils import GradOpsWrapper, _thread_balance
+from .utils import (
+    GradOpsWrapper,
+    _EncoderStateCache,
+    _grad_version,
+    _parse_grad_inputs,
+    _parse_grad_wrt,
+    _split_grad_result,
+    _thread_balance,
+)
 
 # isort: split
 
@@ -54,11 +69,54 @@ except ImportError:
 class MQSim(BackendBase):
     """Mindquantum Backend."""
 
-    def __init__(self, name: str, n_qubits: int, seed=42):
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        name: str,
+        n_qubits: int,
+        seed=42,
+        fusion: Union[bool, int] = False,
+        storage: str = 'memory',
+        path: str = None,
+        restore: str = None,
+    ):
         """Initialize a mindquantum backend."""
         super().__init__(name, n_qubits, seed)
+        _check_input_type('fusion', (bool, int), fusion)
+        if not isinstance(fusion, bool):
+            _check_value_should_between_close_set('fusion', 1, 2, fusion)
+        _check_input_type('storage', str, storage)
+        if storage not in ('memory', 'mmap'):
+            raise ValueError(f"storage should be 'memory' or 'mmap', but get {storage}.")
+        if storage == 'mmap':
+            if name != 'mqvector':
+                raise ValueError(f"Memory mapped quantum state is not supported by {name} backend.")
+            _check_input_type('path', str, path)
+        if restore is not None:
+            if storage != 'mmap':
+                raise ValueError("restore is only supported by simulator with storage 'mmap'.")
+            _check_input_type('restore', str, restore)
+            if os.path.exists(path) and os.path.samefile(restore, path):
+                raise ValueError("restore should be a different file from path, so that the checkpoint is kept.")
+        self.storage = storage
+        self.path = path
+        self.fusion = fusion
+        # Bumped whenever the quantum state changes, so that cached states evolved from it can be dropped.
+        self.state_version = 0
+        self.max_fused_qubits = 0
+        if fusion is True:
+            # Small states stay in cache, where fusing into two qubits matrix does not pay for the extra flops.
+            self.max_fused_qubits = 2 if n_qubits > 13 else 1
+        elif fusion is not False:
+            self.max_fused_qubits = fusion
         if name == 'mqvector':
-            self.sim = _mq_vector.mqvector(n_qubits, seed)
+            if storage == 'mmap':
+                if restore is not None:
+                    # The checkpoint is copied, since the mapped file is written by every gate.
+                    shutil.copyfile(restore, path)
+                self.sim = _mq_vector.mqvector(n_qubits, seed, path, restore is not None)
+            else:
+                self.sim = _mq_vector.mqvector(n_qubits, seed)
         elif name == 'mqvector_gpu':
             if MQ_SIM_GPU_SUPPORTED:
                 self.sim = _mq_vector_gpu.mqvector(n_qubits, seed)
@@ -80,6 +138,12 @@ class MQSim(BackendBase):
         """Return a string representation of the object."""
         return self.__str__()
 
+    def _get_cpp_circuit(self, circuit: Circuit):
+        """Get the cpp object of circuit, with adjacent gates fused if fusion is enabled."""
+        if self.max_fused_qubits:
+            return circuit.get_fused_cpp_obj(self.max_fused_qubits)
+        return circuit.get_cpp_obj()
+
     def apply_circuit(
         self,
         circuit: Circuit,
@@ -89,13 +153,9 @@ class MQSim(BackendBase):
         _check_input_type('circuit', Circuit, circuit)
         if self.n_qubits < circuit.n_qubits:
             raise ValueError(f"Circuit has {circuit.n_qubits} qubits, which is more than simulator qubits.")
-        if circuit.params_name:
-            if pr is None:
-                raise ValueError("Applying a parameterized circuit needs a parameter_resolver.")
-            pr = _check_and_generate_pr_type(pr, circuit.params_name)
-        else:
-            pr = ParameterResolver()
-        res = self.sim.apply_circuit(circuit.get_cpp_obj(), pr.get_cpp_obj())
+        pr = self._circuit_pr(circuit, pr)
+        self.state_version += 1
+        res = self.sim.apply_circuit(self._get_cpp_circuit(circuit), pr.get_cpp_obj())
         if res:
             out = MeasureResult()
             out.add_measure(circuit.all_measures.keys())
@@ -121,6 +181,7 @@ class MQSim(BackendBase):
                 pr = _check_and_generate_pr_type(pr, gate.coeff.params_name)
             else:
                 pr = ParameterResolver()
+            self.state_version += 1
             if isinstance(gate, Measure):
                 return self.sim.apply_gate(gate.get_cpp_obj(), pr.get_cpp_obj(), diff)
             self.sim.apply_gate(gate.get_cpp_obj(), pr.get_cpp_obj(), diff)
@@ -130,14 +191,23 @@ class MQSim(BackendBase):
         """Apply a hamiltonian."""
         _check_input_type('hamiltonian', Hamiltonian, hamiltonian)
         _check_hamiltonian_qubits_number(hamiltonian, self.n_qubits)
+        self.state_version += 1
         self.sim.apply_hamiltonian(hamiltonian.get_cpp_obj())
 
     def copy(self) -> "BackendBase":
         """Copy a projectq simulator."""
-        sim = MQSim(self.name, self.n_qubits, self.seed)
+        sim = MQSim(self.name, self.n_qubits, self.seed, self.fusion)
         sim.sim = self.sim.copy()
         return sim
 
+    def checkpoint(self, path: str):
+        """Flush the memory mapped quantum state to disk and copy it to given file."""
+        if self.storage != 'mmap':
+            raise ValueError("checkpoint is only supported by simulator with storage 'mmap'.")
+        _check_input_type('path', str, path)
+        self.sim.sync()
+        shutil.copyfile(self.path, path)
+
     def device_name(self) -> str:
         """Return the device name."""
         return f"{self.n_qubits} qubits {self.name} simulator."
@@ -147,7 +217,7 @@ class MQSim(BackendBase):
 
     def get_circuit_matrix(self, circuit: Circuit, pr: ParameterResolver) -> np.ndarray:
         """Get the matrix of given circuit."""
-        return np.array(self.sim.get_circuit_matrix(circuit.get_cpp_obj(), pr.get_cpp_obj())).T
+        return self.sim.get_circuit_matrix(self._get_cpp_circuit(circuit), pr.get_cpp_obj())
 
     def get_expectation(self, hamiltonian: Hamiltonian) -> np.ndarray:
         """Get expectation of a hamiltonian."""
@@ -156,6 +226,90 @@ class MQSim(BackendBase):
         _check_hamiltonian_qubits_number(hamiltonian, self.n_qubits)
         return self.sim.get_expectation(hamiltonian.get_cpp_obj())
 
+    def _check_batch_input(self, circuit: Circuit, params: np.ndarray, parallel_worker: int):
+        """Check the input of batched evaluation."""
+        _check_input_type("circuit", Circuit, circuit)
+        if circuit.is_noise_circuit:
+            raise ValueError("noise circuit not support yet.")
+        if circuit.has_measure_gate:
+            raise ValueError("circuit for batched evaluation cannot have measure gate")
+        if self.n_qubits < circuit.n_qubits:
+            raise ValueError(f"Simulator has {self.n_qubits} qubits, but circuit has {circuit.n_qubits} qubits.")
+        _check_encoder(params, len(circuit.params_name))
+        if parallel_worker is not None:
+            _check_int_type("parallel_worker", parallel_worker)
+
+    def get_expectation_batch(
+        self,
+        circuit: Circuit,
+        hams: List[Hamiltonian],
+        params: np.ndarray,
+        parallel_worker: int = None,
+    ) -> np.ndarray:
+        """Get expectation of hamiltonians for a batch of parameters."""
+        hams = self._check_hams(hams)
+        self._check_batch_input(circuit, params, parallel_worker)
+        batch_threads, _ = _thread_balance(params.shape[0], len(hams), parallel_worker)
+        return np.array(
+            self.sim.get_expectation_batch(
+                [i.get_cpp_obj() for i in hams],
+                self._get_cpp_circuit(circuit),
+                params,
+                circuit.params_name,
+                batch_threads,
+                None,
+            )
+        ).reshape((params.shape[0], len(hams)))
+
+    def get_qs_batch(self, circuit: Circuit, params: np.ndarray, parallel_worker: int = None) -> np.ndarray:
+        """Get quantum states for a batch of parameters."""
+        self._check_batch_input(circuit, params, parallel_worker)
+        batch_threads, _ = _thread_balance(params.shape[0], 1, parallel_worker)
+        return np.array(
+            self.sim.get_qs_batch(self._get_cpp_circuit(circuit), params, circuit.params_name, batch_threads)
+        ).reshape((params.shape[0], 1 << self.n_qubits))
+
+    def get_expectation_trajectories(  # pylint: disable=too-many-arguments
+        self,
+        circuit: Circuit,
+        hams: List[Hamiltonian],
+        n_traj: int,
+        pr: Union[Dict, ParameterResolver] = None,
+        seed: int = None,
+        parallel_worker: int = None,
+    ) -> np.ndarray:
+        """Get expectation of hamiltonians on every noise trajectory of circuit."""
+        hams = self._check_hams(hams)
+        _check_input_type("circuit", Circuit, circuit)
+        if self.n_qubits < circuit.n_qubits:
+            raise ValueError(f"Simulator has {self.n_qubits} qubits, but circuit has {circuit.n_qubits} qubits.")
+        _check_int_type("n_traj", n_traj)
+        _check_value_should_not_less("n_traj", 1, n_traj)
+        pr = self._circuit_pr(circuit, pr)
+        if seed is None:
+            seed = int(np.random.randint(1, 2 << 20))
+        else:
+            _check_seed(seed)
+        if parallel_worker is None:
+            # Trajectories are split into one chunk per thread of the thread pool.
+            if self.name == 'mqvector':
+                parallel_worker = _mq_vector.get_threads_number()
+            else:
+                parallel_worker = _mq_vector_gpu.get_threads_number()
+        else:
+            _check_int_type("parallel_worker", parallel_worker)
+            _check_value_should_not_less("parallel_worker", 1, parallel_worker)
+        return np.array(
+            self.sim.get_expectation_trajectories(
+                [i.get_cpp_obj() for i in hams],
+                self._get_cpp_circuit(circuit),
+                pr.get_cpp_obj(),
+                n_traj,
+                seed,
+                parallel_worker,
+            )
+        ).reshape((n_traj, len(hams)))
+
     def get_expectation_with_grad(  # pylint: disable=R0912,R0913,R0914,R0915
         self,
         hams: List[Hamiltonian],
@@ -163,15 +317,11 @@ class MQSim(BackendBase):
         circ_left: Circuit = None,
         simulator_left: "BackendBase" = None,
         parallel_worker: int = None,
+        encoder_cache_size: int = 0,
+        grad_wrt=None,
     ):
         """Get expectation with grad."""
-        if isinstance(hams, Hamiltonian):
-            hams = [hams]
-        elif not isinstance(hams, list):
-            raise TypeError(f"hams requires a Hamiltonian or a list of Hamiltonian, but get {type(hams)}")
-        for h_tmp in hams:
-            _check_input_type("hams's element", Hamiltonian, h_tmp)
-            _check_hamiltonian_qubits_number(h_tmp, self.n_qubits)
+        hams = self._check_hams(hams)
         _check_input_type("circ_right", Circuit, circ_right)
         if circ_right.is_noise_circuit:
             raise ValueError("noise circuit not support yet.")
@@ -202,6 +352,10 @@ class MQSim(BackendBase):
             raise ValueError("circuit for variational algorithm cannot have measure gate")
         if parallel_worker is not None:
             _check_int_type("parallel_worker", parallel_worker)
+        _check_int_type("encoder_cache_size", encoder_cache_size)
+        _check_value_should_not_less("encoder_cache_size", 0, encoder_cache_size)
+        if encoder_cache_size and non_hermitian:
+            raise ValueError("encoder_cache_size is not supported for non hermitian expectation.")
 
         ansatz_params_name = circ_right.all_ansatz.keys()
         encoder_params_name = circ_right.all_encoder.keys()
@@ -214,37 +368,81 @@ class MQSim(BackendBase):
                     encoder_params_name.append(i)
         if set(ansatz_params_name) & set(encoder_params_name):
             raise RuntimeError("Parameter cannot be both encoder and ansatz parameter.")
-        version = "both"
-        if not ansatz_params_name:
-            version = "encoder"
-        if not encoder_params_name:
-            version = "ansatz"
+        enc_grad_name, ans_grad_name = _parse_grad_wrt(grad_wrt, encoder_params_name, ansatz_params_name)
+        grad_name = enc_grad_name + ans_grad_name
+        version = _grad_version(encoder_params_name, ansatz_params_name)
 
         circ_n_qubits = max(circ_left.n_qubits, circ_right.n_qubits)
         if self.n_qubits < circ_n_qubits:
             raise ValueError(f"Simulator has {self.n_qubits} qubits, but circuit has {circ_n_qubits} qubits.")
 
+        def parse_inputs(inputs):
+            return _parse_grad_inputs(
+                inputs, version, len(encoder_params_name), len(ansatz_params_name), len(hams), parallel_worker
+            )
+
+        # Gates before the first ansatz gate only depend on encoder data, so the states after them can be reused
+        # across steps that only change the ansatz parameters.
+        cache = None
+        circ_suffix = circ_right
+        if encoder_cache_size:
+            n_prefix = 0
+            while n_prefix < len(circ_right) and not Circuit([circ_right[n_prefix]]).ansatz_params_name:
+                n_prefix += 1
+            circ_prefix = circ_right[:n_prefix]
+            circ_suffix = circ_right[n_prefix:]
+            prefix_params_name = circ_prefix.encoder_params_name
+
+            def evolve(data):
+                batch_threads, _ = _thread_balance(data.shape[0], 1, parallel_worker)
+                used = [encoder_params_name.index(name) for name in prefix_params_name]
+                return np.array(
+                    self.sim.get_qs_batch(
+                        self._get_cpp_circuit(circ_prefix), data[:, used], prefix_params_name, batch_threads
+                    )
+                ).reshape((data.shape[0], 1 << self.n_qubits))
+
+            cache = _EncoderStateCache(encoder_cache_size, evolve, lambda: self.state_version)
+
+        def initial_states(inputs0):
+            if cache is None:
+                return None
+            return cache.get(inputs0)
+
+        def expectation_ops(*inputs):
+            inputs0, inputs1, batch_threads, _ = parse_inputs(inputs)
+            data = np.hstack([inputs0, np.tile(inputs1, (inputs0.shape[0], 1))])
+            return np.array(
+                self.sim.get_expectation_batch(
+                    [i.get_cpp_obj() for i in hams],
+                    self._get_cpp_circuit(circ_suffix),
+                    data,
+                    encoder_params_name + ansatz_params_name,
+                    batch_threads,
+                    initial_states(inputs0),
+                )
+            ).reshape((data.shape[0], len(hams)))
+
+        def vjp_ops(dout, *inputs):
+            inputs0, inputs1, batch_threads, _ = parse_inputs(inputs)
+            return np.array(
+                self.sim.get_expectation_vjp_multi_multi(
+                    [i.get_cpp_obj() for i in hams],
+                    circ_suffix.get_cpp_obj(),
+                    circ_right.get_cpp_obj(hermitian=True),
+                    np.real(dout).reshape((inputs0.shape[0], len(hams))),
+                    inputs0,
+                    inputs1,
+                    encoder_params_name,
+                    ansatz_params_name,
+                    grad_name,
+                    batch_threads,
+                    initial_states(inputs0),
+                )
+            ).reshape((inputs0.shape[0], len(grad_name)))
+
         def grad_ops(*inputs):
-            if version == "both" and len(inputs) != 2:
-                raise ValueError("Need two inputs!")
-            if version in ("encoder", "ansatz") and len(inputs) != 1:
-                raise ValueError("Need one input!")
-            if version == "both":
-                _check_encoder(inputs[0], len(encoder_params_name))
-                _check_ansatz(inputs[1], len(ansatz_params_name))
-                batch_threads, mea_threads = _thread_balance(inputs[0].shape[0], len(hams), parallel_worker)
-                inputs0 = inputs[0]
-                inputs1 = inputs[1]
-            if version == "encoder":
-                _check_encoder(inputs[0], len(encoder_params_name))
-                batch_threads, mea_threads = _thread_balance(inputs[0].shape[0], len(hams), parallel_worker)
-                inputs0 = inputs[0]
-                inputs1 = np.array([])
-            if version == "ansatz":
-                _check_ansatz(inputs[0], len(ansatz_params_name))
-                batch_threads, mea_threads = _thread_balance(1, len(hams), parallel_worker)
-                inputs0 = np.array([[]])
-                inputs1 = inputs[0]
+            inputs0, inputs1, batch_threads, mea_threads = parse_inputs(inputs)
             if non_hermitian:
                 f_g1_g2 = self.sim.get_expectation_with_grad_non_hermitian_multi_multi(
                     [i.get_cpp_obj() for i in hams],
@@ -257,6 +455,7 @@ class MQSim(BackendBase):
                     inputs1,
                     encoder_params_name,
                     ansatz_params_name,
+                    grad_name,
                     simulator_left.sim,
                     batch_threads,
                     mea_threads,
@@ -264,43 +463,92 @@ class MQSim(BackendBase):
             else:
                 f_g1_g2 = self.sim.get_expectation_with_grad_multi_multi(
                     [i.get_cpp_obj() for i in hams],
-                    circ_right.get_cpp_obj(),
+                    circ_suffix.get_cpp_obj(),
                     circ_right.get_cpp_obj(hermitian=True),
                     inputs0,
                     inputs1,
                     encoder_params_name,
                     ansatz_params_name,
+                    grad_name,
                     batch_threads,
                     mea_threads,
+                    initial_states(inputs0),
                 )
-            res = np.array(f_g1_g2)
-            if version == 'both':
-                return (
-                    res[:, :, 0],
-                    res[:, :, 1 : 1 + len(encoder_params_name)],  # noqa:E203
-                    res[:, :, 1 + len(encoder_params_name) :],  # noqa:E203
-                )  # f, g1, g2
-            return res[:, :, 0], res[:, :, 1:]  # f, g
+            return _split_grad_result(f_g1_g2, version, len(enc_grad_name))
+
+        metric_base = {}
 
+        def metric_ops(*inputs, blocks=None):
+            _, inputs1, _, _ = parse_inputs(inputs)
+            key = None if blocks is None else tuple(tuple(block) for block in blocks)
+            if key not in metric_base:
+                metric_base[key] = _fubini_study_metric(circ_right, blocks=blocks, simulator=self)
+            idx = [circ_right.params_name.index(name) for name in ansatz_params_name]
+            metric = metric_base[key](dict(zip(ansatz_params_name, inputs1)))
+            return metric[np.ix_(idx, idx)]
+
+        metric_parts = {}
+
+        def grad_metric_ops(*inputs, blocks=None):
+            _, inputs1, _, mea_threads = parse_inputs(inputs)
+            key = None if blocks is None else tuple(tuple(block) for block in blocks)
+            if key not in metric_parts:
+                metric_parts[key] = _fubini_study_metric_from_parts(circ_right, blocks=blocks)
+            gates_block, parts_to_metric = metric_parts[key]
+            f_g, part_a, part_b = self.sim.get_expectation_with_grad_and_qfi_parts(
+                [i.get_cpp_obj() for i in hams],
+                circ_right.get_cpp_obj(),
+                circ_right.get_cpp_obj(hermitian=True),
+                inputs1,
+                ansatz_params_name,
+                grad_name,
+                gates_block,
+                mea_threads,
+            )
+            idx = [circ_right.params_name.index(name) for name in ansatz_params_name]
+            metric = parts_to_metric(part_a, part_b)
+            return _split_grad_result([f_g], version, len(enc_grad_name)), metric[np.ix_(idx, idx)]
+
+        # The adjoint sweep against weighted sum of hamiltonians needs the pauli terms of every hamiltonian.
+        native_vjp = not non_hermitian and all(h_tmp.how_to == HowTo.ORIGIN for h_tmp in hams)
         grad_wrapper = GradOpsWrapper(
-            grad_ops, hams, circ_right, circ_left, encoder_params_name, ansatz_params_name, parallel_worker
+            grad_ops,
+            hams,
+            circ_right,
+            circ_left,
+            encoder_params_name,
+            ansatz_params_name,
+            parallel_worker,
+            expectation_ops=None if non_hermitian else expectation_ops,
+            vjp_ops=vjp_ops if native_vjp else None,
+            grad_params_name=grad_name,
+            metric_ops=metric_ops if version == 'ansatz' and not non_hermitian else None,
+            grad_metric_ops=grad_metric_ops if version == 'ansatz' and not non_hermitian else None,
         )
-        grad_str = f'{self.n_qubits} qubit' + ('' if self.n_qubits == 1 else 's')
-        grad_str += f' {self.name} VQA Operator'
-        grad_wrapper.set_str(grad_str)
+        grad_wrapper.set_str(self._vqa_operator_str())
         return grad_wrapper
 
-    def get_qs(self, ket=False) -> np.ndarray:
+    def get_qs(self, ket=False, copy=True) -> np.ndarray:
         """Get quantum state of mqvector simulator."""
         if not isinstance(ket, bool):
             raise TypeError(f"ket requires a bool, but get {type(ket)}")
-        state = np.array(self.sim.get_qs())
+        if not isinstance(copy, bool):
+            raise TypeError(f"copy requires a bool, but get {type(copy)}")
+        if hasattr(self.sim, 'get_qs_view'):
+            state = self.sim.get_qs_view()
+            if copy:
+                state = state.copy()
+            else:
+                state.flags.writeable = False
+        else:
+            state = np.array(self.sim.get_qs())
         if ket:
             return '\n'.join(ket_string(state))
         return state
 
     def reset(self):
         """Reset mindquantum simulator to quantum zero state."""
+        self.state_version += 1
         return self.sim.reset()
 
     def sampling(
@@ -332,18 +580,16 @@ class MQSim(BackendBase):
             _check_seed(seed)
         res = MeasureResult()
         res.add_measure(circuit.all_measures.keys())
-        sim = self
         if circuit.is_measure_end and not circuit.is_noise_circuit:
-            sim = self.copy()
-            sim.apply_circuit(circuit.remove_measure(), pr)
-            circuit = Circuit(circuit.all_measures.keys())
-        samples = np.array(
-            sim.sim.sampling(circuit.get_cpp_obj(), pr.get_cpp_obj(), shots, res.keys_map, seed)
-        ).reshape((shots, -1))
+            sampling = self.sim.sampling_measure_ending_without_noise
+        else:
+            sampling = self.sim.sampling
+        cpp_circ = self._get_cpp_circuit(circuit)
+        samples = np.array(sampling(cpp_circ, pr.get_cpp_obj(), shots, res.keys_map, seed)).reshape((shots, -1))
         res.collect_data(samples)
         return res
 
-    def set_qs(self, quantum_state: np.ndarray):
+    def set_qs(self, quantum_state: np.ndarray, normalize=True):
         """Set quantum state of mqvector simulator."""
         if not isinstance(quantum_state, np.ndarray):
             raise TypeError(f"quantum state must be a ndarray, but get {type(quantum_state)}")
@@ -355,4 +601,16 @@ class MQSim(BackendBase):
         n_qubits = int(n_qubits)
         if self.n_qubits != n_qubits:
             raise ValueError(f"{n_qubits} qubits vec does not match with simulation qubits ({self.n_qubits})")
-        self.sim.set_qs(quantum_state / np.sqrt(np.sum(np.abs(quantum_state) ** 2)))
+        if normalize:
+            quantum_state = quantum_state / np.sqrt(np.vdot(quantum_state, quantum_state).real)
+        self.state_version += 1
+        self.sim.set_qs_buffer(quantum_state)
+
+    def set_threads_number(self, number):
+        """Set maximum number of threads."""
+        _check_int_type('number', number)
+        _check_value_should_not_less('number', 1, number)
+        if self.name == 'mqvector':
+            _mq_vector.set_threads_number(number)
+        else:
+            _mq_vector_gpu.set_threads_number(number)
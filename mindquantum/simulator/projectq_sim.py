@@ -36,7 +36,7 @@ from mindquantum.utils.type_value_check import (
 
 from ..utils.string_utils import ket_string
 from .backend_base import BackendBase
-from .utils import GradOpsWrapper, _thread_balance
+from .utils import GradOpsWrapper, _parse_grad_wrt, _thread_balance
 
 
 class Projectq(BackendBase):
@@ -169,15 +169,16 @@ class Projectq(BackendBase):
         circ_left: Circuit = None,
         simulator_left: "BackendBase" = None,
         parallel_worker: int = None,
+        encoder_cache_size: int = 0,
+        grad_wrt=None,
     ):
-        """Get expectation and gradient w.r.t parameters."""
-        if isinstance(hams, Hamiltonian):
-            hams = [hams]
-        elif not isinstance(hams, list):
-            raise TypeError(f"hams requires a Hamiltonian or a list of Hamiltonian, but get {type(hams)}")
-        for h_tmp in hams:
-            _check_input_type("hams's element", Hamiltonian, h_tmp)
-            _check_hamiltonian_qubits_number(h_tmp, self.n_qubits)
+        """
+        Get expectation and gradient w.r.t parameters.
+
+        The projectq simulator always calculates the gradient w.r.t all parameters and only picks out the ones
+        requested by `grad_wrt`, so `grad_wrt` does not save any work here.
+        """
+        hams = self._check_hams(hams)
         _check_input_type("circ_right", Circuit, circ_right)
         if circ_right.is_noise_circuit:
             raise ValueError("noise circuit not support yet.")
@@ -208,6 +209,8 @@ class Projectq(BackendBase):
             raise ValueError("circuit for variational algorithm cannot have measure gate")
         if parallel_worker is not None:
             _check_int_type("parallel_worker", parallel_worker)
+        if encoder_cache_size:
+            raise ValueError(f"encoder_cache_size is not supported by {self.device_name()} simulator.")
         ansatz_params_name = circ_right.all_ansatz.keys()
         encoder_params_name = circ_right.all_encoder.keys()
         if non_hermitian:
@@ -219,6 +222,10 @@ class Projectq(BackendBase):
                     encoder_params_name.append(i)
         if set(ansatz_params_name) & set(encoder_params_name):
             raise RuntimeError("Parameter cannot be both encoder and ansatz parameter.")
+        # Projectq always calculates the full gradient, the requested columns are picked out afterwards.
+        enc_grad_name, ans_grad_name = _parse_grad_wrt(grad_wrt, encoder_params_name, ansatz_params_name)
+        grad_idx = [encoder_params_name.index(i) for i in enc_grad_name]
+        grad_idx += [len(encoder_params_name) + ansatz_params_name.index(i) for i in ans_grad_name]
         version = "both"
         if not ansatz_params_name:
             version = "encoder"
@@ -285,26 +292,38 @@ class Projectq(BackendBase):
                     mea_threads,
                 )
             res = np.array(f_g1_g2)
+            res = res[:, :, [0] + [1 + i for i in grad_idx]]
             if version == 'both':
                 return (
                     res[:, :, 0],
-                    res[:, :, 1 : 1 + len(encoder_params_name)],  # noqa:E203
-                    res[:, :, 1 + len(encoder_params_name) :],  # noqa:E203
+                    res[:, :, 1 : 1 + len(enc_grad_name)],  # noqa:E203
+                    res[:, :, 1 + len(enc_grad_name) :],  # noqa:E203
                 )  # f, g1, g2
             return res[:, :, 0], res[:, :, 1:]  # f, g
 
         grad_wrapper = GradOpsWrapper(
-            grad_ops, hams, circ_right, circ_left, encoder_params_name, ansatz_params_name, parallel_worker
+            grad_ops,
+            hams,
+            circ_right,
+            circ_left,
+            encoder_params_name,
+            ansatz_params_name,
+            parallel_worker,
+            grad_params_name=enc_grad_name + ans_grad_name,
         )
-        grad_str = f'{self.n_qubits} qubit' + ('' if self.n_qubits == 1 else 's')
-        grad_str += f' {self.name} VQA Operator'
-        grad_wrapper.set_str(grad_str)
+        grad_wrapper.set_str(self._vqa_operator_str())
         return grad_wrapper
 
-    def get_qs(self, ket=False) -> Union[str, np.ndarray]:
-        """Get quantum state of projectq simulator."""
+    def get_qs(self, ket=False, copy=True) -> Union[str, np.ndarray]:
+        """
+        Get quantum state of projectq simulator.
+
+        The projectq simulator always returns a copy of the quantum state, so `copy` is only checked and has no
+        effect.
+        """
         if not isinstance(ket, bool):
             raise TypeError(f"ket requires a bool, but get {type(ket)}")
+        _check_input_type('copy', bool, copy)
         state = np.array(self.sim.get_qs())
         if ket:
             return '\n'.join(ket_string(state))
@@ -355,7 +374,7 @@ class Projectq(BackendBase):
         res.collect_data(samples)
         return res
 
-    def set_qs(self, quantum_state: np.ndarray):
+    def set_qs(self, quantum_state: np.ndarray, normalize=True):
         """Set quantum state of projectq simulator."""
         if not isinstance(quantum_state, np.ndarray):
             raise TypeError(f"quantum state must be a ndarray, but get {type(quantum_state)}")
@@ -367,4 +386,6 @@ class Projectq(BackendBase):
         n_qubits = int(n_qubits)
         if self.n_qubits != n_qubits:
             raise ValueError(f"{n_qubits} qubits vec does not match with simulation qubits ({self.n_qubits})")
-        self.sim.set_qs(quantum_state / np.sqrt(np.sum(np.abs(quantum_state) ** 2)))
+        if normalize:
+            quantum_state = quantum_state / np.sqrt(np.sum(np.abs(quantum_state) ** 2))
+        self.sim.set_qs(quantum_state)
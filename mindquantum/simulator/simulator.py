@@ -29,12 +29,14 @@ from ..utils.type_value_check import (
 )
 from .backend_base import BackendBase
 from .mq_blas import MQBlas
+from .mqmatrix import MQMatrix
 from .mqsim import MQ_SIM_GPU_SUPPORTED, MQSim
 from .projectq_sim import Projectq
 
 SUPPORTED_SIMULATOR = {
     'projectq': Projectq,
     'mqvector': partial(MQSim, 'mqvector'),
+    'mqmatrix': partial(MQMatrix, 'mqmatrix'),
 }
 
 if MQ_SIM_GPU_SUPPORTED:
@@ -61,6 +63,25 @@ class Simulator:
         n_qubits (int): number of quantum simulator.
         seed (int): the random seed for this simulator, if None, seed will generate
             by `numpy.random.randint`. Default: None.
+            The `mqmatrix` backend simulates the density matrix, where noise channels are applied exactly
+            instead of being sampled, so that the expectation of a noisy circuit is given by a single run.
+        fusion (Union[bool, int]): only for `mqvector` and `mqvector_gpu` backend. Whether to fuse adjacent
+            gates into dense matrix gates before applying a circuit, which reduces the passes over the quantum
+            state. If ``True``, the maximum qubits of a fused gate is chosen by the qubit number of simulator,
+            you can also set it to 1 or 2 directly. The fused circuit is not used for gradient calculation.
+            Default: ``False``.
+        storage (str): only for `mqvector` backend. Where to keep the quantum state, ``'memory'`` or
+            ``'mmap'``. With ``'mmap'``, the quantum state is stored in a memory mapped file given by `path`,
+            so that the operating system can page it out for large qubit number, and gates of a circuit that
+            act on low qubits are applied block by block. Only the evolution by gates and circuits, measurements,
+            noise channels and the expectation of hamiltonians built from :class:`~.core.operators.QubitOperator`
+            work on the mapped state directly. :func:`~.Simulator.copy`, sampling, gradient operators,
+            :func:`~.Simulator.apply_hamiltonian` and the expectation of sparse hamiltonians still make full
+            copies of the quantum state in memory. Default: ``'memory'``.
+        path (str): the file of memory mapped quantum state, required when `storage` is ``'mmap'``.
+            Default: ``None``.
+        restore (str): a file saved by :func:`~.Simulator.checkpoint` to restore the quantum state from. It is
+            copied to `path` first, so the checkpoint is never modified. Default: ``None``.
 
     Raises:
         TypeError: if `backend` is not str.
@@ -117,6 +138,8 @@ class Simulator:
         """
         Copy this simulator.
 
+        The quantum state of the copied simulator is always kept in memory.
+
         Returns:
             Simulator, a copy version of this simulator.
 
@@ -135,6 +158,27 @@ class Simulator:
         """
         return self.__class__(self.backend.copy(), None)
 
+    def checkpoint(self, path):
+        """
+        Save the quantum state of a memory mapped simulator to given file.
+
+        The saved file can be restored by a new simulator with `storage='mmap'` and `restore` set to this file.
+
+        Args:
+            path (str): The file to save the quantum state.
+
+        Examples:
+            >>> from mindquantum.core.gates import H
+            >>> from mindquantum.simulator import Simulator
+            >>> sim = Simulator('mqvector', 1, storage='mmap', path='state.bin')
+            >>> sim.apply_gate(H.on(0))
+            >>> sim.checkpoint('state_ckpt.bin')
+            >>> sim2 = Simulator('mqvector', 1, storage='mmap', path='state2.bin', restore='state_ckpt.bin')
+            >>> sim2.get_qs()
+            array([0.70710678+0.j, 0.70710678+0.j])
+        """
+        self.backend.checkpoint(path)
+
     def __str__(self):
         """Return a string representation of the object."""
         return self.backend.__str__()
@@ -350,17 +394,139 @@ class Simulator:
         """
         return self.backend.get_expectation(hamiltonian)
 
+    def get_expectation_batch(self, circuit, hams, params, parallel_worker=None):
+        r"""
+        Get expectation of hamiltonians for a batch of parameters without calculating gradient.
+
+        .. math::
+
+            E_{ij} = \left<\psi\right|U^\dagger(\theta_i) H_j U(\theta_i)\left|\psi\right>
+
+        where :math:`\left|\psi\right>` is the current quantum state of this simulator, which will not be changed.
+
+        Args:
+            circuit (Circuit): The parameterized circuit :math:`U`.
+            hams (Union[Hamiltonian, list[Hamiltonian]]): The hamiltonians that need to get expectation.
+            params (numpy.ndarray): A two dimensional array, every row of which is a group of parameters,
+                and the columns are ordered as `circuit.params_name`.
+            parallel_worker (int): The parallel worker numbers. The parallel workers can handle
+                batch in parallel threads. Default: None.
+
+        Returns:
+            numpy.ndarray, the expectation with shape (number of parameter groups, number of hamiltonians).
+
+        Examples:
+            >>> import numpy as np
+            >>> from mindquantum.core.circuit import Circuit
+            >>> from mindquantum.core.operators import QubitOperator, Hamiltonian
+            >>> from mindquantum.simulator import Simulator
+            >>> circ = Circuit().ry('a', 0)
+            >>> ham = Hamiltonian(QubitOperator('Z0'))
+            >>> sim = Simulator('mqvector', 1)
+            >>> sim.get_expectation_batch(circ, ham, np.array([[0.0], [np.pi]])).real
+            array([[ 1.],
+                   [-1.]])
+        """
+        return self.backend.get_expectation_batch(circuit, hams, params, parallel_worker)
+
+    # pylint: disable=too-many-arguments
+    def get_expectation_trajectories(self, circuit, hams, n_traj, pr=None, seed=None, parallel_worker=None):
+        r"""
+        Estimate expectation of hamiltonians on a noise circuit by averaging over quantum trajectories.
+
+        Every trajectory applies the circuit on the current quantum state of this simulator, which will not be
+        changed, with the noise channels sampled randomly. The trajectories run in parallel, and the gates before the
+        first noise channel or measurement gate are applied only once, so that a circuit with noise only in the later
+        layers is cheap to estimate.
+
+        Args:
+            circuit (Circuit): The noise circuit.
+            hams (Union[Hamiltonian, list[Hamiltonian]]): The hamiltonians that need to get expectation.
+            n_traj (int): The number of trajectories.
+            pr (Union[ParameterResolver, dict, numpy.ndarray, list, numbers.Number]): The parameter
+                resolver for the circuit. If the circuit is not parameterized, this arg should be None.
+                Default: None.
+            seed (int): The random seed of trajectories. With the same seed, the result does not depend on the number
+                of parallel workers. If None, the seed is generated by `numpy.random.randint`. Default: None.
+            parallel_worker (int): The number of parallel workers to run trajectories, which is also limited by the
+                number of threads of simulator. If None, the number of threads of simulator is used. Default: None.
+
+        Returns:
+            tuple[numpy.ndarray], the mean of expectation over trajectories and its standard error, both with shape
+            (number of hamiltonians,).
+
+        Examples:
+            >>> from mindquantum.core.circuit import Circuit
+            >>> from mindquantum.core.gates import AmplitudeDampingChannel
+            >>> from mindquantum.core.operators import QubitOperator, Hamiltonian
+            >>> from mindquantum.simulator import Simulator
+            >>> circ = Circuit().h(0).x(1, 0) + AmplitudeDampingChannel(0.2).on(0)
+            >>> ham = Hamiltonian(QubitOperator('Z0'))
+            >>> sim = Simulator('mqvector', 2)
+            >>> mean, std_err = sim.get_expectation_trajectories(circ, ham, 1000, seed=42)
+        """
+        values = self.backend.get_expectation_trajectories(circuit, hams, n_traj, pr, seed, parallel_worker)
+        mean = np.mean(values, axis=0)
+        if n_traj == 1:
+            return mean, np.zeros(values.shape[1])
+        return mean, np.std(values, axis=0, ddof=1) / np.sqrt(n_traj)
+
+    def get_qs_batch(self, circuit, params, parallel_worker=None):
+        """
+        Get quantum states evolved by circuit for a batch of parameters.
+
+        The circuit is applied on the current quantum state of this simulator, which will not be changed.
+
+        Args:
+            circuit (Circuit): The parameterized circuit.
+            params (numpy.ndarray): A two dimensional array, every row of which is a group of parameters,
+                and the columns are ordered as `circuit.params_name`.
+            parallel_worker (int): The parallel worker numbers. The parallel workers can handle
+                batch in parallel threads. Default: None.
+
+        Returns:
+            numpy.ndarray, the quantum states with shape (number of parameter groups, :math:`2^n`).
+
+        Examples:
+            >>> import numpy as np
+            >>> from mindquantum.core.circuit import Circuit
+            >>> from mindquantum.simulator import Simulator
+            >>> circ = Circuit().ry('a', 0)
+            >>> sim = Simulator('mqvector', 1)
+            >>> np.round(sim.get_qs_batch(circ, np.array([[0.0], [np.pi]])).real, 6)
+            array([[1., 0.],
+                   [0., 1.]])
+        """
+        return self.backend.get_qs_batch(circuit, params, parallel_worker)
+
     def set_threads_number(self, number):
-        """Set maximum number of threads."""
+        """
+        Set maximum number of threads.
+
+        For `mqvector` and `mqvector_gpu` backend, the threads are kept in a pool shared by all simulators of the
+        backend, which runs the samples of a batch and the groups of hamiltonians in gradient calculation. The
+        OpenMP threads of kernels are divided among the running tasks.
+
+        Args:
+            number (int): The maximum number of threads.
+
+        Examples:
+            >>> from mindquantum.simulator import Simulator
+            >>> sim = Simulator('mqvector', 2)
+            >>> sim.set_threads_number(4)
+        """
         return self.backend.set_threads_number(number)
 
-    def get_qs(self, ket=False):
+    def get_qs(self, ket=False, copy=True):
         """
         Get current quantum state of this simulator.
 
         Args:
             ket (bool): Whether to return the quantum state in ket format or not.
                 Default: False.
+            copy (bool): Whether to return a copy of the quantum state. If ``False``, a read-only view of the
+                state buffer of `mqvector` simulator is returned, which follows the quantum state when the
+                simulator evolves. Other backends always return a copy. Default: True.
 
         Returns:
             numpy.ndarray, the current quantum state.
@@ -373,14 +539,17 @@ class Simulator:
             >>> sim.get_qs()
             array([0.5+0.j, 0.5+0.j, 0.5+0.j, 0.5+0.j])
         """
-        return self.backend.get_qs(ket)
+        return self.backend.get_qs(ket, copy)
 
-    def set_qs(self, quantum_state):
+    def set_qs(self, quantum_state, normalize=True):
         """
         Set quantum state for this simulation.
 
         Args:
             quantum_state (numpy.ndarray): the quantum state that you want.
+            normalize (bool): Whether to normalize the quantum state. Set it to ``False`` if the given state is
+                already normalized, so that the state is copied into the simulator without any temporary array.
+                Default: True.
 
         Examples:
             >>> import numpy as np
@@ -392,7 +561,7 @@ class Simulator:
             >>> sim.get_qs()
             array([0.70710678+0.j, 0.70710678+0.j])
         """
-        self.backend.set_qs(quantum_state)
+        self.backend.set_qs(quantum_state, normalize)
 
     # pylint: disable=too-many-arguments
     def get_expectation_with_grad(
@@ -402,6 +571,8 @@ class Simulator:
         circ_left=None,
         simulator_left=None,
         parallel_worker=None,
+        encoder_cache_size=0,
+        grad_wrt=None,
     ):
         r"""
         Get a function that return the forward value and gradient w.r.t circuit parameters.
@@ -427,10 +598,25 @@ class Simulator:
                 Default: None.
             parallel_worker (int): The parallel worker numbers. The parallel workers can handle
                 batch in parallel threads. Default: None.
+            encoder_cache_size (int): The size in bytes of a cache that keeps the quantum state after the
+                gates before the first ansatz gate of `circ_right`, keyed by the rows of encoder data. When
+                the same encoder data are fed again, for example in every step of training the ansatz, the
+                cached states are reused instead of evolving the encoder again. The cache is dropped whenever
+                the quantum state of this simulator changes. Only supported by mqvector backend for hermitian
+                expectation. If ``0``, no cache is used. Default: ``0``.
+            grad_wrt (Union[str, Iterable[str]]): The parameters to calculate gradient for. Can be
+                ``'encoder'``, ``'ansatz'``, parameter names, or an iterable of them. The gradient returned by
+                the grad ops only contains the requested parameters, in the order of encoder parameters and then
+                ansatz parameters. If ``None``, gradient of all parameters are calculated. Default: ``None``.
 
         Returns:
             GradOpsWrapper, a grad ops wrapper than contains information to generate this grad ops.
 
+        Note:
+            When gradient of encoder parameters is not required, either set to no grad or excluded by
+            `grad_wrt`, the gradient sweep stops at the last gate that requires gradient, so that the encoder
+            gates are not traversed.
+
         Examples:
             >>> import numpy as np
             >>> from mindquantum.core.circuit import Circuit
@@ -459,6 +645,8 @@ class Simulator:
             circ_left,
             (simulator_left.backend if simulator_left is not None else None),
             parallel_worker,
+            encoder_cache_size,
+            grad_wrt,
         )
 
 
@@ -14,6 +14,12 @@
 # ============================================================================
 """Simulator utils."""
 
+from collections import OrderedDict
+
+import numpy as np
+
+from mindquantum.utils.type_value_check import _check_ansatz, _check_encoder
+
 
 def _thread_balance(n_prs, n_meas, parallel_worker):
     """Thread balance."""
@@ -32,6 +38,134 @@ def _thread_balance(n_prs, n_meas, parallel_worker):
     return batch_threads, mea_threads
 
 
+def _parse_grad_wrt(grad_wrt, encoder_params_name, ansatz_params_name):
+    """Get the encoder and ansatz parameters name that gradient is calculated for."""
+    if grad_wrt is None:
+        return list(encoder_params_name), list(ansatz_params_name)
+    if isinstance(grad_wrt, str):
+        grad_wrt = [grad_wrt]
+    names = set()
+    for item in grad_wrt:
+        if not isinstance(item, str):
+            raise TypeError(f"grad_wrt requires 'encoder', 'ansatz' or parameter names, but get {type(item)}.")
+        if item == 'encoder':
+            names.update(encoder_params_name)
+        elif item == 'ansatz':
+            names.update(ansatz_params_name)
+        elif item in encoder_params_name or item in ansatz_params_name:
+            names.add(item)
+        else:
+            raise ValueError(f"Parameter {item} in grad_wrt is not a parameter of circuit.")
+    return [i for i in encoder_params_name if i in names], [i for i in ansatz_params_name if i in names]
+
+
+def _grad_version(encoder_params_name, ansatz_params_name):
+    """Get which inputs a gradient operator receives, 'both', 'encoder' or 'ansatz'."""
+    if not encoder_params_name:
+        return "ansatz"
+    if not ansatz_params_name:
+        return "encoder"
+    return "both"
+
+
+def _parse_grad_inputs(inputs, version, n_encoder, n_ansatz, n_hams, parallel_worker):  # pylint: disable=R0913
+    """Check the inputs of a gradient operator and get encoder data, ansatz data and the threads to run them."""
+    if version == "both" and len(inputs) != 2:
+        raise ValueError("Need two inputs!")
+    if version in ("encoder", "ansatz") and len(inputs) != 1:
+        raise ValueError("Need one input!")
+    if version == "both":
+        _check_encoder(inputs[0], n_encoder)
+        _check_ansatz(inputs[1], n_ansatz)
+        batch_threads, mea_threads = _thread_balance(inputs[0].shape[0], n_hams, parallel_worker)
+        return inputs[0], inputs[1], batch_threads, mea_threads
+    if version == "encoder":
+        _check_encoder(inputs[0], n_encoder)
+        batch_threads, mea_threads = _thread_balance(inputs[0].shape[0], n_hams, parallel_worker)
+        return inputs[0], np.array([]), batch_threads, mea_threads
+    _check_ansatz(inputs[0], n_ansatz)
+    batch_threads, mea_threads = _thread_balance(1, n_hams, parallel_worker)
+    return np.array([[]]), inputs[0], batch_threads, mea_threads
+
+
+def _split_grad_result(res, version, n_enc_grad):
+    """Split the result of a gradient operator into forward value and gradients."""
+    res = np.array(res)
+    if version == 'both':
+        return (
+            res[:, :, 0],
+            res[:, :, 1 : 1 + n_enc_grad],  # noqa:E203
+            res[:, :, 1 + n_enc_grad :],  # noqa:E203
+        )  # f, g1, g2
+    return res[:, :, 0], res[:, :, 1:]  # f, g
+
+
+class _EncoderStateCache:
+    """
+    Least recently used cache of quantum states keyed by the rows of encoder data.
+
+    Args:
+        max_bytes (int): The total size of cached quantum states in bytes.
+        evolve (Union[FunctionType, MethodType]): A function that receive a batch of encoder data and return the
+            quantum states of every row.
+        state_version (Union[FunctionType, MethodType]): A function that return the version of the quantum state
+            that `evolve` starts from. All cached states are dropped once the version changes. If ``None``, the
+            initial state is assumed to never change. Default: ``None``.
+    """
+
+    def __init__(self, max_bytes, evolve, state_version=None):
+        """Initialize an _EncoderStateCache object."""
+        self.max_bytes = max_bytes
+        self.evolve = evolve
+        self.state_version = state_version
+        self.n_bytes = 0
+        self._version = None if state_version is None else state_version()
+        self._states = OrderedDict()
+
+    def __len__(self):
+        """Get the number of cached quantum states."""
+        return len(self._states)
+
+    def clear(self):
+        """Drop all cached quantum states."""
+        self._states.clear()
+        self.n_bytes = 0
+
+    def get(self, data):
+        """Get the quantum states of every row of encoder data, evolving the rows that are not cached."""
+        if self.state_version is not None:
+            version = self.state_version()
+            if version != self._version:
+                self.clear()
+                self._version = version
+        data = np.ascontiguousarray(data, dtype=np.float64)
+        keys = [row.tobytes() for row in data]
+        found = {}
+        missing = OrderedDict()
+        for key, row in zip(keys, data):
+            if key in self._states:
+                self._states.move_to_end(key)
+                found[key] = self._states[key]
+            elif key not in missing:
+                missing[key] = row
+        if missing:
+            states = self.evolve(np.array(list(missing.values())).reshape((len(missing), data.shape[1])))
+            for key, state in zip(missing, states):
+                found[key] = state
+                self._put(key, state)
+        return np.array([found[key] for key in keys])
+
+    def _put(self, key, state):
+        """Cache a quantum state, dropping the least recently used ones if out of budget."""
+        if state.nbytes > self.max_bytes:
+            return
+        self._states[key] = state
+        self.n_bytes += state.nbytes
+        while self.n_bytes > self.max_bytes:
+            _, dropped = self._states.popitem(last=False)
+            self.n_bytes -= dropped.nbytes
+
+
 class GradOpsWrapper:  # pylint: disable=too-many-instance-attributes
     """
     Wrapper the gradient operator that with the information that generate this gradient operator.
@@ -45,10 +179,38 @@ class GradOpsWrapper:  # pylint: disable=too-many-instance-attributes
         encoder_params_name (list[str]): The encoder parameters name.
         ansatz_params_name (list[str]): The ansatz parameters name.
         parallel_worker (int): The number of parallel worker to run the batch.
+        expectation_ops (Union[FunctionType, MethodType]): A function or a method that return forward value
+            only. If ``None``, forward value is taken from `grad_ops`. Default: ``None``.
+        vjp_ops (Union[FunctionType, MethodType]): A function or a method that receive the cotangent of forward
+            value and the inputs of `grad_ops`, and return the vector-Jacobian product with shape
+            (batch, number of parameters). If ``None``, the full Jacobian from `grad_ops` is contracted with
+            the cotangent. Default: ``None``.
+        grad_params_name (list[str]): The parameters name that `grad_ops` calculate gradient for, ordered as
+            encoder parameters first and then ansatz parameters. If ``None``, gradient of all parameters are
+            calculated. Default: ``None``.
+        metric_ops (Union[FunctionType, MethodType]): A function or a method that receive the inputs of
+            `grad_ops` and the keyword argument `blocks`, and return the Fubini-Study metric of ansatz parameters.
+            If ``None``, the metric is not supported. Default: ``None``.
+        grad_metric_ops (Union[FunctionType, MethodType]): A function or a method that receive the inputs of
+            `grad_ops` and the keyword argument `blocks`, and return the result of `grad_ops` and the result of
+            `metric_ops` with one evolution of circuit. If ``None``, the metric is always calculated by
+            `metric_ops`. Default: ``None``.
     """
 
     def __init__(
-        self, grad_ops, hams, circ_right, circ_left, encoder_params_name, ansatz_params_name, parallel_worker
+        self,
+        grad_ops,
+        hams,
+        circ_right,
+        circ_left,
+        encoder_params_name,
+        ansatz_params_name,
+        parallel_worker,
+        expectation_ops=None,
+        vjp_ops=None,
+        grad_params_name=None,
+        metric_ops=None,
+        grad_metric_ops=None,
     ):  # pylint: disable=too-many-arguments
         """Initialize a GradOpsWrapper object."""
         self.grad_ops = grad_ops
@@ -58,12 +220,156 @@ class GradOpsWrapper:  # pylint: disable=too-many-instance-attributes
         self.encoder_params_name = encoder_params_name
         self.ansatz_params_name = ansatz_params_name
         self.parallel_worker = parallel_worker
+        self.expectation_ops = expectation_ops
+        self.vjp_ops = vjp_ops
+        if grad_params_name is None:
+            grad_params_name = list(encoder_params_name) + list(ansatz_params_name)
+        self.grad_params_name = grad_params_name
+        self.metric_ops = metric_ops
+        self.grad_metric_ops = grad_metric_ops
         self.str = ''
+        self._grad_cache = None
+        self._metric_request = None
+        self._metric_cache = None
 
     def __call__(self, *args):
         """Definition of a function call operator."""
         return self.grad_ops(*args)
 
+    def expectation(self, *args):
+        """
+        Get the forward value without calculating gradient.
+
+        Args:
+            args (numpy.ndarray): The inputs of this gradient operator.
+
+        Returns:
+            numpy.ndarray, the forward value with shape (batch, number of hamiltonians).
+        """
+        if self.expectation_ops is None:
+            return self.grad_ops(*args)[0]
+        return self.expectation_ops(*args)
+
+    def forward(self, *args):
+        """
+        Get the forward value for a following :meth:`vjp` with the same inputs.
+
+        If the vector-Jacobian product can not be calculated natively, or there is only one hamiltonian, the
+        gradient is calculated in the same evolution as the forward value and kept for :meth:`vjp`, which is cheaper
+        than evolving the circuit again. Otherwise only the forward value is calculated. If a metric is requested
+        by :meth:`request_metric`, the gradient and the metric are both calculated in the same evolution, and kept
+        for :meth:`vjp` and :meth:`metric`.
+
+        Args:
+            args (numpy.ndarray): The inputs of this gradient operator.
+
+        Returns:
+            numpy.ndarray, the forward value with shape (batch, number of hamiltonians).
+        """
+        self._grad_cache = None
+        self._metric_cache = None
+        blocks, self._metric_request = self._metric_request, None
+        if blocks is not None and self.grad_metric_ops is not None:
+            f_g, metric = self.grad_metric_ops(*args, blocks=blocks[0])
+            self._grad_cache = ([np.array(i) for i in args], f_g)
+            self._metric_cache = ([np.array(i) for i in args], blocks[0], metric)
+            return f_g[0]
+        # The gradient costs about one forward and two backward sweeps per hamiltonian, while expectation plus
+        # native vjp costs about four sweeps in total, so the gradient is only kept for a single hamiltonian.
+        if self.vjp_ops is not None and len(self.hams) > 1:
+            return self.expectation(*args)
+        f_g = self.grad_ops(*args)
+        self._grad_cache = ([np.array(i) for i in args], f_g)
+        return f_g[0]
+
+    def vjp(self, dout, *args):
+        """
+        Get the vector-Jacobian product of forward value with respect to parameters.
+
+        Args:
+            dout (numpy.ndarray): The cotangent of forward value, with shape (batch, number of hamiltonians).
+            args (numpy.ndarray): The inputs of this gradient operator.
+
+        Returns:
+            Union[numpy.ndarray, tuple[numpy.ndarray]], the vector-Jacobian product. The gradient of encoder
+            parameters has shape (batch, number of encoder parameters), and the gradient of ansatz parameters
+            is summed over batch. If there are both encoder and ansatz parameters, both gradients are returned.
+            The gradient of parameters not in `grad_params_name` is zero.
+        """
+        cache, self._grad_cache = self._grad_cache, None
+        f_g = None
+        if cache is not None and len(cache[0]) == len(args) and all(map(np.array_equal, cache[0], args)):
+            f_g = cache[1]
+        elif self.vjp_ops is None:
+            f_g = self.grad_ops(*args)
+        if f_g is None:
+            grad = self.vjp_ops(dout, *args)
+        else:
+            dout = np.reshape(dout, f_g[0].shape)
+            grad = np.einsum('smp,sm->sp', np.real(np.concatenate(f_g[1:], axis=-1)), dout)
+        n_enc_grad = len([i for i in self.encoder_params_name if i in self.grad_params_name])
+        enc_grad = self._fill_grad(grad[:, :n_enc_grad], self.encoder_params_name)
+        ans_grad = self._fill_grad(grad[:, n_enc_grad:], self.ansatz_params_name)
+        if not self.encoder_params_name:
+            return np.sum(ans_grad, axis=0)
+        if not self.ansatz_params_name:
+            return enc_grad
+        return enc_grad, np.sum(ans_grad, axis=0)
+
+    def metric(self, *args, blocks=None):
+        r"""
+        Get the Fubini-Study metric of ansatz parameters.
+
+        The metric is :math:`\text{Re}(A_{i,j} - B_{i,j})`, which is a quarter of quantum fisher information, please
+        refer to :func:`~.core.circuit.qfi`. The circuit is applied on the quantum state that simulator has.
+        For `mqvector` backend, the sweeps start from the quantum state of simulator without copying it through
+        python. Every parameterized gate of ansatz takes one forward sweep of its own, which is not shared with the
+        evolution of forward value and gradient, so a metric costs about as much as the gradient of as many
+        hamiltonians as parameters. Request the metric by :meth:`request_metric` before :meth:`forward` to share
+        that evolution instead.
+
+        Args:
+            args (numpy.ndarray): The inputs of this gradient operator.
+            blocks (list[list[str]]): Parameters name grouped into blocks. If given, only the elements between
+                parameters in the same block are calculated and the others are zero. Default: ``None``.
+
+        Returns:
+            numpy.ndarray, the metric with shape (number of ansatz parameters, number of ansatz parameters).
+        """
+        if self.metric_ops is None:
+            raise ValueError(f"Metric is not supported by {self.str or 'this gradient operator'}.")
+        cache, self._metric_cache = self._metric_cache, None
+        if (
+            cache is not None
+            and cache[1] == blocks
+            and len(cache[0]) == len(args)
+            and all(map(np.array_equal, cache[0], args))
+        ):
+            return cache[2]
+        return self.metric_ops(*args, blocks=blocks)
+
+    def request_metric(self, blocks=None):
+        """
+        Calculate the metric in the next :meth:`forward`, together with the gradient.
+
+        The metric is kept for a following :meth:`metric` with the same inputs and blocks, so that the circuit is
+        not evolved again for it. If the metric can not be calculated in the evolution of forward value, nothing
+        happens and :meth:`metric` evolves the circuit itself.
+
+        Args:
+            blocks (list[list[str]]): Parameters name grouped into blocks, please refer to :meth:`metric`.
+                Default: ``None``.
+        """
+        self._metric_request = (blocks,)
+
+    def _fill_grad(self, grad, params_name):
+        """Expand the last axis of gradient to params_name, with zero for parameters not in grad_params_name."""
+        if grad.shape[-1] == len(params_name):
+            return grad
+        full = np.zeros(grad.shape[:-1] + (len(params_name),), dtype=grad.dtype)
+        full[..., [i for i, name in enumerate(params_name) if name in self.grad_params_name]] = grad
+        return full
+
     def set_str(self, grad_str):
         """
         Set expression for gradient operator.
@@ -23,7 +23,7 @@ It can be further used to construct the molecular Hamiltonian.
 """
 # Note this module, we did not modify much of the OpenFermion file
 
-import itertools
+import numpy as np
 
 from mindquantum.core.operators.polynomial_tensor import PolynomialTensor
 
@@ -65,6 +65,36 @@ class InteractionOperator(PolynomialTensor):
         # form
         super().__init__({(): constant, (1, 0): one_body_tensor, (1, 1, 0, 0): two_body_tensor})
 
+    def unique_indices(self, complex_valued=False):
+        r"""
+        Get the indices of all non-zero terms that are not in the same symmetry group, as arrays.
+
+        The representative of every symmetry group is its first non-zero term in lexicographic order, and the
+        representatives are sorted in lexicographic order, which is the same order as :meth:`unique_iter`. See
+        :meth:`unique_iter` for the symmetries.
+
+        Args:
+            complex_valued (bool): Whether the operator has complex coefficients.
+                Default: False.
+
+        Returns:
+            Tuple[numpy.ndarray, numpy.ndarray], the indices (p, q) of one-body terms with shape (n_one_body, 2)
+            and the indices (p, q, r, s) of two-body terms with shape (n_two_body, 4).
+        """
+        one_body = np.stack(np.nonzero(np.tril(self.one_body_tensor)), axis=1)
+
+        # pylint: disable=invalid-name
+        two_body_tensor = np.asarray(self.two_body_tensor)
+        p, q, r, s = np.nonzero(two_body_tensor)
+        flat = np.ravel_multi_index((p, q, r, s), two_body_tensor.shape)
+        is_nonzero = two_body_tensor.ravel() != 0
+        first = flat.copy()
+        for image in _symmetric_two_body_terms((p, q, r, s), complex_valued):
+            image_flat = np.ravel_multi_index(image, two_body_tensor.shape)
+            first = np.where(is_nonzero[image_flat], np.minimum(first, image_flat), first)
+        two_body = np.stack((p, q, r, s), axis=1)[flat == first]
+        return one_body, two_body
+
     def unique_iter(self, complex_valued=False):
         r"""
         Iterate all terms that are not in the same symmetry group.
@@ -84,20 +114,11 @@ class InteractionOperator(PolynomialTensor):
         if self.constant:
             yield ()
 
-        # pylint: disable=invalid-name
-
-        # One-body terms.
-        for p in range(self.n_qubits):
-            for q in range(p + 1):
-                if self.one_body_tensor[p, q]:
-                    yield (p, 1), (q, 0)
-
-        # Two-body terms.
-        two_body_index = set()
-        for quad in itertools.product(range(self.n_qubits), repeat=4):
-            if self.two_body_tensor[quad] and quad not in two_body_index:
-                two_body_index |= set(_symmetric_two_body_terms(quad, complex_valued))
-                yield tuple(zip(quad, (1, 1, 0, 0)))
+        one_body, two_body = self.unique_indices(complex_valued)
+        for p, q in one_body.tolist():  # pylint: disable=invalid-name
+            yield (p, 1), (q, 0)
+        for quad in two_body.tolist():
+            yield tuple(zip(quad, (1, 1, 0, 0)))
 
 
 def _symmetric_two_body_terms(quad, complex_valued):
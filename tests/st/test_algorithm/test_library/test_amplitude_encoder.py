@@ -16,6 +16,7 @@
 
 import warnings
 
+import numpy as np
 import pytest
 
 from mindquantum.simulator import get_supported_simulator
@@ -30,6 +31,16 @@ with warnings.catch_warnings():
     from mindquantum.simulator import Simulator
 
 
+def _get_state(sim):
+    """Get the quantum state as vector, recovered from the pure density matrix of mqmatrix backend."""
+    state = sim.get_qs()
+    if state.ndim == 1:
+        return state
+    # Fix the global phase so that the first nonzero amplitude is positive.
+    idx = np.argmax(np.abs(np.diag(state)) > 1e-12)
+    return state[:, idx] / np.sqrt(state[idx, idx].real)
+
+
 @pytest.mark.level0
 @pytest.mark.platform_x86_gpu_training
 @pytest.mark.platform_x86_cpu
@@ -44,7 +55,7 @@ def test_amplitude_encoder(backend):
     sim = Simulator(backend, 3)
     circuit, params = amplitude_encoder([0.5, 0.5, 0.5, 0.5], 3)
     sim.apply_circuit(circuit, params)
-    state = sim.get_qs(False)
+    state = _get_state(sim)
     assert abs(state[0].real - 0.5) < 1e-10
     assert abs(state[1].real - 0.5) < 1e-10
     assert abs(state[2].real - 0.5) < 1e-10
@@ -52,7 +63,7 @@ def test_amplitude_encoder(backend):
     circuit, params = amplitude_encoder([0, 0, 0.5, 0.5, 0.5, 0.5], 3)
     sim.reset()
     sim.apply_circuit(circuit, params)
-    state = sim.get_qs(False)
+    state = _get_state(sim)
     assert abs(state[2].real - 0.5) < 1e-10
     assert abs(state[3].real - 0.5) < 1e-10
     assert abs(state[4].real - 0.5) < 1e-10
@@ -60,7 +71,7 @@ def test_amplitude_encoder(backend):
     circuit, params = amplitude_encoder([0.5, -0.5, 0.5, 0.5], 3)
     sim.reset()
     sim.apply_circuit(circuit, params)
-    state = sim.get_qs(False)
+    state = _get_state(sim)
     assert abs(state[0].real - 0.5) < 1e-10
     assert abs(state[1].real + 0.5) < 1e-10
     assert abs(state[2].real - 0.5) < 1e-10
@@ -15,8 +15,15 @@
 Test the transforms in the hiqfermion module.
 """
 
-from mindquantum.algorithm.nisq import Transform
-from mindquantum.core.operators import FermionOperator
+import numpy as np
+import pytest
+
+from mindquantum.algorithm.nisq import Transform, transform_interaction_tensors
+from mindquantum.core.operators import (
+    FermionOperator,
+    InteractionOperator,
+    QubitOperator,
+)
 
 
 def _get_terms_as_set(qubit_op):
@@ -66,3 +73,28 @@ def test_transform_ternary_tree():
     op_transform = Transform(op1)
     op1_ternary_tree = op_transform.ternary_tree()
     assert _get_terms_as_set(op1_ternary_tree) == {'1/2 [X0 Z1]', '(-1/2j) [Y0 X2]'}
+
+
+@pytest.mark.parametrize('method', ['jordan_wigner', 'parity', 'bravyi_kitaev'])
+@pytest.mark.parametrize('hermitian', [True, False])
+def test_transform_interaction_tensors(method, hermitian):
+    """
+    Description: Test transform of interaction tensors into Pauli strings
+    Expectation: same qubit operator as transforming the fermion operator
+    """
+    rng = np.random.default_rng(42)
+    n_qubits = 4
+    one_body = rng.normal(size=(n_qubits,) * 2) + 1j * rng.normal(size=(n_qubits,) * 2)
+    two_body = rng.normal(size=(n_qubits,) * 4)
+    two_body[rng.random(two_body.shape) < 0.5] = 0
+    if hermitian:
+        one_body = one_body + one_body.conj().T
+        two_body = two_body + two_body.transpose(3, 2, 1, 0)
+    qubit_op = QubitOperator.from_arrays(*transform_interaction_tensors(0.3, one_body, two_body, method))
+    fermion_op = FermionOperator()
+    interaction_op = InteractionOperator(0.3, one_body, two_body)
+    for term in interaction_op:
+        term_str = ' '.join(f"{i}{'^' if j else ''}" for i, j in term)
+        fermion_op += FermionOperator(term_str, complex(interaction_op[term]))
+    expected = getattr(Transform(fermion_op), method)()
+    assert (qubit_op - expected).compress() == QubitOperator()
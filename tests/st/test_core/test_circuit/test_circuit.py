@@ -55,6 +55,13 @@ def test_get_matrix():
     circ = Circuit().ry('a', 0).rz('b', 0).ry('c', 0)
     matrix = circ.matrix(np.array([7.902762e-01, 2.139225e-04, 7.795934e-01]))
     assert np.allclose(matrix[0, 0], 0.70743435 - 1.06959724e-04j)
+    circ = Circuit().rx('a', 0).h(0).x(1, 0).ry('b', 1)
+    pr = {'a': 1.0, 'b': 0.3}
+    cnot = np.eye(4)[[0, 3, 2, 1]]
+    expect = np.kron(G.RY(0.3).matrix(), np.eye(2)) @ cnot
+    expect = expect @ np.kron(np.eye(2), G.H.matrix() @ G.RX(1.0).matrix())
+    for backend in get_supported_simulator():
+        assert np.allclose(circ.matrix(pr, backend=backend), expect)
 
 
 def test_circuit_apply():
@@ -86,7 +93,9 @@ def test_evolution_state(backend):
     simulator = Simulator(backend, circ.n_qubits)
     simulator.apply_circuit(circ, ParameterResolver({'a': a, 'b': b}))
     state = simulator.get_qs()
-    state_exp = [0.9580325796404553, -0.14479246283091116j, -0.2446258794777393j, -0.036971585637570345]
+    state_exp = np.array([0.9580325796404553, -0.14479246283091116j, -0.2446258794777393j, -0.036971585637570345])
+    if backend == 'mqmatrix':
+        state_exp = np.outer(state_exp, state_exp.conj())
     assert np.allclose(state, state_exp)
 
 
@@ -44,6 +44,13 @@ def test_qfi(backend):
     val = PR({'a': 1, 'b': 2})
     circ = Circuit().rx(a, 0).ry(b, 0)
     sim = Simulator(backend, 1)
+    if backend == 'mqmatrix':
+        # The density matrix simulator has no derivative states.
+        with pytest.raises(ValueError):
+            sim.apply_gate(circ[0], val, True)
+        with pytest.raises(ValueError):
+            qfi(circ, backend=backend)(val)
+        return
     sim.apply_gate(circ[0], val, True)
     sim.apply_gate(circ[1], val, False)
     partial_psi_a = sim.get_qs()
@@ -75,3 +82,32 @@ def test_qfi(backend):
     qfi_exp = np.real(m_pppp_exp - np.outer(m_ppp_exp, np.conj(m_ppp_exp))) * 4
     qfi_m = qfi(circ)(val)
     assert np.allclose(qfi_exp, qfi_m)
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize('backend', get_supported_simulator())
+def test_qfi_blocks(backend):
+    """
+    Description: Test block-diagonal approximation of qfi against full qfi.
+    Expectation: success
+    """
+    circ = Circuit().h(0).rx('a', 0).ry('b', 1).x(1, 0).rx({'c': 2}, 2, 1).rz('a', 1)
+    circ += Circuit().ry('d', 2).phase_shift('e', 0, 2).rz({'d': 0.5}, 1)
+    val = np.array([0.3, -1.1, 0.7, 2.1, -0.6])
+    mask = np.array([[1, 1, 0, 0, 0], [1, 1, 0, 0, 0], [0, 0, 1, 1, 0], [0, 0, 1, 1, 0], [0, 0, 0, 0, 1]])
+    if backend == 'mqmatrix':
+        # The density matrix simulator has no derivative states.
+        with pytest.raises(ValueError):
+            qfi(circ, backend=backend, blocks=[['a', 'b'], ['c', 'd']])(val)
+        return
+    full = qfi(circ, backend=backend)(val)
+    block = qfi(circ, backend=backend, blocks=[['a', 'b'], ['c', 'd']])(val)
+    assert np.allclose(full * mask, block)
+    full = partial_psi_partial_psi(circ, backend=backend)(val)
+    block = partial_psi_partial_psi(circ, backend=backend, blocks=[['a', 'b'], ['c', 'd']])(val)
+    assert np.allclose(full * mask, block)
+    with pytest.raises(ValueError):
+        qfi(circ, backend=backend, blocks=[['a'], ['b', 'a']])
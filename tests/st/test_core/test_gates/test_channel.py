@@ -21,6 +21,14 @@ from mindquantum.core.gates import X
 from mindquantum.simulator import Simulator, get_supported_simulator
 
 
+def _expected_qs(backend, state):
+    """Get the quantum state that backend returns for pure state, which is a density matrix for mqmatrix."""
+    state = np.array(state)
+    if backend == 'mqmatrix':
+        return np.outer(state, state.conj())
+    return state
+
+
 @pytest.mark.level0
 @pytest.mark.platform_x86_gpu_training
 @pytest.mark.platform_x86_cpu
@@ -35,7 +43,7 @@ def test_pauli_channel(backend):
     sim.apply_gate(C.PauliChannel(1, 0, 0).on(0))
     sim.apply_gate(C.PauliChannel(0, 0, 1).on(0))
     sim.apply_gate(C.PauliChannel(0, 1, 0).on(0))
-    assert np.allclose(sim.get_qs(), np.array([0.0 + 1.0j, 0.0 + 0.0j]))
+    assert np.allclose(sim.get_qs(), _expected_qs(backend, np.array([0.0 + 1.0j, 0.0 + 0.0j])))
 
 
 @pytest.mark.level0
@@ -50,11 +58,11 @@ def test_flip_channel(backend):
     """
     sim1 = Simulator(backend, 1)
     sim1.apply_gate(C.BitFlipChannel(1).on(0))
-    assert np.allclose(sim1.get_qs(), np.array([0.0 + 0.0j, 1.0 + 0.0j]))
+    assert np.allclose(sim1.get_qs(), _expected_qs(backend, np.array([0.0 + 0.0j, 1.0 + 0.0j])))
     sim1.apply_gate(C.PhaseFlipChannel(1).on(0))
-    assert np.allclose(sim1.get_qs(), np.array([0.0 + 0.0j, -1.0 + 0.0j]))
+    assert np.allclose(sim1.get_qs(), _expected_qs(backend, np.array([0.0 + 0.0j, -1.0 + 0.0j])))
     sim1.apply_gate(C.BitPhaseFlipChannel(1).on(0))
-    assert np.allclose(sim1.get_qs(), np.array([0.0 + 1.0j, 0.0 + 0.0j]))
+    assert np.allclose(sim1.get_qs(), _expected_qs(backend, np.array([0.0 + 1.0j, 0.0 + 0.0j])))
 
 
 @pytest.mark.level0
@@ -69,7 +77,7 @@ def test_depolarizing_channel(backend):
     """
     sim2 = Simulator(backend, 1)
     sim2.apply_gate(C.DepolarizingChannel(0).on(0))
-    assert np.allclose(sim2.get_qs(), np.array([1.0 + 0.0j, 0.0 + 0.0j]))
+    assert np.allclose(sim2.get_qs(), _expected_qs(backend, np.array([1.0 + 0.0j, 0.0 + 0.0j])))
 
 
 @pytest.mark.level0
@@ -86,12 +94,12 @@ def test_damping_channel(backend):
     sim.apply_gate(X.on(0))
     sim.apply_gate(X.on(1))
     sim.apply_gate(C.AmplitudeDampingChannel(1).on(0))
-    assert np.allclose(sim.get_qs(), np.array([0, 0, 1, 0]))
+    assert np.allclose(sim.get_qs(), _expected_qs(backend, np.array([0, 0, 1, 0])))
     sim2 = Simulator(backend, 2)
     sim2.apply_gate(X.on(0))
     sim2.apply_gate(X.on(1))
     sim2.apply_gate(C.PhaseDampingChannel(0.5).on(0))
-    assert np.allclose(sim2.get_qs(), np.array([0, 0, 0, 1]))
+    assert np.allclose(sim2.get_qs(), _expected_qs(backend, np.array([0, 0, 0, 1])))
 
 
 @pytest.mark.level0
@@ -111,4 +119,4 @@ def test_kraus_channel(backend):
     sim.apply_gate(X.on(0))
     sim.apply_gate(X.on(1))
     sim.apply_gate(kraus.on(0))
-    assert np.allclose(sim.get_qs(), np.array([0, 0, 1, 0]))
+    assert np.allclose(sim.get_qs(), _expected_qs(backend, np.array([0, 0, 1, 0])))
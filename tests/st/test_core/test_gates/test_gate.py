@@ -261,3 +261,30 @@ def test_fsim():
         ]
     )
     assert np.allclose(fsim.matrix({'a': 1.0}), m_exp)
+
+
+def test_measure_result():
+    """
+    Description: Test counting and selecting keys of measure result with more than 64 keys.
+    Expectation: success.
+    """
+    np.random.seed(42)
+    samples = np.random.randint(0, 2, size=(100, 70))
+    res = G.MeasureResult()
+    res.add_measure([G.Measure(f'q{i}').on(i) for i in range(70)])
+    res.collect_data(samples)
+    assert res.shots == 100
+    assert np.all(res.samples == samples)
+    assert res.samples is res.samples
+    assert sum(res.data.values()) == 100
+    assert ''.join(str(i) for i in samples[0][::-1]) in res.data
+    new_res = res.select_keys('q69', 'q0')
+    assert np.all(new_res.samples == samples[:, [69, 0]])
+    assert new_res.keys == ['q69', 'q0']
+    for key, val in new_res.data.items():
+        assert val == np.sum((samples[:, 69] == int(key[1])) & (samples[:, 0] == int(key[0])))
+    assert new_res.samples.dtype == samples.dtype
+    res.samples = samples[:3].astype(np.int32)
+    assert res.shots == 3
+    assert res.samples.dtype == np.int32
+    assert sum(res.data.values()) == 3
@@ -14,7 +14,11 @@
 # ============================================================================
 """Test Hamiltonian."""
 
+import numpy as np
+import pytest
+
 from mindquantum.core.operators import Hamiltonian, QubitOperator
+from mindquantum.core.operators import hamiltonian as hamiltonian_module
 
 
 def test_hamiltonian():
@@ -24,3 +28,90 @@ def test_hamiltonian():
     """
     ham = Hamiltonian(QubitOperator('Z0 Y1', 0.3))
     assert ham.ham_termlist == [(((0, 'Z'), (1, 'Y')), 0.3)]
+    ham = Hamiltonian(QubitOperator('X0 Y1', 0.3) + QubitOperator('Z70', -1.5) + QubitOperator('', 2))
+    assert ham.ham_termlist == [(((0, 'X'), (1, 'Y')), 0.3), (((70, 'Z'),), -1.5), ((), 2.0)]
+    with pytest.raises(ValueError):
+        Hamiltonian(QubitOperator('X0', 'a'))
+
+
+def test_sparse_hamiltonian_cache(tmp_path):
+    """
+    Description: Test that sparse hamiltonians are cached in memory and on disk
+    Expectation: success.
+    """
+    qubit_op = QubitOperator('X0 Y1', 0.3) + QubitOperator('Z1 Z2', -1.5) + QubitOperator('', 2)
+    ham_cpp = Hamiltonian(qubit_op).sparse(3, cache_dir=str(tmp_path)).get_cpp_obj()
+    assert Hamiltonian(qubit_op).sparse(3).get_cpp_obj() is ham_cpp
+    assert Hamiltonian(qubit_op).sparse(4).get_cpp_obj() is not ham_cpp
+    assert len(list(tmp_path.glob('*.npz'))) == 1
+
+    Hamiltonian.clear_sparse_cache()
+    new_ham_cpp = Hamiltonian(qubit_op).sparse(3, cache_dir=str(tmp_path)).get_cpp_obj()
+    assert new_ham_cpp is not ham_cpp
+    for new_array, array in zip(new_ham_cpp.sparse_arrays(), ham_cpp.sparse_arrays()):
+        assert np.allclose(new_array, array)
+
+
+def test_sparse_hamiltonian_cache_size():
+    """
+    Description: Test the size of the in-memory cache of sparse hamiltonians
+    Expectation: success.
+    """
+    qubit_ops = [QubitOperator(f'X0 Z{i}', 0.5) for i in range(1, 4)]
+    Hamiltonian.clear_sparse_cache()
+    try:
+        Hamiltonian.set_sparse_cache_size(2)
+        ham_cpps = [Hamiltonian(qubit_op).sparse(4).get_cpp_obj() for qubit_op in qubit_ops]
+        assert Hamiltonian(qubit_ops[2]).sparse(4).get_cpp_obj() is ham_cpps[2]
+        assert Hamiltonian(qubit_ops[0]).sparse(4).get_cpp_obj() is not ham_cpps[0]
+        Hamiltonian.set_sparse_cache_size(0)
+        assert Hamiltonian(qubit_ops[2]).sparse(4).get_cpp_obj() is not ham_cpps[2]
+        with pytest.raises(ValueError):
+            Hamiltonian.set_sparse_cache_size(-1)
+    finally:
+        Hamiltonian.set_sparse_cache_size(8)
+
+
+def test_sparse_hamiltonian_cache_write_failure(tmp_path, monkeypatch):
+    """
+    Description: Test that a sparse hamiltonian that can not be stored is still returned, without temporary file
+    Expectation: success.
+    """
+
+    def fail_savez(*_args, **_kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(hamiltonian_module.np, 'savez', fail_savez)
+    qubit_op = QubitOperator('Y0 Y1', 0.7)
+    Hamiltonian.clear_sparse_cache()
+    with pytest.warns(UserWarning):
+        ham_cpp = Hamiltonian(qubit_op).sparse(2, cache_dir=str(tmp_path)).get_cpp_obj()
+    assert not list(tmp_path.iterdir())
+    Hamiltonian.clear_sparse_cache()
+    expected_cpp = Hamiltonian(qubit_op).sparse(2).get_cpp_obj()
+    assert expected_cpp is not ham_cpp
+    for array, expected in zip(ham_cpp.sparse_arrays(), expected_cpp.sparse_arrays()):
+        assert np.allclose(array, expected)
+
+
+def test_sparse_hamiltonian_cache_corrupt(tmp_path):
+    """
+    Description: Test that a corrupt sparse hamiltonian cache file is rebuilt
+    Expectation: success.
+    """
+    qubit_op = QubitOperator('X0 Y1', 0.3) + QubitOperator('Z1', -1.5)
+    Hamiltonian.clear_sparse_cache()
+    ham_cpp = Hamiltonian(qubit_op).sparse(2, cache_dir=str(tmp_path)).get_cpp_obj()
+    (path,) = tmp_path.glob('*.npz')
+    data, indices, indptr = ham_cpp.sparse_arrays()
+    unsorted_indptr = indptr.copy()
+    unsorted_indptr[1] = indptr[-1]
+    for bad_indices, bad_indptr in [(indices + 4, indptr), (indices, unsorted_indptr)]:
+        np.savez(path, data=data, indices=bad_indices, indptr=bad_indptr)
+        Hamiltonian.clear_sparse_cache()
+        with pytest.warns(UserWarning):
+            new_ham_cpp = Hamiltonian(qubit_op).sparse(2, cache_dir=str(tmp_path)).get_cpp_obj()
+        for new_array, array in zip(new_ham_cpp.sparse_arrays(), (data, indices, indptr)):
+            assert np.allclose(new_array, array)
+        with np.load(path) as sparse_arrays:
+            assert np.allclose(sparse_arrays['indices'], indices)
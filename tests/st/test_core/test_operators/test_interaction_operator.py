@@ -0,0 +1,57 @@
+# Copyright 2022 Huawei Technologies Co., Ltd
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Test InteractionOperator."""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from mindquantum.core.operators import InteractionOperator
+
+
+def _symmetric_images(quad, complex_valued):
+    p, q, r, s = quad  # pylint: disable=invalid-name
+    images = [(p, q, r, s), (q, p, s, r), (s, r, q, p), (r, s, p, q)]
+    if not complex_valued:
+        images += [(p, s, r, q), (q, r, s, p), (s, p, q, r), (r, q, p, s)]
+    return images
+
+
+@pytest.mark.parametrize('complex_valued', [False, True])
+def test_unique_iter(complex_valued):
+    """
+    Description: Test unique_iter of InteractionOperator
+    Expectation: every symmetry group of non-zero terms is iterated once by its first term
+    """
+    n_qubits = 4
+    rng = np.random.default_rng(42)
+    one_body = rng.normal(size=(n_qubits,) * 2) * (rng.random((n_qubits,) * 2) < 0.5)
+    two_body = rng.normal(size=(n_qubits,) * 4) * (rng.random((n_qubits,) * 4) < 0.3)
+    inter_op = InteractionOperator(1.0, one_body, two_body)
+
+    expected = [()]
+    expected += [((p, 1), (q, 0)) for p in range(n_qubits) for q in range(p + 1) if one_body[p, q]]
+    seen = set()
+    for quad in itertools.product(range(n_qubits), repeat=4):
+        if two_body[quad] and quad not in seen:
+            seen |= set(_symmetric_images(quad, complex_valued))
+            expected.append(tuple(zip(quad, (1, 1, 0, 0))))
+    assert list(inter_op.unique_iter(complex_valued)) == expected
+
+    one_body_indices, two_body_indices = inter_op.unique_indices(complex_valued)
+    n_one_body = len(one_body_indices)
+    assert [((p, 1), (q, 0)) for p, q in one_body_indices.tolist()] == expected[1 : 1 + n_one_body]
+    assert [tuple(zip(quad, (1, 1, 0, 0))) for quad in two_body_indices.tolist()] == expected[1 + n_one_body :]
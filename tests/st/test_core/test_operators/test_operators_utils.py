@@ -56,6 +56,11 @@ def test_commutator():
 
     assert commutator(qub_op1, qub_op1) == QubitOperator()
 
+    qub_op4 = QubitOperator("X0 Y70", 'a') + QubitOperator("Z0 Z70 X130", 1.5) + QubitOperator("Y3", 2j)
+    qub_op5 = QubitOperator("Y0 Y70 Z130", 0.5) + QubitOperator("X3 Z70", 0.7) + QubitOperator("Z0 Y3", -1)
+    diff = commutator(qub_op4, qub_op5) - (qub_op4 * qub_op5 - qub_op5 * qub_op4)
+    assert diff.compress() == QubitOperator()
+
     qubit_exc_op1 = QubitExcitationOperator(((4, TermValue.adg), (1, TermValue.a)), 2.0j)
     qubit_exc_op2 = QubitExcitationOperator(((3, TermValue.adg), (2, TermValue.a)), 2.0j)
     qubit_exc_op3 = QubitExcitationOperator("3^ 2 4^ 1", 4.0) + QubitExcitationOperator("4^ 1 3^ 2", -4.0)
@@ -18,6 +18,7 @@
 
 import os
 
+import numpy as np
 import pytest
 
 from mindquantum.core import ParameterResolver
@@ -192,6 +193,61 @@ def test_qubit_ops_dumps_and_loads():
     assert obj == ops
 
 
+def test_qubit_ops_arrays():
+    """
+    Description: Test qubit operator export to arrays and construction from arrays
+    Expectation: success.
+    """
+    ops = QubitOperator('X0 Y3', 1.2) + QubitOperator('Z70', 2j) + QubitOperator('', 0.5)
+    indices, paulis, coeffs, offsets = ops.to_arrays()
+    assert np.all(indices == [0, 3, 70])
+    assert np.all(paulis == [1, 2, 3])
+    assert np.allclose(coeffs, [1.2, 2j, 0.5])
+    assert np.all(offsets == [0, 2, 3, 3])
+    assert QubitOperator.from_arrays(indices, paulis, coeffs, offsets) == ops
+
+    # Unsorted local operators acting on the same qubit, identities and duplicated terms
+    new_ops = QubitOperator.from_arrays([3, 0, 0, 0, 70, 2], [1, 2, 3, 1, 3, 0], [1, 2, 3j, 4], [0, 2, 2, 5, 6])
+    assert (new_ops - QubitOperator('Y0 X3') - QubitOperator('Y0 Z70', -3) - 6).compress() == QubitOperator()
+
+    with pytest.raises(ValueError):
+        QubitOperator('X0', 'a').to_arrays()
+    with pytest.raises(ValueError):
+        QubitOperator.from_arrays([0], [4], [1.0], [0, 1])
+    with pytest.raises(ValueError):
+        QubitOperator.from_arrays([0], [1], [1.0], [0, 2])
+
+
+def test_qubit_ops_matrix():
+    """
+    Description: Test the sparse matrix of qubit operator
+    Expectation: success.
+    """
+    x_mat = np.array([[0, 1], [1, 0]])
+    y_mat = np.array([[0, -1j], [1j, 0]])
+    z_mat = np.array([[1, 0], [0, -1]])
+    ops = QubitOperator('X0 Y2', 0.3) + QubitOperator('Y0 X2', 1j) + QubitOperator('Z1', -0.7) + QubitOperator('', 2)
+    expected = (
+        0.3 * np.kron(y_mat, np.kron(np.eye(2), x_mat))
+        + 1j * np.kron(x_mat, np.kron(np.eye(2), y_mat))
+        - 0.7 * np.kron(np.eye(2), np.kron(z_mat, np.eye(2)))
+        + 2 * np.eye(8)
+    )
+    matrix = ops.matrix()
+    assert matrix.dtype == np.complex128
+    assert matrix.has_sorted_indices
+    assert np.allclose(matrix.toarray(), expected)
+    matrix = ops.matrix(4, dtype=np.complex64)
+    assert matrix.dtype == np.complex64
+    assert np.allclose(matrix.toarray(), np.kron(np.eye(2), expected))
+
+    # X0 X1 + Y0 Y1 cancels out on |00> and |11>
+    assert (QubitOperator('X0 X1') + QubitOperator('Y0 Y1')).matrix().nnz == 2
+    with pytest.raises(ValueError):
+        QubitOperator('X3').matrix(2)
+    assert np.allclose(QubitOperator('', 2).matrix().toarray(), 2 * np.eye(2))
+
+
 @pytest.mark.skipif(not _HAS_OPENFERMION, reason='OpenFermion is not installed')
 @pytest.mark.skipif(not _FORCE_TEST, reason='set not force test')
 def test_qubit_ops_trans():
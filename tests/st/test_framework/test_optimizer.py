@@ -0,0 +1,76 @@
+# Copyright 2022 Huawei Technologies Co., Ltd
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Test quantum optimizer."""
+
+import numpy as np
+import pytest
+
+_HAS_MINDSPORE = True
+try:
+    import mindspore as ms
+
+    from mindquantum.core.circuit import Circuit, qfi
+    from mindquantum.core.operators import Hamiltonian, QubitOperator
+    from mindquantum.framework import MQAnsatzOnlyLayer, QuantumNaturalGradient
+    from mindquantum.simulator import Simulator, get_supported_simulator
+
+    ms.context.set_context(mode=ms.context.PYNATIVE_MODE, device_target="CPU")
+except ImportError:
+    _HAS_MINDSPORE = False
+
+    def get_supported_simulator():
+        """Dummy function."""
+        return []
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize('backend', [i for i in get_supported_simulator() if i != 'projectq'])
+@pytest.mark.skipif(not _HAS_MINDSPORE, reason='MindSpore is not installed')
+def test_quantum_natural_gradient(backend):
+    """
+    Description: Test QuantumNaturalGradient against the natural gradient solved from qfi.
+    Expectation: success.
+    """
+    circ = Circuit().ry('a', 0).x(1, 0).rx('b', 1).ry('c', 0)
+    ham = Hamiltonian(QubitOperator('Z0 Z1') + QubitOperator('X0', 0.5))
+    sim = Simulator(backend, circ.n_qubits)
+    grad_ops = sim.get_expectation_with_grad(ham, circ)
+    init = np.array([0.3, -0.8, 1.1]).astype(np.float32)
+    net = MQAnsatzOnlyLayer(grad_ops, ms.Tensor(init))
+    if backend == 'mqmatrix':
+        # The density matrix simulator has no derivative states to calculate the metric.
+        with pytest.raises(ValueError):
+            QuantumNaturalGradient(net.trainable_params(), grad_ops)
+        return
+    with pytest.raises(ValueError):
+        QuantumNaturalGradient(net.trainable_params(), grad_ops, regularization=0)
+    opti = QuantumNaturalGradient(net.trainable_params(), grad_ops, learning_rate=0.2, refresh_period=2)
+    train_net = ms.nn.TrainOneStepCell(net, opti)
+
+    weight = init.astype(np.float64)
+    for step in range(3):
+        if step % 2 == 0:
+            metric = qfi(circ, backend=backend)(weight) / 4 + 1e-3 * np.eye(3)
+        grad = np.real(grad_ops(weight)[1][0, 0])
+        weight = weight - 0.2 * np.linalg.solve(metric, grad)
+        train_net()
+        assert np.allclose(net.weight.asnumpy(), weight, atol=1e-5)
+
+    enc_grad_ops = sim.get_expectation_with_grad(ham, Circuit().rx('e', 0).as_encoder() + circ)
+    with pytest.raises(ValueError):
+        QuantumNaturalGradient(net.trainable_params(), enc_grad_ops)
@@ -30,7 +30,7 @@ def test_measure_svg():
     res = sim.sampling(circ, shots=100, seed=42)
     text = res.svg()._repr_svg_().split('bar')  # pylint: disable=protected-access
     text = "bar".join([text[0]] + ['"'.join(i.split('"')[1:]) for i in text[1:]])
-    len_text_exp = 9426
+    len_text_exp = 9622
     assert len(text) == len_text_exp
 
 
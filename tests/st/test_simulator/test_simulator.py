@@ -16,6 +16,9 @@
 # pylint: disable=invalid-name
 """Test simulator."""
 
+import os
+import sys
+
 import numpy as np
 import pytest
 from scipy.sparse import csr_matrix
@@ -23,7 +26,7 @@ from scipy.sparse import csr_matrix
 import mindquantum.core.operators as ops
 from mindquantum.algorithm.library import qft
 from mindquantum.core import gates as G
-from mindquantum.core.circuit import UN, Circuit
+from mindquantum.core.circuit import UN, Circuit, qfi
 from mindquantum.core.operators import Hamiltonian, QubitOperator
 from mindquantum.core.parameterresolver import ParameterResolver as PR
 from mindquantum.simulator import Simulator, get_supported_simulator, inner_product
@@ -56,7 +59,7 @@ except ImportError:
 @pytest.mark.platform_x86_gpu_training
 @pytest.mark.platform_x86_cpu
 @pytest.mark.env_onecard
-@pytest.mark.parametrize("virtual_qc", get_supported_simulator())
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'mqmatrix'])
 def test_init_reset(virtual_qc):
     """
     test
@@ -78,7 +81,7 @@ def test_init_reset(virtual_qc):
 @pytest.mark.platform_x86_gpu_training
 @pytest.mark.platform_x86_cpu
 @pytest.mark.env_onecard
-@pytest.mark.parametrize("virtual_qc", get_supported_simulator())
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'mqmatrix'])
 def test_apply_circuit_and_hermitian(virtual_qc):
     """
     test
@@ -119,7 +122,7 @@ def test_apply_circuit_and_hermitian(virtual_qc):
 @pytest.mark.platform_x86_gpu_training
 @pytest.mark.platform_x86_cpu
 @pytest.mark.env_onecard
-@pytest.mark.parametrize("virtual_qc", get_supported_simulator())
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'mqmatrix'])
 def test_set_and_get(virtual_qc):
     """
     test
@@ -138,7 +141,7 @@ def test_set_and_get(virtual_qc):
 @pytest.mark.platform_x86_gpu_training
 @pytest.mark.platform_x86_cpu
 @pytest.mark.env_onecard
-@pytest.mark.parametrize("virtual_qc", get_supported_simulator())
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'mqmatrix'])
 def test_non_hermitian_grad_ops1(virtual_qc):
     """
     test
@@ -200,7 +203,7 @@ def generate_test_circuit():
 @pytest.mark.platform_x86_gpu_training
 @pytest.mark.platform_x86_cpu
 @pytest.mark.env_onecard
-@pytest.mark.parametrize("virtual_qc", get_supported_simulator())
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'mqmatrix'])
 @pytest.mark.skipif(not _HAS_NUMBA, reason='Numba is not installed')
 def test_all_gate_with_simulator(virtual_qc):  # pylint: disable=too-many-locals
     """
@@ -242,7 +245,7 @@ def test_all_gate_with_simulator(virtual_qc):  # pylint: disable=too-many-locals
 @pytest.mark.platform_x86_gpu_training
 @pytest.mark.platform_x86_cpu
 @pytest.mark.env_onecard
-@pytest.mark.parametrize("virtual_qc", get_supported_simulator())
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'mqmatrix'])
 @pytest.mark.skipif(not _HAS_MINDSPORE, reason='MindSpore is not installed')
 @pytest.mark.skipif(not _HAS_NUMBA, reason='Numba is not installed')
 def test_optimization_with_custom_gate(virtual_qc):  # pylint: disable=too-many-locals
@@ -289,7 +292,7 @@ def test_optimization_with_custom_gate(virtual_qc):  # pylint: disable=too-many-
 @pytest.mark.platform_x86_gpu_training
 @pytest.mark.platform_x86_cpu
 @pytest.mark.env_onecard
-@pytest.mark.parametrize("virtual_qc", get_supported_simulator())
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'mqmatrix'])
 def test_fid(virtual_qc):
     """
     Description:
@@ -310,7 +313,7 @@ def test_fid(virtual_qc):
 @pytest.mark.platform_x86_gpu_training
 @pytest.mark.platform_x86_cpu
 @pytest.mark.env_onecard
-@pytest.mark.parametrize("virtual_qc", get_supported_simulator())
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'mqmatrix'])
 def test_non_hermitian_grad_ops2(virtual_qc):
     """
     Description: test non hermitian grad ops
@@ -331,7 +334,7 @@ def test_non_hermitian_grad_ops2(virtual_qc):
 @pytest.mark.platform_x86_gpu_training
 @pytest.mark.platform_x86_cpu
 @pytest.mark.env_onecard
-@pytest.mark.parametrize("virtual_qc", get_supported_simulator())
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'mqmatrix'])
 def test_inner_product(virtual_qc):
     """
     Description: test inner product of two simulator
@@ -350,7 +353,7 @@ def test_inner_product(virtual_qc):
 @pytest.mark.platform_x86_gpu_training
 @pytest.mark.platform_x86_cpu
 @pytest.mark.env_onecard
-@pytest.mark.parametrize("virtual_qc", get_supported_simulator())
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'mqmatrix'])
 def test_copy(virtual_qc):
     """
     Description: test copy a simulator
@@ -371,7 +374,7 @@ def test_copy(virtual_qc):
 @pytest.mark.platform_x86_gpu_training
 @pytest.mark.platform_x86_cpu
 @pytest.mark.env_onecard
-@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'projectq'])
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i not in ('projectq', 'mqmatrix')])
 def test_multi_params_gate(virtual_qc):
     """
     Description: test multi params gate
@@ -429,3 +432,584 @@ def test_custom_gate_in_parallel(virtual_qc):
     g_sum_exp = 0.06041889360878677
     assert np.allclose(np.sum(f), f_sum_exp)
     assert np.allclose(np.sum(g), g_sum_exp)
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i not in ('projectq', 'mqmatrix')])
+def test_sampling_mid_circuit_measure(virtual_qc):
+    """
+    Description: test sampling circuit with measurement gate and noise channel in the middle.
+    Expectation: success.
+    """
+    circ = Circuit().h(0).measure('a', 0).x(1, 0).h(0)
+    circ += G.AmplitudeDampingChannel(0.3).on(1)
+    circ.measure('b', 0).measure('c', 1)
+    sim = Simulator(virtual_qc, circ.n_qubits)
+    shots = 20000
+    res = sim.sampling(circ, shots=shots, seed=42)
+    assert res.samples.shape == (shots, 3)
+    freq = {key: val / shots for key, val in res.data.items()}
+    freq_exp = {'000': 0.25, '010': 0.25, '001': 0.075, '011': 0.075, '101': 0.175, '111': 0.175}
+    assert set(freq) == set(freq_exp)
+    for key, val in freq_exp.items():
+        assert np.allclose(freq[key], val, atol=0.02)
+    assert np.allclose(sim.get_qs(), np.array([1, 0, 0, 0]))
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i not in ('projectq', 'mqmatrix')])
+def test_sampling_measure_ending(virtual_qc):
+    """
+    Description: test sampling circuit with all measurement gates at the end from the marginal distribution.
+    Expectation: success.
+    """
+
+    class SamplingSpy:  # pylint: disable=too-few-public-methods
+        """Record the sampling method that the backend calls."""
+
+        def __init__(self, cpp_sim):
+            self.cpp_sim = cpp_sim
+            self.calls = []
+
+        def __getattr__(self, name):
+            if name.startswith('sampling'):
+                self.calls.append(name)
+            return getattr(self.cpp_sim, name)
+
+    circ = Circuit().ry(np.pi / 3, 0).x(2, 0).h(1).rx(np.pi / 2, 3)
+    circ.measure('b', 2).measure('a', 0).measure('c', 3)
+    assert circ.is_measure_end
+    sim = Simulator(virtual_qc, circ.n_qubits)
+    spy = SamplingSpy(sim.backend.sim)
+    sim.backend.sim = spy
+    shots = 20000
+    res = sim.sampling(circ, shots=shots, seed=42)
+    assert spy.calls == ['sampling_measure_ending_without_noise']
+    assert res.samples.shape == (shots, 3)
+    assert np.all(res.samples[:, 0] == res.samples[:, 1])
+    assert np.allclose(np.mean(res.samples, axis=0), [0.25, 0.25, 0.5], atol=0.02)
+    assert np.allclose(sim.get_qs(), np.eye(16)[0])
+    circ = Circuit().ry(np.pi / 3, 0).measure('a', 0).measure('b', 0)
+    assert not circ.is_measure_end
+    res = sim.sampling(circ, shots=shots, seed=42)
+    assert spy.calls[-1] == 'sampling'
+    assert np.all(res.samples[:, 0] == res.samples[:, 1])
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i not in ('projectq', 'mqmatrix')])
+@pytest.mark.parametrize("fusion", [True, 1, 2])
+def test_gate_fusion(virtual_qc, fusion):
+    """
+    Description: test applying circuit with adjacent gates fused.
+    Expectation: success.
+    """
+    circ = UN(G.H, 3)
+    circ.rx('a', 0).ry('b', 1).rz(0.3, 2).x(1, 0).x(2, 1)
+    circ += G.CNOT.on(0, 2)
+    circ += G.SWAP([0, 2], 1)
+    circ += G.ISWAP([0, 1]).hermitian()
+    circ += G.XX('c').on([1, 2])
+    circ += G.U3('a', 0.2, 'b').on(2, 0)
+    circ += G.UnivMathGate('fake_YY', G.YY(1.2).matrix()).on([2, 0])
+    circ.s(0)
+    circ += G.T.on(1)
+    circ += G.PhaseShift('c').on(1, [0])
+    pr = PR({'a': 1.2, 'b': 2.3, 'c': 3.4})
+    sim = Simulator(virtual_qc, circ.n_qubits)
+    sim_fused = Simulator(virtual_qc, circ.n_qubits, fusion=fusion)
+    assert np.allclose(sim.backend.get_circuit_matrix(circ, pr), sim_fused.backend.get_circuit_matrix(circ, pr))
+    sim.apply_circuit(circ, pr)
+    sim_fused.apply_circuit(circ, pr)
+    assert np.allclose(sim.get_qs(), sim_fused.get_qs())
+    assert len(circ.get_fused_cpp_obj(2)) < len(circ.get_cpp_obj())
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i not in ('projectq', 'mqmatrix')])
+def test_batch_evaluation(virtual_qc):
+    """
+    Description: test getting expectation and quantum state for a batch of parameters.
+    Expectation: success.
+    """
+    circ = Circuit().ry('a', 0).rx('b', 1).x(1, 0).rz('a', 1)
+    hams = [Hamiltonian(QubitOperator('Z0')), Hamiltonian(QubitOperator('X0 Y1', 0.5))]
+    np.random.seed(42)
+    params = np.random.uniform(-np.pi, np.pi, size=(7, 2))
+    sim = Simulator(virtual_qc, circ.n_qubits)
+    sim.apply_gate(G.H.on(1))
+    init_qs = sim.get_qs()
+    f = sim.get_expectation_batch(circ, hams, params, parallel_worker=3)
+    qs = sim.get_qs_batch(circ, params, parallel_worker=3)
+    assert f.shape == (7, 2)
+    assert qs.shape == (7, 4)
+    assert np.allclose(sim.get_qs(), init_qs)
+    for i, param in enumerate(params):
+        sim_ref = sim.copy()
+        sim_ref.apply_circuit(circ, param)
+        assert np.allclose(qs[i], sim_ref.get_qs())
+        assert np.allclose(f[i], [sim_ref.get_expectation(ham) for ham in hams])
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'mqmatrix'])
+def test_get_set_qs_without_copy(virtual_qc):
+    """
+    Description: test getting quantum state without copy and setting normalized quantum state.
+    Expectation: success.
+    """
+    sim = Simulator(virtual_qc, 2)
+    sim.apply_circuit(Circuit().h(0).x(1, 0))
+    view = sim.get_qs(copy=False)
+    assert np.allclose(view, sim.get_qs())
+    if virtual_qc == 'mqvector':
+        assert not view.flags.writeable
+        with pytest.raises(ValueError):
+            view[0] = 0
+    qs = np.array([1, 1j, -1, 0]) / np.sqrt(3)
+    sim.set_qs(qs, normalize=False)
+    assert np.allclose(sim.get_qs(), qs)
+    sim.set_qs(qs * 2)
+    assert np.allclose(sim.get_qs(), qs)
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+def test_qs_view_across_apply_hamiltonian():
+    """
+    Description: test that a view of quantum state stays valid when the simulator applies hamiltonians.
+    Expectation: the view always shows the current quantum state.
+    """
+    sim = Simulator('mqvector', 3)
+    sim.apply_circuit(Circuit().h(0).x(1, 0).ry(0.3, 2))
+    view = sim.get_qs(copy=False)
+    ham = QubitOperator('X0 Y1') + QubitOperator('Z2', 0.5)
+    for h_tmp in [Hamiltonian(ham), Hamiltonian(ham).sparse(3)]:
+        for _ in range(3):
+            sim.apply_hamiltonian(h_tmp)
+            assert np.allclose(view, sim.get_qs())
+    sim.set_qs(np.array([1, 0, 0, 0, 0, 0, 0, 1j]))
+    assert np.allclose(view, sim.get_qs())
+    sim.reset()
+    assert np.allclose(view, sim.get_qs())
+    del view
+    qs = sim.get_qs()
+    for h_tmp in [Hamiltonian(ham), Hamiltonian(ham).sparse(3)]:
+        sim.apply_hamiltonian(h_tmp)
+        qs = ham.matrix(3) @ qs
+        assert np.allclose(sim.get_qs(), qs)
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'mqmatrix'])
+def test_get_expectation_of_pauli_terms(virtual_qc):
+    """
+    Description: test expectation of hamiltonian with both diagonal and off-diagonal pauli terms.
+    Expectation: success.
+    """
+    ops_str = ['', 'Z0', 'Z0 Z2', 'Z1 Z2', 'X0 Y2', 'Y1', 'X0 X1 Z2', 'Y0 Z1 Y2']
+    ham = QubitOperator()
+    for idx, term in enumerate(ops_str):
+        ham += QubitOperator(term, 0.3 * idx - 0.8)
+    np.random.seed(42)
+    state = np.random.normal(size=8) + 1j * np.random.normal(size=8)
+    state /= np.linalg.norm(state)
+    sim = Simulator(virtual_qc, 3)
+    sim.set_qs(state)
+    expect = np.vdot(state, ham.matrix(3).toarray() @ state)
+    assert np.allclose(sim.get_expectation(Hamiltonian(ham)), expect)
+    sim.apply_hamiltonian(Hamiltonian(ham))
+    assert np.allclose(sim.get_qs(), ham.matrix(3).toarray() @ state)
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.skipif(sys.platform == 'win32', reason="Memory mapped quantum state is not supported on windows.")
+def test_mmap_storage(tmp_path):
+    """
+    Description: test quantum state stored in memory mapped file, checkpoint and restore.
+    Expectation: success.
+    """
+    circ = Circuit().h(0).rx(0.3, 1).x(2, 0).ry(1.2, 1)
+    sim = Simulator('mqvector', 3)
+    sim.apply_circuit(circ)
+    sim_mmap = Simulator('mqvector', 3, storage='mmap', path=str(tmp_path / 'state.bin'))
+    sim_mmap.apply_circuit(circ)
+    assert np.allclose(sim_mmap.get_qs(), sim.get_qs())
+    sim_mmap.checkpoint(str(tmp_path / 'ckpt.bin'))
+    ckpt = (tmp_path / 'ckpt.bin').read_bytes()
+    sim_mmap.apply_circuit(circ)
+    sim_restore = Simulator(
+        'mqvector', 3, storage='mmap', path=str(tmp_path / 'restored.bin'), restore=str(tmp_path / 'ckpt.bin')
+    )
+    assert np.allclose(sim_restore.get_qs(), sim.get_qs())
+    sim_restore.apply_circuit(circ)
+    sim.apply_circuit(circ)
+    assert np.allclose(sim_restore.get_qs(), sim.get_qs())
+    assert (tmp_path / 'ckpt.bin').read_bytes() == ckpt
+    with pytest.raises(ValueError):
+        Simulator('mqvector', 4, storage='mmap', path=str(tmp_path / 'other.bin'), restore=str(tmp_path / 'ckpt.bin'))
+    with pytest.raises(ValueError):
+        Simulator('mqvector', 3, storage='mmap', path=str(tmp_path / 'ckpt.bin'), restore=str(tmp_path / 'ckpt.bin'))
+    with pytest.raises(ValueError):
+        sim.checkpoint(str(tmp_path / 'other.bin'))
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'projectq'])
+def test_expectation_with_grad_vjp(virtual_qc):
+    """
+    Description: test vector-Jacobian product of gradient operator against contraction of full Jacobian.
+    Expectation: success.
+    """
+    enc = Circuit().rx('a', 0).ry('b', 1).as_encoder()
+    ans = Circuit().x(1, 0).rx('c', 1).rz('d', 0, 1).ry('c', 0)
+    hams = [
+        Hamiltonian(QubitOperator('Z0')),
+        Hamiltonian(QubitOperator('Z0 Z1', 2) + QubitOperator('X1', 0.5)),
+        Hamiltonian(QubitOperator('Y0', -0.7) + QubitOperator('', 0.3)),
+    ]
+    sim = Simulator(virtual_qc, 2)
+    grad_ops = sim.get_expectation_with_grad(hams, enc + ans)
+    np.random.seed(42)
+    enc_data = np.random.uniform(-2, 2, size=(5, 2))
+    ans_data = np.random.uniform(-2, 2, size=2)
+    dout = np.random.normal(size=(5, 3))
+    f, g_enc, g_ans = grad_ops(enc_data, ans_data)
+    assert np.allclose(grad_ops.expectation(enc_data, ans_data), f)
+    enc_grad, ans_grad = grad_ops.vjp(dout, enc_data, ans_data)
+    assert np.allclose(enc_grad, np.einsum('smp,sm->sp', np.real(g_enc), dout))
+    assert np.allclose(ans_grad, np.einsum('smp,sm->p', np.real(g_ans), dout))
+    ans_ops = sim.get_expectation_with_grad(hams, ans)
+    f, g_ans = ans_ops(ans_data)
+    assert np.allclose(ans_ops.vjp(dout[:1], ans_data), dout[0] @ np.real(g_ans[0]))
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'projectq'])
+def test_expectation_with_grad_forward(virtual_qc):
+    """
+    Description: test forward value followed by vector-Jacobian product, with and without kept gradient.
+    Expectation: success.
+    """
+    enc = Circuit().rx('a', 0).ry('b', 1).as_encoder()
+    ans = Circuit().x(1, 0).rx('c', 1).rz('d', 0, 1).ry('c', 0)
+    hams = [Hamiltonian(QubitOperator('Z0')), Hamiltonian(QubitOperator('X0 Y1', 0.5))]
+    sim = Simulator(virtual_qc, 2)
+    np.random.seed(42)
+    enc_data = np.random.uniform(-2, 2, size=(3, 2))
+    ans_data = np.random.uniform(-2, 2, size=2)
+    dout = np.random.normal(size=(3, 2))
+    for n_hams in [1, 2]:
+        grad_ops = sim.get_expectation_with_grad(hams[:n_hams], enc + ans)
+        n_calls = []
+        origin_grad_ops = grad_ops.grad_ops
+        grad_ops.grad_ops = lambda *args: n_calls.append(1) or origin_grad_ops(*args)
+        f, g_enc, g_ans = origin_grad_ops(enc_data, ans_data)
+        assert np.allclose(grad_ops.forward(enc_data, ans_data), f)
+        enc_grad, ans_grad = grad_ops.vjp(dout[:, :n_hams], enc_data, ans_data)
+        assert np.allclose(enc_grad, np.einsum('smp,sm->sp', np.real(g_enc), dout[:, :n_hams]))
+        assert np.allclose(ans_grad, np.einsum('smp,sm->p', np.real(g_ans), dout[:, :n_hams]))
+        if n_hams == 1:
+            assert len(n_calls) == 1
+        # Kept gradient is only used for the same inputs.
+        grad_ops.forward(enc_data, ans_data)
+        _, g_enc, g_ans = origin_grad_ops(enc_data, ans_data + 0.1)
+        enc_grad, ans_grad = grad_ops.vjp(dout[:, :n_hams], enc_data, ans_data + 0.1)
+        assert np.allclose(enc_grad, np.einsum('smp,sm->sp', np.real(g_enc), dout[:, :n_hams]))
+        assert np.allclose(ans_grad, np.einsum('smp,sm->p', np.real(g_ans), dout[:, :n_hams]))
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'projectq'])
+def test_expectation_with_grad_wrt(virtual_qc):
+    """
+    Description: test gradient operator that only calculates gradient of requested parameters.
+    Expectation: success.
+    """
+    enc = Circuit().rx('a', 0).ry('b', 1).as_encoder()
+    ans = Circuit().x(1, 0).rx('c', 1).rz('d', 0, 1).ry('c', 0)
+    hams = [Hamiltonian(QubitOperator('Z0')), Hamiltonian(QubitOperator('X0 Y1', 0.5))]
+    sim = Simulator(virtual_qc, 2)
+    np.random.seed(42)
+    enc_data = np.random.uniform(-2, 2, size=(3, 2))
+    ans_data = np.random.uniform(-2, 2, size=2)
+    dout = np.random.normal(size=(3, 2))
+    f, g_enc, g_ans = sim.get_expectation_with_grad(hams, enc + ans)(enc_data, ans_data)
+    grad_ops = sim.get_expectation_with_grad(hams, enc + ans, grad_wrt='ansatz')
+    f_a, g_enc_a, g_ans_a = grad_ops(enc_data, ans_data)
+    assert np.allclose(f, f_a)
+    assert g_enc_a.shape == (3, 2, 0)
+    assert np.allclose(g_ans, g_ans_a)
+    enc_grad, ans_grad = grad_ops.vjp(dout, enc_data, ans_data)
+    assert np.allclose(enc_grad, 0)
+    assert np.allclose(ans_grad, np.einsum('smp,sm->p', np.real(g_ans), dout))
+    _, g_enc_p, g_ans_p = sim.get_expectation_with_grad(hams, enc + ans, grad_wrt={'b', 'd'})(enc_data, ans_data)
+    assert np.allclose(g_enc_p, g_enc[:, :, 1:])
+    assert np.allclose(g_ans_p, g_ans[:, :, 1:])
+    with pytest.raises(ValueError):
+        sim.get_expectation_with_grad(hams, enc + ans, grad_wrt='e')
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i not in ('projectq', 'mqmatrix')])
+def test_expectation_with_grad_encoder_cache(virtual_qc):
+    """
+    Description: test gradient operator that reuses the quantum states after encoder.
+    Expectation: success.
+    """
+    enc = Circuit().h(0).rx('a', 0).ry('b', 1).x(1, 0).as_encoder()
+    ans = Circuit().rx('c', 1).rz('d', 0, 1).ry('c', 0)
+    circ = enc + ans + Circuit().rx('a', 1).as_encoder()
+    hams = [Hamiltonian(QubitOperator('Z0')), Hamiltonian(QubitOperator('X0 Y1', 0.5))]
+    sim = Simulator(virtual_qc, 2)
+    sim.apply_circuit(Circuit().ry(0.3, 0).rx(0.7, 1))
+    grad_ops = sim.get_expectation_with_grad(hams, circ)
+    cached_ops = sim.get_expectation_with_grad(hams, circ, encoder_cache_size=1 << 20)
+    np.random.seed(42)
+    enc_data = np.random.uniform(-2, 2, size=(4, 2))
+    enc_data[2] = enc_data[0]
+    dout = np.random.normal(size=(4, 2))
+    for _ in range(2):
+        ans_data = np.random.uniform(-2, 2, size=2)
+        f, g_enc, g_ans = grad_ops(enc_data, ans_data)
+        f_c, g_enc_c, g_ans_c = cached_ops(enc_data, ans_data)
+        assert np.allclose(f, f_c)
+        assert np.allclose(g_enc, g_enc_c)
+        assert np.allclose(g_ans, g_ans_c)
+        assert np.allclose(cached_ops.expectation(enc_data, ans_data), f)
+        enc_grad, ans_grad = cached_ops.vjp(dout, enc_data, ans_data)
+        assert np.allclose(enc_grad, np.einsum('smp,sm->sp', np.real(g_enc), dout))
+        assert np.allclose(ans_grad, np.einsum('smp,sm->p', np.real(g_ans), dout))
+    for change in (
+        lambda: sim.apply_circuit(Circuit().x(0)),
+        lambda: sim.apply_gate(Circuit().ry(0.4, 1)[0]),
+        lambda: sim.apply_hamiltonian(hams[0]),
+        lambda: sim.set_qs(np.array([0.5, 0.5j, -0.5, 0.5])),
+        sim.reset,
+    ):
+        change()
+        assert np.allclose(cached_ops(enc_data, ans_data)[0], grad_ops(enc_data, ans_data)[0])
+    with pytest.raises(ValueError):
+        sim.get_expectation_with_grad(hams, circ, Circuit(), encoder_cache_size=1 << 20)
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'projectq'])
+def test_set_threads_number(virtual_qc):
+    """
+    Description: test gradient calculation with different number of threads in the pool.
+    Expectation: success.
+    """
+    enc = Circuit().rx('a', 0).ry('b', 1).as_encoder()
+    ans = Circuit().x(1, 0).rx('c', 1).rz('d', 0, 1).ry('c', 0)
+    hams = [Hamiltonian(QubitOperator(f'{p}{i % 2}', i + 1)) for i, p in enumerate('XYZXYZXYZ')]
+    sim = Simulator(virtual_qc, 2)
+    grad_ops = sim.get_expectation_with_grad(hams, enc + ans)
+    np.random.seed(42)
+    enc_data = np.random.uniform(-2, 2, size=(7, 2))
+    ans_data = np.random.uniform(-2, 2, size=2)
+    sim.set_threads_number(1)
+    expect = grad_ops(enc_data, ans_data)
+    sim.set_threads_number(4)
+    for res, exp in zip(grad_ops(enc_data, ans_data), expect):
+        assert np.allclose(res, exp)
+    with pytest.raises(ValueError):
+        sim.set_threads_number(0)
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='fork is not available')
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i != 'projectq'])
+def test_thread_pool_after_fork(virtual_qc):
+    """
+    Description: test gradient calculation in a child process forked after the thread pool started its workers.
+    Expectation: the child does not inherit the dead workers and gets the same result.
+    """
+    enc = Circuit().rx('a', 0).ry('b', 1).as_encoder()
+    ans = Circuit().x(1, 0).rx('c', 1).rz('d', 0, 1)
+    ham = Hamiltonian(QubitOperator('Z0'))
+    sim = Simulator(virtual_qc, 2)
+    sim.set_threads_number(4)
+    grad_ops = sim.get_expectation_with_grad(ham, enc + ans, parallel_worker=4)
+    enc_data = np.ones((8, 2))
+    ans_data = np.ones(2)
+    f, _, _ = grad_ops(enc_data, ans_data)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            f_child, _, _ = grad_ops(enc_data, ans_data)
+            sim.set_threads_number(2)
+            f_resized, _, _ = grad_ops(enc_data, ans_data)
+            os._exit(0 if np.allclose(f, f_child) and np.allclose(f, f_resized) else 1)
+        finally:
+            os._exit(1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0 and os.WIFEXITED(status)
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i not in ('projectq', 'mqmatrix')])
+def test_expectation_with_grad_metric(virtual_qc):
+    """
+    Description: test Fubini-Study metric of gradient operator on the quantum state of simulator.
+    Expectation: success.
+    """
+    circ = Circuit().ry('a', 0).x(1, 0).rx('b', 1).rz({'a': 0.5, 'c': 1}, 0)
+    init = Circuit().h(0).ry(0.7, 1)
+    ham = Hamiltonian(QubitOperator('Z0 X1'))
+    sim = Simulator(virtual_qc, 2)
+    sim.apply_circuit(init)
+    grad_ops = sim.get_expectation_with_grad(ham, circ)
+    ans_data = np.array([0.4, -1.2, 0.9])
+    exp = qfi(init + circ, backend=virtual_qc)(ans_data) / 4
+    assert np.allclose(grad_ops.metric(ans_data), exp)
+    blocks = [['a', 'c']]
+    exp = qfi(init + circ, backend=virtual_qc, blocks=blocks)(ans_data) / 4
+    assert np.allclose(grad_ops.metric(ans_data, blocks=blocks), exp)
+    grad_ops.request_metric(blocks)
+    f = grad_ops.forward(ans_data)
+    assert np.allclose(f, grad_ops(ans_data)[0])
+    assert np.allclose(grad_ops.metric(ans_data, blocks=blocks), exp)
+    assert np.allclose(grad_ops.vjp(np.ones_like(f), ans_data), np.real(grad_ops(ans_data)[1][0, 0]))
+    assert np.allclose(sim.get_qs(), init.get_qs())
+    enc_grad_ops = sim.get_expectation_with_grad(ham, Circuit().rx('e', 0).as_encoder() + circ)
+    with pytest.raises(ValueError):
+        enc_grad_ops.metric(np.array([[0.1]]), ans_data)
+
+
+def _noisy_density_matrix(pr):
+    """Density matrix of the noisy circuit used in test_density_matrix_simulator."""
+    gamma, flip = 0.3, 0.2
+    k_damp = [np.array([[1, 0], [0, np.sqrt(1 - gamma)]]), np.array([[0, np.sqrt(gamma)], [0, 0]])]
+    k_flip = [np.sqrt(1 - flip) * np.eye(2), np.sqrt(flip) * G.X.matrix()]
+    circ1 = Circuit().rx('a', 0).ry('b', 1).x(1, 0)
+    circ2 = Circuit().rz('c', 0).ry('a', 1).x(0, 1)
+    mat1 = circ1.matrix(pr)
+    rho = np.outer(mat1[:, 0], mat1[:, 0].conj())
+    rho = sum(np.kron(np.eye(2), k) @ rho @ np.kron(np.eye(2), k).conj().T for k in k_damp)
+    rho = sum(np.kron(k, np.eye(2)) @ rho @ np.kron(k, np.eye(2)).conj().T for k in k_flip)
+    mat2 = circ2.matrix(pr)
+    return mat2 @ rho @ mat2.conj().T
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+def test_density_matrix_simulator():
+    """
+    Description: test expectation and gradient of noisy circuit with density matrix simulator.
+    Expectation: success.
+    """
+    circ = Circuit().rx('a', 0).ry('b', 1).x(1, 0)
+    circ += G.AmplitudeDampingChannel(0.3).on(0)
+    circ += G.BitFlipChannel(0.2).on(1)
+    circ.rz('c', 0).ry('a', 1).x(0, 1)
+    ham = QubitOperator('Z0 X1', 0.7) + QubitOperator('Y0', -0.4) + QubitOperator('Z1')
+    p0 = np.array([0.4, -1.2, 0.9])
+    sim = Simulator('mqmatrix', 2)
+    sim.apply_circuit(circ, dict(zip(circ.params_name, p0)))
+    rho = _noisy_density_matrix(dict(zip(circ.params_name, p0)))
+    assert np.allclose(sim.get_qs(), rho)
+    assert np.allclose(sim.get_expectation(Hamiltonian(ham)), np.trace(ham.matrix(2).toarray() @ rho))
+
+    sim.reset()
+    f, g = sim.get_expectation_with_grad(Hamiltonian(ham), circ)(p0)
+    assert np.allclose(f, np.trace(ham.matrix(2).toarray() @ rho))
+    eps = 1e-6
+    for idx in range(len(p0)):
+        p_p, p_m = p0.copy(), p0.copy()
+        p_p[idx] += eps
+        p_m[idx] -= eps
+        f_p = np.trace(ham.matrix(2).toarray() @ _noisy_density_matrix(dict(zip(circ.params_name, p_p))))
+        f_m = np.trace(ham.matrix(2).toarray() @ _noisy_density_matrix(dict(zip(circ.params_name, p_m))))
+        assert np.allclose(g[0, 0, idx], (f_p - f_m) / 2 / eps, atol=1e-6)
+
+    pure = Circuit().h(0).rx(0.5, 1).x(1, 0)
+    sim.reset()
+    sim.apply_circuit(pure)
+    vec_sim = Simulator('mqvector', 2)
+    vec_sim.apply_circuit(pure)
+    assert np.allclose(sim.get_qs(), np.outer(vec_sim.get_qs(), vec_sim.get_qs().conj()))
+    with pytest.raises(ValueError):
+        sim.get_qs(ket=True)
+
+
+@pytest.mark.level0
+@pytest.mark.platform_x86_gpu_training
+@pytest.mark.platform_x86_cpu
+@pytest.mark.env_onecard
+@pytest.mark.parametrize("virtual_qc", [i for i in get_supported_simulator() if i not in ('projectq', 'mqmatrix')])
+def test_expectation_trajectories(virtual_qc):
+    """
+    Description: test estimating expectation of noise circuit by averaging over trajectories.
+    Expectation: success.
+    """
+    circ = Circuit().h(0).rx('a', 1).x(2, 0)
+    circ += G.PauliChannel(0.1, 0.05, 0.02).on(1)
+    circ.ry('b', 1)
+    circ += G.AmplitudeDampingChannel(0.3).on(0)
+    circ.x(1, 0)
+    circ += G.PhaseDampingChannel(0.4).on(2)
+    circ.h(2)
+    circ += G.KrausChannel('kraus', [[[1, 0], [0, np.sqrt(0.5)]], [[0, 1j * np.sqrt(0.5)], [0, 0]]]).on(1)
+    hams = [
+        Hamiltonian(QubitOperator('Z0 Z1', 0.7) + QubitOperator('X2', 0.3)),
+        Hamiltonian(QubitOperator('X1', 1.2) + QubitOperator('Y0 Y2', -0.4)),
+    ]
+    pr = {'a': 0.3, 'b': -1.1}
+    dm_sim = Simulator('mqmatrix', 3)
+    dm_sim.apply_circuit(circ, pr)
+    expect = np.array([dm_sim.get_expectation(ham) for ham in hams])
+    sim = Simulator(virtual_qc, 3)
+    mean, std_err = sim.get_expectation_trajectories(circ, hams, 4000, pr, seed=42)
+    assert mean.shape == (2,)
+    assert np.all(np.abs(mean - expect) < 5 * std_err + 1e-8)
+    for parallel_worker in [1, 3, 8, 4000]:
+        mean_p, std_err_p = sim.get_expectation_trajectories(
+            circ, hams, 4000, pr, seed=42, parallel_worker=parallel_worker
+        )
+        assert np.allclose(mean, mean_p)
+        assert np.allclose(std_err, std_err_p)
+    assert np.allclose(sim.get_qs(), np.eye(8)[0])